@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Notification
+from .models import EmailPreference, Notification, OutboundEmail, PendingDigestEvent
 
 
 @admin.register(Notification)
@@ -8,3 +9,33 @@ class NotificationAdmin(admin.ModelAdmin):
 	list_display = ("subject", "recipient_email", "created_at", "read_at")
 	list_filter = ("read_at", "created_at")
 	search_fields = ("subject", "recipient_email", "body")
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+	list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+	list_filter = ("status", "created_at")
+	search_fields = ("subject", "recipients", "last_error")
+	readonly_fields = ("created_at", "sent_at", "last_error")
+	actions = ["reintentar"]
+
+	@admin.action(description="Reintentar ahora (vuelve a la cola)")
+	def reintentar(self, request, queryset):
+		count = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+			status=OutboundEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+		)
+		self.message_user(request, f"{count} emails reencolados.")
+
+
+@admin.register(EmailPreference)
+class EmailPreferenceAdmin(admin.ModelAdmin):
+	list_display = ("user", "admin_delivery", "updated_at")
+	list_filter = ("admin_delivery",)
+	search_fields = ("user__username", "user__email")
+
+
+@admin.register(PendingDigestEvent)
+class PendingDigestEventAdmin(admin.ModelAdmin):
+	list_display = ("subject", "recipient", "category", "created_at", "digested_at")
+	list_filter = ("category", "digested_at")
+	search_fields = ("subject", "recipient__email")
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import realtime
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """Ticket de un solo uso en ``?ticket=``: ``EventSource`` no permite enviar el header
+    Authorization, y así el JWT no queda en la URL (ni en los logs de acceso)."""
+
+    def authenticate(self, request):
+        ticket = request.query_params.get("ticket")
+        if not ticket:
+            return None
+        user_id = realtime.consumir_ticket_stream(ticket)
+        if user_id is None:
+            raise AuthenticationFailed("Ticket de stream inválido o vencido.")
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed("Ticket de stream inválido o vencido.")
+        return user, None
@@ -0,0 +1,129 @@
+"""
+Resumen periódico de avisos administrativos.
+
+Los avisos a administradores (pagos, bajas de empleados, clima) se reparten según
+``EmailPreference.admin_delivery``: los de modo inmediato reciben el email como
+siempre y los de modo resumen sólo suman una fila en ``PendingDigestEvent``. El
+comando ``enviar_resumenes`` arma un único email por administrador con todo lo
+pendiente y lo deja en la bandeja de salida.
+"""
+
+import logging
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPreference, PendingDigestEvent
+from .rendering import render_email
+
+logger = logging.getLogger(__name__)
+
+
+class AdminDigest:
+    """Reparto inmediato/resumen de avisos a administradores y armado del resumen."""
+
+    @staticmethod
+    def default_delivery():
+        return getattr(settings, "EMAIL_ADMIN_DEFAULT_DELIVERY", EmailPreference.DELIVERY_IMMEDIATE)
+
+    @classmethod
+    def split_admins(cls):
+        """Administradores activos con email, separados en ``(inmediatos, resumen)``.
+
+        Devuelve emails para los inmediatos y usuarios para los de resumen; una sola consulta.
+        """
+        default = cls.default_delivery()
+        inmediatos, resumen = [], []
+        admins = (
+            get_user_model()
+            .objects.filter(is_staff=True, is_active=True)
+            .exclude(email="")
+            .exclude(email__isnull=True)
+            .select_related("email_preference")
+            .order_by("id")
+        )
+        for user in admins:
+            preference = getattr(user, "email_preference", None)
+            delivery = preference.admin_delivery if preference else default
+            if delivery == EmailPreference.DELIVERY_DIGEST:
+                resumen.append(user)
+            else:
+                inmediatos.append(user.email)
+        return inmediatos, resumen
+
+    @staticmethod
+    def record(users, category, subject, body):
+        if not users:
+            return []
+        return PendingDigestEvent.objects.bulk_create(
+            PendingDigestEvent(recipient=user, category=category, subject=subject[:255], body=body) for user in users
+        )
+
+    @staticmethod
+    def render(user, events):
+        """Resumen (``emails/resumen_admin``): eventos agrupados por categoría, en orden de llegada."""
+        titulos = dict(PendingDigestEvent.CATEGORY_CHOICES)
+        ordenados = sorted(events, key=lambda event: (event.category, event.created_at, event.pk))
+        grupos = [
+            {
+                "titulo": titulos.get(category, category),
+                "eventos": [
+                    {
+                        "hora": timezone.localtime(event.created_at).strftime("%d/%m %H:%M"),
+                        "subject": event.subject,
+                        "body": event.body.strip(),
+                    }
+                    for event in grupo
+                ],
+            }
+            for category, grupo in groupby(ordenados, key=lambda event: event.category)
+        ]
+        return render_email(
+            "resumen_admin",
+            {
+                "nombre": user.get_full_name() or user.username,
+                "desde": timezone.localtime(events[0].created_at).strftime("%d/%m/%Y %H:%M"),
+                "hasta": timezone.localtime(events[-1].created_at).strftime("%d/%m/%Y %H:%M"),
+                "cantidad": len(events),
+                "grupos": grupos,
+            },
+        )
+
+    @classmethod
+    def send_pending(cls, limit=None):
+        """Encola un resumen por administrador con eventos pendientes y los marca como enviados.
+
+        Todo ocurre en una transacción con ``skip_locked``: dos ejecuciones simultáneas
+        no mandan el mismo evento dos veces.
+        """
+        from .outbox import EmailOutbox
+
+        limit = limit or int(getattr(settings, "EMAIL_DIGEST_MAX_EVENTS", 500))
+        stats = {"resumenes": 0, "eventos": 0}
+        ahora = timezone.now()
+        with transaction.atomic():
+            pendientes = list(
+                PendingDigestEvent.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(digested_at__isnull=True)
+                .select_related("recipient")
+                .order_by("recipient_id", "created_at", "id")[:limit]
+            )
+            for _, events in groupby(pendientes, key=lambda event: event.recipient_id):
+                events = list(events)
+                user = events[0].recipient
+                if not user.email:
+                    continue
+                email = cls.render(user, events)
+                # Los avisos ya quedaron como Notification in-app; sólo falta el email
+                EmailOutbox.enqueue(
+                    email.subject, email.text, [user.email], settings.DEFAULT_FROM_EMAIL, html_message=email.html
+                )
+                PendingDigestEvent.objects.filter(pk__in=[event.pk for event in events]).update(digested_at=ahora)
+                stats["resumenes"] += 1
+                stats["eventos"] += len(events)
+        if stats["resumenes"]:
+            logger.info("Resúmenes encolados: %s (%s eventos)", stats["resumenes"], stats["eventos"])
+        return stats
@@ -0,0 +1,182 @@
+"""
+Datos de ejemplo para cada plantilla de ``templates/emails/``.
+
+Los usan ``preview_email``, ``benchmark_render_emails`` y los tests; las claves
+son exactamente las que ``EmailService`` arma para cada email.
+"""
+
+from decimal import Decimal
+
+CONTEXTOS_DE_EJEMPLO = {
+    "bienvenida_cliente": {
+        "user_name": "Ana Gómez",
+        "username": "ana.gomez",
+        "password": "Temporal123",
+    },
+    "bienvenida_empleado": {
+        "user_name": "Bruno Díaz",
+        "username": "bruno.diaz@eleden.com",
+        "password": "Empleado2024",
+        "profile_url": "http://localhost:5173/login?redirect=profile",
+    },
+    "recuperar_contrasena": {
+        "user_name": "Ana Gómez",
+        "reset_url": "http://localhost:5173/reset-password/abc123",
+    },
+    "confirmacion_servicio": {
+        "user_name": "Ana Gómez",
+        "service_name": "Diseño de jardín",
+        "service_date": "15/11/2026 10:00",
+    },
+    "confirmacion_pago": {
+        "user_name": "Ana Gómez",
+        "reserva_id": 42,
+        "servicio_nombre": "Diseño de jardín",
+        "monto": Decimal("15000.00"),
+        "payment_id": "1234567890",
+        "tipo_pago": "seña",
+        "tipo_pago_texto": "Seña",
+    },
+    "pago_admin": {
+        "reserva_id": 42,
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Diseño de jardín",
+        "monto": Decimal("15000.00"),
+        "payment_id": "1234567890",
+        "fecha_formateada": "15/11/2026",
+        "direccion": "Av. Siempre Viva 742, Posadas",
+        "observaciones": "Tocar timbre del portón lateral.",
+        "tipo_pago": "seña",
+        "tipo_pago_texto": "Seña",
+    },
+    "baja_empleado": {
+        "nombre_empleado": "Bruno Díaz",
+        "email_empleado": "bruno.diaz@eleden.com",
+        "motivo": "Promedio de encuestas por debajo del mínimo",
+        "promedio": "2.35",
+        "evaluaciones_bajas": 4,
+        "timestamp": "2026-10-19 09:30:00",
+    },
+    "alerta_clima": {
+        "reserva_id": 42,
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Mantenimiento de césped",
+        "fecha_texto": "15/11/2026 10:00",
+        "probabilidad": 85,
+        "precipitacion_mm": Decimal("12.5"),
+        "umbral": Decimal("5.0"),
+    },
+    "reprogramacion_cliente": {
+        "reserva_id": 42,
+        "cliente_nombre": "Ana",
+        "servicio_nombre": "Mantenimiento de césped",
+        "nueva_fecha_texto": "17/11/2026 10:00",
+        "direccion": "Av. Siempre Viva 742, Posadas",
+    },
+    "reprogramacion_admin": {
+        "reserva_id": 42,
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Mantenimiento de césped",
+        "nueva_fecha_texto": "17/11/2026 10:00",
+        "direccion": "Av. Siempre Viva 742, Posadas",
+        "dashboard_url": "http://localhost:5173/admin/reservas/42",
+    },
+    "reprogramacion_empleado": {
+        "reserva_id": 42,
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Mantenimiento de césped",
+        "nueva_fecha_texto": "17/11/2026 10:00",
+        "direccion": "Av. Siempre Viva 742, Posadas",
+    },
+    "propuesta_diseno": {
+        "cliente_nombre": "Ana Gómez",
+        "diseno_id": 7,
+        "titulo_diseno": "Jardín de bajo mantenimiento",
+        "descripcion": "Canteros con especies nativas y riego por goteo.",
+        "presupuesto": Decimal("185000.00"),
+        "reserva_id": 42,
+        "servicio_nombre": "Diseño de jardín",
+        "disenador_nombre": "Bruno Díaz",
+        "fecha_texto": "20/11/2026",
+        "productos": [
+            {
+                "nombre": "Lavanda",
+                "cantidad": 12,
+                "precio_unitario": Decimal("2500.00"),
+                "subtotal": Decimal("30000.00"),
+            },
+            {
+                "nombre": "Kit de riego por goteo",
+                "cantidad": 1,
+                "precio_unitario": Decimal("45000.00"),
+                "subtotal": Decimal("45000.00"),
+            },
+        ],
+        "imagenes_count": 3,
+    },
+    "rechazo_diseno": {
+        "disenador_nombre": "Bruno Díaz",
+        "diseno_id": 7,
+        "titulo_diseno": "Jardín de bajo mantenimiento",
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Diseño de jardín",
+        "reserva_id": 42,
+        "feedback_cliente": "Prefiero más color en los canteros.",
+        "presupuesto": Decimal("185000.00"),
+        "cancelar_servicio": False,
+    },
+    "asignacion_trabajo": {
+        "empleado_nombre": "Bruno Díaz",
+        "reserva_id": 42,
+        "cliente_nombre": "Ana Gómez",
+        "servicio_nombre": "Mantenimiento de césped",
+        "rol_texto": "Responsable",
+        "dia_semana": "Domingo",
+        "fecha_formateada": "15/11/2026",
+        "hora_servicio": "10:00",
+        "direccion": "Av. Siempre Viva 742, Posadas",
+        "observaciones": "Llevar bordeadora.",
+    },
+    "solicitud_encuesta": {
+        "cliente_nombre": "Ana Gómez",
+        "reserva_id": 42,
+        "servicio_nombre": "Mantenimiento de césped",
+        "encuesta_titulo": "Encuesta de satisfacción",
+        "survey_url": "http://localhost:5173/servicios/reservas/42#encuesta",
+    },
+    "puntaje_encuesta": {
+        "reserva_id": 42,
+        "servicio_nombre": "Mantenimiento de césped",
+        "fecha_reserva_str": "15/11/2026 10:00",
+        "puntuacion": Decimal("8.50"),
+        "cantidad_items": 5,
+    },
+    "resumen_admin": {
+        "nombre": "Administración",
+        "desde": "19/10/2026 08:00",
+        "hasta": "19/10/2026 09:00",
+        "cantidad": 2,
+        "grupos": [
+            {
+                "titulo": "Pagos recibidos",
+                "eventos": [
+                    {
+                        "hora": "19/10 08:15",
+                        "subject": "Nueva Reserva - Pago de Seña Recibido - Reserva #42",
+                        "body": "Cliente: Ana Gómez\nMonto: $15,000.00",
+                    }
+                ],
+            },
+            {
+                "titulo": "Alertas de clima",
+                "eventos": [
+                    {
+                        "hora": "19/10 08:50",
+                        "subject": "[Clima] Posible lluvia para reserva #43",
+                        "body": "Probabilidad: 85%",
+                    }
+                ],
+            },
+        ],
+    },
+}
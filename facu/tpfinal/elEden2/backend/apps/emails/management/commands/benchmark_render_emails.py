@@ -0,0 +1,62 @@
+"""
+Micro-benchmark del render de emails con los datos de ``apps.emails.ejemplos``:
+    python manage.py benchmark_render_emails --iteraciones 500
+
+Para cada plantilla mide el primer render (compila y cachea las plantillas) y
+después ``--iteraciones`` renders en caliente, que es lo que paga cada request.
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+from apps.emails import rendering
+from apps.emails.ejemplos import CONTEXTOS_DE_EJEMPLO
+
+
+class Command(BaseCommand):
+    help = "Mide el throughput de render_email (texto + HTML) por plantilla."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteraciones", type=int, default=200, help="Renders en caliente por plantilla.")
+        parser.add_argument("plantillas", nargs="*", help="Plantillas a medir (por defecto todas).")
+
+    def _limpiar_caches(self):
+        for engine in engines.all():
+            for loader in getattr(engine, "engine", engine).template_loaders:
+                if hasattr(loader, "reset"):
+                    loader.reset()
+        rendering.fragmentos.cache_clear()
+
+    def handle(self, *args, **options):
+        iteraciones = max(1, options["iteraciones"])
+        plantillas = options["plantillas"] or rendering.plantillas_disponibles()
+        desconocidas = set(plantillas) - set(rendering.plantillas_disponibles())
+        if desconocidas:
+            raise CommandError(f"Plantillas inexistentes: {', '.join(sorted(desconocidas))}")
+
+        self.stdout.write(f"{len(plantillas)} plantillas, {iteraciones} renders en caliente cada una")
+        total_renders, total_segundos = 0, 0.0
+        for nombre in plantillas:
+            contexto = CONTEXTOS_DE_EJEMPLO.get(nombre, {})
+            self._limpiar_caches()
+            inicio = time.perf_counter()
+            rendering.render_email(nombre, contexto)
+            frio = (time.perf_counter() - inicio) * 1000
+
+            tiempos = []
+            for _ in range(iteraciones):
+                inicio = time.perf_counter()
+                rendering.render_email(nombre, contexto)
+                tiempos.append(time.perf_counter() - inicio)
+            tiempos = np.array(tiempos)
+            p50, p95 = np.percentile(tiempos * 1000, [50, 95])
+            total_renders += iteraciones
+            total_segundos += float(tiempos.sum())
+            self.stdout.write(
+                f"{nombre:<24} frío={frio:8.2f} ms  p50={p50:6.3f} ms  p95={p95:6.3f} ms  "
+                f"renders/s={iteraciones / tiempos.sum():9.0f}"
+            )
+        self.stdout.write(f"Total: {total_renders} renders, {total_renders / total_segundos:.0f} renders/s")
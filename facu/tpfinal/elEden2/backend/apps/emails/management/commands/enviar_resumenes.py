@@ -0,0 +1,36 @@
+"""
+Encola el resumen de avisos administrativos de cada administrador en modo resumen.
+Con --loop corre cada EMAIL_DIGEST_INTERVAL_MINUTES (servicio email-digest en docker-compose):
+    python manage.py enviar_resumenes --loop
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.emails.digest import AdminDigest
+
+
+class Command(BaseCommand):
+    help = "Arma un email de resumen por administrador con los avisos pendientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Repite el envío cada --interval minutos.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Minutos entre resúmenes (por defecto EMAIL_DIGEST_INTERVAL_MINUTES).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options.get("interval")
+        if interval is None:
+            interval = float(getattr(settings, "EMAIL_DIGEST_INTERVAL_MINUTES", 60))
+        while True:
+            stats = AdminDigest.send_pending()
+            self.stdout.write(f"Resúmenes: {stats['resumenes']} | eventos: {stats['eventos']}")
+            if not options.get("loop"):
+                return
+            time.sleep(max(1.0, interval * 60))
@@ -0,0 +1,60 @@
+"""
+Muestra cómo queda un email con los datos de ejemplo de ``apps.emails.ejemplos``:
+    python manage.py preview_email --list
+    python manage.py preview_email confirmacion_pago
+    python manage.py preview_email propuesta_diseno --html --output /tmp/propuesta.html
+    python manage.py preview_email pago_admin --contexto datos.json
+
+``--contexto`` es un JSON cuyas claves pisan las del ejemplo.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateDoesNotExist
+
+from apps.emails.ejemplos import CONTEXTOS_DE_EJEMPLO
+from apps.emails.rendering import plantillas_disponibles, render_email
+
+
+class Command(BaseCommand):
+    help = "Renderiza una plantilla de email (texto o HTML) con datos de ejemplo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("plantilla", nargs="?", help="Nombre de la carpeta en templates/emails/.")
+        parser.add_argument("--list", action="store_true", help="Lista las plantillas disponibles.")
+        parser.add_argument("--html", action="store_true", help="Muestra la alternativa HTML en lugar del texto.")
+        parser.add_argument("--output", help="Escribe el resultado en este archivo en lugar de la salida estándar.")
+        parser.add_argument("--contexto", help="Archivo JSON con valores que reemplazan a los de ejemplo.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for nombre in plantillas_disponibles():
+                self.stdout.write(nombre)
+            return
+
+        nombre = options.get("plantilla")
+        if not nombre:
+            raise CommandError("Indicá una plantilla o usá --list.")
+        if nombre not in plantillas_disponibles():
+            raise CommandError(f"No existe la plantilla '{nombre}'. Disponibles: {', '.join(plantillas_disponibles())}")
+
+        contexto = dict(CONTEXTOS_DE_EJEMPLO.get(nombre, {}))
+        if options.get("contexto"):
+            try:
+                contexto.update(json.loads(Path(options["contexto"]).read_text(encoding="utf-8")))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"No se pudo leer el contexto: {exc}") from exc
+
+        try:
+            email = render_email(nombre, contexto)
+        except TemplateDoesNotExist as exc:
+            raise CommandError(f"Falta el archivo {exc} de la plantilla '{nombre}'.") from exc
+
+        salida = email.html if options["html"] else f"Asunto: {email.subject}\n\n{email.text}"
+        if options.get("output"):
+            Path(options["output"]).write_text(salida + "\n", encoding="utf-8")
+            self.stdout.write(f"Escrito en {options['output']}")
+        else:
+            self.stdout.write(salida)
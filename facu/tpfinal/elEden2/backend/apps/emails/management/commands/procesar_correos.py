@@ -0,0 +1,66 @@
+"""
+Envía los emails encolados en la bandeja de salida.
+Con --loop queda corriendo como worker (servicio email-worker en docker-compose):
+    python manage.py procesar_correos --loop --interval 1 --flush-interval 5
+
+Cada lote sale por una sola conexión SMTP; con --loop se espera a tener un lote
+completo o a que el email más viejo supere --flush-interval.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.emails.outbox import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = "Drena la bandeja de salida de emails con reintentos, backoff exponencial y descarte final."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Sigue procesando indefinidamente; espera --interval segundos cuando la cola está vacía.",
+        )
+        parser.add_argument("--interval", type=float, default=1, help="Espera entre vueltas sin trabajo.")
+        parser.add_argument(
+            "--flush-interval",
+            type=float,
+            default=None,
+            help="Espera máxima para juntar un lote (por defecto EMAIL_OUTBOX_FLUSH_INTERVAL_SECONDS).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Emails por lote (por defecto EMAIL_OUTBOX_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        interval = max(0.1, options["interval"])
+        totales = {"enviados": 0, "reintentos": 0, "descartados": 0}
+        while True:
+            if options.get("loop") and not EmailOutbox.ready_to_flush(
+                options.get("batch_size"), options.get("flush_interval")
+            ):
+                time.sleep(interval)
+                continue
+            stats = EmailOutbox.process_batch(options.get("batch_size"))
+            procesados = sum(stats.values())
+            for clave, valor in stats.items():
+                totales[clave] += valor
+            if procesados and options.get("loop"):
+                self._reportar(stats)
+            if procesados:
+                continue
+            if not options.get("loop"):
+                # Sin --loop se drena lo vencido y se termina
+                self._reportar(totales)
+                return
+            time.sleep(interval)
+
+    def _reportar(self, stats):
+        self.stdout.write(
+            f"Enviados: {stats['enviados']} | reintentos: {stats['reintentos']} | descartados: {stats['descartados']}"
+        )
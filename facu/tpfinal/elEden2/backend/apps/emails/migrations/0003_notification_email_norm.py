@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def normalizar_emails(apps, schema_editor):
+    Notification = apps.get_model("emails", "Notification")
+    Notification.objects.update(recipient_email_norm=Lower(Trim("recipient_email")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("emails", "0002_bandeja_salida"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="recipient_email_norm",
+            field=models.CharField(blank=True, default="", max_length=254),
+        ),
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["recipient_email_norm"], name="emails_notif_email_norm_idx"),
+        ),
+        # Índice por expresión para buscar usuarios por email sin distinguir mayúsculas
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));",
+            "DROP INDEX IF EXISTS auth_user_email_lower_idx;",
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("emails", "0004_resumen_admin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboundemail",
+            name="html_body",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -11,6 +13,8 @@ class Notification(models.Model):
 		related_name="notifications",
 	)
 	recipient_email = models.EmailField()
+	# recipient_email en minúsculas: las búsquedas por email usan igualdad e índice en vez de iexact
+	recipient_email_norm = models.CharField(max_length=254, blank=True, default="")
 	subject = models.CharField(max_length=255)
 	body = models.TextField()
 	created_at = models.DateTimeField(auto_now_add=True)
@@ -21,11 +25,122 @@ class Notification(models.Model):
 		indexes = [
 			models.Index(fields=["recipient_email"]),
 			models.Index(fields=["read_at"]),
+			models.Index(fields=["recipient_email_norm"], name="emails_notif_email_norm_idx"),
 		]
 
+	@staticmethod
+	def normalize_email(email):
+		return (email or "").strip().lower()
+
+	def save(self, *args, **kwargs):
+		self.recipient_email_norm = self.normalize_email(self.recipient_email)
+		update_fields = kwargs.get("update_fields")
+		if update_fields is not None and "recipient_email" in update_fields:
+			kwargs["update_fields"] = {*update_fields, "recipient_email_norm"}
+		super().save(*args, **kwargs)
+
 	@property
 	def is_read(self):
 		return self.read_at is not None
 
 	def __str__(self):
 		return f"{self.subject} -> {self.recipient_email}"
+
+
+class OutboundEmail(models.Model):
+	"""Bandeja de salida: los requests encolan y ``procesar_correos`` envía."""
+
+	STATUS_PENDING = "pending"
+	STATUS_SENDING = "sending"
+	STATUS_SENT = "sent"
+	STATUS_DEAD = "dead"
+	STATUS_CHOICES = [
+		(STATUS_PENDING, "Pendiente"),
+		(STATUS_SENDING, "Enviando"),
+		(STATUS_SENT, "Enviado"),
+		(STATUS_DEAD, "Descartado"),
+	]
+
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	# Alternativa HTML (multipart/alternative); vacía para emails sólo texto
+	html_body = models.TextField(blank=True, default="")
+	from_email = models.CharField(max_length=255)
+	recipients = models.JSONField(default=list)
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+	attempts = models.PositiveSmallIntegerField(default=0)
+	next_attempt_at = models.DateTimeField(default=timezone.now)
+	last_error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	sent_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ["next_attempt_at", "id"]
+		indexes = [
+			models.Index(fields=["status", "next_attempt_at"], name="emails_outbox_due_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class EmailPreference(models.Model):
+	"""Cómo recibe cada usuario los avisos administrativos (pagos, bajas, clima)."""
+
+	DELIVERY_IMMEDIATE = "immediate"
+	DELIVERY_DIGEST = "digest"
+	DELIVERY_CHOICES = [
+		(DELIVERY_IMMEDIATE, "Inmediato"),
+		(DELIVERY_DIGEST, "Resumen periódico"),
+	]
+
+	user = models.OneToOneField(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		related_name="email_preference",
+	)
+	admin_delivery = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default=DELIVERY_IMMEDIATE)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"{self.user} ({self.admin_delivery})"
+
+
+class PendingDigestEvent(models.Model):
+	"""Aviso administrativo que espera el próximo resumen del destinatario."""
+
+	CATEGORY_PAGO = "pago"
+	CATEGORY_EMPLEADO = "empleado"
+	CATEGORY_CLIMA = "clima"
+	CATEGORY_REPROGRAMACION = "reprogramacion"
+	CATEGORY_CHOICES = [
+		(CATEGORY_PAGO, "Pagos recibidos"),
+		(CATEGORY_EMPLEADO, "Bajas de empleados"),
+		(CATEGORY_CLIMA, "Alertas de clima"),
+		(CATEGORY_REPROGRAMACION, "Reprogramaciones por clima"),
+	]
+
+	recipient = models.ForeignKey(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		related_name="pending_digest_events",
+	)
+	category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	created_at = models.DateTimeField(auto_now_add=True)
+	digested_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ["created_at", "id"]
+		indexes = [
+			# Sólo los pendientes: el job de resúmenes recorre este índice
+			models.Index(
+				fields=["recipient", "created_at"],
+				condition=Q(digested_at__isnull=True),
+				name="emails_digest_pending_idx",
+			),
+		]
+
+	def __str__(self):
+		return f"{self.subject} -> {self.recipient} ({self.category})"
@@ -0,0 +1,193 @@
+"""
+Bandeja de salida de emails respaldada en la base de datos.
+
+``EmailService`` sólo encola (al confirmar la transacción del request) y el
+comando ``procesar_correos`` envía. Se guarda un mensaje por destinatario (nadie
+ve las direcciones de los demás) y cada lote sale por una única conexión SMTP.
+Cada email se reintenta con backoff exponencial y, al agotar
+``EMAIL_OUTBOX_MAX_ATTEMPTS``, queda descartado (``dead``) para revisión manual
+desde el admin.
+"""
+
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutbox:
+    """Encolado, envío con reintentos y métricas de ``OutboundEmail``."""
+
+    @staticmethod
+    def enqueue(subject, message, recipient_list, from_email=None, html_message=None):
+        """Un ``OutboundEmail`` por destinatario, en un solo INSERT."""
+        return OutboundEmail.objects.bulk_create(
+            OutboundEmail(
+                subject=subject[:255],
+                body=message,
+                html_body=html_message or "",
+                from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                recipients=[recipient],
+            )
+            for recipient in dict.fromkeys(recipient_list)
+        )
+
+    @staticmethod
+    def backoff(attempts):
+        base = int(getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30))
+        tope = int(getattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600))
+        return timedelta(seconds=min(tope, base * 2 ** max(0, attempts - 1)))
+
+    @staticmethod
+    def claim(batch_size=None):
+        """Toma un lote vencido y lo marca ``sending`` con un plazo de lease.
+
+        ``skip_locked`` permite varios workers en paralelo sin repartir el mismo
+        email; si un worker muere, el lease vence y otro lo vuelve a tomar.
+        """
+        batch_size = batch_size or int(getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50))
+        lease = int(getattr(settings, "EMAIL_OUTBOX_LEASE_SECONDS", 300))
+        ahora = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING],
+                    next_attempt_at__lte=ahora,
+                )
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status=OutboundEmail.STATUS_SENDING, next_attempt_at=ahora + timedelta(seconds=lease)
+            )
+        return emails
+
+    @staticmethod
+    def ready_to_flush(batch_size=None, flush_interval=None):
+        """Hay un lote completo vencido, o el más viejo ya esperó ``flush_interval`` segundos."""
+        batch_size = batch_size or int(getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50))
+        if flush_interval is None:
+            flush_interval = float(getattr(settings, "EMAIL_OUTBOX_FLUSH_INTERVAL_SECONDS", 5))
+        ahora = timezone.now()
+        vencidos = OutboundEmail.objects.filter(
+            status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING],
+            next_attempt_at__lte=ahora,
+        )
+        if vencidos[:batch_size].count() >= batch_size:
+            return True
+        return vencidos.filter(next_attempt_at__lte=ahora - timedelta(seconds=flush_interval)).exists()
+
+    @staticmethod
+    def _deliver(connection, email):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipients,
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, "text/html")
+        # Un mensaje por llamada sobre la conexión ya abierta: un fallo no arrastra al resto del lote
+        connection.send_messages([message])
+
+    @classmethod
+    def process_batch(cls, batch_size=None):
+        max_attempts = int(getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+        stats = {"enviados": 0, "reintentos": 0, "descartados": 0}
+        emails = cls.claim(batch_size)
+        if not emails:
+            return stats
+
+        connection = get_connection(fail_silently=False)
+        try:
+            for email in emails:
+                cls._process_one(connection, email, max_attempts, stats)
+        finally:
+            try:
+                connection.close()
+            except Exception:  # pragma: no cover - la conexión ya pudo haberse caído
+                pass
+        return stats
+
+    @classmethod
+    def _process_one(cls, connection, email, max_attempts, stats):
+        email.attempts += 1
+        try:
+            # No-op si ya está abierta; reabre tras un fallo anterior del lote
+            connection.open()
+            cls._deliver(connection, email)
+        except Exception as exc:
+            # Se descarta la conexión: el siguiente mensaje abre una nueva
+            try:
+                connection.close()
+            except Exception:  # pragma: no cover
+                pass
+            email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if email.attempts >= max_attempts:
+                email.status = OutboundEmail.STATUS_DEAD
+                stats["descartados"] += 1
+                logger.error("Email %s descartado tras %s intentos: %s", email.pk, email.attempts, exc)
+            else:
+                email.status = OutboundEmail.STATUS_PENDING
+                email.next_attempt_at = timezone.now() + cls.backoff(email.attempts)
+                stats["reintentos"] += 1
+                logger.warning("Email %s falló (intento %s): %s", email.pk, email.attempts, exc)
+        else:
+            email.status = OutboundEmail.STATUS_SENT
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            stats["enviados"] += 1
+        email.save(update_fields=["attempts", "status", "next_attempt_at", "last_error", "sent_at"])
+
+    @staticmethod
+    def metrics(window_minutes=60):
+        """Profundidad de la cola y latencia de envío (encolado → enviado) de la ventana."""
+        ahora = timezone.now()
+        por_estado = dict(OutboundEmail.objects.values_list("status").annotate(total=Count("id")))
+        pendientes = OutboundEmail.objects.filter(
+            status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING]
+        ).aggregate(
+            vencidos=Count("id", filter=Q(next_attempt_at__lte=ahora)),
+            mas_antiguo=Min("created_at"),
+        )
+        enviados = OutboundEmail.objects.filter(
+            status=OutboundEmail.STATUS_SENT, sent_at__gte=ahora - timedelta(minutes=window_minutes)
+        ).values_list("created_at", "sent_at")
+        latencias = np.array([(sent_at - created_at).total_seconds() for created_at, sent_at in enviados])
+
+        latencia = None
+        if latencias.size:
+            p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+            latencia = {
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(latencias.max()), 3),
+            }
+        return {
+            "cola": {
+                "pendientes": por_estado.get(OutboundEmail.STATUS_PENDING, 0),
+                "enviando": por_estado.get(OutboundEmail.STATUS_SENDING, 0),
+                "vencidos": pendientes["vencidos"],
+                "antiguedad_segundos": (
+                    round((ahora - pendientes["mas_antiguo"]).total_seconds(), 1)
+                    if pendientes["mas_antiguo"]
+                    else 0
+                ),
+            },
+            "enviados": por_estado.get(OutboundEmail.STATUS_SENT, 0),
+            "descartados": por_estado.get(OutboundEmail.STATUS_DEAD, 0),
+            "ventana_minutos": window_minutes,
+            "enviados_en_ventana": int(latencias.size),
+            "latencia_envio_segundos": latencia,
+        }
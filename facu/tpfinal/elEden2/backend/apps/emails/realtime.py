@@ -0,0 +1,247 @@
+"""
+Push de notificaciones en tiempo real (server-sent events).
+
+``NotificationBroker`` es un pub/sub en memoria del proceso: ``EmailService``
+publica cada ``Notification`` creada y ``NotificationViewSet.stream`` la reenvía
+al navegador apenas llega. Un evento publicado en otro proceso (otro worker de
+gunicorn, un comando de manage.py) no llega por memoria; para eso cada stream
+consulta la base cada ``NOTIFICATIONS_SSE_POLL_SECONDS`` buscando ids nuevos.
+
+El contador de no leídas vive en el cache (``notificaciones:no_leidas:<user_id>``):
+se incrementa al crear y se ajusta en ``marcar_leida`` / ``marcar_todas_leidas``,
+así el badge no consulta la base salvo cuando la clave no existe. Con varios
+procesos el cache tiene que ser compartido (Redis/Memcached) para que el
+contador sea exacto; con ``LocMemCache`` el TTL acota la diferencia, y cuando la
+consulta a la base trae notificaciones de otro proceso el contador se recalcula.
+
+``EventSource`` no puede mandar el header Authorization: el navegador pide antes un
+ticket de un solo uso (``emitir_ticket_stream``) y abre el stream con ``?ticket=``.
+"""
+
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationBroker:
+    """Colas por usuario para los streams abiertos en este proceso."""
+
+    def __init__(self, max_pendientes=100):
+        self._lock = threading.Lock()
+        self._suscriptores = {}
+        self.max_pendientes = max_pendientes
+
+    def subscribe(self, user_id):
+        cola = queue.Queue(maxsize=self.max_pendientes)
+        with self._lock:
+            self._suscriptores.setdefault(user_id, set()).add(cola)
+        return cola
+
+    def unsubscribe(self, user_id, cola):
+        with self._lock:
+            colas = self._suscriptores.get(user_id)
+            if colas is None:
+                return
+            colas.discard(cola)
+            if not colas:
+                del self._suscriptores[user_id]
+
+    def publish(self, user_id, evento):
+        with self._lock:
+            colas = list(self._suscriptores.get(user_id, ()))
+        for cola in colas:
+            try:
+                cola.put_nowait(evento)
+            except queue.Full:
+                # Cliente lento: la consulta periódica a la base lo pone al día
+                logger.debug("Cola SSE llena para el usuario %s; se descarta el evento", user_id)
+
+
+broker = NotificationBroker()
+
+
+def notificaciones_de(user):
+    """Notificaciones visibles para ``user``: propias o enviadas a su email."""
+    email = Notification.normalize_email(user.email)
+    filters = Q(recipient=user)
+    if email:
+        filters |= Q(recipient_email_norm=email)
+    return Notification.objects.filter(filters)
+
+
+def _clave_no_leidas(user_id):
+    return f"notificaciones:no_leidas:{user_id}"
+
+
+def _ttl_no_leidas():
+    return int(getattr(settings, "NOTIFICATIONS_UNREAD_CACHE_SECONDS", 300))
+
+
+def contar_no_leidas(user):
+    clave = _clave_no_leidas(user.pk)
+    valor = cache.get(clave)
+    if valor is None:
+        valor = notificaciones_de(user).filter(read_at__isnull=True).count()
+        cache.set(clave, valor, _ttl_no_leidas())
+    return valor
+
+
+def recontar_no_leidas(user):
+    """Descarta el contador cacheado y lo vuelve a calcular desde la base."""
+    cache.delete(_clave_no_leidas(user.pk))
+    return contar_no_leidas(user)
+
+
+def _ajustar_no_leidas(user_id, delta):
+    """Ajusta el contador si está en cache; si no, la próxima lectura lo recalcula."""
+    clave = _clave_no_leidas(user_id)
+    try:
+        valor = cache.incr(clave, delta)
+    except ValueError:
+        return None
+    if valor < 0:
+        cache.delete(clave)
+        return None
+    return valor
+
+
+def publicar_creadas(notificaciones):
+    """Suma al contador y avisa a los streams de cada destinatario con usuario."""
+    from .serializers import NotificationSerializer
+
+    for notificacion in notificaciones:
+        if notificacion.recipient_id is None:
+            continue
+        broker.publish(
+            notificacion.recipient_id,
+            {
+                "tipo": "notificacion",
+                "id": notificacion.pk,
+                "notificacion": NotificationSerializer(notificacion).data,
+                "no_leidas": _ajustar_no_leidas(notificacion.recipient_id, 1),
+            },
+        )
+
+
+def publicar_leidas(user, cantidad):
+    """``cantidad`` notificaciones de ``user`` pasaron a leídas."""
+    no_leidas = _ajustar_no_leidas(user.pk, -cantidad) if cantidad else cache.get(_clave_no_leidas(user.pk))
+    broker.publish(user.pk, {"tipo": "no_leidas", "no_leidas": no_leidas})
+
+
+def publicar_todas_leidas(user):
+    cache.set(_clave_no_leidas(user.pk), 0, _ttl_no_leidas())
+    broker.publish(user.pk, {"tipo": "no_leidas", "no_leidas": 0})
+
+
+def _clave_ticket(ticket):
+    return f"notificaciones:ticket:{ticket}"
+
+
+def emitir_ticket_stream(user):
+    """Ticket aleatorio que autoriza una sola conexión al stream de ``user``."""
+    ticket = secrets.token_urlsafe(32)
+    ttl = int(getattr(settings, "NOTIFICATIONS_SSE_TICKET_SECONDS", 30))
+    cache.set(_clave_ticket(ticket), user.pk, ttl)
+    return ticket, ttl
+
+
+def consumir_ticket_stream(ticket):
+    """Id del usuario del ticket, o ``None`` si no existe, venció o ya se usó."""
+    clave = _clave_ticket(ticket)
+    user_id = cache.get(clave)
+    # Con dos conexiones simultáneas con el mismo ticket sólo una logra borrarlo
+    if user_id is None or not cache.delete(clave):
+        return None
+    return user_id
+
+
+def _formatear(evento):
+    lineas = []
+    if evento["tipo"] == "notificacion":
+        lineas.append(f"id: {evento['id']}")
+    lineas.append(f"event: {evento['tipo']}")
+    lineas.append(f"data: {json.dumps(evento, cls=DjangoJSONEncoder)}")
+    return "\n".join(lineas) + "\n\n"
+
+
+def _nuevas_en_base(user, desde_id):
+    from .serializers import NotificationSerializer
+
+    for notificacion in notificaciones_de(user).filter(id__gt=desde_id).order_by("id")[:100]:
+        yield {
+            "tipo": "notificacion",
+            "id": notificacion.pk,
+            "notificacion": NotificationSerializer(notificacion).data,
+        }
+
+
+def stream_eventos(user, ultimo_id=None):
+    """Generador SSE: eventos ``notificacion`` y ``no_leidas``, con ping periódico.
+
+    Cierra después de ``NOTIFICATIONS_SSE_MAX_SECONDS``; ``EventSource`` reconecta
+    solo y manda ``Last-Event-ID``, desde donde se reenvía lo que se haya perdido.
+    """
+    poll = float(getattr(settings, "NOTIFICATIONS_SSE_POLL_SECONDS", 15))
+    duracion = float(getattr(settings, "NOTIFICATIONS_SSE_MAX_SECONDS", 300))
+    usar_base = getattr(settings, "NOTIFICATIONS_SSE_DB_FALLBACK", True)
+
+    cola = broker.subscribe(user.pk)
+    try:
+        yield f"retry: {int(getattr(settings, 'NOTIFICATIONS_SSE_RETRY_MS', 3000))}\n\n"
+        # Cursor de la consulta a la base y ids ya enviados por memoria por encima de él
+        cursor = ultimo_id
+        if cursor is None:
+            cursor = notificaciones_de(user).aggregate(ultimo=Max("id"))["ultimo"] or 0
+        enviados = set()
+        yield _formatear({"tipo": "no_leidas", "no_leidas": contar_no_leidas(user)})
+
+        limite = time.monotonic() + duracion
+        proxima_consulta = time.monotonic() + poll
+        while True:
+            ahora = time.monotonic()
+            if ahora >= limite:
+                return
+            try:
+                evento = cola.get(timeout=max(0.0, min(limite, proxima_consulta) - ahora))
+            except queue.Empty:
+                evento = None
+
+            if evento is not None:
+                if evento["tipo"] == "notificacion":
+                    if evento["id"] <= cursor or evento["id"] in enviados:
+                        continue
+                    enviados.add(evento["id"])
+                if evento.get("no_leidas") is None:
+                    evento = {**evento, "no_leidas": contar_no_leidas(user)}
+                yield _formatear(evento)
+
+            if time.monotonic() < proxima_consulta:
+                continue
+            proxima_consulta = time.monotonic() + poll
+            if usar_base:
+                filas = list(_nuevas_en_base(user, cursor))
+                nuevas = [fila for fila in filas if fila["id"] not in enviados]
+                for nueva in nuevas:
+                    yield _formatear(nueva)
+                if filas:
+                    cursor = filas[-1]["id"]
+                    enviados = {id_ for id_ in enviados if id_ > cursor}
+                if nuevas:
+                    # Las creó otro proceso sin pasar por el contador de este cache
+                    yield _formatear({"tipo": "no_leidas", "no_leidas": recontar_no_leidas(user)})
+            yield ": ping\n\n"
+    finally:
+        broker.unsubscribe(user.pk, cola)
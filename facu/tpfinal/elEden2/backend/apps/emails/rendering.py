@@ -0,0 +1,73 @@
+"""
+Render de emails desde plantillas Django, con alternativa de texto y HTML.
+
+Cada email vive en ``templates/emails/<nombre>/`` con ``asunto.txt``,
+``cuerpo.txt`` y ``cuerpo.html``. ``get_template`` pasa por el loader cacheado de
+Django (activo por defecto cuando ``TEMPLATES`` no define ``loaders``), así cada
+plantilla se compila una sola vez por proceso. Los fragmentos estáticos
+(separador, encabezado y pie HTML) se renderizan una única vez y llegan a las
+plantillas ya resueltos en ``fragmentos``.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates" / "emails"
+FRAGMENTOS = {
+    "separador": "separador.txt",
+    "encabezado": "encabezado.html",
+    "pie": "pie.html",
+}
+
+_LINEAS_VACIAS = re.compile(r"\n{3,}")
+
+
+@dataclass(frozen=True)
+class EmailRenderizado:
+    subject: str
+    text: str
+    html: str
+
+
+@lru_cache(maxsize=None)
+def fragmentos():
+    contexto = {"frontend_url": settings.FRONTEND_URL}
+    return {
+        nombre: mark_safe(get_template(f"emails/fragmentos/{archivo}").render(contexto).strip())
+        for nombre, archivo in FRAGMENTOS.items()
+    }
+
+
+@receiver(setting_changed)
+def _limpiar_fragmentos(setting, **kwargs):
+    if setting in ("FRONTEND_URL", "TEMPLATES"):
+        fragmentos.cache_clear()
+
+
+def plantillas_disponibles():
+    return sorted(
+        carpeta.name for carpeta in TEMPLATES_DIR.iterdir() if carpeta.is_dir() and carpeta.name != "fragmentos"
+    )
+
+
+def _texto(contenido):
+    lineas = [linea.rstrip() for linea in contenido.strip().splitlines()]
+    return _LINEAS_VACIAS.sub("\n\n", "\n".join(lineas))
+
+
+def render_email(nombre, contexto=None):
+    contexto = {"frontend_url": settings.FRONTEND_URL, **(contexto or {}), "fragmentos": fragmentos()}
+    subject = " ".join(get_template(f"emails/{nombre}/asunto.txt").render(contexto).split())
+    return EmailRenderizado(
+        subject=subject,
+        text=_texto(get_template(f"emails/{nombre}/cuerpo.txt").render(contexto)),
+        html=get_template(f"emails/{nombre}/cuerpo.html").render(contexto).strip(),
+    )
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Notification
+from .models import EmailPreference, Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -20,3 +20,10 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     def get_is_read(self, obj):
         return obj.read_at is not None
+
+
+class EmailPreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmailPreference
+        fields = ["admin_delivery", "updated_at"]
+        read_only_fields = ["updated_at"]
@@ -0,0 +1,30 @@
+from decimal import Decimal, InvalidOperation
+
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.filter
+def moneda(value):
+    """``15000`` -> ``15,000.00`` (mismo formato que ``f"{monto:,.2f}"``)."""
+    try:
+        return f"{Decimal(str(value)):,.2f}"
+    except (InvalidOperation, TypeError, ValueError):
+        return value
+
+
+@register.simple_tag
+def fila(etiqueta, valor, prefijo="", sufijo=""):
+    """Fila ``etiqueta: valor`` de las tablas de detalle HTML; se omite si no hay valor."""
+    if valor is None or valor == "":
+        return ""
+    return format_html(
+        '<tr><td style="padding:6px 12px 6px 0;color:#52606d;white-space:nowrap;vertical-align:top;">{}</td>'
+        '<td style="padding:6px 0;font-weight:bold;">{}{}{}</td></tr>',
+        etiqueta,
+        prefijo,
+        valor,
+        sufijo,
+    )
@@ -1 +1,347 @@
-# Create your tests here.
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import rendering
+from .digest import AdminDigest
+from .ejemplos import CONTEXTOS_DE_EJEMPLO
+from .models import EmailPreference, Notification, OutboundEmail, PendingDigestEvent
+from .outbox import EmailOutbox
+from .rendering import plantillas_disponibles, render_email
+from .services import EmailService
+
+
+class EmailOutboxTests(TestCase):
+    def _enqueue(self, subject="Hola", recipients=("cliente@example.com",)):
+        with self.captureOnCommitCallbacks(execute=True):
+            EmailService._send_and_log(subject=subject, message="Cuerpo", recipient_list=list(recipients))
+
+    def test_send_only_enqueues_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            EmailService._send_and_log(subject="Hola", message="Cuerpo", recipient_list=["cliente@example.com"])
+            self.assertFalse(OutboundEmail.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.recipients, ["cliente@example.com"])
+        self.assertEqual(email.status, OutboundEmail.STATUS_PENDING)
+        self.assertTrue(Notification.objects.filter(recipient_email="cliente@example.com").exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_drains_the_queue(self):
+        self._enqueue("Primero")
+        self._enqueue("Segundo", recipients=("otro@example.com", "admin@example.com"))
+
+        out = StringIO()
+        call_command("procesar_correos", stdout=out)
+
+        self.assertEqual([message.subject for message in mail.outbox], ["Primero", "Segundo", "Segundo"])
+        # Un mensaje por destinatario
+        self.assertEqual([message.to for message in mail.outbox[1:]], [["otro@example.com"], ["admin@example.com"]])
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+        self.assertIn("Enviados: 3", out.getvalue())
+
+    def test_batch_is_sent_over_a_single_connection(self):
+        self._enqueue(recipients=[f"cliente{indice}@example.com" for indice in range(5)])
+
+        with patch("apps.emails.outbox.get_connection", wraps=get_connection) as spy:
+            stats = EmailOutbox.process_batch()
+
+        spy.assert_called_once()
+        self.assertEqual(stats["enviados"], 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_OUTBOX_BATCH_SIZE=3)
+    def test_ready_to_flush_waits_for_a_full_batch_or_the_interval(self):
+        self._enqueue(recipients=["a@example.com", "b@example.com"])
+        self.assertFalse(EmailOutbox.ready_to_flush(flush_interval=60))
+
+        self._enqueue(recipients=["c@example.com"])
+        self.assertTrue(EmailOutbox.ready_to_flush(flush_interval=60))
+
+        OutboundEmail.objects.update(status=OutboundEmail.STATUS_SENT)
+        self._enqueue()
+        OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertTrue(EmailOutbox.ready_to_flush(flush_interval=60))
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_BACKOFF_SECONDS=30)
+    def test_failures_back_off_exponentially_and_are_dead_lettered(self):
+        self._enqueue()
+        email = OutboundEmail.objects.get()
+
+        with patch.object(EmailOutbox, "_deliver", side_effect=SMTPException("timeout")):
+            delays = []
+            for _ in range(3):
+                antes = timezone.now()
+                stats = EmailOutbox.process_batch()
+                email.refresh_from_db()
+                delays.append(round((email.next_attempt_at - antes).total_seconds()))
+                # Nada más para enviar hasta que venza el backoff
+                self.assertEqual(sum(EmailOutbox.process_batch().values()), 0)
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(delays[:2], [30, 60])
+        self.assertEqual(stats, {"enviados": 0, "reintentos": 0, "descartados": 1})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.STATUS_DEAD)
+        self.assertEqual(email.attempts, 3)
+        self.assertIn("timeout", email.last_error)
+
+    def test_expired_lease_is_claimed_again(self):
+        self._enqueue()
+        self.assertEqual(len(EmailOutbox.claim()), 1)
+        self.assertEqual(EmailOutbox.claim(), [])
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(EmailOutbox.process_batch()["enviados"], 1)
+
+    def test_metrics_report_depth_and_latency(self):
+        self._enqueue("Enviado")
+        EmailOutbox.process_batch()
+        self._enqueue("En cola")
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "adminpass123")
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse("emails-outbox-metricas"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["cola"]["pendientes"], 1)
+        self.assertEqual(body["cola"]["vencidos"], 1)
+        self.assertEqual(body["enviados"], 1)
+        self.assertEqual(body["enviados_en_ventana"], 1)
+        self.assertGreaterEqual(body["latencia_envio_segundos"]["p99"], 0)
+
+
+class NotificationLoggingTests(TestCase):
+    def test_broadcast_logs_with_one_user_lookup_and_one_insert(self):
+        User = get_user_model()
+        admins = User.objects.bulk_create(
+            User(username=f"admin{indice}", email=f"Admin{indice}@Example.com") for indice in range(30)
+        )
+        recipients = [f"admin{indice}@example.com" for indice in range(30)] + ["externo@example.com"]
+
+        with self.assertNumQueries(2):
+            EmailService._log_notifications("Aviso", "Cuerpo", recipients)
+
+        self.assertEqual(Notification.objects.count(), 31)
+        self.assertEqual(Notification.objects.get(recipient_email="admin7@example.com").recipient, admins[7])
+        self.assertIsNone(Notification.objects.get(recipient_email="externo@example.com").recipient)
+
+    def test_users_see_notifications_addressed_to_their_email_in_any_case(self):
+        user = get_user_model().objects.create_user("cliente", "Cliente@Example.com", "pass1234")
+        Notification.objects.create(recipient_email=" CLIENTE@example.com", subject="Sin usuario", body="-")
+        Notification.objects.create(recipient_email="otro@example.com", subject="Ajena", body="-")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("notificaciones-list"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        resultados = body["results"] if isinstance(body, dict) else body
+        self.assertEqual([item["subject"] for item in resultados], ["Sin usuario"])
+
+
+@override_settings(NOTIFICATIONS_SSE_POLL_SECONDS=0.05, NOTIFICATIONS_SSE_MAX_SECONDS=1)
+class NotificationRealtimeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("cliente", "cliente@example.com", "pass1234")
+
+    def _eventos(self, response, cantidad):
+        chunks = iter(response.streaming_content)
+        eventos = []
+        while len(eventos) < cantidad:
+            chunk = next(chunks).decode()
+            if chunk.startswith("event: ") or "\nevent: " in chunk:
+                eventos.append(chunk)
+        return eventos
+
+    def test_unread_counter_is_served_from_cache(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("notificaciones-no-leidas")).json(), {"no_leidas": 0})
+
+        EmailService._log_notifications("Uno", "-", ["cliente@example.com"])
+        EmailService._log_notifications("Dos", "-", ["cliente@example.com"])
+
+        with self.assertNumQueries(0):
+            from .realtime import contar_no_leidas
+
+            self.assertEqual(contar_no_leidas(self.user), 2)
+
+        notificacion = Notification.objects.filter(subject="Uno").get()
+        self.client.post(reverse("notificaciones-marcar-leida", args=[notificacion.pk]))
+        self.assertEqual(contar_no_leidas(self.user), 1)
+        self.client.post(reverse("notificaciones-marcar-todas-leidas"))
+        self.assertEqual(contar_no_leidas(self.user), 0)
+
+    def _ticket(self):
+        token = AccessToken.for_user(self.user)
+        response = self.client.post(reverse("notificaciones-stream-ticket"), HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["ticket"]
+
+    def test_stream_pushes_new_notifications_and_counts(self):
+        response = self.client.get(
+            reverse("notificaciones-stream"), {"ticket": self._ticket()}, HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        try:
+            (inicial,) = self._eventos(response, 1)
+            self.assertIn('"no_leidas": 0', inicial)
+
+            EmailService._log_notifications("En memoria", "-", ["cliente@example.com"])
+            (evento,) = self._eventos(response, 1)
+            self.assertIn("event: notificacion", evento)
+            self.assertIn("En memoria", evento)
+            self.assertIn('"no_leidas": 1', evento)
+
+            # Creada por otro proceso: no pasa por el broker, la trae la consulta a la base
+            Notification.objects.create(recipient_email="cliente@example.com", subject="Otro proceso", body="-")
+            evento, contador = self._eventos(response, 2)
+            self.assertIn("Otro proceso", evento)
+            # El contador en cache no la sumó: se recalcula desde la base
+            self.assertIn("event: no_leidas", contador)
+            self.assertIn('"no_leidas": 2', contador)
+        finally:
+            # Agota el stream (NOTIFICATIONS_SSE_MAX_SECONDS) para que libere su suscripción
+            list(response.streaming_content)
+
+    def test_stream_requires_authentication(self):
+        response = self.client.get(reverse("notificaciones-stream"), HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_ticket_is_single_use_and_jwt_is_not_accepted_in_query(self):
+        token = AccessToken.for_user(self.user)
+        jwt_en_query = self.client.get(
+            reverse("notificaciones-stream"), {"token": str(token)}, HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(jwt_en_query.status_code, 401)
+
+        ticket = self._ticket()
+        with override_settings(NOTIFICATIONS_SSE_MAX_SECONDS=0):
+            primera = self.client.get(reverse("notificaciones-stream"), {"ticket": ticket})
+            list(primera.streaming_content)
+            repetida = self.client.get(reverse("notificaciones-stream"), {"ticket": ticket})
+
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(repetida.status_code, 401)
+
+
+class EmailTemplateTests(TestCase):
+    def test_every_template_renders_text_and_html_with_example_data(self):
+        self.assertEqual(set(plantillas_disponibles()), set(CONTEXTOS_DE_EJEMPLO))
+        for nombre in plantillas_disponibles():
+            with self.subTest(plantilla=nombre):
+                email = render_email(nombre, CONTEXTOS_DE_EJEMPLO[nombre])
+                self.assertTrue(email.subject)
+                self.assertNotIn("\n", email.subject)
+                self.assertNotIn("{{", email.text)
+                self.assertTrue(email.html.startswith("<!DOCTYPE html>"))
+                self.assertIn("</html>", email.html)
+
+    def test_html_escapes_user_content_and_text_keeps_it(self):
+        contexto = {**CONTEXTOS_DE_EJEMPLO["rechazo_diseno"], "feedback_cliente": "<b>No</b> & más"}
+        email = render_email("rechazo_diseno", contexto)
+        self.assertIn("<b>No</b> & más", email.text)
+        self.assertIn("&lt;b&gt;No&lt;/b&gt; &amp; más", email.html)
+
+    def test_static_fragments_are_rendered_once_per_process(self):
+        rendering.fragmentos.cache_clear()
+        with patch("apps.emails.rendering.get_template", wraps=rendering.get_template) as spy:
+            for _ in range(3):
+                render_email("bienvenida_cliente", CONTEXTOS_DE_EJEMPLO["bienvenida_cliente"])
+        fragmentos = [call.args[0] for call in spy.call_args_list if "fragmentos/" in call.args[0]]
+        self.assertEqual(len(fragmentos), len(rendering.FRAGMENTOS))
+
+    def test_outbox_sends_html_alternative(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            EmailService.send_welcome_email("ana@example.com", "Ana Gómez", "ana")
+        EmailOutbox.process_batch()
+
+        message = mail.outbox[0]
+        self.assertIn("Ana Gómez", message.body)
+        self.assertEqual(len(message.alternatives), 1)
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("Ana Gómez", html)
+
+    def test_preview_command_lists_and_renders(self):
+        out = StringIO()
+        call_command("preview_email", "--list", stdout=out)
+        self.assertIn("confirmacion_pago", out.getvalue().split())
+
+        out = StringIO()
+        call_command("preview_email", "confirmacion_pago", stdout=out)
+        self.assertIn("Asunto:", out.getvalue())
+        self.assertIn("$15,000.00", out.getvalue())
+
+
+class AdminDigestTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.inmediato = User.objects.create_user("inmediato", "inmediato@example.com", "pass1234", is_staff=True)
+        self.resumen = User.objects.create_user("resumen", "resumen@example.com", "pass1234", is_staff=True)
+        EmailPreference.objects.create(user=self.resumen, admin_delivery=EmailPreference.DELIVERY_DIGEST)
+
+    def _pago(self, reserva_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            EmailService.send_payment_notification_to_admin(
+                reserva_id=reserva_id,
+                cliente_nombre="Ana Pérez",
+                servicio_nombre="Poda",
+                monto=15000,
+                payment_id=f"MP-{reserva_id}",
+                fecha_reserva=timezone.now(),
+                direccion="Calle 1",
+            )
+
+    def test_digest_admins_get_one_summary_per_interval(self):
+        self._pago(1)
+        self._pago(2)
+
+        # El administrador inmediato recibe un email por pago; el otro sólo acumula eventos
+        self.assertEqual(OutboundEmail.objects.filter(recipients=["inmediato@example.com"]).count(), 2)
+        self.assertFalse(OutboundEmail.objects.filter(recipients=["resumen@example.com"]).exists())
+        self.assertEqual(PendingDigestEvent.objects.filter(recipient=self.resumen, digested_at__isnull=True).count(), 2)
+        self.assertEqual(Notification.objects.filter(recipient=self.resumen).count(), 2)
+
+        out = StringIO()
+        call_command("enviar_resumenes", stdout=out)
+
+        resumen = OutboundEmail.objects.get(recipients=["resumen@example.com"])
+        self.assertIn("2 avisos", resumen.subject)
+        self.assertIn("Reserva #1", resumen.body)
+        self.assertIn("Reserva #2", resumen.body)
+        self.assertFalse(PendingDigestEvent.objects.filter(digested_at__isnull=True).exists())
+        self.assertIn("Resúmenes: 1 | eventos: 2", out.getvalue())
+
+        # Nada pendiente: no se vuelve a mandar
+        self.assertEqual(AdminDigest.send_pending(), {"resumenes": 0, "eventos": 0})
+
+    def test_admin_can_switch_to_digest(self):
+        self.client.force_login(self.inmediato)
+        url = reverse("emails-preferencias")
+
+        self.assertEqual(self.client.get(url).json()["admin_delivery"], "immediate")
+        response = self.client.put(url, {"admin_delivery": "digest"}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.inmediato.email_preference.admin_delivery, "digest")
+        self.assertEqual(AdminDigest.split_admins(), ([], [self.inmediato, self.resumen]))
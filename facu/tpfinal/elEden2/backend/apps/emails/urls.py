@@ -1,11 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import NotificationViewSet
+from .views import EmailPreferenceAPIView, NotificationViewSet, OutboxMetricsAPIView
 
 router = DefaultRouter()
 router.register(r"emails/notificaciones", NotificationViewSet, basename="notificaciones")
 
 urlpatterns = [
+    path("emails/preferencias/", EmailPreferenceAPIView.as_view(), name="emails-preferencias"),
+    path("emails/outbox/metricas/", OutboxMetricsAPIView.as_view(), name="emails-outbox-metricas"),
     path("", include(router.urls)),
 ]
@@ -1,11 +1,20 @@
-from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import permissions, viewsets
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Notification
-from .serializers import NotificationSerializer
+from . import realtime
+from .authentication import StreamTicketAuthentication
+from .outbox import EmailOutbox
+from .renderers import EventStreamRenderer
+from .digest import AdminDigest
+from .models import EmailPreference
+from .serializers import EmailPreferenceSerializer, NotificationSerializer
 
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
@@ -13,12 +22,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 	permission_classes = [permissions.IsAuthenticated]
 
 	def get_queryset(self):
-		user = self.request.user
-		email = (user.email or "").strip()
-		filters = Q(recipient=user)
-		if email:
-			filters |= Q(recipient_email__iexact=email)
-		return Notification.objects.filter(filters).order_by("-created_at")
+		return realtime.notificaciones_de(self.request.user).order_by("-created_at")
 
 	@action(detail=True, methods=["post"], url_path="marcar-leida")
 	def marcar_leida(self, request, pk=None):
@@ -26,6 +30,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 		if notif.read_at is None:
 			notif.read_at = timezone.now()
 			notif.save(update_fields=["read_at"])
+			realtime.publicar_leidas(request.user, 1)
 		serializer = self.get_serializer(notif)
 		return Response(serializer.data)
 
@@ -34,4 +39,72 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 		qs = self.get_queryset().filter(read_at__isnull=True)
 		now = timezone.now()
 		count = qs.update(read_at=now)
+		realtime.publicar_todas_leidas(request.user)
 		return Response({"count": count})
+
+	@action(detail=False, methods=["get"], url_path="no-leidas")
+	def no_leidas(self, request):
+		return Response({"no_leidas": realtime.contar_no_leidas(request.user)})
+
+	@action(detail=False, methods=["post"], url_path="stream-ticket")
+	def stream_ticket(self, request):
+		"""Ticket de un solo uso para abrir el stream sin poner el JWT en la URL."""
+		ticket, expira_en = realtime.emitir_ticket_stream(request.user)
+		return Response({"ticket": ticket, "expira_en": expira_en})
+
+	@action(
+		detail=False,
+		methods=["get"],
+		url_path="stream",
+		renderer_classes=[JSONRenderer, EventStreamRenderer],
+		authentication_classes=[JWTAuthentication, StreamTicketAuthentication, SessionAuthentication],
+	)
+	def stream(self, request):
+		"""Server-sent events con notificaciones nuevas y el contador de no leídas."""
+		ultimo_id = request.headers.get("Last-Event-ID") or request.query_params.get("ultimo_id")
+		try:
+			ultimo_id = int(ultimo_id) if ultimo_id else None
+		except (TypeError, ValueError):
+			ultimo_id = None
+		response = StreamingHttpResponse(
+			realtime.stream_eventos(request.user, ultimo_id), content_type="text/event-stream"
+		)
+		response["Cache-Control"] = "no-cache"
+		response["X-Accel-Buffering"] = "no"
+		return response
+
+
+class OutboxMetricsAPIView(APIView):
+	"""Profundidad de la bandeja de salida y latencia de envío (p50/p95/p99)."""
+
+	permission_classes = [permissions.IsAdminUser]
+
+	def get(self, request):
+		try:
+			window = int(request.query_params.get("minutos", 60))
+		except (TypeError, ValueError):
+			window = 60
+		return Response(EmailOutbox.metrics(window_minutes=max(1, min(window, 7 * 24 * 60))))
+
+
+class EmailPreferenceAPIView(APIView):
+	"""Preferencia de avisos administrativos del usuario: inmediato o resumen periódico."""
+
+	permission_classes = [permissions.IsAdminUser]
+
+	def get(self, request):
+		preference = EmailPreference.objects.filter(user=request.user).first()
+		if preference is None:
+			return Response({"admin_delivery": AdminDigest.default_delivery(), "updated_at": None})
+		return Response(EmailPreferenceSerializer(preference).data)
+
+	def put(self, request):
+		preference, _ = EmailPreference.objects.get_or_create(
+			user=request.user, defaults={"admin_delivery": AdminDigest.default_delivery()}
+		)
+		serializer = EmailPreferenceSerializer(preference, data=request.data)
+		serializer.is_valid(raise_exception=True)
+		serializer.save()
+		return Response(serializer.data)
+
+	patch = put
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import ClaveIdempotencia
+
+
+@admin.register(ClaveIdempotencia)
+class ClaveIdempotenciaAdmin(admin.ModelAdmin):
+    list_display = ("fecha_creacion", "usuario", "metodo", "ruta", "status_code", "estado", "fecha_expiracion")
+    list_filter = ("estado", "metodo")
+    search_fields = ("clave", "ruta", "usuario__username", "usuario__email")
+    readonly_fields = ("fecha_creacion", "hash_peticion")
+    exclude = ("cuerpo",)
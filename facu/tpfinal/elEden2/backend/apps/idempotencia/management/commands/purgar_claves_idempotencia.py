@@ -0,0 +1,51 @@
+"""
+Borra las claves de idempotencia vencidas (respuestas guardadas y reclamos abandonados).
+Con --loop corre cada IDEMPOTENCY_PURGE_INTERVAL_MINUTES (servicio idempotencia-purga en docker-compose):
+    python manage.py purgar_claves_idempotencia --loop
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.idempotencia.models import ClaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = "Borra las filas de ClaveIdempotencia con fecha_expiracion vencida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Repite la purga cada --interval minutos.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Minutos entre purgas (por defecto IDEMPOTENCY_PURGE_INTERVAL_MINUTES).",
+        )
+        parser.add_argument("--lote", type=int, default=1000, help="Filas borradas por sentencia.")
+
+    def handle(self, *args, **options):
+        interval = options.get("interval")
+        if interval is None:
+            interval = float(getattr(settings, "IDEMPOTENCY_PURGE_INTERVAL_MINUTES", 60))
+        lote = max(1, options["lote"])
+        while True:
+            borradas = self._purgar(lote)
+            self.stdout.write(f"Claves de idempotencia vencidas borradas: {borradas}")
+            if not options.get("loop"):
+                return
+            time.sleep(max(1.0, interval * 60))
+
+    @staticmethod
+    def _purgar(lote):
+        """Borra por lotes para no bloquear la tabla con un único DELETE grande."""
+        borradas = 0
+        while True:
+            vencidas = ClaveIdempotencia.objects.filter(fecha_expiracion__lt=timezone.now())
+            ids = list(vencidas.values_list("pk", flat=True)[:lote])
+            if not ids:
+                return borradas
+            # Repite el filtro: una clave reclamada de nuevo entre las dos consultas no se borra
+            borradas += vencidas.filter(pk__in=ids).delete()[0]
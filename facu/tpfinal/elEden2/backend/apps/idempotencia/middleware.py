@@ -0,0 +1,189 @@
+"""
+Middleware de ``Idempotency-Key``.
+
+Si una petición que modifica datos (POST/PUT/PATCH/DELETE bajo ``/api/``) trae el
+header ``Idempotency-Key``, la respuesta se guarda en ``ClaveIdempotencia`` por
+usuario y clave. Un reintento con la misma clave recibe la respuesta guardada sin
+volver a ejecutar la vista: no se repiten llamadas a MercadoPago, escrituras ni emails.
+
+Ninguna transacción queda abierta mientras corre la vista (que puede llamar a
+MercadoPago por HTTP): la clave se reclama en una transacción corta, la vista corre
+fuera de ella y la respuesta se guarda con un UPDATE aparte. Mientras la primera
+petición está en curso, un duplicado recibe 409 y reintenta; si el proceso muere a
+mitad de camino, la clave se libera sola después de ``IDEMPOTENCY_LOCK_SECONDS``.
+Las respuestas 5xx y las 202 (provisorias: el cliente vuelve a preguntar con la
+misma clave) no se guardan y liberan la clave.
+
+``python manage.py purgar_claves_idempotencia`` borra las claves vencidas.
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import ClaveIdempotencia
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyMiddleware:
+    HEADER = "Idempotency-Key"
+    METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+    API_PREFIX = "/api/"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        clave = request.headers.get(self.HEADER, "").strip()
+        if not clave or request.method not in self.METHODS or not request.path.startswith(self.API_PREFIX):
+            return self.get_response(request)
+        if len(clave) > 255:
+            return JsonResponse({"error": f"{self.HEADER} demasiado largo (máximo 255 caracteres)"}, status=400)
+
+        usuario = self._usuario(request)
+        if usuario is None:
+            # Sin usuario no hay a quién asociar la clave: la vista responde 401 como siempre
+            return self.get_response(request)
+
+        hash_peticion = self._hash(request)
+        registro, reclamada = self._reclamar(usuario, clave, request, hash_peticion, timezone.now())
+        if registro.hash_peticion != hash_peticion:
+            return JsonResponse({"error": f"El {self.HEADER} ya se usó con otra petición"}, status=422)
+        if registro.estado == ClaveIdempotencia.ESTADO_COMPLETADA:
+            return self._repetir(registro)
+        if not reclamada:
+            response = JsonResponse(
+                {"error": f"Ya hay una petición en curso con este {self.HEADER}; reintentá en unos segundos"},
+                status=409,
+            )
+            response["Retry-After"] = "1"
+            return response
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._liberar(registro)
+            raise
+        if response.status_code >= 500 or response.status_code == 202 or getattr(response, "streaming", False):
+            self._liberar(registro)
+            return response
+
+        guardada = self._reclamo(registro).update(
+            estado=ClaveIdempotencia.ESTADO_COMPLETADA,
+            status_code=response.status_code,
+            content_type=response.get("Content-Type", "")[:100],
+            cuerpo=response.content,
+            fecha_expiracion=timezone.now() + self._ttl(),
+        )
+        if not guardada:
+            logger.warning("Idempotency-Key %s: la clave venció durante la petición; no se guarda", clave)
+        return response
+
+    def _reclamar(self, usuario, clave, request, hash_peticion, ahora):
+        """``(registro, reclamada)``: crea la clave o toma una vencida; si no, la devuelve como está.
+
+        La reclamada queda ``en_proceso`` con un vencimiento corto (``IDEMPOTENCY_LOCK_SECONDS``)
+        que se extiende a ``IDEMPOTENCY_TTL_HOURS`` al guardar la respuesta.
+        """
+        vencimiento = ahora + self._ttl_reclamo()
+        try:
+            with transaction.atomic():
+                registro = ClaveIdempotencia.objects.create(
+                    usuario=usuario,
+                    clave=clave,
+                    metodo=request.method,
+                    ruta=request.path[:500],
+                    hash_peticion=hash_peticion,
+                    fecha_expiracion=vencimiento,
+                )
+            return registro, True
+        except IntegrityError:
+            pass
+
+        with transaction.atomic():
+            registro = ClaveIdempotencia.objects.select_for_update().filter(usuario=usuario, clave=clave).first()
+            if registro is None:
+                # Se liberó entre el INSERT y esta lectura: el cliente reintenta
+                return ClaveIdempotencia(hash_peticion=hash_peticion), False
+            if registro.fecha_expiracion > ahora:
+                return registro, False
+            registro.metodo = request.method
+            registro.ruta = request.path[:500]
+            registro.hash_peticion = hash_peticion
+            registro.estado = ClaveIdempotencia.ESTADO_EN_PROCESO
+            registro.status_code = None
+            registro.content_type = ""
+            registro.cuerpo = b""
+            registro.fecha_expiracion = vencimiento
+            registro.save()
+        return registro, True
+
+    @staticmethod
+    def _reclamo(registro):
+        """La fila mientras siga siendo nuestro reclamo (otro pudo tomarla si venció el plazo)."""
+        return ClaveIdempotencia.objects.filter(
+            pk=registro.pk,
+            estado=ClaveIdempotencia.ESTADO_EN_PROCESO,
+            fecha_expiracion=registro.fecha_expiracion,
+        )
+
+    def _liberar(self, registro):
+        """La respuesta no se guarda: la clave queda libre para el próximo intento."""
+        self._reclamo(registro).delete()
+
+    @staticmethod
+    def _ttl_reclamo():
+        return timedelta(seconds=float(getattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 120)))
+
+    @staticmethod
+    def _ttl():
+        return timedelta(hours=float(getattr(settings, "IDEMPOTENCY_TTL_HOURS", 24)))
+
+    def _repetir(self, registro):
+        logger.info("Idempotency-Key %s: se devuelve la respuesta guardada", registro.clave)
+        response = HttpResponse(
+            bytes(registro.cuerpo),
+            status=registro.status_code,
+            content_type=registro.content_type or None,
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    @staticmethod
+    def _usuario(request):
+        """Usuario de la sesión o, para la API, el que autentique DRF (JWT)."""
+        usuario = getattr(request, "user", None)
+        if getattr(usuario, "is_authenticated", False):
+            return usuario
+        drf_request = Request(request)
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                resultado = authentication_class().authenticate(drf_request)
+            except Exception:
+                continue
+            if resultado is not None and getattr(resultado[0], "is_authenticated", False):
+                return resultado[0]
+        return None
+
+    @staticmethod
+    def _hash(request):
+        """SHA-256 de método, ruta y cuerpo; en multipart, de los campos y nombre/tamaño de los archivos."""
+        digest = hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode())
+        if request.content_type == "multipart/form-data":
+            # request.POST deja el cuerpo parseado y DRF lo reutiliza
+            for nombre, valores in sorted(request.POST.lists()):
+                digest.update(f"{nombre}={valores!r}\n".encode())
+            for nombre, archivos in sorted(request.FILES.lists()):
+                for archivo in archivos:
+                    digest.update(f"{nombre}:{archivo.name}:{archivo.size}\n".encode())
+        else:
+            digest.update(request.body)
+        return digest.hexdigest()
@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClaveIdempotencia",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("clave", models.CharField(max_length=255)),
+                ("metodo", models.CharField(max_length=10)),
+                ("ruta", models.CharField(max_length=500)),
+                ("hash_peticion", models.CharField(help_text="SHA-256 de método, ruta y cuerpo", max_length=64)),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[("en_proceso", "En proceso"), ("completada", "Completada")],
+                        default="en_proceso",
+                        max_length=12,
+                    ),
+                ),
+                ("status_code", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("content_type", models.CharField(blank=True, max_length=100)),
+                ("cuerpo", models.BinaryField(blank=True, default=b"")),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_expiracion", models.DateTimeField()),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="claves_idempotencia",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Clave de idempotencia",
+                "verbose_name_plural": "Claves de idempotencia",
+                "db_table": "idempotencia_clave",
+                "ordering": ["-fecha_creacion"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("usuario", "clave"), name="idempotencia_usuario_clave_uniq")
+                ],
+            },
+        ),
+    ]
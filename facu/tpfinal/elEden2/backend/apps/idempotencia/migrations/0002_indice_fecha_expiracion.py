@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("idempotencia", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="claveidempotencia",
+            name="fecha_expiracion",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Las claves son un cache de respuestas con vencimiento: se borran físicamente al vencer
+# (purgar_claves_idempotencia). Según el orden de migración la tabla puede haber recibido
+# el bloqueo global de DELETE de productos.0009; se le quita sólo a esta tabla.
+DROP_DELETE_GUARD_SQL = "DROP TRIGGER IF EXISTS prevent_physical_delete ON idempotencia_clave;"
+
+RESTORE_DELETE_GUARD_SQL = """
+DO $$
+BEGIN
+    IF to_regprocedure('attach_prevent_delete_trigger(regclass)') IS NOT NULL THEN
+        PERFORM attach_prevent_delete_trigger('idempotencia_clave'::regclass);
+    END IF;
+END;
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("idempotencia", "0002_indice_fecha_expiracion"),
+        ("productos", "0009_bloqueo_delete_fisico_global"),
+    ]
+
+    operations = [
+        migrations.RunSQL(DROP_DELETE_GUARD_SQL, reverse_sql=RESTORE_DELETE_GUARD_SQL),
+    ]
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import models
+
+
+class ClaveIdempotencia(models.Model):
+    """Respuesta guardada para un ``Idempotency-Key`` de un usuario.
+
+    La fila se crea ``en_proceso`` al empezar la petición, con un vencimiento corto que
+    funciona de reclamo: mientras no venza, un duplicado recibe 409. Al terminar pasa a
+    ``completada`` (y vence a las ``IDEMPOTENCY_TTL_HOURS``) o se borra si la respuesta
+    no se guarda (5xx, 202). Sólo las ``completada`` se repiten.
+    """
+
+    ESTADO_EN_PROCESO = "en_proceso"
+    ESTADO_COMPLETADA = "completada"
+    ESTADO_CHOICES = [
+        (ESTADO_EN_PROCESO, "En proceso"),
+        (ESTADO_COMPLETADA, "Completada"),
+    ]
+
+    clave = models.CharField(max_length=255)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="claves_idempotencia",
+    )
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=500)
+    hash_peticion = models.CharField(max_length=64, help_text="SHA-256 de método, ruta y cuerpo")
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default=ESTADO_EN_PROCESO)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    cuerpo = models.BinaryField(blank=True, default=b"")
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_expiracion = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Clave de idempotencia"
+        verbose_name_plural = "Claves de idempotencia"
+        db_table = "idempotencia_clave"
+        ordering = ["-fecha_creacion"]
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "clave"], name="idempotencia_usuario_clave_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.clave} ({self.metodo} {self.ruta})"
@@ -0,0 +1,177 @@
+"""
+Tests del middleware de Idempotency-Key
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.mercadopago.services import MercadoPagoService
+from apps.servicios.models import Pago, Reserva, Servicio
+from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
+
+from .middleware import IdempotencyKeyMiddleware
+from .models import ClaveIdempotencia
+
+
+class IdempotencyKeyMiddlewareTests(APITestCase):
+    def setUp(self):
+        persona = Persona.objects.create(
+            nombre="Ana",
+            apellido="Pérez",
+            email="ana@example.com",
+            telefono="123456789",
+            calle="Calle",
+            numero="1",
+            nro_documento="30000000",
+            genero=Genero.objects.create(genero="Otro"),
+            tipo_documento=TipoDocumento.objects.create(tipo="DNI"),
+            localidad=Localidad.objects.create(cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones"),
+        )
+        self.user = User.objects.create_user("ana", "ana@example.com", "pass1234")
+        self.reserva = Reserva.objects.create(
+            cliente=Cliente.objects.create(persona=persona),
+            servicio=Servicio.objects.create(nombre="Poda"),
+            fecha_cita=timezone.now() + timedelta(days=3),
+            direccion="Calle 1",
+        )
+        Pago.objects.create(reserva=self.reserva, monto_sena=Decimal("5000.00"))
+        self.url = reverse("mercadopago:confirmar_pago_sena", args=[self.reserva.id_reserva])
+        # El middleware ve el JWT del header, no force_authenticate
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def _registrar_pago(self, payment_id="111"):
+        with patch("apps.mercadopago.services.MercadoPagoService.notificar"):
+            MercadoPagoService.registrar(
+                {
+                    "id": int(payment_id),
+                    "status": "approved",
+                    "external_reference": f"SENA-{self.reserva.id_reserva}",
+                    "transaction_amount": 5000.0,
+                }
+            )
+
+    def _confirmar(self, clave, payment_id="111"):
+        return self.client.post(self.url, {"payment_id": payment_id}, format="json", HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_replay_returns_stored_response_without_running_the_view(self):
+        self._registrar_pago()
+        primera = self._confirmar("clave-1")
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+
+        # Si la vista se ejecutara de nuevo vería la seña pendiente y respondería otra cosa
+        Pago.objects.filter(reserva=self.reserva).update(estado_pago_sena="pendiente")
+        segunda = self._confirmar("clave-1")
+
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda["Idempotent-Replayed"], "true")
+        self.assertEqual(segunda.json(), primera.json())
+        self.assertEqual(ClaveIdempotencia.objects.get().status_code, 200)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self._registrar_pago()
+        self._confirmar("clave-1")
+
+        response = self._confirmar("clave-1", payment_id="999")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_provisional_202_is_not_stored(self):
+        response = self._confirmar("clave-1")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self._registrar_pago()
+        response = self._confirmar("clave-1")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(ClaveIdempotencia.objects.get().estado, ClaveIdempotencia.ESTADO_COMPLETADA)
+
+    def test_multipart_body_still_reaches_the_view(self):
+        self._registrar_pago()
+
+        response = self.client.post(
+            self.url, {"payment_id": "111"}, format="multipart", HTTP_IDEMPOTENCY_KEY="clave-1"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["payment_id"], "111")
+
+
+class IdempotencyKeyFlowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ana", "ana@example.com", "pass1234")
+        self.factory = RequestFactory()
+
+    def _post(self, middleware, clave="clave-1"):
+        request = self.factory.post(
+            "/api/v1/pagos/", {"monto": 10}, content_type="application/json", HTTP_IDEMPOTENCY_KEY=clave
+        )
+        request.user = self.user
+        return middleware(request)
+
+    def test_view_runs_outside_the_claim_transaction_and_duplicates_get_409(self):
+        transacciones_afuera = len(connection.atomic_blocks)
+        vista = {}
+
+        def get_response(request):
+            vista["transacciones"] = len(connection.atomic_blocks)
+            vista["duplicado"] = self._post(middleware)
+            return JsonResponse({"ok": True}, status=201)
+
+        middleware = IdempotencyKeyMiddleware(get_response)
+        response = self._post(middleware)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(vista["transacciones"], transacciones_afuera)
+        self.assertEqual(vista["duplicado"].status_code, 409)
+        registro = ClaveIdempotencia.objects.get()
+        self.assertEqual((registro.estado, registro.status_code), (ClaveIdempotencia.ESTADO_COMPLETADA, 201))
+        self.assertGreater(registro.fecha_expiracion, timezone.now() + timedelta(hours=1))
+
+    def test_server_error_frees_the_key_and_abandoned_claims_expire(self):
+        respuestas = [JsonResponse({}, status=500), JsonResponse({}, status=201)]
+        middleware = IdempotencyKeyMiddleware(lambda request: respuestas.pop(0))
+
+        self.assertEqual(self._post(middleware).status_code, 500)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+        self.assertEqual(self._post(middleware).status_code, 201)
+
+        # Reclamo de un proceso que murió antes de responder
+        ClaveIdempotencia.objects.create(
+            usuario=self.user,
+            clave="clave-2",
+            metodo="POST",
+            ruta="/api/v1/pagos/",
+            hash_peticion="-",
+            fecha_expiracion=timezone.now() - timedelta(seconds=1),
+        )
+        middleware = IdempotencyKeyMiddleware(lambda request: JsonResponse({}, status=201))
+        self.assertEqual(self._post(middleware, "clave-2").status_code, 201)
+
+    def test_purge_deletes_only_expired_keys(self):
+        for clave, vence in (("vieja", -1), ("vigente", 1)):
+            ClaveIdempotencia.objects.create(
+                usuario=self.user,
+                clave=clave,
+                metodo="POST",
+                ruta="/api/v1/pagos/",
+                hash_peticion="-",
+                fecha_expiracion=timezone.now() + timedelta(hours=vence),
+            )
+
+        call_command("purgar_claves_idempotencia", "--lote", "1", stdout=StringIO())
+
+        self.assertEqual(list(ClaveIdempotencia.objects.values_list("clave", flat=True)), ["vigente"])
@@ -2,5 +2,30 @@
 Admin para la app de MercadoPago
 """
 
-# No se requiere admin por el momento, ya que la configuración
-# de pagos se maneja desde ConfiguracionPago en la app de servicios
+from django.contrib import admin
+
+from .models import PagoMercadoPago, PreferenciaMercadoPago, VerificacionPago
+
+
+@admin.register(PagoMercadoPago)
+class PagoMercadoPagoAdmin(admin.ModelAdmin):
+    list_display = ("payment_id", "reserva", "tipo", "status", "transaction_amount", "fecha_aplicacion")
+    list_filter = ("tipo", "status")
+    search_fields = ("payment_id", "external_reference")
+    readonly_fields = ("fecha_creacion", "fecha_actualizacion")
+
+
+@admin.register(VerificacionPago)
+class VerificacionPagoAdmin(admin.ModelAdmin):
+    list_display = ("id", "payment_id", "external_reference", "reserva", "estado", "intentos", "proximo_intento")
+    list_filter = ("estado", "tipo")
+    search_fields = ("payment_id", "external_reference")
+    readonly_fields = ("pago_mercadopago", "fecha_creacion", "fecha_actualizacion", "fecha_fin")
+
+
+@admin.register(PreferenciaMercadoPago)
+class PreferenciaMercadoPagoAdmin(admin.ModelAdmin):
+    list_display = ("preference_id", "reserva", "tipo", "monto", "fecha_expiracion")
+    list_filter = ("tipo",)
+    search_fields = ("preference_id",)
+    readonly_fields = ("firma", "fecha_creacion", "fecha_actualizacion")
@@ -0,0 +1,313 @@
+"""
+Benchmark de checkouts concurrentes de punta a punta contra el simulador de MercadoPago:
+    python manage.py benchmark_checkout --checkouts 100 --concurrency 100 --visible-after 1 --latency-ms 80
+
+Cada checkout hace lo que hace el frontend: pide la preferencia de seña
+(``crear-pago-sena``), "paga" en el ``init_point`` del simulador y consulta
+``confirmar-pago-sena`` hasta que el pago queda aplicado por el webhook (o, con
+``--no-webhook``, por el worker de verificaciones).
+
+Por defecto levanta en el mismo proceso el simulador y un servidor WSGI con hilos
+del backend apuntado a él (``MERCADOPAGO_API_BASE_URL``). Con ``--api-url`` se usa un
+backend ya levantado, que tiene que apuntar al simulador (``--simulator-url`` o el
+embebido en ``--simulator-port``) y compartir ``MERCADOPAGO_WEBHOOK_SECRET``.
+
+Las requests concurrentes usan conexiones propias, así que los datos no pueden
+crearse en una transacción que se revierte como en ``benchmark_clima``: escribe en
+la base configurada y por eso se niega a correr salvo con ``DEBUG`` o
+``--permitir-escritura``. Al terminar da de baja lo creado (reservas canceladas,
+clientes, usuarios y el servicio "Benchmark checkout" inactivos): el DELETE físico
+está bloqueado en esas tablas. Los clientes se reutilizan en la próxima corrida.
+"""
+
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from wsgiref.simple_server import WSGIRequestHandler
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, get_internal_wsgi_application
+from django.db import close_old_connections, connections
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.mercadopago.services import MercadoPagoService
+from apps.mercadopago.simulador import ConfiguracionSimulador, SimuladorMercadoPago, iniciar_en_segundo_plano
+from apps.mercadopago.verificaciones import VerificadorPagos
+from apps.servicios.models import Pago, Reserva, Servicio
+from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
+
+FASES = ("preferencia", "pago", "confirmacion", "total")
+
+
+def _limitar(aplicacion, workers):
+    """La aplicación WSGI atendiendo como mucho ``workers`` requests a la vez; el resto espera."""
+    semaforo = threading.BoundedSemaphore(max(1, workers))
+
+    def limitada(environ, start_response):
+        with semaforo:
+            return aplicacion(environ, start_response)
+
+    return limitada
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    """Sin una línea de log por request: con cientos de checkouts taparía el reporte."""
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Mide checkouts concurrentes (preferencia, pago y confirmación) contra un MercadoPago simulado."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=100, help="Checkouts en curso a la vez.")
+        parser.add_argument("--clientes", type=int, default=20, help="Clientes distintos entre los que se reparten.")
+        parser.add_argument("--monto-sena", type=Decimal, default=Decimal("5000.00"))
+        parser.add_argument("--visible-after", type=float, default=1, help="Segundos hasta que MercadoPago ve el pago.")
+        parser.add_argument("--latency-ms", type=float, default=50, help="Latencia de cada llamada al simulador.")
+        parser.add_argument("--error-rate", type=float, default=0)
+        parser.add_argument("--poll-interval", type=float, default=0.5, help="Espera entre consultas de confirmación.")
+        parser.add_argument("--timeout", type=float, default=60, help="Segundos máximos por checkout.")
+        parser.add_argument(
+            "--no-webhook",
+            action="store_true",
+            help="El simulador no notifica: los pagos los resuelve el worker de verificaciones.",
+        )
+        parser.add_argument("--api-url", help="Backend ya levantado (p. ej. http://127.0.0.1:8000/api/v1).")
+        parser.add_argument("--simulator-url", help="Simulador ya levantado (p. ej. http://127.0.0.1:8090).")
+        parser.add_argument("--simulator-port", type=int, default=0, help="Puerto del simulador embebido.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=16,
+            help="Requests que atiende a la vez el backend embebido (como los workers de gunicorn); "
+            "cada uno usa una conexión a la base.",
+        )
+        parser.add_argument(
+            "--permitir-escritura",
+            action="store_true",
+            help="Corre aunque DEBUG esté apagado: crea reservas, clientes y usuarios en la base configurada.",
+        )
+
+    def _crear_datos(self, total, cantidad_clientes, monto_sena):
+        localidad = Localidad.objects.filter(nombre_localidad="Posadas").first() or Localidad.objects.create(
+            cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones"
+        )
+        genero = Genero.objects.get_or_create(genero="Otro")[0]
+        tipo_documento = TipoDocumento.objects.get_or_create(tipo="DNI")[0]
+        servicio = Servicio.objects.get_or_create(nombre="Benchmark checkout")[0]
+        Servicio.objects.filter(pk=servicio.pk).update(activo=True)
+
+        clientes = []
+        for indice in range(max(1, cantidad_clientes)):
+            email = f"benchmark-checkout-{indice}@example.com"
+            usuario = User.objects.filter(username=email).first() or User.objects.create_user(
+                email, email, secrets.token_urlsafe(12)
+            )
+            persona = Persona.objects.filter(email=email).first() or Persona.objects.create(
+                nombre="Benchmark",
+                apellido=f"Checkout {indice}",
+                email=email,
+                telefono="+5493764000000",
+                calle="Benchmark",
+                numero=str(indice),
+                nro_documento=f"BENCH-CHK-{indice}",
+                user=usuario,
+                genero=genero,
+                tipo_documento=tipo_documento,
+                localidad=localidad,
+            )
+            cliente = Cliente.objects.filter(persona=persona).first() or Cliente.objects.create(persona=persona)
+            # La corrida anterior los dejó dados de baja
+            User.objects.filter(pk=usuario.pk).update(is_active=True)
+            Cliente.objects.filter(pk=cliente.pk).update(activo=True)
+            clientes.append((cliente, str(AccessToken.for_user(usuario))))
+
+        checkouts = []
+        ahora = timezone.now()
+        for indice in range(total):
+            cliente, token = clientes[indice % len(clientes)]
+            reserva = Reserva.objects.create(
+                cliente=cliente,
+                servicio=servicio,
+                fecha_cita=ahora + timedelta(days=7, hours=indice % 8),
+                direccion=f"Benchmark {indice}",
+            )
+            Pago.objects.create(reserva=reserva, monto_sena=monto_sena)
+            checkouts.append((reserva.id_reserva, token))
+        return checkouts
+
+    def _dar_de_baja(self, reserva_ids):
+        """Baja lógica de lo usado por el benchmark (el DELETE físico está bloqueado por trigger)."""
+        close_old_connections()
+        canceladas = Reserva.objects.filter(pk__in=reserva_ids).update(estado="cancelada")
+        clientes = Cliente.objects.filter(persona__email__startswith="benchmark-checkout-")
+        User.objects.filter(pk__in=clientes.values("persona__user_id")).update(is_active=False)
+        clientes.update(activo=False)
+        Servicio.objects.filter(nombre="Benchmark checkout").update(activo=False)
+        self.stdout.write(f"Datos del benchmark dados de baja: {canceladas} reservas canceladas")
+
+    def _checkout(self, api_url, reserva_id, token, poll_interval, limite):
+        sesion = requests.Session()
+        sesion.headers["Authorization"] = f"Bearer {token}"
+        tiempos = {}
+        inicio = time.perf_counter()
+        try:
+            respuesta = sesion.post(f"{api_url}/mercadopago/reservas/{reserva_id}/crear-pago-sena/", json={}, timeout=limite)
+            if respuesta.status_code != 200:
+                return {"error": f"preferencia HTTP {respuesta.status_code}"}
+            tiempos["preferencia"] = time.perf_counter() - inicio
+
+            pagado = time.perf_counter()
+            respuesta = requests.post(respuesta.json()["init_point"], json={}, timeout=limite)
+            if respuesta.status_code != 201:
+                return {"error": f"pago HTTP {respuesta.status_code}"}
+            payment_id = respuesta.json()["id"]
+            tiempos["pago"] = time.perf_counter() - pagado
+
+            confirmando, consultas = time.perf_counter(), 0
+            url = f"{api_url}/mercadopago/reservas/{reserva_id}/confirmar-pago-sena/"
+            while True:
+                consultas += 1
+                respuesta = sesion.post(url, json={"payment_id": str(payment_id)}, timeout=limite)
+                if respuesta.status_code == 200:
+                    break
+                if respuesta.status_code != 202:
+                    return {"error": f"confirmación HTTP {respuesta.status_code}"}
+                if time.perf_counter() - inicio > limite:
+                    return {"error": "timeout"}
+                time.sleep(poll_interval)
+            tiempos["confirmacion"] = time.perf_counter() - confirmando
+        except requests.RequestException as exc:
+            return {"error": type(exc).__name__}
+        finally:
+            sesion.close()
+        tiempos["total"] = time.perf_counter() - inicio
+        return {"tiempos": tiempos, "consultas": consultas}
+
+    def _worker(self, detener):
+        """Verificaciones en un hilo, como ``verificar_pagos --loop``."""
+        try:
+            while not detener.is_set():
+                if not sum(VerificadorPagos.process_batch().values()):
+                    detener.wait(0.2)
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        if not 0 <= options["error_rate"] <= 1:
+            raise CommandError("--error-rate debe estar entre 0 y 1.")
+        if not settings.DEBUG and not options["permitir_escritura"]:
+            raise CommandError(
+                "El benchmark crea reservas, clientes y usuarios en la base configurada: "
+                "sólo corre con DEBUG=True o con --permitir-escritura."
+            )
+        if options.get("api_url") and options["no_webhook"]:
+            self.stdout.write("Con --api-url el worker de verificaciones (verificar_pagos --loop) tiene que estar corriendo.")
+
+        servidores = []
+        api_url = (options.get("api_url") or "").rstrip("/")
+        simulador_url = (options.get("simulator_url") or "").rstrip("/")
+        secreto = getattr(settings, "MERCADOPAGO_WEBHOOK_SECRET", "") if api_url else secrets.token_hex(16)
+
+        if not api_url:
+            backend = ThreadedWSGIServer(("127.0.0.1", 0), _HandlerSilencioso, allow_reuse_address=False)
+            backend.daemon_threads = True
+            backend.set_app(_limitar(get_internal_wsgi_application(), options["workers"]))
+            threading.Thread(target=backend.serve_forever, daemon=True).start()
+            servidores.append(backend)
+            api_url = f"http://127.0.0.1:{backend.server_address[1]}/api/v1"
+
+        simulador = None
+        if not simulador_url:
+            simulador = SimuladorMercadoPago(
+                ConfiguracionSimulador(
+                    visible_despues_s=max(0.0, options["visible_after"]),
+                    latencia_ms=max(0.0, options["latency_ms"]),
+                    tasa_error=options["error_rate"],
+                    webhook_url="" if options["no_webhook"] else f"{api_url}/mercadopago/webhook/",
+                    webhook_secret=secreto,
+                )
+            )
+            servidor_simulador = iniciar_en_segundo_plano(simulador, port=options["simulator_port"])
+            servidores.append(servidor_simulador)
+            simulador_url = f"http://127.0.0.1:{servidor_simulador.server_address[1]}"
+
+        detener = threading.Event()
+        ajustes = override_settings(MERCADOPAGO_API_BASE_URL=simulador_url, MERCADOPAGO_WEBHOOK_SECRET=secreto)
+        try:
+            with ajustes:
+                MercadoPagoService.reset_sdk()
+                if options["no_webhook"] and not options.get("api_url"):
+                    threading.Thread(target=self._worker, args=(detener,), daemon=True).start()
+                self._correr(api_url, simulador_url, simulador, options)
+        finally:
+            detener.set()
+            for servidor in servidores:
+                servidor.shutdown()
+                servidor.server_close()
+            MercadoPagoService.reset_sdk()
+
+    def _correr(self, api_url, simulador_url, simulador, options):
+        checkouts = self._crear_datos(max(1, options["checkouts"]), options["clientes"], options["monto_sena"])
+        try:
+            self._medir(api_url, simulador_url, simulador, options, checkouts)
+        finally:
+            self._dar_de_baja([reserva_id for reserva_id, _ in checkouts])
+
+    def _medir(self, api_url, simulador_url, simulador, options, checkouts):
+        total = len(checkouts)
+        self.stdout.write(
+            f"{total} checkouts, {options['concurrency']} concurrentes, backend {api_url}, simulador {simulador_url}"
+        )
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options["concurrency"])) as pool:
+            resultados = list(
+                pool.map(
+                    lambda checkout: self._checkout(
+                        api_url, checkout[0], checkout[1], options["poll_interval"], options["timeout"]
+                    ),
+                    checkouts,
+                )
+            )
+        duracion = time.perf_counter() - inicio
+        close_old_connections()
+
+        exitosos = [resultado for resultado in resultados if "tiempos" in resultado]
+        errores = Counter(resultado["error"] for resultado in resultados if "error" in resultado)
+        aplicados = Pago.objects.filter(
+            reserva_id__in=[reserva_id for reserva_id, _ in checkouts], estado_pago_sena="sena_pagada"
+        ).count()
+        self.stdout.write(
+            f"completados={len(exitosos)}/{total}  aplicados={aplicados}  duración={duracion:.1f} s  "
+            f"throughput={len(exitosos) / duracion:.1f} checkouts/s"
+        )
+        for fase in FASES if exitosos else ():
+            tiempos = np.array([resultado["tiempos"][fase] for resultado in exitosos]) * 1000
+            p50, p95, p99 = np.percentile(tiempos, [50, 95, 99])
+            self.stdout.write(
+                f"{fase:<13} p50={p50:9.1f} ms  p95={p95:9.1f} ms  p99={p99:9.1f} ms  max={tiempos.max():9.1f} ms"
+            )
+        if exitosos:
+            self.stdout.write(f"consultas de confirmación por checkout: {np.mean([r['consultas'] for r in exitosos]):.1f}")
+        if errores:
+            self.stdout.write(self.style.WARNING("Errores: " + ", ".join(f"{k}={v}" for k, v in errores.most_common())))
+
+        if simulador is not None:
+            estadisticas = dict(simulador.estadisticas)
+        else:
+            estadisticas = requests.get(f"{simulador_url}/__simulador/estadisticas", timeout=10).json()
+        self.stdout.write("Llamadas al simulador: " + ", ".join(f"{k}={v}" for k, v in sorted(estadisticas.items())))
@@ -0,0 +1,71 @@
+"""
+Reconcilia con MercadoPago todos los pagos de reservas con la seña o el pago final pendientes:
+    python manage.py reconciliar_pagos --concurrencia 4 --por-segundo 10
+
+Busca cada referencia (SENA-{id}, RESERVA-{id}, FINAL-{id}) en lotes, aplica en bloque
+los pagos aprobados y lista las discrepancias. Con --dry-run no guarda nada.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.mercadopago.reconciliacion import ConciliadorPagos
+
+
+class Command(BaseCommand):
+    help = "Busca en MercadoPago los pagos pendientes de todas las reservas, aplica los aprobados y reporta discrepancias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Pagos por lote (por defecto MERCADOPAGO_RECONCILIACION_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--concurrencia",
+            type=int,
+            default=None,
+            help="Búsquedas simultáneas (por defecto MERCADOPAGO_RECONCILIACION_CONCURRENCIA).",
+        )
+        parser.add_argument(
+            "--por-segundo",
+            type=float,
+            default=None,
+            help="Máximo de llamadas por segundo a MercadoPago; 0 sin límite "
+            "(por defecto MERCADOPAGO_RECONCILIACION_POR_SEGUNDO).",
+        )
+        parser.add_argument("--reserva", type=int, action="append", help="Sólo estas reservas (se puede repetir).")
+        parser.add_argument("--dry-run", action="store_true", help="Muestra qué se aplicaría sin persistir cambios.")
+        parser.add_argument("--json", action="store_true", help="Imprime el reporte completo como JSON.")
+
+    def handle(self, *args, **options):
+        conciliador = ConciliadorPagos(
+            batch_size=options.get("batch_size"),
+            concurrencia=options.get("concurrencia"),
+            por_segundo=options.get("por_segundo"),
+            dry_run=bool(options.get("dry_run")),
+        )
+        reporte = conciliador.ejecutar(options.get("reserva"))
+
+        if options.get("json"):
+            self.stdout.write(json.dumps(reporte, ensure_ascii=False, indent=2))
+            return
+
+        for item in reporte["discrepancias"]:
+            linea = f"Reserva #{item['reserva_id']} ({item['referencia']}): {item['motivo']}"
+            if item["payment_id"]:
+                linea += f" [pago {item['payment_id']}]"
+            if item["detalle"]:
+                linea += f" - {item['detalle']}"
+            self.stdout.write(self.style.WARNING(linea))
+
+        prefijo = "[dry-run] " if options.get("dry_run") else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefijo}Pendientes: {reporte['pendientes']} | consultas: {reporte['consultas']} | "
+                f"pagos encontrados: {reporte['encontrados']} | aplicados: {reporte['aplicados']} | "
+                f"discrepancias: {len(reporte['discrepancias'])}"
+            )
+        )
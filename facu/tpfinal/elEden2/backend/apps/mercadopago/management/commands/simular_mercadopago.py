@@ -0,0 +1,79 @@
+"""
+Levanta el simulador local de la API de MercadoPago:
+    python manage.py simular_mercadopago --port 8090 --visible-after 2 \
+        --webhook-url http://127.0.0.1:8000/api/v1/mercadopago/webhook/
+
+Después apuntar el backend a él:
+    MERCADOPAGO_API_BASE_URL=http://127.0.0.1:8090
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.mercadopago.simulador import ConfiguracionSimulador, SimuladorMercadoPago, iniciar_servidor
+
+
+class Command(BaseCommand):
+    help = "Simula los endpoints de preferencias y pagos de MercadoPago (con webhooks firmados) para pruebas de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8090)
+        parser.add_argument(
+            "--visible-after",
+            type=float,
+            default=0,
+            help="Segundos hasta que un pago aparece en la API y se manda su webhook.",
+        )
+        parser.add_argument("--latency-ms", type=float, default=0, help="Latencia agregada a cada llamada a la API.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Fracción de llamadas que fallan (0 a 1).")
+        parser.add_argument("--error-status", type=int, default=500, help="Status de las fallas simuladas (500, 429...).")
+        parser.add_argument(
+            "--payment-status",
+            default="approved",
+            help="Estado de los pagos si el checkout no pide otro con ?status=.",
+        )
+        parser.add_argument(
+            "--webhook-url",
+            default=getattr(settings, "MERCADOPAGO_NOTIFICATION_URL", ""),
+            help="Dónde notificar los pagos (por defecto MERCADOPAGO_NOTIFICATION_URL; vacío: sin webhooks).",
+        )
+        parser.add_argument(
+            "--webhook-secret",
+            default=getattr(settings, "MERCADOPAGO_WEBHOOK_SECRET", ""),
+            help="Secreto con el que se firman los webhooks (por defecto MERCADOPAGO_WEBHOOK_SECRET).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Semilla de las fallas simuladas.")
+        parser.add_argument("--verbose-requests", action="store_true", help="Loguea cada request recibido.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["error_rate"] <= 1:
+            raise CommandError("--error-rate debe estar entre 0 y 1.")
+        simulador = SimuladorMercadoPago(
+            ConfiguracionSimulador(
+                visible_despues_s=max(0.0, options["visible_after"]),
+                latencia_ms=max(0.0, options["latency_ms"]),
+                tasa_error=options["error_rate"],
+                status_error=options["error_status"],
+                estado_pago=options["payment_status"],
+                webhook_url=options["webhook_url"],
+                webhook_secret=options["webhook_secret"],
+                semilla=options["seed"],
+            )
+        )
+        servidor = iniciar_servidor(
+            simulador, options["host"], options["port"], silencioso=not options["verbose_requests"]
+        )
+        host, port = servidor.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"Simulador de MercadoPago escuchando en http://{host}:{port}"))
+        self.stdout.write(f"  MERCADOPAGO_API_BASE_URL=http://{host}:{port}")
+        self.stdout.write(f"  Webhooks: {options['webhook_url'] or 'desactivados'}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            self.stdout.write("Requests atendidos: " + json.dumps(simulador.estadisticas, ensure_ascii=False))
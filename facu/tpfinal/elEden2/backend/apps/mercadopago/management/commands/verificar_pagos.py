@@ -0,0 +1,56 @@
+"""
+Resuelve las verificaciones de pago encoladas por los endpoints de confirmación.
+Con --loop queda corriendo como worker (servicio mp-verificador en docker-compose):
+    python manage.py verificar_pagos --loop --interval 2
+
+Cada lote hace una sola búsqueda en MercadoPago para todas las verificaciones
+vencidas; las que siguen sin aparecer se reintentan con backoff exponencial.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.mercadopago.verificaciones import VerificadorPagos
+
+
+class Command(BaseCommand):
+    help = "Consulta a MercadoPago los pagos pendientes de verificación y los aplica a las reservas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Sigue procesando indefinidamente; espera --interval segundos cuando no hay verificaciones vencidas.",
+        )
+        parser.add_argument("--interval", type=float, default=2, help="Espera entre vueltas sin trabajo.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Verificaciones por lote (por defecto MERCADOPAGO_VERIFICACION_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        interval = max(0.1, options["interval"])
+        totales = {"aprobados": 0, "rechazados": 0, "reintentos": 0, "agotados": 0}
+        while True:
+            stats = VerificadorPagos.process_batch(options.get("batch_size"))
+            procesados = sum(stats.values())
+            for clave, valor in stats.items():
+                totales[clave] += valor
+            if procesados and options.get("loop"):
+                self._reportar(stats)
+            # Los reintentos quedan con proximo_intento a futuro: no vuelven a tomarse en esta vuelta
+            if procesados:
+                continue
+            if not options.get("loop"):
+                self._reportar(totales)
+                return
+            time.sleep(interval)
+
+    def _reportar(self, stats):
+        self.stdout.write(
+            f"Aprobados: {stats['aprobados']} | rechazados: {stats['rechazados']} | "
+            f"reintentos: {stats['reintentos']} | agotados: {stats['agotados']}"
+        )
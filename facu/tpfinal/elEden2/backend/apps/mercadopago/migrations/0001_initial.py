@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("servicios", "0037_catalogos_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PagoMercadoPago",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("payment_id", models.CharField(max_length=200, unique=True)),
+                (
+                    "tipo",
+                    models.CharField(
+                        blank=True,
+                        choices=[("sena", "Seña"), ("final", "Pago final"), ("reserva", "Seña de pre-reserva")],
+                        max_length=10,
+                    ),
+                ),
+                ("external_reference", models.CharField(blank=True, max_length=100)),
+                (
+                    "status",
+                    models.CharField(
+                        help_text="Estado informado por MercadoPago (approved, pending, ...)", max_length=30
+                    ),
+                ),
+                ("status_detail", models.CharField(blank=True, max_length=100)),
+                ("transaction_amount", models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ("datos", models.JSONField(blank=True, default=dict)),
+                (
+                    "fecha_aplicacion",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Cuándo se impactó en el Pago de la reserva (vacío si todavía no)",
+                        null=True,
+                    ),
+                ),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+                (
+                    "reserva",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="pagos_mercadopago",
+                        to="servicios.reserva",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pago de MercadoPago",
+                "verbose_name_plural": "Pagos de MercadoPago",
+                "db_table": "mercadopago_pago",
+                "ordering": ["-fecha_creacion"],
+                "indexes": [models.Index(fields=["reserva", "tipo"], name="mp_pago_reserva_tipo_idx")],
+            },
+        ),
+    ]
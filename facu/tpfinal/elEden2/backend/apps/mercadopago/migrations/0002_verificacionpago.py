@@ -0,0 +1,89 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mercadopago", "0001_initial"),
+        ("servicios", "0037_catalogos_soft_delete"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VerificacionPago",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "tipo",
+                    models.CharField(
+                        blank=True,
+                        choices=[("sena", "Seña"), ("final", "Pago final"), ("reserva", "Seña de pre-reserva")],
+                        max_length=10,
+                    ),
+                ),
+                ("payment_id", models.CharField(blank=True, max_length=200)),
+                ("external_reference", models.CharField(blank=True, max_length=100)),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("pendiente", "Pendiente"),
+                            ("verificando", "Verificando"),
+                            ("aprobado", "Aprobado"),
+                            ("rechazado", "Rechazado"),
+                            ("agotado", "Sin respuesta (reintentos agotados)"),
+                        ],
+                        default="pendiente",
+                        max_length=12,
+                    ),
+                ),
+                ("intentos", models.PositiveSmallIntegerField(default=0)),
+                ("proximo_intento", models.DateTimeField(default=django.utils.timezone.now)),
+                ("ultimo_error", models.TextField(blank=True)),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+                ("fecha_fin", models.DateTimeField(blank=True, null=True)),
+                (
+                    "pago_mercadopago",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="verificaciones",
+                        to="mercadopago.pagomercadopago",
+                    ),
+                ),
+                (
+                    "reserva",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="verificaciones_pago",
+                        to="servicios.reserva",
+                    ),
+                ),
+                (
+                    "solicitado_por",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="verificaciones_pago",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Verificación de pago",
+                "verbose_name_plural": "Verificaciones de pago",
+                "db_table": "mercadopago_verificacion",
+                "ordering": ["proximo_intento", "id"],
+                "indexes": [models.Index(fields=["estado", "proximo_intento"], name="mp_verif_pendientes_idx")],
+            },
+        ),
+    ]
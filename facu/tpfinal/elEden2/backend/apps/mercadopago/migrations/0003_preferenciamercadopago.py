@@ -0,0 +1,50 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mercadopago", "0002_verificacionpago"),
+        ("servicios", "0037_catalogos_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PreferenciaMercadoPago",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("sena", "Seña"), ("final", "Pago final"), ("reserva", "Seña de pre-reserva")],
+                        max_length=10,
+                    ),
+                ),
+                ("monto", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("firma", models.CharField(max_length=64)),
+                ("preference_id", models.CharField(max_length=200)),
+                ("init_point", models.URLField(blank=True, max_length=500)),
+                ("sandbox_init_point", models.URLField(blank=True, max_length=500)),
+                ("fecha_expiracion", models.DateTimeField()),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+                (
+                    "reserva",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="preferencias_mercadopago",
+                        to="servicios.reserva",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Preferencia de MercadoPago",
+                "verbose_name_plural": "Preferencias de MercadoPago",
+                "db_table": "mercadopago_preferencia",
+                "constraints": [
+                    models.UniqueConstraint(fields=("reserva", "tipo"), name="mp_preferencia_reserva_tipo_uniq")
+                ],
+            },
+        ),
+    ]
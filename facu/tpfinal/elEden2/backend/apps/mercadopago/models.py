@@ -1,7 +1,180 @@
 """
-Modelos para la app de MercadoPago
-Por ahora no se necesitan modelos adicionales,
-ya que toda la información de pagos se guarda en el modelo Reserva.
+Modelos para la app de MercadoPago.
+
+Los montos y estados del pago de cada reserva siguen en ``servicios.Pago``; acá
+sólo se guarda lo que MercadoPago informa de cada pago (webhook o consulta), que
+es lo que leen los endpoints de confirmación, las verificaciones pendientes
+para los pagos que todavía no se informaron y la última preferencia de checkout
+de cada reserva, para no crear una nueva cada vez que se abre el pago.
 """
 
-# No se requieren modelos adicionales por el momento
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class PagoMercadoPago(models.Model):
+    """Último estado conocido de un pago de MercadoPago."""
+
+    TIPO_SENA = "sena"
+    TIPO_FINAL = "final"
+    TIPO_RESERVA = "reserva"
+    TIPO_CHOICES = [
+        (TIPO_SENA, "Seña"),
+        (TIPO_FINAL, "Pago final"),
+        (TIPO_RESERVA, "Seña de pre-reserva"),
+    ]
+
+    # external_reference de las preferencias: SENA-{id}, FINAL-{id}, RESERVA-{id}
+    PREFIJOS = {"SENA": TIPO_SENA, "FINAL": TIPO_FINAL, "RESERVA": TIPO_RESERVA}
+
+    payment_id = models.CharField(max_length=200, unique=True)
+    reserva = models.ForeignKey(
+        "servicios.Reserva",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="pagos_mercadopago",
+    )
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, blank=True)
+    external_reference = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=30, help_text="Estado informado por MercadoPago (approved, pending, ...)")
+    status_detail = models.CharField(max_length=100, blank=True)
+    transaction_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    datos = models.JSONField(default=dict, blank=True)
+    fecha_aplicacion = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Cuándo se impactó en el Pago de la reserva (vacío si todavía no)",
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Pago de MercadoPago"
+        verbose_name_plural = "Pagos de MercadoPago"
+        db_table = "mercadopago_pago"
+        ordering = ["-fecha_creacion"]
+        indexes = [
+            models.Index(fields=["reserva", "tipo"], name="mp_pago_reserva_tipo_idx"),
+        ]
+
+    def __str__(self):
+        return f"Pago MP {self.payment_id} ({self.status})"
+
+    @property
+    def aprobado(self):
+        return self.status == "approved"
+
+    @property
+    def en_proceso(self):
+        return self.status in ("pending", "in_process", "authorized")
+
+    @classmethod
+    def parse_referencia(cls, external_reference):
+        """``"SENA-12"`` → ``("sena", 12)``; ``(None, None)`` si no es de una reserva."""
+        prefijo, _, numero = (external_reference or "").partition("-")
+        tipo = cls.PREFIJOS.get(prefijo.upper())
+        if not tipo or not numero.isdigit():
+            return None, None
+        return tipo, int(numero)
+
+
+class VerificacionPago(models.Model):
+    """Trabajo en segundo plano que consulta a MercadoPago un pago todavía no informado.
+
+    Lo procesa ``manage.py verificar_pagos``; se identifica por ``payment_id`` o, si el
+    frontend no lo tiene, por ``external_reference``.
+    """
+
+    ESTADO_PENDIENTE = "pendiente"
+    ESTADO_VERIFICANDO = "verificando"
+    ESTADO_APROBADO = "aprobado"
+    ESTADO_RECHAZADO = "rechazado"
+    ESTADO_AGOTADO = "agotado"
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_VERIFICANDO, "Verificando"),
+        (ESTADO_APROBADO, "Aprobado"),
+        (ESTADO_RECHAZADO, "Rechazado"),
+        (ESTADO_AGOTADO, "Sin respuesta (reintentos agotados)"),
+    ]
+    ESTADOS_ACTIVOS = (ESTADO_PENDIENTE, ESTADO_VERIFICANDO)
+
+    reserva = models.ForeignKey(
+        "servicios.Reserva",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="verificaciones_pago",
+    )
+    tipo = models.CharField(max_length=10, choices=PagoMercadoPago.TIPO_CHOICES, blank=True)
+    payment_id = models.CharField(max_length=200, blank=True)
+    external_reference = models.CharField(max_length=100, blank=True)
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    pago_mercadopago = models.ForeignKey(
+        PagoMercadoPago,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="verificaciones",
+    )
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="verificaciones_pago",
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Verificación de pago"
+        verbose_name_plural = "Verificaciones de pago"
+        db_table = "mercadopago_verificacion"
+        ordering = ["proximo_intento", "id"]
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento"], name="mp_verif_pendientes_idx"),
+        ]
+
+    def __str__(self):
+        return f"Verificación {self.pk} - {self.payment_id or self.external_reference} ({self.estado})"
+
+
+class PreferenciaMercadoPago(models.Model):
+    """Última preferencia de checkout creada para el pago ``tipo`` de una reserva.
+
+    ``firma`` es el hash del contenido enviado a MercadoPago: si cambia el monto, el
+    pagador o las URLs, la preferencia guardada deja de servir.
+    """
+
+    reserva = models.ForeignKey(
+        "servicios.Reserva",
+        on_delete=models.CASCADE,
+        related_name="preferencias_mercadopago",
+    )
+    tipo = models.CharField(max_length=10, choices=PagoMercadoPago.TIPO_CHOICES)
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    firma = models.CharField(max_length=64)
+    preference_id = models.CharField(max_length=200)
+    init_point = models.URLField(max_length=500, blank=True)
+    sandbox_init_point = models.URLField(max_length=500, blank=True)
+    fecha_expiracion = models.DateTimeField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Preferencia de MercadoPago"
+        verbose_name_plural = "Preferencias de MercadoPago"
+        db_table = "mercadopago_preferencia"
+        constraints = [
+            models.UniqueConstraint(fields=["reserva", "tipo"], name="mp_preferencia_reserva_tipo_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Preferencia {self.preference_id} - Reserva {self.reserva_id} ({self.tipo})"
@@ -0,0 +1,310 @@
+"""
+Reconciliación de pagos pendientes contra MercadoPago.
+
+El webhook y las verificaciones sólo cubren los pagos de los que alguien avisó;
+``manage.py reconciliar_pagos`` recorre todos los ``servicios.Pago`` con la seña o el
+pago final pendientes y le pregunta a MercadoPago por su ``external_reference``
+(``SENA-{id}``/``RESERVA-{id}`` o ``FINAL-{id}``). Por cada lote:
+
+1. Las búsquedas corren en paralelo con ``concurrencia`` hilos y como mucho
+   ``por_segundo`` llamadas por segundo entre todos, para no agotar la cuota de la API.
+2. Los pagos encontrados se guardan en ``PagoMercadoPago`` con un único upsert.
+3. Los aprobados se aplican con ``PagoService.registrar_lote`` (un UPDATE condicional por
+   tipo de pago); los emails salen igual que desde el webhook.
+
+Lo que no cierra (monto distinto, más de un pago aprobado, pagos rechazados o todavía
+pendientes, referencias sin pago) queda en ``discrepancias`` para el reporte. Un pago
+aprobado por un monto distinto del esperado no se aplica.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.servicios.models import Pago
+from apps.servicios.services import PagoService
+
+from .models import PagoMercadoPago
+from .services import MercadoPagoError, MercadoPagoService
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_PENDIENTES = PagoService.ESTADOS_PENDIENTES
+
+
+class _Limitador:
+    """Espaciado mínimo entre llamadas, compartido por todos los hilos."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1 / por_segundo if por_segundo and por_segundo > 0 else 0
+        self.lock = threading.Lock()
+        self.proxima = 0.0
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self.lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self.proxima)
+            self.proxima = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+class ConciliadorPagos:
+    """Busca en MercadoPago los pagos pendientes de ``servicios.Pago`` y aplica los aprobados."""
+
+    def __init__(self, batch_size=None, concurrencia=None, por_segundo=None, dry_run=False):
+        self.batch_size = batch_size or int(getattr(settings, "MERCADOPAGO_RECONCILIACION_BATCH_SIZE", 100))
+        self.concurrencia = max(
+            1, concurrencia or int(getattr(settings, "MERCADOPAGO_RECONCILIACION_CONCURRENCIA", 4))
+        )
+        if por_segundo is None:
+            por_segundo = float(getattr(settings, "MERCADOPAGO_RECONCILIACION_POR_SEGUNDO", 10))
+        self.limitador = _Limitador(por_segundo)
+        self.limite = int(getattr(settings, "MERCADOPAGO_VERIFICACION_PAGE_SIZE", 100))
+        self.max_paginas = int(getattr(settings, "MERCADOPAGO_VERIFICACION_MAX_PAGES", 5))
+        self.dry_run = dry_run
+
+    @staticmethod
+    def pendientes(reserva_ids=None):
+        """``(pago, tipo, referencias)`` de cada seña o pago final pendiente."""
+        pagos = Pago.objects.exclude(reserva__estado="cancelada").filter(
+            Q(estado_pago_sena__in=ESTADOS_PENDIENTES, monto_sena__gt=0)
+            | Q(
+                estado_pago_sena="sena_pagada",
+                estado_pago_final__in=ESTADOS_PENDIENTES,
+                monto_total__gt=F("monto_sena"),
+            )
+        )
+        if reserva_ids:
+            pagos = pagos.filter(reserva_id__in=reserva_ids)
+
+        items = []
+        for pago in pagos.order_by("reserva_id").only(
+            "reserva_id", "monto_sena", "monto_total", "estado_pago_sena", "estado_pago_final"
+        ):
+            reserva_id = pago.reserva_id
+            if pago.estado_pago_sena == "sena_pagada":
+                items.append((pago, PagoMercadoPago.TIPO_FINAL, [f"FINAL-{reserva_id}"]))
+            else:
+                # La seña pudo pagarse desde el checkout normal o desde la pre-reserva
+                items.append((pago, PagoMercadoPago.TIPO_SENA, [f"SENA-{reserva_id}", f"RESERVA-{reserva_id}"]))
+        return items
+
+    def ejecutar(self, reserva_ids=None):
+        reporte = {"pendientes": 0, "consultas": 0, "encontrados": 0, "aplicados": 0, "discrepancias": []}
+        items = self.pendientes(reserva_ids)
+        reporte["pendientes"] = len(items)
+        with ThreadPoolExecutor(max_workers=self.concurrencia, thread_name_prefix="mp-reconciliacion") as pool:
+            for inicio in range(0, len(items), self.batch_size):
+                lote = items[inicio : inicio + self.batch_size]
+                referencias = [referencia for _, _, refs in lote for referencia in refs]
+                resultados = dict(zip(referencias, pool.map(self._buscar, referencias)))
+                self._aplicar_lote(lote, resultados, reporte)
+        return reporte
+
+    def _buscar(self, referencia):
+        """Pagos con esa ``external_reference``: ``(pagos, consultas, error)``."""
+        pagos, consultas = [], 0
+        sdk = MercadoPagoService.sdk()
+        for pagina in range(self.max_paginas):
+            self.limitador.esperar()
+            consultas += 1
+            try:
+                respuesta = sdk.payment().search(
+                    filters={
+                        "external_reference": referencia,
+                        "sort": "date_created",
+                        "criteria": "desc",
+                        "limit": self.limite,
+                        "offset": pagina * self.limite,
+                    }
+                )
+                cuerpo = respuesta.get("response") if "response" in respuesta else respuesta
+                if not isinstance(cuerpo, dict) or (
+                    isinstance(respuesta.get("status"), int) and respuesta["status"] >= 400
+                ):
+                    raise MercadoPagoError(f"Búsqueda de pagos falló: {respuesta.get('status')}")
+            except Exception as exc:
+                logger.warning("Reconciliación: no se pudo buscar %s: %s", referencia, exc)
+                return pagos, consultas, str(exc)
+
+            resultados = cuerpo.get("results") or []
+            pagos.extend(
+                datos for datos in resultados if datos.get("id") and datos.get("external_reference") == referencia
+            )
+            total = (cuerpo.get("paging") or {}).get("total", len(resultados))
+            if len(resultados) < self.limite or (pagina + 1) * self.limite >= total:
+                break
+        return pagos, consultas, ""
+
+    @staticmethod
+    def _monto(datos):
+        try:
+            return Decimal(str(datos["transaction_amount"])) if datos.get("transaction_amount") is not None else None
+        except (InvalidOperation, ValueError):
+            return None
+
+    def _guardar_registros(self, encontrados):
+        """Upsert de ``PagoMercadoPago`` y las filas resultantes bloqueadas, por ``payment_id``."""
+        if not encontrados:
+            return {}
+        registros = []
+        for datos in encontrados.values():
+            tipo, reserva_id = PagoMercadoPago.parse_referencia(datos.get("external_reference"))
+            registros.append(
+                PagoMercadoPago(
+                    payment_id=str(datos["id"]),
+                    reserva_id=reserva_id,
+                    tipo=tipo or "",
+                    external_reference=(datos.get("external_reference") or "")[:100],
+                    status=str(datos.get("status") or "")[:30],
+                    status_detail=str(datos.get("status_detail") or "")[:100],
+                    transaction_amount=self._monto(datos),
+                    datos=datos,
+                )
+            )
+        if self.dry_run:
+            existentes = PagoMercadoPago.objects.filter(payment_id__in=encontrados).values_list(
+                "payment_id", "fecha_aplicacion"
+            )
+            aplicacion = dict(existentes)
+            for registro in registros:
+                registro.fecha_aplicacion = aplicacion.get(registro.payment_id)
+            return {registro.payment_id: registro for registro in registros}
+
+        PagoMercadoPago.objects.bulk_create(
+            registros,
+            update_conflicts=True,
+            unique_fields=["payment_id"],
+            update_fields=[
+                "reserva",
+                "tipo",
+                "external_reference",
+                "status",
+                "status_detail",
+                "transaction_amount",
+                "datos",
+                "fecha_actualizacion",
+            ],
+        )
+        # Mismo orden de bloqueo que MercadoPagoService.registrar: primero el pago de MercadoPago
+        bloqueados = PagoMercadoPago.objects.select_for_update().filter(payment_id__in=encontrados).order_by("pk")
+        return {registro.payment_id: registro for registro in bloqueados}
+
+    def _aplicar_lote(self, lote, resultados, reporte):
+        encontrados = {}
+        for pagos, consultas, _ in resultados.values():
+            reporte["consultas"] += consultas
+            for datos in pagos:
+                encontrados[str(datos["id"])] = datos
+        reporte["encontrados"] += len(encontrados)
+
+        ahora = timezone.now()
+        aplicados = []
+        with transaction.atomic():
+            registros = self._guardar_registros(encontrados)
+            ids = [pago.reserva_id for pago, _, _ in lote]
+            pagos = {
+                pago.reserva_id: pago
+                for pago in Pago.objects.select_for_update(of=("self",))
+                .select_related("reserva__cliente__persona", "reserva__servicio")
+                .filter(reserva_id__in=ids)
+            }
+
+            for pago_lote, tipo, referencias in lote:
+                pago = pagos.get(pago_lote.reserva_id)
+                if pago is None:
+                    continue
+                reserva = pago.reserva
+                errores = [resultados[ref][2] for ref in referencias if resultados[ref][2]]
+                candidatos = [
+                    registros[str(datos["id"])]
+                    for ref in referencias
+                    for datos in resultados[ref][0]
+                    if str(datos["id"]) in registros
+                ]
+                registro = self._conciliar(reserva, pago, tipo, referencias, candidatos, errores, reporte)
+                if registro is None:
+                    continue
+                if not PagoService.pendiente(pago, registro.tipo):
+                    continue
+                registro.fecha_aplicacion = ahora
+                aplicados.append((reserva, pago, registro))
+
+            reporte["aplicados"] += len(aplicados)
+            if self.dry_run or not aplicados:
+                return
+            # Un UPDATE por tipo de pago; las filas de Pago están bloqueadas, así que cambian todas
+            for tipo in {registro.tipo for _, _, registro in aplicados}:
+                PagoService.registrar_lote(
+                    tipo,
+                    [(pago, registro.payment_id) for _, pago, registro in aplicados if registro.tipo == tipo],
+                    ahora,
+                )
+            PagoMercadoPago.objects.bulk_update([registro for _, _, registro in aplicados], ["fecha_aplicacion"])
+            for reserva, pago, registro in aplicados:
+                logger.info(
+                    "Reconciliación: pago %s (%s) aplicado a la reserva %s",
+                    registro.payment_id,
+                    registro.tipo,
+                    reserva.id_reserva,
+                )
+                MercadoPagoService.notificar(reserva, pago, registro)
+
+    @staticmethod
+    def _conciliar(reserva, pago, tipo, referencias, candidatos, errores, reporte):
+        """El ``PagoMercadoPago`` aprobado a aplicar, o ``None``; anota las discrepancias."""
+
+        def discrepancia(motivo, detalle="", payment_id=""):
+            reporte["discrepancias"].append(
+                {
+                    "reserva_id": reserva.id_reserva,
+                    "tipo": tipo,
+                    "referencia": referencias[0],
+                    "motivo": motivo,
+                    "payment_id": payment_id,
+                    "detalle": detalle,
+                }
+            )
+
+        aprobados = sorted((r for r in candidatos if r.aprobado), key=lambda r: r.fecha_creacion or timezone.now())
+        if not aprobados:
+            if errores:
+                discrepancia("error", "; ".join(errores))
+            elif any(r.en_proceso for r in candidatos):
+                discrepancia("en_proceso", ", ".join(f"{r.payment_id}:{r.status}" for r in candidatos))
+            elif candidatos:
+                discrepancia("rechazado", ", ".join(f"{r.payment_id}:{r.status}" for r in candidatos))
+            else:
+                discrepancia("sin_pago")
+            return None
+
+        registro = aprobados[0]
+        if len(aprobados) > 1:
+            discrepancia(
+                "varios_aprobados",
+                f"se aplica {registro.payment_id}; también aprobados: "
+                + ", ".join(r.payment_id for r in aprobados[1:]),
+                registro.payment_id,
+            )
+        esperado = MercadoPagoService.monto_esperado(pago, tipo)
+        if registro.transaction_amount is not None and registro.transaction_amount != esperado:
+            # No se aplica: el Pago queda como está hasta que alguien lo revise
+            discrepancia(
+                "monto_distinto",
+                f"esperado {esperado}, pagado {registro.transaction_amount}; no se aplica",
+                registro.payment_id,
+            )
+            return None
+        if registro.fecha_aplicacion is not None:
+            discrepancia("aprobado_sin_reflejar", "figuraba aplicado pero el Pago seguía pendiente", registro.payment_id)
+        return registro
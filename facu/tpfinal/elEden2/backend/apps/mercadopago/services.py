@@ -0,0 +1,342 @@
+"""
+Servicios de MercadoPago usados por las vistas y el webhook.
+
+``MercadoPagoService.sdk()`` devuelve un cliente compartido por todo el proceso
+(una ``requests.Session`` con pool de conexiones en vez de una sesión por
+llamada) y ``preferencia`` reutiliza la preferencia de checkout de una reserva
+mientras no cambie nada.
+
+``MercadoPagoService.registrar`` guarda lo que MercadoPago informa de un pago en
+``PagoMercadoPago`` y, si está aprobado, lo impacta en ``servicios.Pago`` una sola
+vez (con ``servicios.services.PagoService``): el mismo pago puede llegar por el webhook (que MercadoPago reintenta) o por
+una verificación en segundo plano (``verificaciones.py``), y sólo el primero
+cambia estados y manda emails.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+import mercadopago
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from mercadopago.http.http_client import HttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from apps.emails.services import EmailService
+from apps.servicios.models import Pago, Reserva, ReservaEmpleado
+from apps.servicios.services import PagoService
+
+from .models import PagoMercadoPago, PreferenciaMercadoPago
+
+logger = logging.getLogger(__name__)
+
+# Host al que apunta el SDK; MERCADOPAGO_API_BASE_URL lo reemplaza
+API_BASE_URL = "https://api.mercadopago.com"
+
+
+class MercadoPagoError(Exception):
+    """MercadoPago no respondió o devolvió un error distinto de 404."""
+
+
+class ClienteHTTPPooled(HttpClient):
+    """``HttpClient`` del SDK que reutiliza una sola sesión (keep-alive y pool de conexiones).
+
+    El cliente del SDK abre una ``requests.Session`` nueva por llamada, con su handshake
+    TLS. Los reintentos ante 429/5xx quedan configurados una vez en el adaptador. Con
+    ``api_base_url`` las llamadas van a otro host (p. ej. ``manage.py simular_mercadopago``).
+    """
+
+    def __init__(self, pool_maxsize=10, max_retries=3, api_base_url=""):
+        self.api_base_url = api_base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=max_retries, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, maxretries=None, **kwargs):
+        if self.api_base_url and url.startswith(API_BASE_URL):
+            url = self.api_base_url + url[len(API_BASE_URL) :]
+        api_result = self.session.request(method, url, **kwargs)
+        return {"status": api_result.status_code, "response": api_result.json()}
+
+
+@lru_cache(maxsize=None)
+def _sdk(access_token, api_base_url=""):
+    return mercadopago.SDK(
+        access_token,
+        http_client=ClienteHTTPPooled(
+            pool_maxsize=int(getattr(settings, "MERCADOPAGO_POOL_MAXSIZE", 10)),
+            api_base_url=api_base_url,
+        ),
+    )
+
+
+class MercadoPagoService:
+    """Consulta de pagos, verificación del webhook y aplicación idempotente sobre ``Pago``."""
+
+    @staticmethod
+    def sdk():
+        """Cliente del SDK compartido por el proceso (uno por access token y URL de la API)."""
+        return _sdk(settings.MERCADOPAGO_ACCESS_TOKEN, getattr(settings, "MERCADOPAGO_API_BASE_URL", ""))
+
+    @staticmethod
+    def reset_sdk():
+        """Descarta el cliente compartido (tests, o después de rotar credenciales)."""
+        _sdk.cache_clear()
+
+    @staticmethod
+    def notification_url():
+        return getattr(settings, "MERCADOPAGO_NOTIFICATION_URL", "")
+
+    @classmethod
+    def datos_preferencia_sena(cls, reserva, pago):
+        """Preferencia de la seña: la misma para todos los endpoints, así ``preferencia`` la reutiliza."""
+        persona = reserva.cliente.persona
+        preference_data = {
+            "items": [
+                {
+                    "id": f"SENA-{reserva.id_reserva}",
+                    "title": f"Seña - Reserva #{reserva.id_reserva} - {reserva.servicio.nombre}",
+                    "description": f"Pago de seña para reserva de {reserva.servicio.nombre}",
+                    "quantity": 1,
+                    "unit_price": float(pago.monto_sena),
+                    "currency_id": "ARS",
+                    "category_id": "services",
+                }
+            ],
+            "payer": {"name": persona.nombre, "surname": persona.apellido, "email": persona.email},
+            "back_urls": {
+                "success": f"{settings.FRONTEND_URL}/reservas/pago-exitoso?tipo=sena&reserva_id={reserva.id_reserva}",
+                "failure": f"{settings.FRONTEND_URL}/mis-reservas?error=pago_rechazado",
+                "pending": f"{settings.FRONTEND_URL}/mis-reservas?info=pago_pendiente",
+            },
+            "auto_return": "approved",
+            "external_reference": f"SENA-{reserva.id_reserva}",
+            "statement_descriptor": "El Eden",
+            "payment_methods": {"excluded_payment_types": [], "installments": 12},
+        }
+        if cls.notification_url():
+            preference_data["notification_url"] = cls.notification_url()
+        return preference_data
+
+    @classmethod
+    def preferencia(cls, reserva, tipo, monto, preference_data):
+        """Preferencia de checkout de ``reserva``: la guardada si sigue vigente, o una nueva.
+
+        Se reutiliza mientras no venza y el contenido (monto, pagador, URLs) sea el mismo;
+        si algo cambió se crea otra y reemplaza a la guardada. Devuelve
+        ``(PreferenciaMercadoPago, reutilizada)``.
+        """
+        firma = hashlib.sha256(
+            json.dumps(preference_data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        ahora = timezone.now()
+        margen = timedelta(minutes=int(getattr(settings, "MERCADOPAGO_PREFERENCIA_MARGEN_MINUTOS", 10)))
+        vigente = PreferenciaMercadoPago.objects.filter(
+            reserva=reserva, tipo=tipo, monto=monto, firma=firma, fecha_expiracion__gt=ahora + margen
+        ).first()
+        if vigente is not None:
+            return vigente, True
+
+        ttl = timedelta(minutes=int(getattr(settings, "MERCADOPAGO_PREFERENCIA_TTL_MINUTOS", 1440)))
+        expiracion = ahora + ttl
+        datos = {
+            **preference_data,
+            "expires": True,
+            "expiration_date_to": expiracion.isoformat(timespec="milliseconds"),
+        }
+        try:
+            respuesta = cls.sdk().preference().create(datos)
+        except Exception as exc:
+            raise MercadoPagoError(str(exc)) from exc
+        creada = respuesta.get("response") if "response" in respuesta else respuesta
+        http_status = respuesta.get("status")
+        if (isinstance(http_status, int) and http_status >= 400) or not isinstance(creada, dict) or not creada.get("id"):
+            raise MercadoPagoError(f"No se pudo crear la preferencia (HTTP {http_status}): {creada}")
+
+        registro, _ = PreferenciaMercadoPago.objects.update_or_create(
+            reserva=reserva,
+            tipo=tipo,
+            defaults={
+                "monto": monto,
+                "firma": firma,
+                "preference_id": creada["id"],
+                "init_point": creada.get("init_point") or "",
+                "sandbox_init_point": creada.get("sandbox_init_point") or "",
+                "fecha_expiracion": expiracion,
+            },
+        )
+        return registro, False
+
+    @classmethod
+    def consultar_pago(cls, payment_id):
+        """Un único ``GET /v1/payments/{id}``: el pago, o ``None`` si MercadoPago todavía no lo tiene."""
+        try:
+            respuesta = cls.sdk().payment().get(payment_id)
+        except Exception as exc:
+            raise MercadoPagoError(str(exc)) from exc
+        datos = respuesta.get("response") if "response" in respuesta else respuesta
+        http_status = respuesta.get("status")
+        if http_status == 404 or not isinstance(datos, dict) or datos.get("status") == 404:
+            return None
+        if isinstance(http_status, int) and http_status >= 400:
+            raise MercadoPagoError(f"HTTP {http_status}: {datos.get('message', '')}")
+        return datos
+
+    @staticmethod
+    def verificar_firma(x_signature, x_request_id, data_id):
+        """Valida ``x-signature`` (``ts=...,v1=...``) con ``MERCADOPAGO_WEBHOOK_SECRET``.
+
+        El manifiesto es ``id:{data.id};request-id:{x-request-id};ts:{ts};``, omitiendo
+        las partes que no vengan, firmado con HMAC-SHA256.
+        """
+        secreto = getattr(settings, "MERCADOPAGO_WEBHOOK_SECRET", "")
+        if not secreto or not x_signature:
+            return False
+        partes = {}
+        for parte in x_signature.split(","):
+            clave, _, valor = parte.strip().partition("=")
+            partes[clave] = valor
+        ts, firma = partes.get("ts"), partes.get("v1")
+        if not ts or not firma:
+            return False
+
+        data_id = str(data_id or "")
+        manifiesto = ""
+        if data_id:
+            manifiesto += f"id:{data_id.lower() if data_id.isalnum() else data_id};"
+        if x_request_id:
+            manifiesto += f"request-id:{x_request_id};"
+        manifiesto += f"ts:{ts};"
+        esperada = hmac.new(secreto.encode(), manifiesto.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(esperada, firma)
+
+    @classmethod
+    def registrar(cls, datos):
+        """Guarda el estado del pago y lo aplica a la reserva si está aprobado y todavía no se aplicó."""
+        payment_id = str(datos.get("id") or "")
+        if not payment_id:
+            raise ValueError("El pago de MercadoPago no tiene id")
+        external_reference = datos.get("external_reference") or ""
+        tipo, reserva_id = PagoMercadoPago.parse_referencia(external_reference)
+        if reserva_id and not Reserva.objects.filter(id_reserva=reserva_id).exists():
+            logger.warning("Pago %s referencia la reserva %s, que no existe", payment_id, reserva_id)
+            reserva_id = None
+
+        try:
+            monto = Decimal(str(datos["transaction_amount"])) if datos.get("transaction_amount") is not None else None
+        except (InvalidOperation, ValueError):
+            monto = None
+
+        with transaction.atomic():
+            # update_or_create bloquea la fila: dos notificaciones del mismo pago se serializan acá
+            registro, _ = PagoMercadoPago.objects.update_or_create(
+                payment_id=payment_id,
+                defaults={
+                    "reserva_id": reserva_id,
+                    "tipo": tipo or "",
+                    "external_reference": external_reference[:100],
+                    "status": str(datos.get("status") or "")[:30],
+                    "status_detail": str(datos.get("status_detail") or "")[:100],
+                    "transaction_amount": monto,
+                    "datos": datos,
+                },
+            )
+            if registro.aprobado and registro.reserva_id and registro.fecha_aplicacion is None:
+                cls._aplicar(registro)
+        return registro
+
+    @classmethod
+    def _aplicar(cls, registro):
+        """Impacta un pago aprobado en ``Pago``/``Reserva``; se llama con la fila de ``registro`` bloqueada."""
+        reserva = Reserva.objects.select_related("cliente__persona", "servicio").get(id_reserva=registro.reserva_id)
+        pago, _ = Pago.objects.get_or_create(reserva=reserva)
+
+        esperado = cls.monto_esperado(pago, registro.tipo)
+        if registro.transaction_amount is not None and registro.transaction_amount != esperado:
+            # Igual que la reconciliación: queda sin aplicar hasta que alguien lo revise
+            logger.warning(
+                "Pago %s (%s) de la reserva %s no se aplica: esperado %s, pagado %s",
+                registro.payment_id,
+                registro.tipo,
+                reserva.id_reserva,
+                esperado,
+                registro.transaction_amount,
+            )
+            return False
+
+        registro.fecha_aplicacion = timezone.now()
+        registro.save(update_fields=["fecha_aplicacion", "fecha_actualizacion"])
+        if not PagoService.registrar(pago, registro.tipo, registro.payment_id, registro.fecha_aplicacion):
+            return False
+
+        logger.info("Pago %s (%s) aplicado a la reserva %s", registro.payment_id, registro.tipo, reserva.id_reserva)
+        cls.notificar(reserva, pago, registro)
+        return True
+
+    @staticmethod
+    def monto_esperado(pago, tipo):
+        """Monto que MercadoPago debería haber cobrado para ese tipo de pago."""
+        return pago.monto_final if tipo == PagoMercadoPago.TIPO_FINAL else pago.monto_sena
+
+    @staticmethod
+    def notificar(reserva, pago, registro):
+        """Emails del pago aplicado; se encolan al confirmar la transacción que lo aplicó."""
+        tipo_email = "final" if registro.tipo == PagoMercadoPago.TIPO_FINAL else "seña"
+        monto = pago.monto_final if registro.tipo == PagoMercadoPago.TIPO_FINAL else pago.monto_sena
+        persona = reserva.cliente.persona
+        cliente_nombre = f"{persona.nombre} {persona.apellido}"
+        try:
+            EmailService.send_payment_confirmation_email(
+                user_email=persona.email,
+                user_name=cliente_nombre,
+                reserva_id=reserva.id_reserva,
+                servicio_nombre=reserva.servicio.nombre,
+                monto=monto,
+                payment_id=registro.payment_id,
+                tipo_pago=tipo_email,
+            )
+            EmailService.send_payment_notification_to_admin(
+                reserva_id=reserva.id_reserva,
+                cliente_nombre=cliente_nombre,
+                servicio_nombre=reserva.servicio.nombre,
+                monto=monto,
+                payment_id=registro.payment_id,
+                fecha_reserva=reserva.fecha_cita,
+                direccion=reserva.direccion,
+                observaciones=reserva.observaciones,
+                tipo_pago=tipo_email,
+            )
+            if registro.tipo != PagoMercadoPago.TIPO_FINAL:
+                return
+
+            # Con el pago final el trabajo queda firme: avisar a los empleados asignados
+            hora_servicio = reserva.fecha_cita.strftime("%H:%M") if reserva.fecha_cita else "A confirmar"
+            for asignacion in ReservaEmpleado.objects.filter(reserva=reserva).select_related("empleado__persona"):
+                empleado = asignacion.empleado.persona
+                EmailService.send_employee_work_assignment_notification(
+                    empleado_email=empleado.email,
+                    empleado_nombre=f"{empleado.nombre} {empleado.apellido}",
+                    reserva_id=reserva.id_reserva,
+                    cliente_nombre=cliente_nombre,
+                    servicio_nombre=reserva.servicio.nombre,
+                    fecha_servicio=reserva.fecha_cita,
+                    hora_servicio=hora_servicio,
+                    direccion=reserva.direccion or "No especificada",
+                    observaciones=reserva.observaciones,
+                    rol=asignacion.rol,
+                )
+        except Exception as exc:
+            logger.error("Error al encolar emails del pago %s: %s", registro.payment_id, exc)
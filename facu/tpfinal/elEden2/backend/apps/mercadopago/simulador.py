@@ -0,0 +1,291 @@
+"""Servidor local que imita la API de MercadoPago para pruebas de integración y de carga.
+
+Responde los endpoints que usa el SDK en esta app: ``POST /checkout/preferences``,
+``GET /checkout/preferences/{id}``, ``POST /v1/payments``, ``GET /v1/payments/{id}`` y
+``GET /v1/payments/search`` (filtros ``external_reference``, ``status``, rango de fechas,
+orden y paginado). El ``init_point`` de cada preferencia apunta a
+``/checkout/pagar/{id}``, que hace de comprador: crea el pago por el monto de la
+preferencia (``?status=rejected`` para otro estado, ``?redirect=1`` para volver a
+``back_urls`` como el checkout real).
+
+Un pago recién aparece en la API ``visible_despues_s`` segundos después de creado, y en
+ese momento se manda el webhook firmado con ``webhook_secret`` (el mismo ``x-signature``
+que valida ``MercadoPagoService.verificar_firma``). Se configuran la latencia y la tasa
+de errores de las llamadas a la API. Todo queda en memoria; no usa la base de datos.
+
+    python manage.py simular_mercadopago --port 8090 --visible-after 2
+    MERCADOPAGO_API_BASE_URL=http://127.0.0.1:8090
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from socketserver import ThreadingMixIn
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfiguracionSimulador:
+    visible_despues_s: float = 0
+    latencia_ms: float = 0
+    tasa_error: float = 0
+    status_error: int = 500
+    estado_pago: str = "approved"
+    webhook_url: str = ""
+    webhook_secret: str = ""
+    semilla: int = 0
+
+
+def _fecha(instante: float) -> str:
+    return datetime.fromtimestamp(instante, dt_timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _instante(texto) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(texto).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class SimuladorMercadoPago:
+    """Aplicación WSGI; ``estadisticas`` cuenta llamadas por operación y resultado."""
+
+    def __init__(self, configuracion: Optional[ConfiguracionSimulador] = None):
+        self.configuracion = configuracion or ConfiguracionSimulador()
+        self._lock = threading.Lock()
+        self._azar = random.Random(self.configuracion.semilla)
+        # Ids en milisegundos: no se repiten con los de corridas anteriores ya guardados en la base
+        self._ids = itertools.count(int(time.time() * 1000))
+        self.preferencias: Dict[str, dict] = {}
+        # payment_id -> (instante desde el que es visible, pago)
+        self.pagos: Dict[int, tuple] = {}
+        self.estadisticas: Dict[str, int] = {}
+
+    def _contar(self, clave: str) -> None:
+        with self._lock:
+            self.estadisticas[clave] = self.estadisticas.get(clave, 0) + 1
+
+    def reiniciar_estadisticas(self) -> None:
+        with self._lock:
+            self.estadisticas = {}
+
+    def _falla(self) -> bool:
+        with self._lock:
+            return self._azar.random() < self.configuracion.tasa_error
+
+    # --- Preferencias y pagos -------------------------------------------
+
+    def crear_preferencia(self, datos: dict, base_url: str) -> dict:
+        preference_id = f"sim-{uuid.uuid4().hex[:16]}"
+        monto = sum(
+            Decimal(str(item.get("unit_price") or 0)) * int(item.get("quantity") or 1)
+            for item in datos.get("items") or []
+        )
+        preferencia = {
+            **datos,
+            "id": preference_id,
+            "init_point": f"{base_url}/checkout/pagar/{preference_id}",
+            "sandbox_init_point": f"{base_url}/checkout/pagar/{preference_id}",
+            "date_created": _fecha(time.time()),
+            "monto": float(monto),
+        }
+        with self._lock:
+            self.preferencias[preference_id] = preferencia
+        return preferencia
+
+    def crear_pago(self, external_reference: str, monto, estado: str = "", preference_id: str = "", datos=None):
+        """Registra el pago; se ve en la API y se notifica pasados ``visible_despues_s``."""
+        configuracion = self.configuracion
+        ahora = time.time()
+        estado = estado or configuracion.estado_pago
+        pago = {
+            **(datos or {}),
+            "id": next(self._ids),
+            "status": estado,
+            "status_detail": "accredited" if estado == "approved" else "pending_contingency",
+            "external_reference": external_reference,
+            "transaction_amount": float(monto),
+            "currency_id": "ARS",
+            "preference_id": preference_id,
+            "date_created": _fecha(ahora),
+            "date_approved": _fecha(ahora) if estado == "approved" else None,
+            "date_last_updated": _fecha(ahora),
+        }
+        with self._lock:
+            self.pagos[pago["id"]] = (ahora + configuracion.visible_despues_s, pago)
+        if configuracion.webhook_url:
+            temporizador = threading.Timer(configuracion.visible_despues_s, self.enviar_webhook, args=(pago["id"],))
+            temporizador.daemon = True
+            temporizador.start()
+        return pago
+
+    def pago(self, payment_id) -> Optional[dict]:
+        try:
+            visible, pago = self.pagos[int(payment_id)]
+        except (KeyError, ValueError):
+            return None
+        return pago if visible <= time.time() else None
+
+    def buscar(self, filtros: Dict[str, str]) -> dict:
+        ahora = time.time()
+        with self._lock:
+            resultados = [pago for visible, pago in self.pagos.values() if visible <= ahora]
+        for campo in ("external_reference", "status", "id", "preference_id"):
+            if filtros.get(campo):
+                resultados = [pago for pago in resultados if str(pago.get(campo)) == filtros[campo]]
+        campo_rango = filtros.get("range")
+        if campo_rango:
+            desde = _instante(filtros.get("begin_date")) or float("-inf")
+            hasta = _instante(filtros.get("end_date")) or float("inf")
+            resultados = [p for p in resultados if desde <= (_instante(p.get(campo_rango)) or -1) <= hasta]
+        orden = filtros.get("sort") or "date_created"
+        resultados.sort(key=lambda pago: pago.get(orden) or "", reverse=filtros.get("criteria") != "asc")
+        offset, limite = int(filtros.get("offset") or 0), int(filtros.get("limit") or 30)
+        return {
+            "paging": {"total": len(resultados), "limit": limite, "offset": offset},
+            "results": resultados[offset : offset + limite],
+        }
+
+    # --- Webhook --------------------------------------------------------
+
+    def firmar(self, payment_id, request_id: str) -> Dict[str, str]:
+        """Headers del webhook: ``x-signature`` sobre ``id:{id};request-id:{rid};ts:{ts};``."""
+        ts = str(int(time.time()))
+        manifiesto = f"id:{payment_id};request-id:{request_id};ts:{ts};"
+        secreto = self.configuracion.webhook_secret.encode()
+        firma = hmac.new(secreto, manifiesto.encode(), hashlib.sha256).hexdigest()
+        return {"x-signature": f"ts={ts},v1={firma}", "x-request-id": request_id}
+
+    def enviar_webhook(self, payment_id) -> None:
+        url = self.configuracion.webhook_url
+        separador = "&" if "?" in url else "?"
+        try:
+            respuesta = requests.post(
+                f"{url}{separador}{urlencode({'data.id': payment_id, 'type': 'payment'})}",
+                json={"type": "payment", "action": "payment.created", "data": {"id": str(payment_id)}},
+                headers=self.firmar(payment_id, uuid.uuid4().hex),
+                timeout=10,
+            )
+            self._contar(f"webhook {respuesta.status_code}")
+        except requests.RequestException as exc:
+            logger.warning("Simulador de MercadoPago: falló el webhook del pago %s: %s", payment_id, exc)
+            self._contar("webhook error")
+
+    # --- WSGI -----------------------------------------------------------
+
+    def _pagar(self, preference_id: str, params: Dict[str, str]):
+        preferencia = self.preferencias.get(preference_id)
+        if preferencia is None:
+            return "404 Not Found", {"message": "preference not found", "status": 404}, []
+        pago = self.crear_pago(
+            preferencia.get("external_reference") or "", preferencia["monto"], params.get("status", ""), preference_id
+        )
+        destino = (preferencia.get("back_urls") or {}).get("success" if pago["status"] == "approved" else "pending")
+        if str(params.get("redirect")) in ("1", "true") and destino:
+            query = urlencode(
+                {
+                    "payment_id": pago["id"],
+                    "status": pago["status"],
+                    "external_reference": pago["external_reference"],
+                    "preference_id": preference_id,
+                }
+            )
+            return "302 Found", pago, [("Location", f"{destino}{'&' if '?' in destino else '?'}{query}")]
+        return "201 Created", pago, []
+
+    def _api(self, metodo: str, ruta: str, params: Dict[str, str], datos: dict, base_url: str):
+        """``(operación, estado, cuerpo)`` de una llamada del SDK."""
+        if ruta == "/checkout/preferences" and metodo == "POST":
+            return "preference.create", "201 Created", self.crear_preferencia(datos, base_url)
+        if ruta.startswith("/checkout/preferences/") and metodo == "GET":
+            preferencia = self.preferencias.get(ruta.rsplit("/", 1)[-1])
+            if preferencia is None:
+                return "preference.get", "404 Not Found", {"message": "preference not found", "status": 404}
+            return "preference.get", "200 OK", preferencia
+        if ruta == "/v1/payments" and metodo == "POST":
+            monto = datos.get("transaction_amount") or 0
+            return "payment.create", "201 Created", self.crear_pago(datos.get("external_reference") or "", monto, datos=datos)
+        if ruta == "/v1/payments/search" and metodo == "GET":
+            return "payment.search", "200 OK", self.buscar(params)
+        if ruta.startswith("/v1/payments/") and metodo == "GET":
+            pago = self.pago(ruta.rsplit("/", 1)[-1])
+            if pago is None:
+                return "payment.get", "404 Not Found", {"message": "Payment not found", "status": 404}
+            return "payment.get", "200 OK", pago
+        return "desconocida", "404 Not Found", {"message": f"ruta no simulada: {metodo} {ruta}", "status": 404}
+
+    def __call__(self, environ, start_response):
+        metodo = environ.get("REQUEST_METHOD", "GET")
+        ruta = environ.get("PATH_INFO", "/").rstrip("/") or "/"
+        params = {clave: valores[-1] for clave, valores in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        largo = int(environ.get("CONTENT_LENGTH") or 0)
+        try:
+            datos = json.loads(environ["wsgi.input"].read(largo)) if largo else {}
+        except ValueError:
+            datos = {}
+        headers = []
+
+        if ruta == "/__simulador/estadisticas":
+            with self._lock:
+                estado, cuerpo = "200 OK", dict(self.estadisticas)
+        elif ruta.startswith("/checkout/pagar/"):
+            estado, cuerpo, headers = self._pagar(ruta.rsplit("/", 1)[-1], {**params, **datos})
+            self._contar(f"checkout {estado.split()[0]}")
+        else:
+            if self.configuracion.latencia_ms:
+                time.sleep(self.configuracion.latencia_ms / 1000)
+            if self._falla():
+                codigo = self.configuracion.status_error
+                operacion, estado, cuerpo = "falla", f"{codigo} Error", {"message": "falla simulada", "status": codigo}
+            else:
+                base_url = f"{environ.get('wsgi.url_scheme', 'http')}://{environ.get('HTTP_HOST', '')}"
+                operacion, estado, cuerpo = self._api(metodo, ruta, params, datos, base_url)
+            self._contar(f"{operacion} {estado.split()[0]}")
+
+        contenido = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        start_response(
+            estado,
+            [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(contenido))), *headers],
+        )
+        return [contenido]
+
+
+class _ServidorConHilos(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor(
+    simulador: SimuladorMercadoPago, host: str = "127.0.0.1", port: int = 0, silencioso: bool = True
+) -> WSGIServer:
+    """Crea el servidor (``port=0`` elige uno libre); ``serve_forever`` queda a cargo del llamador."""
+    handler = _HandlerSilencioso if silencioso else WSGIRequestHandler
+    return make_server(host, port, simulador, server_class=_ServidorConHilos, handler_class=handler)
+
+
+def iniciar_en_segundo_plano(simulador: SimuladorMercadoPago, host: str = "127.0.0.1", port: int = 0) -> WSGIServer:
+    servidor = iniciar_servidor(simulador, host, port)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
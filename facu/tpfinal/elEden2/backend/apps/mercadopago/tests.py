@@ -2,4 +2,462 @@
 Tests para la app de MercadoPago
 """
 
-# TODO: Agregar tests para las vistas de MercadoPago
+import hashlib
+import hmac
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import requests
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.emails.models import OutboundEmail
+from apps.servicios.models import Pago, Reserva, Servicio
+from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
+
+from .models import PagoMercadoPago, PreferenciaMercadoPago, VerificacionPago
+from .reconciliacion import ConciliadorPagos
+from .services import MercadoPagoError, MercadoPagoService
+from .simulador import ConfiguracionSimulador, SimuladorMercadoPago, iniciar_en_segundo_plano
+from .verificaciones import VerificadorPagos
+
+SECRETO = "secreto-de-prueba"
+
+
+def _pago_mp(payment_id, reserva_id, tipo="SENA", estado="approved", monto="5000.00"):
+    return {
+        "id": int(payment_id),
+        "status": estado,
+        "status_detail": "accredited" if estado == "approved" else "pending_contingency",
+        "external_reference": f"{tipo}-{reserva_id}",
+        "transaction_amount": float(monto),
+    }
+
+
+class _SDKFalso:
+    """Reemplaza ``mercadopago.SDK``: ``pagos`` es el estado que 'tiene' MercadoPago."""
+
+    pagos = {}
+    llamadas = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def payment(self):
+        return self
+
+    def preference(self):
+        return self
+
+    def create(self, datos):
+        self.llamadas.append(("preference", datos))
+        numero = sum(1 for llamada in self.llamadas if llamada[0] == "preference")
+        return {
+            "status": 201,
+            "response": {
+                "id": f"pref-{numero}",
+                "init_point": f"https://www.mercadopago.com.ar/checkout/v1/redirect?pref_id=pref-{numero}",
+            },
+        }
+
+    def get(self, payment_id):
+        self.llamadas.append(("get", str(payment_id)))
+        datos = self.pagos.get(str(payment_id))
+        if datos is None:
+            return {"status": 404, "response": {"status": 404, "message": "Payment not found"}}
+        return {"status": 200, "response": datos}
+
+    def search(self, filters=None):
+        filters = filters or {}
+        self.llamadas.append(("search", filters))
+        resultados = list(self.pagos.values())
+        if filters.get("begin_date"):
+            desde = filters["begin_date"]
+            resultados = [datos for datos in resultados if datos.get("date_last_updated", desde) >= desde]
+        if filters.get("external_reference"):
+            resultados = [datos for datos in resultados if datos["external_reference"] == filters["external_reference"]]
+        offset, limit = int(filters.get("offset", 0)), int(filters.get("limit", 30))
+        return {
+            "status": 200,
+            "response": {"results": resultados[offset : offset + limit], "paging": {"total": len(resultados)}},
+        }
+
+
+@override_settings(MERCADOPAGO_WEBHOOK_SECRET=SECRETO)
+class MercadoPagoWebhookTests(APITestCase):
+    def setUp(self):
+        genero = Genero.objects.create(genero="Otro")
+        tipo_documento = TipoDocumento.objects.create(tipo="DNI")
+        localidad = Localidad.objects.create(cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones")
+        persona = Persona.objects.create(
+            nombre="Ana",
+            apellido="Pérez",
+            email="ana@example.com",
+            telefono="123456789",
+            calle="Calle",
+            numero="1",
+            nro_documento="30000000",
+            genero=genero,
+            tipo_documento=tipo_documento,
+            localidad=localidad,
+        )
+        self.user = User.objects.create_user("ana", "ana@example.com", "pass1234")
+        User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+        self.reserva = Reserva.objects.create(
+            cliente=Cliente.objects.create(persona=persona),
+            servicio=Servicio.objects.create(nombre="Poda"),
+            fecha_cita=timezone.now() + timedelta(days=3),
+            direccion="Calle 1",
+        )
+        Pago.objects.create(reserva=self.reserva, monto_sena=Decimal("5000.00"))
+
+        _SDKFalso.pagos = {}
+        _SDKFalso.llamadas = []
+        patcher = patch("apps.mercadopago.services.mercadopago.SDK", _SDKFalso)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        MercadoPagoService.reset_sdk()
+        self.addCleanup(MercadoPagoService.reset_sdk)
+
+    def _notificar(self, payment_id, secreto=SECRETO):
+        ts = "1704908010"
+        manifiesto = f"id:{payment_id};request-id:req-1;ts:{ts};"
+        firma = hmac.new(secreto.encode(), manifiesto.encode(), hashlib.sha256).hexdigest()
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"{reverse('mercadopago:webhook')}?data.id={payment_id}&type=payment",
+                {"type": "payment", "action": "payment.updated", "data": {"id": str(payment_id)}},
+                format="json",
+                HTTP_X_SIGNATURE=f"ts={ts},v1={firma}",
+                HTTP_X_REQUEST_ID="req-1",
+            )
+
+    def _verificar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return VerificadorPagos.process_batch()
+
+    def test_webhook_applies_payment_once_even_if_delivered_twice(self):
+        _SDKFalso.pagos["111"] = _pago_mp("111", self.reserva.id_reserva)
+
+        for _ in range(2):
+            response = self._notificar("111")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.data["aplicado"])
+
+        pago = Pago.objects.get(reserva=self.reserva)
+        self.assertEqual(pago.estado_pago_sena, "sena_pagada")
+        self.assertEqual(pago.payment_id_sena, "111")
+        self.assertEqual(PagoMercadoPago.objects.count(), 1)
+        # Cliente y administrador: un email cada uno, no uno por notificación
+        self.assertEqual(OutboundEmail.objects.filter(recipients=["ana@example.com"]).count(), 1)
+        self.assertEqual(OutboundEmail.objects.filter(recipients=["admin@example.com"]).count(), 1)
+
+    def test_webhook_rejects_invalid_signature(self):
+        _SDKFalso.pagos["111"] = _pago_mp("111", self.reserva.id_reserva)
+
+        response = self._notificar("111", secreto="otro")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(PagoMercadoPago.objects.exists())
+
+    def test_webhook_enqueues_verification_while_payment_is_not_visible(self):
+        response = self._notificar("222")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        verificacion = VerificacionPago.objects.get(id=response.data["verificacion_id"])
+        self.assertEqual(verificacion.payment_id, "222")
+
+        _SDKFalso.pagos["222"] = _pago_mp("222", self.reserva.id_reserva)
+        VerificacionPago.objects.filter(id=verificacion.id).update(proximo_intento=timezone.now())
+        self.assertEqual(self._verificar()["aprobados"], 1)
+        self.assertEqual(Pago.objects.get(reserva=self.reserva).estado_pago_sena, "sena_pagada")
+
+    def test_confirm_endpoint_enqueues_verification_and_reads_status(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("mercadopago:confirmar_pago_sena", args=[self.reserva.id_reserva])
+
+        # MercadoPago todavía no lo tiene: 202 con la verificación, sin consultar en el request
+        response = self.client.post(url, {"payment_id": "333"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["estado"], "procesando")
+        verificacion_id = response.data["verificacion_id"]
+        self.assertEqual(_SDKFalso.llamadas, [])
+        # Confirmar de nuevo no duplica la verificación
+        response = self.client.post(url, {"payment_id": "333"}, format="json")
+        self.assertEqual(response.data["verificacion_id"], verificacion_id)
+
+        _SDKFalso.pagos["333"] = _pago_mp("333", self.reserva.id_reserva, estado="in_process")
+        self._notificar("333")
+        response = self.client.post(url, {"payment_id": "333"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status_mercadopago"], "in_process")
+
+        _SDKFalso.pagos["333"] = _pago_mp("333", self.reserva.id_reserva)
+        self._notificar("333")
+        response = self.client.post(url, {"payment_id": "333"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["estado_pago"], "sena_pagada")
+
+    def test_worker_resolves_batch_with_one_search_and_sends_emails(self):
+        # Saldo de 5000.00 después de la seña, lo que cobra el pago final 556
+        Pago.objects.filter(reserva=self.reserva).update(monto_total=Decimal("10000.00"))
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("mercadopago:confirmar_pago_sena", args=[self.reserva.id_reserva]),
+            {"payment_id": "555"},
+            format="json",
+        )
+        sena_id = response.data["verificacion_id"]
+        response = self.client.post(
+            reverse("mercadopago:buscar_pago_por_preferencia", args=[self.reserva.id_reserva]),
+            {"tipo_pago": "final"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        final_id = response.data["verificacion_id"]
+        self.assertFalse(OutboundEmail.objects.exists())
+
+        _SDKFalso.pagos["555"] = _pago_mp("555", self.reserva.id_reserva)
+        _SDKFalso.pagos["556"] = _pago_mp("556", self.reserva.id_reserva, tipo="FINAL")
+        stats = self._verificar()
+
+        self.assertEqual(stats["aprobados"], 2)
+        self.assertEqual([llamada[0] for llamada in _SDKFalso.llamadas], ["search"])
+        pago = Pago.objects.get(reserva=self.reserva)
+        self.assertEqual((pago.payment_id_sena, pago.payment_id_final), ("555", "556"))
+        self.assertEqual(OutboundEmail.objects.filter(recipients=["ana@example.com"]).count(), 2)
+
+        response = self.client.get(reverse("mercadopago:verificacion_pago", args=[final_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["estado"], VerificacionPago.ESTADO_APROBADO)
+        self.assertEqual(response.data["payment_id"], "556")
+        self.assertEqual(
+            self.client.get(reverse("mercadopago:verificacion_pago", args=[sena_id])).data["status_mercadopago"],
+            "approved",
+        )
+
+        self.client.force_authenticate(User.objects.create_user("otro", "otro@example.com", "pass1234"))
+        response = self.client.get(reverse("mercadopago:verificacion_pago", args=[final_id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_worker_finds_payments_updated_before_the_search_window(self):
+        Pago.objects.filter(reserva=self.reserva).update(monto_total=Decimal("10000.00"))
+        hace_horas = (timezone.now() - timedelta(hours=3)).isoformat(timespec="milliseconds")
+        _SDKFalso.pagos["888"] = {**_pago_mp("888", self.reserva.id_reserva), "date_last_updated": hace_horas}
+        _SDKFalso.pagos["889"] = {
+            **_pago_mp("889", self.reserva.id_reserva, tipo="FINAL"),
+            "date_last_updated": hace_horas,
+        }
+        por_id = VerificadorPagos.encolar(reserva=self.reserva, tipo="sena", payment_id="888")
+        por_referencia = VerificadorPagos.encolar(
+            reserva=self.reserva, tipo="final", external_reference=f"FINAL-{self.reserva.id_reserva}"
+        )
+
+        stats = self._verificar()
+
+        self.assertEqual(stats["aprobados"], 2)
+        self.assertEqual([llamada[0] for llamada in _SDKFalso.llamadas], ["search", "get", "search"])
+        self.assertEqual(_SDKFalso.llamadas[2][1]["external_reference"], f"FINAL-{self.reserva.id_reserva}")
+        for verificacion in (por_id, por_referencia):
+            verificacion.refresh_from_db()
+            self.assertEqual(verificacion.estado, VerificacionPago.ESTADO_APROBADO)
+        pago = Pago.objects.get(reserva=self.reserva)
+        self.assertEqual((pago.payment_id_sena, pago.payment_id_final), ("888", "889"))
+
+    def test_worker_backs_off_until_attempts_are_exhausted(self):
+        verificacion = VerificadorPagos.encolar(reserva=self.reserva, tipo="sena", payment_id="666")
+
+        with override_settings(MERCADOPAGO_VERIFICACION_MAX_ATTEMPTS=2):
+            self.assertEqual(self._verificar()["reintentos"], 1)
+            verificacion.refresh_from_db()
+            self.assertEqual(verificacion.estado, VerificacionPago.ESTADO_PENDIENTE)
+            self.assertGreater(verificacion.proximo_intento, timezone.now())
+            # Antes del backoff no se vuelve a tomar
+            self.assertEqual(sum(self._verificar().values()), 0)
+
+            VerificacionPago.objects.filter(id=verificacion.id).update(proximo_intento=timezone.now())
+            self.assertEqual(self._verificar()["agotados"], 1)
+        verificacion.refresh_from_db()
+        self.assertEqual(verificacion.estado, VerificacionPago.ESTADO_AGOTADO)
+        self.assertIsNotNone(verificacion.fecha_fin)
+
+    def test_confirm_rejects_payment_of_another_reservation(self):
+        self.client.force_authenticate(self.user)
+        _SDKFalso.pagos["444"] = _pago_mp("444", self.reserva.id_reserva, tipo="FINAL")
+        url = reverse("mercadopago:confirmar_pago_sena", args=[self.reserva.id_reserva])
+
+        response = self.client.post(url, {"payment_id": "444"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self._verificar()
+        self.assertEqual(
+            VerificacionPago.objects.get(id=response.data["verificacion_id"]).estado,
+            VerificacionPago.ESTADO_RECHAZADO,
+        )
+
+        response = self.client.post(url, {"payment_id": "444"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Pago.objects.get(reserva=self.reserva).estado_pago_sena, "pendiente")
+
+    def test_checkout_reuses_preference_until_amount_changes(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("mercadopago:crear_pago_sena", args=[self.reserva.id_reserva])
+
+        primera = self.client.post(url, format="json")
+        segunda = self.client.post(url, format="json")
+
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.data["init_point"], primera.data["init_point"])
+        creadas = [llamada[1] for llamada in _SDKFalso.llamadas if llamada[0] == "preference"]
+        self.assertEqual(len(creadas), 1)
+        self.assertTrue(creadas[0]["expires"])
+        self.assertIs(MercadoPagoService.sdk(), MercadoPagoService.sdk())
+
+        Pago.objects.filter(reserva=self.reserva).update(monto_sena=Decimal("6000.00"))
+        tercera = self.client.post(url, format="json")
+        self.assertNotEqual(tercera.data["preference_id"], primera.data["preference_id"])
+        self.assertEqual(PreferenciaMercadoPago.objects.get(reserva=self.reserva).monto, Decimal("6000.00"))
+
+    def test_both_sena_checkout_endpoints_share_the_preference(self):
+        self.client.force_authenticate(self.user)
+        urls = [
+            reverse("mercadopago:crear_pago_sena", args=[self.reserva.id_reserva]),
+            reverse("reserva-crear-preferencia-sena", args=[self.reserva.id_reserva]),
+        ]
+
+        respuestas = [self.client.post(url, format="json") for url in urls * 2]
+
+        self.assertEqual({respuesta.status_code for respuesta in respuestas}, {status.HTTP_200_OK})
+        self.assertEqual({respuesta.data["preference_id"] for respuesta in respuestas}, {"pref-1"})
+        self.assertEqual(len([llamada for llamada in _SDKFalso.llamadas if llamada[0] == "preference"]), 1)
+
+    @override_settings(MERCADOPAGO_NOTIFICATION_URL="https://api.example.com/api/v1/mercadopago/webhook/")
+    def test_reserva_preferences_notify_the_webhook(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post(reverse("reserva-crear-preferencia-sena", args=[self.reserva.id_reserva]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        Pago.objects.filter(reserva=self.reserva).update(
+            estado_pago_sena="sena_pagada", monto_total=Decimal("14000.00")
+        )
+        response = self.client.post(reverse("reserva-crear-preferencia-final", args=[self.reserva.id_reserva]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        creadas = [llamada[1] for llamada in _SDKFalso.llamadas if llamada[0] == "preference"]
+        self.assertEqual(len(creadas), 2)
+        for creada in creadas:
+            self.assertEqual(creada["notification_url"], "https://api.example.com/api/v1/mercadopago/webhook/")
+
+    def test_webhook_does_not_apply_payment_with_a_different_amount(self):
+        _SDKFalso.pagos["121"] = _pago_mp("121", self.reserva.id_reserva, monto="50.00")
+
+        response = self._notificar("121")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["aplicado"])
+        registro = PagoMercadoPago.objects.get(payment_id="121")
+        self.assertEqual((registro.status, registro.fecha_aplicacion), ("approved", None))
+        self.assertEqual(Pago.objects.get(reserva=self.reserva).estado_pago_sena, "pendiente")
+        self.assertFalse(OutboundEmail.objects.exists())
+
+        # La verificación de una confirmación tampoco lo da por bueno
+        verificacion = VerificadorPagos.encolar(payment_id="121", reserva=self.reserva, tipo="sena")
+        self._verificar()
+        verificacion.refresh_from_db()
+        self.assertEqual(verificacion.estado, VerificacionPago.ESTADO_RECHAZADO)
+        self.assertEqual(Pago.objects.get(reserva=self.reserva).estado_pago_sena, "pendiente")
+
+    def test_reconciliation_applies_pending_payments_in_bulk_and_reports_discrepancies(self):
+        otra = Reserva.objects.create(
+            cliente=self.reserva.cliente,
+            servicio=self.reserva.servicio,
+            fecha_cita=timezone.now() + timedelta(days=5),
+            direccion="Calle 2",
+        )
+        Pago.objects.create(reserva=otra, monto_sena=Decimal("3000.00"))
+        _SDKFalso.pagos["701"] = _pago_mp("701", self.reserva.id_reserva, monto="5000.00")
+        _SDKFalso.pagos["702"] = _pago_mp("702", otra.id_reserva, estado="in_process", monto="3000.00")
+
+        reporte = ConciliadorPagos(por_segundo=0, dry_run=True).ejecutar()
+        self.assertEqual(reporte["aplicados"], 1)
+        self.assertEqual(Pago.objects.get(reserva=self.reserva).estado_pago_sena, "pendiente")
+        self.assertFalse(PagoMercadoPago.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reporte = ConciliadorPagos(batch_size=1, concurrencia=2, por_segundo=0).ejecutar()
+
+        # Seña de cada reserva por SENA- y RESERVA-: una búsqueda por referencia
+        self.assertEqual(reporte["consultas"], 4)
+        self.assertEqual(reporte["aplicados"], 1)
+        pago = Pago.objects.get(reserva=self.reserva)
+        self.assertEqual((pago.estado_pago_sena, pago.payment_id_sena), ("sena_pagada", "701"))
+        self.assertEqual(Reserva.objects.get(pk=self.reserva.pk).estado, "pendiente")
+        self.assertIsNotNone(PagoMercadoPago.objects.get(payment_id="701").fecha_aplicacion)
+        self.assertEqual(PagoMercadoPago.objects.get(payment_id="702").status, "in_process")
+        self.assertEqual(
+            [(item["reserva_id"], item["motivo"]) for item in reporte["discrepancias"]],
+            [(otra.id_reserva, "en_proceso")],
+        )
+        self.assertEqual(OutboundEmail.objects.filter(recipients=["ana@example.com"]).count(), 1)
+
+        # Lo ya aplicado no vuelve a seleccionarse
+        self.assertEqual(ConciliadorPagos(por_segundo=0).ejecutar()["pendientes"], 1)
+
+    def test_reconciliation_reports_amount_mismatch_without_applying(self):
+        _SDKFalso.pagos["701"] = _pago_mp("701", self.reserva.id_reserva, monto="4000.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reporte = ConciliadorPagos(por_segundo=0).ejecutar()
+
+        self.assertEqual(reporte["aplicados"], 0)
+        self.assertEqual(
+            [(item["motivo"], item["payment_id"]) for item in reporte["discrepancias"]], [("monto_distinto", "701")]
+        )
+        pago = Pago.objects.get(reserva=self.reserva)
+        self.assertEqual((pago.estado_pago_sena, pago.payment_id_sena), ("pendiente", None))
+        self.assertIsNone(PagoMercadoPago.objects.get(payment_id="701").fecha_aplicacion)
+        self.assertFalse(OutboundEmail.objects.exists())
+        # Sigue pendiente: la próxima corrida lo vuelve a reportar
+        self.assertEqual(ConciliadorPagos(por_segundo=0).ejecutar()["pendientes"], 1)
+
+
+class SimuladorMercadoPagoTests(APITestCase):
+    def setUp(self):
+        self.simulador = SimuladorMercadoPago(ConfiguracionSimulador(visible_despues_s=60, webhook_secret=SECRETO))
+        servidor = iniciar_en_segundo_plano(self.simulador)
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        ajustes = override_settings(
+            MERCADOPAGO_API_BASE_URL=f"http://127.0.0.1:{servidor.server_address[1]}",
+            MERCADOPAGO_WEBHOOK_SECRET=SECRETO,
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        MercadoPagoService.reset_sdk()
+        self.addCleanup(MercadoPagoService.reset_sdk)
+
+    def test_sdk_talks_to_the_stand_in(self):
+        respuesta = MercadoPagoService.sdk().preference().create(
+            {"items": [{"unit_price": 2500.0, "quantity": 2}], "external_reference": "SENA-7"}
+        )
+        self.assertEqual(respuesta["status"], 201)
+        pago = requests.post(respuesta["response"]["init_point"], json={}, timeout=5).json()
+        self.assertEqual(pago["transaction_amount"], 5000.0)
+
+        # Hasta visible_despues_s MercadoPago "no lo tiene"
+        self.assertIsNone(MercadoPagoService.consultar_pago(pago["id"]))
+        self.simulador.pagos[pago["id"]] = (0, pago)
+        self.assertEqual(MercadoPagoService.consultar_pago(pago["id"])["status"], "approved")
+        busqueda = MercadoPagoService.sdk().payment().search(filters={"external_reference": "SENA-7"})
+        self.assertEqual([p["id"] for p in busqueda["response"]["results"]], [pago["id"]])
+
+        headers = self.simulador.firmar(pago["id"], "req-1")
+        self.assertTrue(MercadoPagoService.verificar_firma(headers["x-signature"], "req-1", str(pago["id"])))
+
+        self.simulador.configuracion.tasa_error = 1
+        with self.assertRaises(MercadoPagoError):
+            MercadoPagoService.consultar_pago(pago["id"])
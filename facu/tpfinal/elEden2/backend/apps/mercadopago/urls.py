@@ -53,6 +53,14 @@ urlpatterns = [
         views.crear_reserva_con_pago,
         name="crear_reserva_con_pago",
     ),
+    # Notificaciones de MercadoPago (firmadas con MERCADOPAGO_WEBHOOK_SECRET)
+    path("webhook/", views.webhook, name="webhook"),
+    # Progreso de las verificaciones encoladas cuando el pago todavía no se informó (202)
+    path(
+        "verificaciones/<int:verificacion_id>/",
+        views.verificacion_pago,
+        name="verificacion_pago",
+    ),
     # Pago de prueba (solo para desarrollo)
     path("pago-prueba/", views.crear_pago_prueba, name="pago_prueba"),
     # Endpoint deprecado (mantener por compatibilidad)
@@ -0,0 +1,266 @@
+"""
+Verificación de pagos en segundo plano.
+
+Cuando el frontend confirma un pago que MercadoPago todavía no informó, la vista
+encola una ``VerificacionPago`` y responde 202; ``manage.py verificar_pagos`` la
+resuelve fuera del request. Cada lote:
+
+1. Resuelve sin llamar a MercadoPago lo que ya llegó por webhook (``PagoMercadoPago``).
+2. Trae el resto con una sola búsqueda paginada (``payment().search`` por fecha de
+   actualización) y cruza los resultados por ``payment_id`` o ``external_reference``.
+3. Consulta uno por uno los que no aparecieron (por id o por ``external_reference``):
+   pueden ser pagos actualizados antes de la ventana de la búsqueda.
+
+Lo que sigue sin aparecer se reintenta con backoff exponencial hasta
+``MERCADOPAGO_VERIFICACION_MAX_ATTEMPTS``. Los emails salen de
+``MercadoPagoService.registrar`` cuando el trabajo aplica el pago.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PagoMercadoPago, VerificacionPago
+from .services import MercadoPagoError, MercadoPagoService
+
+logger = logging.getLogger(__name__)
+
+
+class VerificadorPagos:
+    """Encolado y procesamiento por lotes de ``VerificacionPago``."""
+
+    @staticmethod
+    def encolar(reserva=None, tipo="", payment_id="", external_reference="", usuario=None):
+        """Devuelve la verificación activa del mismo pago, o crea una nueva."""
+        payment_id = str(payment_id or "")
+        if not payment_id and not external_reference:
+            raise ValueError("Se necesita payment_id o external_reference")
+        activas = VerificacionPago.objects.filter(estado__in=VerificacionPago.ESTADOS_ACTIVOS)
+        if payment_id:
+            activas = activas.filter(payment_id=payment_id)
+        else:
+            activas = activas.filter(payment_id="", external_reference=external_reference)
+        existente = activas.order_by("id").first()
+        if existente is not None:
+            return existente
+        return VerificacionPago.objects.create(
+            reserva=reserva,
+            tipo=tipo,
+            payment_id=payment_id,
+            external_reference=external_reference,
+            solicitado_por=usuario if getattr(usuario, "is_authenticated", False) else None,
+        )
+
+    @staticmethod
+    def backoff(intentos):
+        base = int(getattr(settings, "MERCADOPAGO_VERIFICACION_BACKOFF_SECONDS", 5))
+        tope = int(getattr(settings, "MERCADOPAGO_VERIFICACION_BACKOFF_MAX_SECONDS", 300))
+        return timedelta(seconds=min(tope, base * 2 ** max(0, intentos - 1)))
+
+    @staticmethod
+    def claim(batch_size=None):
+        """Toma un lote vencido con ``skip_locked`` y lo marca ``verificando`` con un lease."""
+        batch_size = batch_size or int(getattr(settings, "MERCADOPAGO_VERIFICACION_BATCH_SIZE", 50))
+        lease = int(getattr(settings, "MERCADOPAGO_VERIFICACION_LEASE_SECONDS", 120))
+        ahora = timezone.now()
+        with transaction.atomic():
+            verificaciones = list(
+                VerificacionPago.objects.select_for_update(skip_locked=True)
+                .filter(estado__in=VerificacionPago.ESTADOS_ACTIVOS, proximo_intento__lte=ahora)
+                .order_by("proximo_intento", "id")[:batch_size]
+            )
+            VerificacionPago.objects.filter(pk__in=[v.pk for v in verificaciones]).update(
+                estado=VerificacionPago.ESTADO_VERIFICANDO, proximo_intento=ahora + timedelta(seconds=lease)
+            )
+        return verificaciones
+
+    @staticmethod
+    def _clave(datos):
+        return str(datos.get("id") or ""), datos.get("external_reference") or ""
+
+    @classmethod
+    def _buscar(cls, verificaciones):
+        """Pagos actualizados desde la verificación más vieja: ``(por_id, por_referencia)``.
+
+        Sólo mira ``MERCADOPAGO_VERIFICACION_MAX_PAGES`` páginas de la ventana; lo que no
+        aparece se consulta uno por uno en ``process_batch``.
+        """
+        margen = int(getattr(settings, "MERCADOPAGO_VERIFICACION_WINDOW_MINUTES", 60))
+        limite = int(getattr(settings, "MERCADOPAGO_VERIFICACION_PAGE_SIZE", 100))
+        max_paginas = int(getattr(settings, "MERCADOPAGO_VERIFICACION_MAX_PAGES", 5))
+        desde = min(v.fecha_creacion for v in verificaciones) - timedelta(minutes=margen)
+        filtros = {
+            "sort": "date_last_updated",
+            "criteria": "desc",
+            "range": "date_last_updated",
+            "begin_date": desde.isoformat(timespec="milliseconds"),
+            "end_date": timezone.now().isoformat(timespec="milliseconds"),
+            "limit": limite,
+        }
+
+        por_id, por_referencia = {}, {}
+        buscados_id = {v.payment_id for v in verificaciones if v.payment_id}
+        buscadas_ref = {v.external_reference for v in verificaciones if not v.payment_id}
+        sdk = MercadoPagoService.sdk()
+        for pagina in range(max_paginas):
+            try:
+                respuesta = sdk.payment().search(filters={**filtros, "offset": pagina * limite})
+            except Exception as exc:
+                raise MercadoPagoError(str(exc)) from exc
+            cuerpo = respuesta.get("response") if "response" in respuesta else respuesta
+            if not isinstance(cuerpo, dict) or (isinstance(respuesta.get("status"), int) and respuesta["status"] >= 400):
+                raise MercadoPagoError(f"Búsqueda de pagos falló: {respuesta.get('status')}")
+            resultados = cuerpo.get("results") or []
+            for datos in resultados:
+                payment_id, referencia = cls._clave(datos)
+                if payment_id in buscados_id:
+                    por_id[payment_id] = datos
+                # Por referencia gana el aprobado; si no hay, el más reciente
+                if referencia in buscadas_ref and (
+                    referencia not in por_referencia or datos.get("status") == "approved"
+                ):
+                    if por_referencia.get(referencia, {}).get("status") != "approved":
+                        por_referencia[referencia] = datos
+            total = (cuerpo.get("paging") or {}).get("total", len(resultados))
+            if len(resultados) < limite or (pagina + 1) * limite >= total:
+                break
+            if buscados_id <= set(por_id) and buscadas_ref <= set(por_referencia):
+                break
+        return por_id, por_referencia
+
+    @staticmethod
+    def _buscar_referencia(referencia):
+        """El pago aprobado con esa ``external_reference`` o, si no hay, el más reciente."""
+        limite = int(getattr(settings, "MERCADOPAGO_VERIFICACION_PAGE_SIZE", 100))
+        try:
+            respuesta = MercadoPagoService.sdk().payment().search(
+                filters={
+                    "external_reference": referencia,
+                    "sort": "date_last_updated",
+                    "criteria": "desc",
+                    "limit": limite,
+                }
+            )
+        except Exception as exc:
+            raise MercadoPagoError(str(exc)) from exc
+        cuerpo = respuesta.get("response") if "response" in respuesta else respuesta
+        if not isinstance(cuerpo, dict) or (isinstance(respuesta.get("status"), int) and respuesta["status"] >= 400):
+            raise MercadoPagoError(f"Búsqueda de pagos falló: {respuesta.get('status')}")
+        resultados = [datos for datos in cuerpo.get("results") or [] if datos.get("external_reference") == referencia]
+        aprobados = [datos for datos in resultados if datos.get("status") == "approved"]
+        return (aprobados or resultados or [None])[0]
+
+    @classmethod
+    def process_batch(cls, batch_size=None):
+        stats = {"aprobados": 0, "rechazados": 0, "reintentos": 0, "agotados": 0}
+        verificaciones = cls.claim(batch_size)
+        if not verificaciones:
+            return stats
+
+        # 1. Lo que ya informó el webhook no necesita llamar a MercadoPago
+        conocidos = PagoMercadoPago.objects.filter(
+            Q(payment_id__in=[v.payment_id for v in verificaciones if v.payment_id])
+            | Q(
+                external_reference__in=[v.external_reference for v in verificaciones if not v.payment_id],
+                status="approved",
+            )
+        )
+        por_id = {registro.payment_id: registro for registro in conocidos}
+        por_referencia = {registro.external_reference: registro for registro in conocidos if registro.aprobado}
+        faltantes = []
+        for verificacion in verificaciones:
+            if verificacion.payment_id:
+                registro = por_id.get(verificacion.payment_id)
+            else:
+                registro = por_referencia.get(verificacion.external_reference)
+            if registro is not None and not registro.en_proceso:
+                cls._resolver(verificacion, registro, stats)
+            else:
+                faltantes.append(verificacion)
+        if not faltantes:
+            return stats
+
+        # 2. Una búsqueda para todo el resto del lote
+        try:
+            encontrados_id, encontrados_ref = cls._buscar(faltantes)
+        except MercadoPagoError as exc:
+            logger.warning("Búsqueda de pagos en MercadoPago falló: %s", exc)
+            for verificacion in faltantes:
+                cls._reintentar(verificacion, f"MercadoPagoError: {exc}", stats)
+            return stats
+
+        for verificacion in faltantes:
+            try:
+                # Lo que no apareció puede haberse actualizado antes de la ventana (aprobado
+                # hace horas y sin webhook) o quedar fuera de las páginas leídas
+                if verificacion.payment_id:
+                    datos = encontrados_id.get(verificacion.payment_id)
+                    if datos is None:
+                        datos = MercadoPagoService.consultar_pago(verificacion.payment_id)
+                else:
+                    datos = encontrados_ref.get(verificacion.external_reference)
+                    if datos is None:
+                        datos = cls._buscar_referencia(verificacion.external_reference)
+                if datos is None:
+                    cls._reintentar(verificacion, "Pago aún no disponible en MercadoPago", stats)
+                    continue
+                cls._resolver(verificacion, MercadoPagoService.registrar(datos), stats)
+            except Exception as exc:
+                logger.warning("Verificación %s falló: %s", verificacion.pk, exc)
+                cls._reintentar(verificacion, f"{type(exc).__name__}: {exc}", stats)
+        return stats
+
+    @staticmethod
+    def _corresponde(verificacion, registro):
+        """Si la verificación se pidió para una reserva, el pago tiene que ser de esa reserva y tipo."""
+        if verificacion.reserva_id is None:
+            return True
+        es_final = verificacion.tipo == PagoMercadoPago.TIPO_FINAL
+        return registro.reserva_id == verificacion.reserva_id and (registro.tipo == PagoMercadoPago.TIPO_FINAL) == es_final
+
+    @classmethod
+    def _resolver(cls, verificacion, registro, stats):
+        verificacion.pago_mercadopago = registro
+        verificacion.intentos += 1
+        if registro.en_proceso:
+            cls._reintentar(verificacion, f"Pago {registro.status} en MercadoPago", stats, contar=False)
+            return
+        verificacion.ultimo_error = ""
+        if registro.aprobado and not cls._corresponde(verificacion, registro):
+            verificacion.estado = VerificacionPago.ESTADO_RECHAZADO
+            verificacion.ultimo_error = "El pago no corresponde a esta reserva"
+            stats["rechazados"] += 1
+        elif registro.aprobado and registro.reserva_id and registro.fecha_aplicacion is None:
+            verificacion.estado = VerificacionPago.ESTADO_RECHAZADO
+            verificacion.ultimo_error = "El monto pagado no coincide con el de la reserva"
+            stats["rechazados"] += 1
+        elif registro.aprobado:
+            verificacion.estado = VerificacionPago.ESTADO_APROBADO
+            stats["aprobados"] += 1
+        else:
+            verificacion.estado = VerificacionPago.ESTADO_RECHAZADO
+            verificacion.ultimo_error = f"Pago {registro.status} en MercadoPago"
+            stats["rechazados"] += 1
+        verificacion.fecha_fin = timezone.now()
+        verificacion.save()
+
+    @classmethod
+    def _reintentar(cls, verificacion, motivo, stats, contar=True):
+        max_intentos = int(getattr(settings, "MERCADOPAGO_VERIFICACION_MAX_ATTEMPTS", 12))
+        if contar:
+            verificacion.intentos += 1
+        verificacion.ultimo_error = motivo[:2000]
+        if verificacion.intentos >= max_intentos:
+            verificacion.estado = VerificacionPago.ESTADO_AGOTADO
+            verificacion.fecha_fin = timezone.now()
+            stats["agotados"] += 1
+            logger.error("Verificación %s agotada tras %s intentos: %s", verificacion.pk, verificacion.intentos, motivo)
+        else:
+            verificacion.estado = VerificacionPago.ESTADO_PENDIENTE
+            verificacion.proximo_intento = timezone.now() + cls.backoff(verificacion.intentos)
+            stats["reintentos"] += 1
+        verificacion.save()
@@ -6,21 +6,24 @@ Maneja la creación de preferencias de pago y la confirmación de pagos.
 import logging
 import uuid
 
-import mercadopago
 from django.conf import settings
 from django.forms.models import model_to_dict
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from apps.emails.services import EmailService
 from apps.audit.services import AuditService, sanitize_payload
 from apps.servicios.models import ConfiguracionPago, ImagenReserva, Pago, Reserva, Servicio
 from apps.servicios.serializers import ReservaSerializer
 from apps.users.models import Cliente, Persona
 
+from .models import PagoMercadoPago, VerificacionPago
+from .services import MercadoPagoError, MercadoPagoService
+from .verificaciones import VerificadorPagos
+
 logger = logging.getLogger(__name__)
 
 
@@ -70,52 +73,21 @@ def crear_preferencia_pago_sena(request, reserva_id):
 
         # Crear preferencia de pago de seña usando SDK de MercadoPago
         try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
-            preference_data = {
-                "items": [
-                    {
-                        "id": f"SENA-{reserva.id_reserva}",
-                        "title": f"Seña - Reserva #{reserva.id_reserva} - {reserva.servicio.nombre}",
-                        "description": f"Pago de seña para reserva de {reserva.servicio.nombre}",
-                        "quantity": 1,
-                        "unit_price": float(pago.monto_sena),
-                        "currency_id": "ARS",
-                        "category_id": "services",
-                    }
-                ],
-                "payer": {
-                    "name": reserva.cliente.persona.nombre,
-                    "surname": reserva.cliente.persona.apellido,
-                    "email": reserva.cliente.persona.email,
-                },
-                "back_urls": {
-                    "success": (
-                        f"{settings.FRONTEND_URL}/reservas/pago-exitoso"
-                        f"?tipo=sena&reserva_id={reserva.id_reserva}"
-                    ),
-                    "failure": f"{settings.FRONTEND_URL}/mis-reservas?error=pago_rechazado",
-                    "pending": f"{settings.FRONTEND_URL}/mis-reservas?info=pago_pendiente",
-                },
-                "auto_return": "approved",
-                "external_reference": f"SENA-{reserva.id_reserva}",
-                "statement_descriptor": "El Eden",
-                "payment_methods": {"excluded_payment_types": [], "installments": 12},
-            }
-
-            preference_response = sdk.preference().create(preference_data)
-            if "response" in preference_response:
-                preference = preference_response["response"]
-            else:
-                preference = preference_response
+            preference_data = MercadoPagoService.datos_preferencia_sena(reserva, pago)
 
+            registro, reutilizada = MercadoPagoService.preferencia(
+                reserva, PagoMercadoPago.TIPO_SENA, pago.monto_sena, preference_data
+            )
             preferencia = {
-                "preference_id": preference.get("id"),
-                "init_point": preference.get("init_point"),
-                "sandbox_init_point": preference.get("sandbox_init_point"),
+                "preference_id": registro.preference_id,
+                "init_point": registro.init_point,
+                "sandbox_init_point": registro.sandbox_init_point,
             }
 
-            logger.info(f"Preferencia de SEÑA creada para reserva {reserva_id}: {preferencia['preference_id']}")
+            logger.info(
+                f"Preferencia de SEÑA {'reutilizada' if reutilizada else 'creada'} "
+                f"para reserva {reserva_id}: {preferencia['preference_id']}"
+            )
 
             return Response(
                 {
@@ -189,8 +161,6 @@ def crear_preferencia_pago_final(request, reserva_id):
 
         # Crear preferencia de pago final usando SDK de MercadoPago
         try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
             preference_data = {
                 "items": [
                     {
@@ -221,20 +191,22 @@ def crear_preferencia_pago_final(request, reserva_id):
                 "statement_descriptor": "El Eden",
                 "payment_methods": {"excluded_payment_types": [], "installments": 12},
             }
+            if MercadoPagoService.notification_url():
+                preference_data["notification_url"] = MercadoPagoService.notification_url()
 
-            preference_response = sdk.preference().create(preference_data)
-            if "response" in preference_response:
-                preference = preference_response["response"]
-            else:
-                preference = preference_response
-
+            registro, reutilizada = MercadoPagoService.preferencia(
+                reserva, PagoMercadoPago.TIPO_FINAL, pago.monto_final, preference_data
+            )
             preferencia = {
-                "preference_id": preference.get("id"),
-                "init_point": preference.get("init_point"),
-                "sandbox_init_point": preference.get("sandbox_init_point"),
+                "preference_id": registro.preference_id,
+                "init_point": registro.init_point,
+                "sandbox_init_point": registro.sandbox_init_point,
             }
 
-            logger.info(f"Preferencia de PAGO FINAL creada para reserva {reserva_id}: {preferencia['preference_id']}")
+            logger.info(
+                f"Preferencia de PAGO FINAL {'reutilizada' if reutilizada else 'creada'} "
+                f"para reserva {reserva_id}: {preferencia['preference_id']}"
+            )
 
             return Response(
                 {
@@ -322,6 +294,45 @@ def verificar_pago(request, reserva_id):
         return Response({"error": "Reserva no encontrada"}, status=status.HTTP_404_NOT_FOUND)
 
 
+def _respuesta_en_proceso(verificacion, registro=None):
+    """202: MercadoPago todavía no informó el pago (o lo informó pendiente); queda una verificación encolada."""
+    return Response(
+        {
+            "estado": "procesando",
+            "verificacion_id": verificacion.id,
+            "verificacion_url": reverse("mercadopago:verificacion_pago", args=[verificacion.id]),
+            "status_mercadopago": registro.status if registro else None,
+            "mensaje": "El pago aún está siendo procesado. Te avisaremos apenas MercadoPago lo confirme.",
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def registro_para_reserva(request, reserva, payment_id, tipos):
+    """Estado conocido de ``payment_id`` para ``reserva``: ``(registro, respuesta_de_error)``.
+
+    Sólo lee ``PagoMercadoPago``: si MercadoPago todavía no lo informó encola una
+    ``VerificacionPago`` (la resuelve ``manage.py verificar_pagos``) y devuelve un 202.
+    """
+    registro = PagoMercadoPago.objects.filter(payment_id=str(payment_id)).first()
+    if registro is None or registro.en_proceso:
+        verificacion = VerificadorPagos.encolar(
+            reserva=reserva, tipo=tipos[0], payment_id=payment_id, usuario=request.user
+        )
+        return None, _respuesta_en_proceso(verificacion, registro)
+    if registro.reserva_id != reserva.id_reserva or registro.tipo not in tipos:
+        return None, Response(
+            {"error": "El pago no corresponde a esta reserva"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not registro.aprobado:
+        return None, Response(
+            {"error": f"El pago no está aprobado. Estado: {registro.status}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return registro, None
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def confirmar_pago_sena(request, reserva_id):
@@ -330,6 +341,10 @@ def confirmar_pago_sena(request, reserva_id):
     POST /api/v1/mercadopago/reservas/{reserva_id}/confirmar-pago-sena/
 
     Body: { "payment_id": "123456789" }
+
+    Sólo lee el estado que informó MercadoPago (webhook o verificación en segundo plano):
+    200 si está aprobado, 400 si fue rechazado y, mientras se procesa, 202 con el id de la
+    verificación (ver ``GET /api/v1/mercadopago/verificaciones/{id}/``).
     """
     try:
         reserva = Reserva.objects.get(id_reserva=reserva_id)
@@ -343,120 +358,26 @@ def confirmar_pago_sena(request, reserva_id):
 
         logger.info(f"🔍 Confirmando pago de seña para reserva {reserva_id} con payment_id: {payment_id}")
 
-        # Verificar el pago con MercadoPago (con reintentos por delay de sandbox)
-        sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-        payment_data = None
-        max_retries = 6  # Reintentos para sandbox que tiene delays
-        retry_delay = 3  # segundos entre reintentos
-
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    logger.info(f"⏳ Reintento {attempt + 1}/{max_retries} después de {retry_delay}s...")
-                    import time
-
-                    time.sleep(retry_delay)
-
-                payment_info = sdk.payment().get(payment_id)
-                payment_data = payment_info["response"] if "response" in payment_info else payment_info
-
-                # Verificar si el pago existe (no es 404)
-                if isinstance(payment_data, dict) and payment_data.get("status") != 404:
-                    logger.info(
-                        "📄 Información del pago encontrada: "
-                        f"ID={payment_data.get('id')}, Status={payment_data.get('status')}"
-                    )
-                    break  # Pago encontrado, salir del loop
-                else:
-                    logger.warning(f"⚠️ Intento {attempt + 1}: Pago aún no disponible en API (404)")
-                    if attempt == max_retries - 1:
-                        return Response(
-                            {
-                                "error": (
-                                    "El pago aún está siendo procesado. Por favor, espera unos segundos "
-                                    "y recarga la página."
-                                )
-                            },
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"❌ Error al validar pago después de {max_retries} intentos: {str(e)}")
-                    return Response(
-                        {"error": "No se pudo validar el pago con MercadoPago. Por favor, contacta con soporte."},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
-
-        # Verificar que el pago esté aprobado
-        if payment_data.get("status") == "approved":
-            pago = reserva.obtener_pago()
-
-            # Actualizar el pago de seña
-            pago.estado_pago_sena = "sena_pagada"
-            pago.payment_id_sena = payment_id
-            pago.fecha_pago_sena = timezone.now()
-
-            # Mantener estado general consistente
-            # - Si ya está pagado el final, queda 'pagado'
-            # - Si solo está la seña, queda 'sena_pagada'
-            if pago.estado_pago_final == "pagado":
-                pago.estado_pago = "pagado"
-            else:
-                pago.estado_pago = "sena_pagada"
-
-            reserva.save()
-            pago.save()
-
-            logger.info(f"✅ Pago de seña confirmado para reserva {reserva_id}")
-
-            # Enviar email de confirmación al cliente
-            try:
-                cliente = reserva.cliente
-                EmailService.send_payment_confirmation_email(
-                    user_email=cliente.persona.email,
-                    user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                    reserva_id=reserva.id_reserva,
-                    servicio_nombre=reserva.servicio.nombre,
-                    monto=pago.monto_sena,
-                    payment_id=payment_id,
-                    tipo_pago="seña",
-                )
-                logger.info(f"✅ Email de confirmación enviado a {cliente.persona.email}")
-            except Exception as e:
-                logger.error(f"Error al enviar email de confirmación al cliente: {str(e)}")
-
-            # Enviar notificación a los administradores
-            try:
-                EmailService.send_payment_notification_to_admin(
-                    reserva_id=reserva.id_reserva,
-                    cliente_nombre=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                    servicio_nombre=reserva.servicio.nombre,
-                    monto=pago.monto_sena,
-                    payment_id=payment_id,
-                    fecha_reserva=reserva.fecha_cita,
-                    direccion=reserva.direccion,
-                    observaciones=reserva.observaciones,
-                    tipo_pago="seña",
-                )
-                logger.info("✅ Notificación a administradores enviada")
-            except Exception as e:
-                logger.error(f"Error al enviar notificación a administradores: {str(e)}")
-
-            return Response(
-                {
-                    "success": True,
-                    "message": "Pago de seña confirmado exitosamente",
-                    "reserva_id": reserva.id_reserva,
-                    "estado_pago": pago.estado_pago_sena,
-                    "estado_reserva": reserva.estado,
-                }
-            )
-        else:
-            return Response(
-                {"error": f'El pago no está aprobado. Estado: {payment_data.get("status")}'},
-                status=status.HTTP_400_BAD_REQUEST,
+        pago = reserva.obtener_pago()
+        if pago.estado_pago_sena != "sena_pagada":
+            _, error = registro_para_reserva(
+                request, reserva, payment_id, (PagoMercadoPago.TIPO_SENA, PagoMercadoPago.TIPO_RESERVA)
             )
+            if error is not None:
+                return error
+            pago.refresh_from_db()
+            reserva.refresh_from_db()
+
+        return Response(
+            {
+                "success": True,
+                "message": "Pago de seña confirmado exitosamente",
+                "reserva_id": reserva.id_reserva,
+                "estado_pago": pago.estado_pago_sena,
+                "estado_reserva": reserva.estado,
+                "payment_id": pago.payment_id_sena,
+            }
+        )
 
     except Reserva.DoesNotExist:
         return Response({"error": "Reserva no encontrada"}, status=status.HTTP_404_NOT_FOUND)
@@ -476,6 +397,8 @@ def confirmar_pago_final(request, reserva_id):
     POST /api/v1/mercadopago/reservas/{reserva_id}/confirmar-pago-final/
 
     Body: { "payment_id": "123456789" }
+
+    Igual que la seña: 200 si está aprobado, 202 mientras se procesa, 400 si fue rechazado.
     """
     try:
         reserva = Reserva.objects.get(id_reserva=reserva_id)
@@ -490,162 +413,35 @@ def confirmar_pago_final(request, reserva_id):
         logger.info(f"🔍 Confirmando pago final para reserva {reserva_id} con payment_id: {payment_id}")
 
         # Idempotencia: si ya está pagado, no volver a consultar/actualizar
-        pago_existente = reserva.obtener_pago()
-        if pago_existente.estado_pago_final == "pagado":
+        pago = reserva.obtener_pago()
+        if pago.estado_pago_final == "pagado":
             return Response(
                 {
                     "success": True,
                     "message": "El pago final ya fue confirmado",
                     "reserva_id": reserva.id_reserva,
-                    "estado_pago": pago_existente.estado_pago_final,
+                    "estado_pago": pago.estado_pago_final,
                     "estado_reserva": reserva.estado,
-                    "payment_id": pago_existente.payment_id_final,
+                    "payment_id": pago.payment_id_final,
                 }
             )
 
-        # Verificar el pago con MercadoPago
-        try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-            payment_data = None
-            max_retries = 6
-            retry_delay = 3
-
-            for attempt in range(max_retries):
-                if attempt > 0:
-                    logger.info(f"⏳ Reintento {attempt + 1}/{max_retries} después de {retry_delay}s...")
-                    import time
-
-                    time.sleep(retry_delay)
-
-                payment_info = sdk.payment().get(payment_id)
-                payment_data = payment_info["response"] if "response" in payment_info else payment_info
-
-                # Si no es 404, lo tomamos como disponible
-                if isinstance(payment_data, dict) and payment_data.get("status") != 404:
-                    break
-
-                if attempt == max_retries - 1:
-                    return Response(
-                        {
-                            "error": (
-                                "El pago aún está siendo procesado. Por favor, espera unos segundos "
-                                "y recarga la página."
-                            )
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-            logger.info(f"📄 Información del pago: {payment_data}")
-
-            # Verificar que el pago esté aprobado
-            if payment_data.get("status") == "approved":
-                pago = reserva.obtener_pago()
-
-                # Actualizar el pago final
-                pago.estado_pago_final = "pagado"
-                pago.payment_id_final = payment_id
-                pago.fecha_pago_final = timezone.now()
-
-                # Estado general
-                pago.estado_pago = "pagado"
-
-                # Si existe una propuesta aceptada con fecha, tomarla como fecha de cita confirmada
-                try:
-                    diseno_aceptado = reserva.disenos.filter(estado="aceptado").order_by("-id_diseno").first()
-                    if diseno_aceptado and diseno_aceptado.fecha_propuesta:
-                        if not getattr(reserva, "fecha_realizacion", None):
-                            reserva.fecha_realizacion = diseno_aceptado.fecha_propuesta
-                except Exception:
-                    pass
-
-                # Actualizar el estado de la reserva
-                if reserva.estado not in ("confirmada", "en_curso", "completada", "cancelada"):
-                    # Normalización suave: si hubiese estados legacy en DB
-                    reserva.estado = "confirmada"
-
-                reserva.save()
-                pago.save()
-
-                logger.info(f"✅ Pago final confirmado para reserva {reserva_id}")
-
-                # Enviar emails de confirmación
-                try:
-                    cliente = reserva.cliente
-
-                    # 1. Email al cliente confirmando el pago
-                    EmailService.send_payment_confirmation_email(
-                        user_email=cliente.persona.email,
-                        user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                        reserva_id=reserva.id_reserva,
-                        servicio_nombre=reserva.servicio.nombre,
-                        monto=pago.monto_final,
-                        payment_id=payment_id,
-                        tipo_pago="final",
-                    )
-                    logger.info(f"✅ Email de confirmación de pago final enviado a {cliente.persona.email}")
-
-                    # 2. Emails a los empleados asignados
-                    from apps.servicios.models import ReservaEmpleado
-
-                    empleados_asignados = ReservaEmpleado.objects.filter(reserva=reserva).select_related(
-                        "empleado__persona"
-                    )
-
-                    for asignacion in empleados_asignados:
-                        empleado = asignacion.empleado
-                        hora_servicio = (
-                            reserva.fecha_cita.strftime("%H:%M") if reserva.fecha_cita else "A confirmar"
-                        )
-
-                        EmailService.send_employee_work_assignment_notification(
-                            empleado_email=empleado.persona.email,
-                            empleado_nombre=f"{empleado.persona.nombre} {empleado.persona.apellido}",
-                            reserva_id=reserva.id_reserva,
-                            cliente_nombre=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                            servicio_nombre=reserva.servicio.nombre,
-                            fecha_servicio=reserva.fecha_cita,
-                            hora_servicio=hora_servicio,
-                            direccion=reserva.direccion or "No especificada",
-                            observaciones=reserva.observaciones,
-                            rol=asignacion.rol,
-                        )
-                        logger.info(f"✅ Email de asignación de trabajo enviado a {empleado.persona.email}")
-
-                    if empleados_asignados.count() > 0:
-                        logger.info(f"✅ Se enviaron {empleados_asignados.count()} email(s) a empleados asignados")
-                    else:
-                        logger.warning(f"⚠️ No hay empleados asignados a la reserva {reserva_id}")
-
-                except Exception as e:
-                    logger.error(f"❌ Error al enviar emails de confirmación: {str(e)}")
-                    import traceback
-
-                    logger.error(traceback.format_exc())
+        _, error = registro_para_reserva(request, reserva, payment_id, (PagoMercadoPago.TIPO_FINAL,))
+        if error is not None:
+            return error
+        pago.refresh_from_db()
+        reserva.refresh_from_db()
 
-                return Response(
-                    {
-                        "success": True,
-                        "message": "Pago final confirmado exitosamente",
-                        "reserva_id": reserva.id_reserva,
-                        "estado_pago": pago.estado_pago_final,
-                        "estado_reserva": reserva.estado,
-                    }
-                )
-            else:
-                return Response(
-                    {"error": f'El pago no está aprobado. Estado: {payment_data.get("status")}'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        except Exception as e:
-            logger.error(f"Error al verificar el pago con MercadoPago: {str(e)}")
-            return Response(
-                {
-                    "error": "No se pudo verificar el pago con MercadoPago",
-                    "detalle": str(e),
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return Response(
+            {
+                "success": True,
+                "message": "Pago final confirmado exitosamente",
+                "reserva_id": reserva.id_reserva,
+                "estado_pago": pago.estado_pago_final,
+                "estado_reserva": reserva.estado,
+                "payment_id": pago.payment_id_final,
+            }
+        )
 
     except Reserva.DoesNotExist:
         return Response({"error": "Reserva no encontrada"}, status=status.HTTP_404_NOT_FOUND)
@@ -661,157 +457,46 @@ def confirmar_pago_final(request, reserva_id):
 @permission_classes([IsAuthenticated])
 def buscar_pago_por_preferencia(request, reserva_id):
     """
-    Buscar y confirmar un pago usando el preference_id
+    Buscar y confirmar un pago de la reserva cuando el frontend no tiene el payment_id
     POST /api/v1/mercadopago/reservas/{reserva_id}/buscar-pago-por-preferencia/
 
-    Body: { "preference_id": "xxx", "tipo_pago": "sena" }
+    Body: { "tipo_pago": "sena" }
+
+    Busca por external_reference (SENA-{id} / FINAL-{id}). Si el pago aprobado ya se
+    registró responde 200; si no, encola una verificación y responde 202 con su id:
+    la búsqueda en MercadoPago la hace ``manage.py verificar_pagos`` en lote.
     """
     try:
         reserva = Reserva.objects.get(id_reserva=reserva_id)
-        preference_id = request.data.get("preference_id")
         tipo_pago = request.data.get("tipo_pago", "sena")
 
-        if preference_id:
-            filters = {"preference_id": preference_id}
-            logger.info(f"🔍 Buscando pago para preferencia: {preference_id}")
+        if tipo_pago == "sena":
+            external_reference = f"SENA-{reserva.id_reserva}"
+            tipo = PagoMercadoPago.TIPO_SENA
         else:
-            external_reference = (
-                f"SENA-{reserva.id_reserva}" if tipo_pago == "sena" else f"FINAL-{reserva.id_reserva}"
+            external_reference = f"FINAL-{reserva.id_reserva}"
+            tipo = PagoMercadoPago.TIPO_FINAL
+        logger.info(f"🔍 Buscando pago por external_reference: {external_reference}")
+
+        registro = (
+            PagoMercadoPago.objects.filter(external_reference=external_reference, status="approved")
+            .order_by("-fecha_actualizacion")
+            .first()
+        )
+        if registro is None:
+            verificacion = VerificadorPagos.encolar(
+                reserva=reserva, tipo=tipo, external_reference=external_reference, usuario=request.user
             )
-            filters = {"external_reference": external_reference}
-            logger.info(f"🔍 Buscando pago por external_reference: {external_reference}")
+            return _respuesta_en_proceso(verificacion)
 
-        # Buscar pagos asociados a esta preferencia
-        try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
-            search_result = sdk.payment().search(filters=filters)
-
-            if "response" in search_result:
-                payments = search_result["response"].get("results", [])
-            else:
-                payments = search_result.get("results", [])
-
-            logger.info(f"📄 Pagos encontrados: {len(payments)}")
-
-            # Buscar el pago aprobado más reciente
-            approved_payment = None
-            for payment in payments:
-                if payment.get("status") == "approved":
-                    approved_payment = payment
-                    break
-
-            if approved_payment:
-                payment_id = str(approved_payment.get("id"))
-                logger.info(f"✅ Pago aprobado encontrado: {payment_id}")
-
-                # Confirmar el pago
-                pago = reserva.obtener_pago()
-                if tipo_pago == "sena":
-                    pago.estado_pago_sena = "sena_pagada"
-                    pago.payment_id_sena = payment_id
-                    pago.fecha_pago_sena = timezone.now()
-
-                    if pago.estado_pago_final == "pagado":
-                        pago.estado_pago = "pagado"
-                    else:
-                        pago.estado_pago = "sena_pagada"
-                else:
-                    pago.estado_pago_final = "pagado"
-                    pago.payment_id_final = payment_id
-                    pago.fecha_pago_final = timezone.now()
-
-                    pago.estado_pago = "pagado"
-
-                    # Si existe una propuesta aceptada con fecha, tomarla como fecha de cita confirmada
-                    try:
-                        diseno_aceptado = reserva.disenos.filter(estado="aceptado").order_by("-id_diseno").first()
-                        if diseno_aceptado and diseno_aceptado.fecha_propuesta:
-                            if not getattr(reserva, "fecha_realizacion", None):
-                                reserva.fecha_realizacion = diseno_aceptado.fecha_propuesta
-                    except Exception:
-                        pass
-
-                reserva.save()
-                pago.save()
-
-                # Enviar emails de confirmación
-                try:
-                    cliente = reserva.cliente
-
-                    if tipo_pago == "sena":
-                        # Email al cliente
-                        EmailService.send_payment_confirmation_email(
-                            user_email=cliente.persona.email,
-                            user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                            reserva_id=reserva.id_reserva,
-                            servicio_nombre=reserva.servicio.nombre,
-                            monto=pago.monto_sena,
-                            payment_id=payment_id,
-                            tipo_pago="seña",
-                        )
-                        # Email a administradores
-                        EmailService.send_payment_notification_to_admin(
-                            reserva_id=reserva.id_reserva,
-                            cliente_nombre=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                            servicio_nombre=reserva.servicio.nombre,
-                            monto=pago.monto_sena,
-                            payment_id=payment_id,
-                            fecha_reserva=reserva.fecha_cita,
-                            direccion=reserva.direccion,
-                            observaciones=reserva.observaciones,
-                            tipo_pago="seña",
-                        )
-                    else:
-                        # Email al cliente para pago final
-                        EmailService.send_payment_confirmation_email(
-                            user_email=cliente.persona.email,
-                            user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                            reserva_id=reserva.id_reserva,
-                            servicio_nombre=reserva.servicio.nombre,
-                            monto=pago.monto_final,
-                            payment_id=payment_id,
-                            tipo_pago="final",
-                        )
-                        # Email a administradores para pago final
-                        EmailService.send_payment_notification_to_admin(
-                            reserva_id=reserva.id_reserva,
-                            cliente_nombre=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                            servicio_nombre=reserva.servicio.nombre,
-                            monto=pago.monto_final,
-                            payment_id=payment_id,
-                            fecha_reserva=reserva.fecha_cita,
-                            direccion=reserva.direccion,
-                            observaciones=reserva.observaciones,
-                            tipo_pago="final",
-                        )
-
-                    logger.info("✅ Emails enviados exitosamente")
-                except Exception as e:
-                    logger.error(f"Error al enviar emails: {str(e)}")
-
-                return Response(
-                    {
-                        "success": True,
-                        "payment_id": payment_id,
-                        "message": f"Pago de {tipo_pago} confirmado exitosamente",
-                    }
-                )
-            else:
-                return Response(
-                    {"error": "No se encontró un pago aprobado para esta preferencia"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-        except Exception as e:
-            logger.error(f"Error al buscar pagos en MercadoPago: {str(e)}")
-            return Response(
-                {
-                    "error": "No se pudo buscar el pago en MercadoPago",
-                    "detalle": str(e),
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        logger.info(f"✅ Pago aprobado encontrado: {registro.payment_id}")
+        return Response(
+            {
+                "success": True,
+                "payment_id": registro.payment_id,
+                "message": f"Pago de {tipo_pago} confirmado exitosamente",
+            }
+        )
 
     except Reserva.DoesNotExist:
         return Response({"error": "Reserva no encontrada"}, status=status.HTTP_404_NOT_FOUND)
@@ -902,8 +587,6 @@ def crear_preferencia_prereserva(request):
         logger.info(f"📸 {len(imagenes_jardin)} imágenes de jardín y {len(imagenes_ideas)} imágenes de ideas guardadas")
 
         # PASO 2: Crear preferencia de pago en MercadoPago
-        sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
         preference_data = {
             "items": [
                 {
@@ -936,78 +619,35 @@ def crear_preferencia_prereserva(request):
                 "servicio_id": servicio.id_servicio,
             },
         }
+        if MercadoPagoService.notification_url():
+            preference_data["notification_url"] = MercadoPagoService.notification_url()
 
         logger.info("🔵 PASO 2: Creando preferencia de pago MercadoPago")
         logger.info(f"📋 Preference data: {preference_data}")
         logger.info("📤 Enviando preferencia a MercadoPago...")
 
         try:
-            preference_response = sdk.preference().create(preference_data)
-            logger.info("✅ SDK llamado exitosamente (sin excepciones)")
-        except Exception as sdk_error:
-            logger.error(f"❌ Error al llamar SDK de MercadoPago: {str(sdk_error)}")
-            logger.error(f"❌ Tipo de error: {type(sdk_error).__name__}")
-            import traceback
-
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
+            preferencia, _ = MercadoPagoService.preferencia(
+                reserva, PagoMercadoPago.TIPO_RESERVA, monto_sena, preference_data
+            )
+        except MercadoPagoError as sdk_error:
+            logger.error(f"❌ Error al crear la preferencia en MercadoPago: {str(sdk_error)}")
             return Response(
                 {"error": f"Error de MercadoPago: {str(sdk_error)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Log de la respuesta completa para debugging
-        logger.info(f"📥 Respuesta completa de MercadoPago: {preference_response}")
-        logger.info(f"📥 Tipo de respuesta: {type(preference_response)}")
-
-        # Verificar si la respuesta tiene 'status' de error
-        if isinstance(preference_response, dict):
-            if preference_response.get("status") in [400, 401, 403, 404, 500]:
-                logger.error(f"❌ MercadoPago retornó status de error: {preference_response.get('status')}")
-                if "message" in preference_response:
-                    logger.error(f"❌ Mensaje: {preference_response.get('message')}")
-                if "error" in preference_response:
-                    logger.error(f"❌ Error: {preference_response.get('error')}")
-                if "cause" in preference_response:
-                    logger.error(f"❌ Causa: {preference_response.get('cause')}")
-                return Response(
-                    {
-                        "error": "Error al crear la preferencia de pago",
-                        "details": preference_response,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        # Manejar diferentes formatos de respuesta del SDK
-        if "response" in preference_response:
-            preference = preference_response["response"]
-            logger.info("📦 Usando preference_response['response']")
-        else:
-            preference = preference_response
-            logger.info("📦 Usando preference_response directamente")
-
-        # Verificar si preference es un dict o None
-        if preference is None:
-            logger.error("❌ La preferencia es None!")
-            # Intentar obtener el error
-            if "error" in preference_response:
-                logger.error(f"❌ Error de MercadoPago: {preference_response['error']}")
-            if "message" in preference_response:
-                logger.error(f"❌ Mensaje de MercadoPago: {preference_response['message']}")
-            if "status" in preference_response:
-                logger.error(f"❌ Status de MercadoPago: {preference_response['status']}")
-            raise Exception("MercadoPago retornó una preferencia vacía")
-
-        logger.info(f"✅ Preferencia de pre-reserva creada: {preference.get('id')}")
-        logger.info(f"🔗 Sandbox: {preference.get('sandbox_init_point')}")
+        logger.info(f"✅ Preferencia de pre-reserva creada: {preferencia.preference_id}")
+        logger.info(f"🔗 Sandbox: {preferencia.sandbox_init_point}")
         logger.info(
             f"🔙 Success URL: {settings.FRONTEND_URL}/reservas/confirmar-prereserva?reserva_id={reserva.id_reserva}"
         )
 
         return Response(
             {
-                "preference_id": preference.get("id"),
-                "init_point": preference.get("init_point"),
-                "sandbox_init_point": preference.get("sandbox_init_point"),
+                "preference_id": preferencia.preference_id,
+                "init_point": preferencia.init_point,
+                "sandbox_init_point": preferencia.sandbox_init_point,
                 "reserva_id": reserva.id_reserva,  # Retornar ID de reserva en lugar de temp_id
             },
             status=status.HTTP_201_CREATED,
@@ -1040,6 +680,8 @@ def crear_reserva_con_pago(request):
 
     POST /api/v1/mercadopago/crear-reserva-con-pago/
     Body: { "payment_id": "...", "reserva_id": 123 }
+
+    201 con la reserva si el pago está aprobado, 202 mientras MercadoPago lo procesa.
     """
     try:
         # Validar que el usuario sea un cliente
@@ -1072,118 +714,23 @@ def crear_reserva_con_pago(request):
 
         # Buscar la reserva
         try:
-            reserva = Reserva.objects.get(
-                id_reserva=reserva_id,
-                cliente=cliente,
-                estado_pago_sena="pendiente_pago_sena",
-            )
+            reserva = Reserva.objects.get(id_reserva=reserva_id, cliente=cliente)
         except Reserva.DoesNotExist:
-            logger.error(f"❌ No se encontró reserva #{reserva_id} pendiente de pago para este cliente")
+            logger.error(f"❌ No se encontró reserva #{reserva_id} para este cliente")
             return Response(
                 {"error": "No se encontró la reserva o ya fue procesada"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        logger.info(f"✅ Reserva encontrada: #{reserva.id_reserva}")
-
-        # Validar el pago con MercadoPago (con reintentos por delay de sandbox)
-        sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-        payment_data = None
-        max_retries = 10  # Sandbox puede tardar hasta 30+ segundos
-        retry_delay = 4  # segundos - total hasta 40 segundos de espera
-
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    logger.info(f"⏳ Reintento {attempt + 1}/{max_retries} después de {retry_delay}s...")
-                    import time
-
-                    time.sleep(retry_delay)
-
-                payment_info = sdk.payment().get(payment_id)
-                payment_data = payment_info["response"] if "response" in payment_info else payment_info
-
-                # Verificar si el pago existe (no es 404)
-                if isinstance(payment_data, dict) and payment_data.get("status") != 404:
-                    logger.info(f"📊 Estado del pago: {payment_data.get('status')}")
-                    logger.info(f"💵 Monto: ${payment_data.get('transaction_amount')}")
-                    break  # Pago encontrado, salir del loop
-                else:
-                    logger.warning(f"⚠️ Intento {attempt + 1}: Pago aún no disponible en API (404)")
-                    if attempt == max_retries - 1:
-                        raise Exception("Pago no encontrado después de múltiples reintentos")
-
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"❌ Error al validar pago después de {max_retries} intentos: {str(e)}")
-
-                    # Eliminar la reserva si el pago no se pudo validar
-                    logger.info(f"🗑️ Eliminando reserva #{reserva.id_reserva} por fallo en validación de pago")
-                    reserva.delete()
-
-                    return Response(
-                        {
-                            "error": (
-                                "No se pudo validar el pago con MercadoPago. La reserva fue cancelada. "
-                                "Por favor, intenta nuevamente."
-                            )
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-        # Verificar que el pago esté aprobado
-        if payment_data.get("status") != "approved":
-            logger.warning(f"⚠️ Pago NO aprobado. Estado: {payment_data.get('status')}")
-            return Response(
-                {"error": "El pago no está aprobado"},
-                status=status.HTTP_400_BAD_REQUEST,
+        if reserva.obtener_pago().estado_pago_sena != "sena_pagada":
+            _, error = registro_para_reserva(
+                request, reserva, payment_id, (PagoMercadoPago.TIPO_RESERVA, PagoMercadoPago.TIPO_SENA)
             )
+            if error is not None:
+                return error
+            reserva.refresh_from_db()
 
-        monto_pagado = payment_data.get("transaction_amount")
-
-        pago = reserva.obtener_pago()
-
-        # ACTUALIZAR el pago de la reserva existente
-        pago.payment_id_sena = payment_id
-        pago.estado_pago_sena = "sena_pagada"
-        pago.fecha_pago_sena = timezone.now()
-        reserva.estado = "confirmada"  # Ahora sí está confirmada
-        reserva.save()
-        pago.save()
-
-        logger.info(f"✅ Reserva #{reserva.id_reserva} ACTUALIZADA con pago confirmado")
-        logger.info(f"💳 Payment ID: {payment_id}")
-        logger.info(f"💰 Monto pagado: ${monto_pagado}")
-        logger.info("📊 Estado anterior: pendiente_pago_sena → Estado nuevo: sena_pagada")
-
-        # Enviar email de confirmación
-        logger.info("📧 Preparando email de confirmación de pago...")
-        logger.info(f"   📮 Destinatario: {cliente.persona.email}")
-        logger.info(f"   💰 Monto: ${pago.monto_sena}")
-        logger.info(f"   🔢 Reserva: #{reserva.id_reserva}")
-
-        try:
-            email_sent = EmailService.send_payment_confirmation_email(
-                user_email=cliente.persona.email,
-                user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                reserva_id=reserva.id_reserva,
-                servicio_nombre=reserva.servicio.nombre,
-                monto=pago.monto_sena,
-                payment_id=payment_id,
-                tipo_pago="seña",
-            )
-
-            if email_sent:
-                logger.info(f"✅ Email de confirmación enviado exitosamente a {cliente.persona.email}")
-            else:
-                logger.warning("⚠️ El email no pudo ser enviado (sin excepción)")
-
-        except Exception as e:
-            logger.error(f"❌ Error al enviar email: {str(e)}")
-            logger.error(f"   Tipo de error: {type(e).__name__}")
-            import traceback
-
-            logger.error(f"   Traceback: {traceback.format_exc()}")
+        logger.info(f"✅ Reserva #{reserva.id_reserva} con pago de seña confirmado ({payment_id})")
 
         # Serializar y retornar la reserva
         serializer = ReservaSerializer(reserva)
@@ -1208,6 +755,94 @@ def crear_reserva_con_pago(request):
         )
 
 
+# ==================== WEBHOOK ====================
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def webhook(request):
+    """
+    Notificaciones de MercadoPago (webhooks)
+    POST /api/v1/mercadopago/webhook/?data.id=123&type=payment
+
+    Verifica la firma ``x-signature`` con ``MERCADOPAGO_WEBHOOK_SECRET``, consulta el
+    pago una vez y lo registra/aplica de forma idempotente. Si el pago todavía no se
+    puede leer encola una verificación en vez de esperar el reintento de MercadoPago.
+    """
+    cuerpo = request.data if isinstance(request.data, dict) else {}
+    tipo = request.query_params.get("type") or cuerpo.get("type") or request.query_params.get("topic")
+    data_id = request.query_params.get("data.id") or (cuerpo.get("data") or {}).get("id")
+
+    if tipo != "payment" or not data_id:
+        return Response({"ignorado": True})
+
+    if not MercadoPagoService.verificar_firma(
+        request.headers.get("x-signature", ""), request.headers.get("x-request-id", ""), data_id
+    ):
+        logger.warning(f"Webhook de MercadoPago con firma inválida (data.id={data_id})")
+        return Response({"error": "Firma inválida"}, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        datos = MercadoPagoService.consultar_pago(data_id)
+    except MercadoPagoError as e:
+        logger.warning(f"Webhook: no se pudo consultar el pago {data_id}: {e}")
+        datos = None
+    if datos is None:
+        verificacion = VerificadorPagos.encolar(payment_id=data_id)
+        return Response({"payment_id": str(data_id), "verificacion_id": verificacion.id})
+
+    registro = MercadoPagoService.registrar(datos)
+    logger.info(f"Webhook: pago {registro.payment_id} ({registro.status}) registrado")
+    return Response(
+        {
+            "payment_id": registro.payment_id,
+            "status": registro.status,
+            "aplicado": registro.fecha_aplicacion is not None,
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def verificacion_pago(request, verificacion_id):
+    """
+    Progreso de una verificación de pago encolada por los endpoints de confirmación
+    GET /api/v1/mercadopago/verificaciones/{verificacion_id}/
+
+    ``estado``: pendiente / verificando mientras se consulta, aprobado / rechazado al
+    resolverse, agotado si MercadoPago no lo informó tras todos los reintentos.
+    """
+    try:
+        verificacion = VerificacionPago.objects.select_related(
+            "reserva__cliente__persona", "pago_mercadopago"
+        ).get(id=verificacion_id)
+    except VerificacionPago.DoesNotExist:
+        return Response({"error": "Verificación no encontrada"}, status=status.HTTP_404_NOT_FOUND)
+
+    reserva = verificacion.reserva
+    es_cliente = reserva is not None and reserva.cliente.persona.email == request.user.email
+    if not (request.user.is_staff or es_cliente or verificacion.solicitado_por_id == request.user.id):
+        return Response({"error": "No tenés acceso a esta verificación"}, status=status.HTTP_403_FORBIDDEN)
+
+    registro = verificacion.pago_mercadopago
+    return Response(
+        {
+            "id": verificacion.id,
+            "estado": verificacion.estado,
+            "reserva_id": verificacion.reserva_id,
+            "tipo": verificacion.tipo,
+            "payment_id": registro.payment_id if registro else verificacion.payment_id,
+            "intentos": verificacion.intentos,
+            "proximo_intento": verificacion.proximo_intento if verificacion.fecha_fin is None else None,
+            "status_mercadopago": registro.status if registro else None,
+            "ultimo_error": verificacion.ultimo_error,
+            "fecha_creacion": verificacion.fecha_creacion,
+            "fecha_fin": verificacion.fecha_fin,
+        }
+    )
+
+
 # ==================== ENDPOINTS DEPRECADOS ====================
 
 
@@ -1242,8 +877,8 @@ def crear_pago_prueba(request):
         monto = request.data.get("monto", 100)
         descripcion = request.data.get("descripcion", "Pago de prueba")
 
-        # Crear SDK de MercadoPago
-        sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
+        # Cliente compartido del SDK (las preferencias de prueba no se guardan)
+        sdk = MercadoPagoService.sdk()
 
         # Generar un ID único para la prueba
         test_id = str(uuid.uuid4())[:8]
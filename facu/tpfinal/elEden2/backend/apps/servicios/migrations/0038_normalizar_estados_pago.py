@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def normalizar_estados_pago(apps, schema_editor):
+    """Guarda los estados que el serializer derivaba al leer: un payment_id registrado es un pago hecho."""
+    Pago = apps.get_model("servicios", "Pago")
+
+    sena_registrada = Q(payment_id_sena__isnull=False) & ~Q(payment_id_sena="")
+    Pago.objects.filter(sena_registrada | Q(estado_pago_sena="pagado")).exclude(
+        estado_pago_sena="sena_pagada"
+    ).update(estado_pago_sena="sena_pagada")
+
+    final_registrado = Q(payment_id_final__isnull=False) & ~Q(payment_id_final="")
+    Pago.objects.filter(final_registrado).exclude(estado_pago_final="pagado").update(estado_pago_final="pagado")
+
+    Pago.objects.filter(estado_pago_final="pagado").exclude(estado_pago="pagado").update(estado_pago="pagado")
+    Pago.objects.filter(estado_pago_sena="sena_pagada").exclude(estado_pago_final="pagado").exclude(
+        estado_pago="sena_pagada"
+    ).update(estado_pago="sena_pagada")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("servicios", "0037_catalogos_soft_delete"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_estados_pago, migrations.RunPython.noop),
+    ]
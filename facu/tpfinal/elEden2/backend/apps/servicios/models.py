@@ -325,6 +325,10 @@ class Reserva(models.Model):
         )
 
     def aplicar_reprogramacion(self, nueva_fecha, motivo="clima", confirmar=False):
+        self.save(update_fields=self.preparar_reprogramacion(nueva_fecha, motivo=motivo, confirmar=confirmar))
+
+    def preparar_reprogramacion(self, nueva_fecha, motivo="clima", confirmar=False):
+        """Asigna los campos de la reprogramación sin guardar; devuelve los campos tocados."""
         update_fields = [
             "fecha_reprogramada_sugerida",
             "requiere_reprogramacion",
@@ -345,7 +349,7 @@ class Reserva(models.Model):
             self.requiere_reprogramacion = True
             update_fields.append("fecha_reprogramada_confirmada")
 
-        self.save(update_fields=update_fields)
+        return update_fields
 
 
 class Pago(models.Model):
@@ -223,7 +223,7 @@ class ReservaSerializer(serializers.ModelSerializer):
         decimal_places=2,
         read_only=True,
     )
-    estado_pago_sena = serializers.SerializerMethodField()
+    estado_pago_sena = serializers.CharField(source="pago.estado_pago_sena", read_only=True)
     payment_id_sena = serializers.CharField(source="pago.payment_id_sena", read_only=True)
     fecha_pago_sena = serializers.DateTimeField(source="pago.fecha_pago_sena", read_only=True)
 
@@ -239,10 +239,10 @@ class ReservaSerializer(serializers.ModelSerializer):
         decimal_places=2,
         read_only=True,
     )
-    estado_pago_final = serializers.SerializerMethodField()
+    estado_pago_final = serializers.CharField(source="pago.estado_pago_final", read_only=True)
     payment_id_final = serializers.CharField(source="pago.payment_id_final", read_only=True)
     fecha_pago_final = serializers.DateTimeField(source="pago.fecha_pago_final", read_only=True)
-    estado_pago = serializers.SerializerMethodField()
+    estado_pago = serializers.CharField(source="pago.estado_pago", read_only=True)
 
     class Meta:
         model = Reserva
@@ -266,44 +266,6 @@ class ReservaSerializer(serializers.ModelSerializer):
             for d in disenos
         ]
 
-    def _get_pago(self, obj):
-        return getattr(obj, "pago", None)
-
-    def get_estado_pago_sena(self, obj):
-        pago = self._get_pago(obj)
-        if not pago:
-            return None
-
-        # Si ya hay un payment_id registrado, consideramos la seña como pagada
-        if pago.payment_id_sena:
-            return "sena_pagada"
-
-        return pago.estado_pago_sena
-
-    def get_estado_pago_final(self, obj):
-        pago = self._get_pago(obj)
-        if not pago:
-            return None
-
-        # Si ya hay un payment_id del final, consideramos el final como pagado
-        if pago.payment_id_final:
-            return "pagado"
-
-        return pago.estado_pago_final
-
-    def get_estado_pago(self, obj):
-        pago = self._get_pago(obj)
-        if not pago:
-            return None
-
-        # Estado general coherente (evita casos donde quedó 'pendiente' aunque haya pagos registrados)
-        if pago.payment_id_final or pago.estado_pago_final == "pagado":
-            return "pagado"
-        if pago.payment_id_sena or pago.estado_pago_sena == "sena_pagada":
-            return "sena_pagada"
-
-        return pago.estado_pago
-
     def _get_cliente_respuesta(self, obj):
         """Obtiene la respuesta de encuesta completada por el cliente autenticado, si existe."""
         request = self.context.get("request")
@@ -407,7 +369,7 @@ class ReservaSerializer(serializers.ModelSerializer):
         if not pago:
             return False
 
-        return bool(pago.estado_pago_final == "pagado" or pago.payment_id_final)
+        return pago.estado_pago_final == "pagado"
 
 
 class EditarEmpleadosReservaSerializer(serializers.Serializer):
@@ -418,6 +380,22 @@ class EditarEmpleadosReservaSerializer(serializers.Serializer):
     )
 
 
+class ReprogramacionClimaSerializer(serializers.Serializer):
+    reserva_id = serializers.IntegerField(min_value=1)
+    # Sin fecha se confirma la sugerida por la alerta
+    nueva_fecha = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class ReprogramacionClimaLoteSerializer(serializers.Serializer):
+    reprogramaciones = ReprogramacionClimaSerializer(many=True, required=False)
+    aceptar_sugerencias = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs.get("reprogramaciones") and not attrs.get("aceptar_sugerencias"):
+            raise serializers.ValidationError('Debe indicar "reprogramaciones" o "aceptar_sugerencias"')
+        return attrs
+
+
 class ImagenDisenoSerializer(serializers.ModelSerializer):
     """Serializer para las imágenes de un diseño"""
 
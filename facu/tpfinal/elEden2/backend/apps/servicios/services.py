@@ -0,0 +1,119 @@
+"""
+Transiciones de estado de ``Pago`` (seña y pago final).
+
+Todo lo que confirma un pago (webhook y verificaciones de MercadoPago,
+``reconciliar_pagos`` y los endpoints ``confirmar-pago-*`` de ``ReservaViewSet``) pasa
+por ``PagoService``. Cada transición es un único
+``UPDATE ... WHERE estado_pago_<tipo> IN (pendientes)`` que escribe sólo las columnas que
+cambian: si dos procesos confirman el mismo pago a la vez, uno solo lo aplica y el otro
+recibe ``False``. El estado general ``estado_pago`` se calcula en el mismo UPDATE y queda
+guardado, así que los serializers lo leen tal cual.
+"""
+
+import logging
+
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Diseno, Pago, Reserva
+
+logger = logging.getLogger(__name__)
+
+
+class PagoService:
+    SENA = "sena"
+    FINAL = "final"
+    # Seña del flujo "pago primero": además confirma la reserva
+    RESERVA = "reserva"
+
+    # Estados desde los que se puede registrar un pago
+    ESTADOS_PENDIENTES = ("pendiente", "pendiente_pago_sena", "rechazado")
+    # Estados de la reserva que el pago final no cambia
+    ESTADOS_RESERVA_FIRMES = ("confirmada", "en_curso", "completada", "cancelada")
+
+    @classmethod
+    def _campos(cls, tipo):
+        """``(estado, payment_id, fecha, estado pagado)`` de ``Pago`` para el tipo de pago."""
+        if tipo == cls.FINAL:
+            return "estado_pago_final", "payment_id_final", "fecha_pago_final", "pagado"
+        return "estado_pago_sena", "payment_id_sena", "fecha_pago_sena", "sena_pagada"
+
+    @classmethod
+    def pendiente(cls, pago, tipo):
+        """Si el tipo de pago todavía se puede registrar, según la instancia en memoria."""
+        estado, _, _, _ = cls._campos(tipo)
+        return getattr(pago, estado) in cls.ESTADOS_PENDIENTES
+
+    @classmethod
+    def registrar(cls, pago, tipo, payment_id, fecha=None):
+        """Registra un pago aprobado; ``False`` si ese tipo ya estaba pagado (``pago`` queda releído)."""
+        return cls.registrar_lote(tipo, [(pago, payment_id)], fecha) == 1
+
+    @classmethod
+    def registrar_lote(cls, tipo, pagos, fecha=None):
+        """Registra ``[(pago, payment_id), ...]`` del mismo tipo y devuelve cuántos cambiaron.
+
+        Un UPDATE para ``Pago`` y, si cambió algo, uno para ``Reserva`` (pago final y
+        pre-reserva). Si cambiaron todos, las instancias de ``pago`` se actualizan en
+        memoria; si no, se releen. Las instancias de ``Reserva`` no se tocan.
+        """
+        if not pagos:
+            return 0
+        fecha = fecha or timezone.now()
+        estado, campo_payment_id, campo_fecha, pagado = cls._campos(tipo)
+        payment_ids = {pago.pk: str(payment_id) for pago, payment_id in pagos}
+
+        if len(payment_ids) == 1:
+            valor_payment_id = Value(next(iter(payment_ids.values())))
+        else:
+            valor_payment_id = Case(*[When(pk=pk, then=Value(valor)) for pk, valor in payment_ids.items()])
+        if tipo == cls.FINAL:
+            estado_pago = Value("pagado")
+        else:
+            estado_pago = Case(When(estado_pago_final="pagado", then=Value("pagado")), default=Value("sena_pagada"))
+
+        actualizados = Pago.objects.filter(pk__in=payment_ids, **{f"{estado}__in": cls.ESTADOS_PENDIENTES}).update(
+            **{estado: pagado, campo_payment_id: valor_payment_id, campo_fecha: fecha, "estado_pago": estado_pago}
+        )
+        if actualizados and tipo != cls.SENA:
+            cls._actualizar_reservas(tipo, [pago.reserva_id for pago, _ in pagos])
+
+        for pago, payment_id in pagos:
+            if actualizados == len(pagos):
+                setattr(pago, estado, pagado)
+                setattr(pago, campo_payment_id, str(payment_id))
+                setattr(pago, campo_fecha, fecha)
+                pago.estado_pago = "pagado" if tipo == cls.FINAL or pago.estado_pago_final == "pagado" else pagado
+                continue
+            pago.refresh_from_db(fields=[estado, campo_payment_id, campo_fecha, "estado_pago"])
+            previo = getattr(pago, campo_payment_id)
+            if getattr(pago, estado) == pagado and previo and previo != str(payment_id):
+                logger.warning(
+                    "Reserva %s: el pago %s de %s llegó con el tipo ya pagado por %s",
+                    pago.reserva_id,
+                    payment_id,
+                    tipo,
+                    previo,
+                )
+        return actualizados
+
+    @classmethod
+    def _actualizar_reservas(cls, tipo, reserva_ids):
+        estado, _, _, pagado = cls._campos(tipo)
+        # Sólo las reservas cuyo pago quedó pagado (en un lote pudo haber alguno ya aplicado por otro proceso)
+        reservas = Reserva.objects.filter(pk__in=reserva_ids, **{f"pago__{estado}": pagado})
+        if tipo == cls.RESERVA:
+            reservas.update(estado="confirmada")
+            return
+
+        # Si existe una propuesta aceptada con fecha, tomarla como fecha de realización (no pisar fecha_cita)
+        fecha_propuesta = (
+            Diseno.objects.filter(reserva=OuterRef("pk"), estado="aceptado")
+            .order_by("-id_diseno")
+            .values("fecha_propuesta")[:1]
+        )
+        reservas.update(
+            estado=Case(When(estado__in=cls.ESTADOS_RESERVA_FIRMES, then=F("estado")), default=Value("confirmada")),
+            fecha_realizacion=Coalesce(F("fecha_realizacion"), Subquery(fecha_propuesta)),
+        )
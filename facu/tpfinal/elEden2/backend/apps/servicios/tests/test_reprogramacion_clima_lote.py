@@ -0,0 +1,142 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from apps.servicios.models import Reserva, Servicio
+from apps.users.models import Cliente, Empleado, Genero, Localidad, Persona, TipoDocumento
+from apps.weather.models import AlertaClimatica
+
+
+class ReprogramacionClimaLoteTests(APITestCase):
+    def setUp(self):
+        self.genero = Genero.objects.create(genero="Otro")
+        self.tipo_documento = TipoDocumento.objects.create(tipo="DNI")
+        self.localidad = Localidad.objects.create(cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones")
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="pass1234", is_staff=True
+        )
+        self.client.force_authenticate(self.admin_user)
+
+        self.cliente = Cliente.objects.create(persona=self._persona("Cliente", "30000000"))
+        for indice in range(2):
+            Empleado.objects.create(persona=self._persona(f"Empleado{indice}", f"4000000{indice}"), cargo="Operador")
+
+        self.servicio = Servicio.objects.create(nombre="Poda", reprogramable_por_clima=True)
+        self.base = (timezone.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def _persona(self, nombre, documento):
+        return Persona.objects.create(
+            nombre=nombre,
+            apellido="Test",
+            email=f"{nombre.lower()}@example.com",
+            telefono="123456789",
+            calle="Calle",
+            numero="1",
+            nro_documento=documento,
+            genero=self.genero,
+            tipo_documento=self.tipo_documento,
+            localidad=self.localidad,
+        )
+
+    def _reserva_con_alerta(self, sugerida, servicio=None, estado_alerta="pending"):
+        servicio = servicio or self.servicio
+        reserva = Reserva.objects.create(
+            fecha_cita=self.base,
+            cliente=self.cliente,
+            servicio=servicio,
+            estado="confirmada",
+            direccion="Calle 1",
+        )
+        alerta = AlertaClimatica.objects.create(
+            reserva=reserva,
+            servicio=servicio,
+            fecha_alerta=self.base.date(),
+            latitud=Decimal("-27.37000"),
+            longitud=Decimal("-55.90000"),
+            precipitacion_mm=Decimal("8.00"),
+            estado=estado_alerta,
+        )
+        reserva.weather_alert = alerta
+        reserva.requiere_reprogramacion = True
+        reserva.fecha_reprogramada_sugerida = sugerida
+        reserva.save(update_fields=["weather_alert", "requiere_reprogramacion", "fecha_reprogramada_sugerida"])
+        return reserva
+
+    def test_accept_all_suggestions_checks_capacity_once_for_the_batch(self):
+        dia_libre = self.base + timedelta(days=1)
+        primera = self._reserva_con_alerta(dia_libre)
+        # Mismo día que la anterior: con 2 empleados y 2 requeridos por reserva ya no entra
+        sin_cupo = self._reserva_con_alerta(dia_libre + timedelta(hours=4))
+        otra_fecha = self._reserva_con_alerta(self.base + timedelta(days=3))
+        ya_resuelta = self._reserva_con_alerta(self.base + timedelta(days=4), estado_alerta="resolved")
+
+        with (
+            patch("apps.emails.services.EmailService.send_weather_reprogram_notification") as mock_email,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.post(
+                reverse("reserva-reprogramar-por-clima-lote"), {"aceptar_sugerencias": True}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(
+            [item["reserva_id"] for item in body["reprogramadas"]], [primera.id_reserva, otra_fecha.id_reserva]
+        )
+        self.assertEqual([item["reserva_id"] for item in body["rechazadas"]], [sin_cupo.id_reserva])
+
+        primera.refresh_from_db()
+        self.assertEqual(primera.fecha_cita, dia_libre)
+        self.assertFalse(primera.requiere_reprogramacion)
+        self.assertEqual(primera.weather_alert.estado, "resolved")
+        self.assertEqual(primera.weather_alert.resuelta_por, self.admin_user)
+        sin_cupo.refresh_from_db()
+        self.assertEqual(sin_cupo.fecha_cita, self.base)
+        self.assertEqual(sin_cupo.weather_alert.estado, "pending")
+        ya_resuelta.refresh_from_db()
+        self.assertEqual(ya_resuelta.fecha_cita, self.base)
+
+        # Un aviso por reserva reprogramada, encolado después del commit
+        self.assertEqual(
+            [call.kwargs["reserva"].id_reserva for call in mock_email.call_args_list],
+            [primera.id_reserva, otra_fecha.id_reserva],
+        )
+
+    def test_explicit_dates_override_suggestions_and_reject_fixed_services(self):
+        reserva = self._reserva_con_alerta(self.base + timedelta(days=1))
+        fijo = self._reserva_con_alerta(
+            self.base + timedelta(days=1),
+            servicio=Servicio.objects.create(nombre="Diseño", reprogramable_por_clima=False),
+        )
+        nueva_fecha = self.base + timedelta(days=5)
+
+        with patch("apps.emails.services.EmailService.send_weather_reprogram_notification"):
+            response = self.client.post(
+                reverse("reserva-reprogramar-por-clima-lote"),
+                {
+                    "reprogramaciones": [
+                        {"reserva_id": reserva.id_reserva, "nueva_fecha": nueva_fecha.isoformat()},
+                        {"reserva_id": fijo.id_reserva},
+                        {"reserva_id": 999999},
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(len(body["reprogramadas"]), 1)
+        self.assertEqual({item["reserva_id"] for item in body["rechazadas"]}, {fijo.id_reserva, 999999})
+        reserva.refresh_from_db()
+        self.assertEqual(reserva.fecha_cita, nueva_fecha)
+        self.assertEqual(reserva.fecha_reprogramada_confirmada, nueva_fecha)
+
+    def test_requires_a_list_or_accept_all(self):
+        response = self.client.post(reverse("reserva-reprogramar-por-clima-lote"), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
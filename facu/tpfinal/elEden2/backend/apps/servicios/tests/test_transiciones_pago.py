@@ -0,0 +1,145 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from apps.mercadopago.models import PagoMercadoPago, VerificacionPago
+from apps.servicios.models import Diseno, Pago, Reserva, Servicio
+from apps.servicios.services import PagoService
+from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
+
+
+class TransicionesPagoTests(APITestCase):
+    def setUp(self):
+        persona = Persona.objects.create(
+            nombre="Cliente",
+            apellido="Test",
+            email="cliente@example.com",
+            telefono="123456789",
+            calle="Calle",
+            numero="1",
+            nro_documento="30000000",
+            genero=Genero.objects.create(genero="Otro"),
+            tipo_documento=TipoDocumento.objects.create(tipo="DNI"),
+            localidad=Localidad.objects.create(cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones"),
+        )
+        self.servicio = Servicio.objects.create(nombre="Poda")
+        self.reserva = Reserva.objects.create(
+            fecha_cita=timezone.now() + timedelta(days=2),
+            cliente=Cliente.objects.create(persona=persona),
+            servicio=self.servicio,
+            estado="pendiente",
+            direccion="Calle 1",
+        )
+        self.pago = Pago.objects.create(reserva=self.reserva, monto_sena=Decimal("100"), monto_total=Decimal("1000"))
+        self.admin_user = User.objects.create_user(
+            username="admin", email="admin@example.com", password="pass1234", is_staff=True
+        )
+
+    def test_concurrent_transitions_apply_once_and_store_derived_status(self):
+        # Dos procesos con la misma fila leída antes de que cualquiera la cambie
+        otra_copia = Pago.objects.get(pk=self.pago.pk)
+
+        self.assertTrue(PagoService.registrar(self.pago, PagoService.SENA, "111"))
+        with self.assertLogs("apps.servicios.services", level="WARNING"):
+            self.assertFalse(PagoService.registrar(otra_copia, PagoService.SENA, "222"))
+
+        self.assertEqual(otra_copia.payment_id_sena, "111")
+        self.pago.refresh_from_db()
+        self.assertEqual(
+            (self.pago.estado_pago_sena, self.pago.payment_id_sena, self.pago.estado_pago),
+            ("sena_pagada", "111", "sena_pagada"),
+        )
+
+        fecha_propuesta = timezone.now() + timedelta(days=10)
+        Diseno.objects.create(
+            titulo="Propuesta",
+            presupuesto=Decimal("1000"),
+            estado="aceptado",
+            reserva=self.reserva,
+            servicio=self.servicio,
+            fecha_propuesta=fecha_propuesta,
+        )
+        # Informado aprobado por MercadoPago pero todavía sin aplicar
+        PagoMercadoPago.objects.create(
+            payment_id="333", reserva=self.reserva, tipo=PagoMercadoPago.TIPO_FINAL, status="approved"
+        )
+        self.client.force_authenticate(self.admin_user)
+        url = reverse("reserva-confirmar-pago-final", args=[self.reserva.id_reserva])
+        with patch("apps.emails.services.EmailService.send_payment_confirmation_email") as mock_email:
+            respuesta = self.client.post(url, {"payment_id": "333"}, format="json")
+            repetida = self.client.post(url, {"payment_id": "333"}, format="json")
+            otro_pago = self.client.post(url, {"payment_id": "444"}, format="json")
+
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(repetida.status_code, status.HTTP_200_OK)
+        self.assertEqual(otro_pago.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(mock_email.call_count, 1)
+        self.assertEqual(
+            (respuesta.data["reserva"]["estado_pago_final"], respuesta.data["reserva"]["estado_pago"]),
+            ("pagado", "pagado"),
+        )
+
+        self.reserva.refresh_from_db()
+        self.assertEqual(self.reserva.estado, "confirmada")
+        self.assertEqual(self.reserva.fecha_realizacion, fecha_propuesta)
+        self.pago.refresh_from_db()
+        self.assertEqual((self.pago.payment_id_final, self.pago.estado_pago), ("333", "pagado"))
+
+    def test_confirm_only_applies_payments_verified_with_mercadopago(self):
+        self.client.force_authenticate(User.objects.create_user("cliente", "cliente@example.com", "pass1234"))
+        url = reverse("reserva-confirmar-pago-sena", args=[self.reserva.id_reserva])
+
+        desconocido = self.client.post(url, {"payment_id": "555"}, format="json")
+        self.assertEqual(desconocido.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(VerificacionPago.objects.filter(payment_id="555").exists())
+
+        PagoMercadoPago.objects.create(
+            payment_id="666", reserva=self.reserva, tipo=PagoMercadoPago.TIPO_FINAL, status="approved"
+        )
+        PagoMercadoPago.objects.create(
+            payment_id="777", reserva=self.reserva, tipo=PagoMercadoPago.TIPO_SENA, status="rejected"
+        )
+        self.assertEqual(
+            self.client.post(url, {"payment_id": "666"}, format="json").status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.post(url, {"payment_id": "777"}, format="json").status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+        PagoMercadoPago.objects.create(
+            payment_id="999",
+            reserva=self.reserva,
+            tipo=PagoMercadoPago.TIPO_SENA,
+            status="approved",
+            transaction_amount=Decimal("50"),
+        )
+        self.assertEqual(
+            self.client.post(url, {"payment_id": "999"}, format="json").status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+        self.pago.refresh_from_db()
+        self.assertEqual((self.pago.estado_pago_sena, self.pago.payment_id_sena), ("pendiente", None))
+
+        # Seña del flujo "pago primero": se aplica con su tipo y confirma la pre-reserva
+        PagoMercadoPago.objects.create(
+            payment_id="888",
+            reserva=self.reserva,
+            tipo=PagoMercadoPago.TIPO_RESERVA,
+            status="approved",
+            transaction_amount=Decimal("100"),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(url, {"payment_id": "888"}, format="json")
+
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(respuesta.data["reserva"]["estado"], "confirmada")
+        self.assertIsNotNone(PagoMercadoPago.objects.get(payment_id="888").fecha_aplicacion)
+        self.assertIsNone(PagoMercadoPago.objects.get(payment_id="999").fecha_aplicacion)
+        self.pago.refresh_from_db()
+        self.assertEqual((self.pago.estado_pago_sena, self.pago.payment_id_sena), ("sena_pagada", "888"))
@@ -60,9 +60,11 @@ from .serializers import (
     OpcionNivelIntervencionSerializer,
     OpcionPresupuestoAproximadoSerializer,
     EditarEmpleadosReservaSerializer,
+    ReprogramacionClimaLoteSerializer,
     ReservaSerializer,
     ServicioSerializer,
 )
+from .services import PagoService
 from .utils import ordenar_empleados_por_puntuacion
 
 logger = logging.getLogger(__name__)
@@ -363,7 +365,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
             )
 
         pago = reserva.obtener_pago()
-        if not (pago.estado_pago_final == "pagado" or pago.payment_id_final):
+        if pago.estado_pago_final != "pagado":
             return Response(
                 {
                     "error": "No se pueden editar empleados para esta reserva.",
@@ -785,141 +787,89 @@ class ReservaViewSet(viewsets.ModelViewSet):
     def confirmar_pago_sena(self, request, pk=None):
         """
         Endpoint para confirmar el pago de seña desde el frontend.
-        Recibe el payment_id de MercadoPago y actualiza el estado de la reserva.
+        Recibe el payment_id de MercadoPago; igual que ``/api/v1/mercadopago/.../confirmar-pago-sena/``
+        responde 200 si MercadoPago lo informó aprobado, 202 mientras se verifica y 400 si no corresponde.
         """
-        from apps.emails.services import EmailService
-
-        reserva = self.get_object()
-        payment_id = request.data.get("payment_id")
-
-        logger.info(f"🔵 Confirmar pago seña llamado para reserva {reserva.id_reserva}")
-        logger.info(f"💳 Payment ID recibido: {payment_id}")
-
-        if not payment_id:
-            return Response({"error": "payment_id es requerido"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Actualizar estado de pago
-        pago = reserva.obtener_pago()
-        pago.payment_id_sena = payment_id
-        pago.estado_pago_sena = "sena_pagada"
-        pago.fecha_pago_sena = timezone.now()
-        if pago.estado_pago_final == "pagado":
-            pago.estado_pago = "pagado"
-        else:
-            pago.estado_pago = "sena_pagada"
-        pago.save(update_fields=["payment_id_sena", "estado_pago_sena", "fecha_pago_sena", "estado_pago"])
-
-        logger.info(f"✅ Pago de seña confirmado para reserva {reserva.id_reserva}: payment_id={payment_id}")
-
-        # Enviar email de confirmación al cliente
-        try:
-            cliente = reserva.cliente
-            logger.info(f"📧 Intentando enviar email a: {cliente.persona.email}")
-            logger.info(f"👤 Cliente: {cliente.persona.nombre} {cliente.persona.apellido}")
-
-            EmailService.send_payment_confirmation_email(
-                user_email=cliente.persona.email,
-                user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                reserva_id=reserva.id_reserva,
-                servicio_nombre=reserva.servicio.nombre,
-                monto=pago.monto_sena,
-                payment_id=payment_id,
-                tipo_pago="seña",
-            )
-            logger.info(f"✅ Email de confirmación enviado exitosamente a {cliente.persona.email}")
-        except Exception as e:
-            # No fallar el endpoint si el email falla
-            logger.error(f"❌ Error al enviar email de confirmación al cliente: {str(e)}")
-            import traceback
-
-            logger.error(traceback.format_exc())
-
-        # Enviar notificación a los administradores
-        try:
-            logger.info("📧 Enviando notificación a administradores...")
-
-            EmailService.send_payment_notification_to_admin(
-                reserva_id=reserva.id_reserva,
-                cliente_nombre=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                servicio_nombre=reserva.servicio.nombre,
-                monto=pago.monto_sena,
-                payment_id=payment_id,
-                fecha_reserva=reserva.fecha_cita,
-                direccion=reserva.direccion,
-                observaciones=reserva.observaciones,
-                tipo_pago="seña",
-            )
-            logger.info("✅ Notificación a administradores enviada exitosamente")
-        except Exception as e:
-            # No fallar el endpoint si el email falla
-            logger.error(f"❌ Error al enviar notificación a administradores: {str(e)}")
-            import traceback
-
-            logger.error(traceback.format_exc())
+        from apps.mercadopago.models import PagoMercadoPago
 
-        return Response(
-            {
-                "success": True,
-                "mensaje": "Pago de seña confirmado exitosamente",
-                "reserva": self.get_serializer(reserva).data,
-            },
-            status=status.HTTP_200_OK,
+        return self._confirmar_pago(
+            request, PagoService.SENA, (PagoMercadoPago.TIPO_SENA, PagoMercadoPago.TIPO_RESERVA), "de seña"
         )
 
     @action(detail=True, methods=["post"], url_path="confirmar-pago-final")
     def confirmar_pago_final(self, request, pk=None):
         """
         Endpoint para confirmar el pago final desde el frontend.
-        Recibe el payment_id de MercadoPago y actualiza el estado de la reserva.
+        Mismas respuestas que ``confirmar_pago_sena``; el pago aplicado confirma la reserva.
         """
-        from apps.emails.services import EmailService
+        from apps.mercadopago.models import PagoMercadoPago
+
+        return self._confirmar_pago(request, PagoService.FINAL, (PagoMercadoPago.TIPO_FINAL,), "final")
+
+    def _confirmar_pago(self, request, tipo, tipos_mercadopago, tipo_pago):
+        """Aplica ``payment_id`` sólo si MercadoPago lo informó aprobado para esta reserva.
+
+        Se aplica como lo haría el webhook, con el tipo que informó MercadoPago: una
+        pre-reserva (``RESERVA-{id}``) queda confirmada.
+        """
+        from apps.mercadopago.models import PagoMercadoPago
+        from apps.mercadopago.services import MercadoPagoService
+        from apps.mercadopago.views import registro_para_reserva
 
         reserva = self.get_object()
         payment_id = request.data.get("payment_id")
-
         if not payment_id:
             return Response({"error": "payment_id es requerido"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Actualizar estado de pago
         pago = reserva.obtener_pago()
-        pago.payment_id_final = payment_id
-        pago.estado_pago_final = "pagado"
-        pago.fecha_pago_final = timezone.now()
-        pago.estado_pago = "pagado"
-        pago.save(update_fields=["payment_id_final", "estado_pago_final", "fecha_pago_final", "estado_pago"])
-
-        # Si existe una propuesta aceptada con fecha, guardarla como fecha_realizacion (no pisar fecha_cita)
-        try:
-            diseno_aceptado = reserva.disenos.filter(estado="aceptado").order_by("-id_diseno").first()
-            if diseno_aceptado and diseno_aceptado.fecha_propuesta and not reserva.fecha_realizacion:
-                reserva.fecha_realizacion = diseno_aceptado.fecha_propuesta
-                reserva.save(update_fields=["fecha_realizacion"])
-        except Exception:
-            pass
+        if tipo == PagoService.FINAL:
+            campo_payment_id, ya_pagado = "payment_id_final", pago.estado_pago_final == "pagado"
+        else:
+            campo_payment_id, ya_pagado = "payment_id_sena", pago.estado_pago_sena == "sena_pagada"
+        if ya_pagado:
+            return self._pago_ya_registrado(reserva, getattr(pago, campo_payment_id), payment_id, tipo_pago)
+
+        # El id lo manda el cliente: se resuelve contra lo que informó MercadoPago (webhook o verificación)
+        registro, error = registro_para_reserva(request, reserva, payment_id, tipos_mercadopago)
+        if error is not None:
+            return error
+
+        # Normalmente el webhook ya lo aplicó (con sus emails); si no, se aplica acá con la fila bloqueada
+        with transaction.atomic():
+            registro = PagoMercadoPago.objects.select_for_update().get(pk=registro.pk)
+            aplicado = registro.fecha_aplicacion is None and MercadoPagoService._aplicar(registro)
+        if not aplicado:
+            if registro.fecha_aplicacion is None:
+                return Response(
+                    {"error": "El monto pagado no coincide con el de la reserva"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            pago.refresh_from_db()
+            return self._pago_ya_registrado(reserva, getattr(pago, campo_payment_id), payment_id, tipo_pago)
+        logger.info(f"Pago {tipo_pago} confirmado para reserva {reserva.id_reserva}: payment_id={registro.payment_id}")
 
-        logger.info(f"Pago final confirmado para reserva {reserva.id_reserva}: payment_id={payment_id}")
+        reserva.refresh_from_db()
+        return Response(
+            {
+                "success": True,
+                "mensaje": f"Pago {tipo_pago} confirmado exitosamente",
+                "reserva": self.get_serializer(reserva).data,
+            },
+            status=status.HTTP_200_OK,
+        )
 
-        # Enviar email de confirmación al cliente
-        try:
-            cliente = reserva.cliente
-            EmailService.send_payment_confirmation_email(
-                user_email=cliente.persona.email,
-                user_name=f"{cliente.persona.nombre} {cliente.persona.apellido}",
-                reserva_id=reserva.id_reserva,
-                servicio_nombre=reserva.servicio.nombre,
-                monto=pago.monto_final,
-                payment_id=payment_id,
-                tipo_pago="final",
+    def _pago_ya_registrado(self, reserva, payment_id_registrado, payment_id, tipo_pago):
+        """Respuesta cuando el pago ya estaba registrado: 200 si es el mismo pago, 409 si es otro."""
+        if payment_id_registrado != str(payment_id):
+            return Response(
+                {"error": f"El pago {tipo_pago} de esta reserva ya fue registrado con otro pago"},
+                status=status.HTTP_409_CONFLICT,
             )
-            logger.info(f"Email de confirmación de pago final enviado a {cliente.persona.email}")
-        except Exception as e:
-            # No fallar el endpoint si el email falla
-            logger.error(f"Error al enviar email de confirmación: {str(e)}")
-
+        reserva.refresh_from_db()
         return Response(
             {
                 "success": True,
-                "mensaje": "Pago final confirmado exitosamente",
+                "mensaje": f"El pago {tipo_pago} ya estaba confirmado",
                 "reserva": self.get_serializer(reserva).data,
             },
             status=status.HTTP_200_OK,
@@ -982,6 +932,47 @@ class ReservaViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="reprogramar-por-clima-lote",
+        permission_classes=[IsAdminUser],
+    )
+    def reprogramar_por_clima_lote(self, request):
+        """
+        Reprograma por clima varias reservas en una sola operación.
+        Acepta {"reprogramaciones": [{"reserva_id", "nueva_fecha"?}, ...]} o
+        {"aceptar_sugerencias": true} para confirmar todas las fechas sugeridas pendientes.
+        """
+        from apps.weather.services import ServicioAlertasClimaticas
+
+        serializer = ReprogramacionClimaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        service = ServicioAlertasClimaticas()
+        cambios = {}
+        if data["aceptar_sugerencias"]:
+            cambios.update(
+                dict.fromkeys(service.reservas_con_sugerencia_pendiente().values_list("id_reserva", flat=True))
+            )
+        for item in data.get("reprogramaciones") or []:
+            cambios[item["reserva_id"]] = item.get("nueva_fecha")
+
+        resultado = service.reprogramar_en_lote(cambios, usuario=request.user)
+        logger.info(
+            "[Reprogramación] Lote por clima: %s reprogramadas, %s rechazadas",
+            len(resultado["reprogramadas"]),
+            len(resultado["rechazadas"]),
+        )
+        return Response(
+            {
+                "mensaje": f"{len(resultado['reprogramadas'])} reservas reprogramadas",
+                **resultado,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"], url_path="crear-preferencia-sena")
     def crear_preferencia_sena(self, request, pk=None):
         """
@@ -989,14 +980,14 @@ class ReservaViewSet(viewsets.ModelViewSet):
         El frontend usará esta preferencia para redirigir al checkout de MP.
         """
         try:
-            import mercadopago
+            from apps.mercadopago.models import PagoMercadoPago
+            from apps.mercadopago.services import MercadoPagoService
         except ImportError:
             logger.error("MercadoPago SDK no instalado: mercadopago")
             return Response(
                 {"error": 'MercadoPago SDK no instalado en el servidor. Instale la librería "mercadopago".'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
-        from django.conf import settings
 
         reserva = self.get_object()
         pago = reserva.obtener_pago()
@@ -1014,61 +1005,25 @@ class ReservaViewSet(viewsets.ModelViewSet):
             pago = reserva.obtener_pago()
 
         try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
-            preference_data = {
-                "items": [
-                    {
-                        "id": f"SENA-{reserva.id_reserva}",
-                        "title": f"Seña - Reserva #{reserva.id_reserva} - {reserva.servicio.nombre}",
-                        "description": f"Pago de seña para reserva de {reserva.servicio.nombre}",
-                        "quantity": 1,
-                        "unit_price": float(pago.monto_sena),
-                        "currency_id": "ARS",
-                        "category_id": "services",
-                    }
-                ],
-                "payer": {
-                    "name": reserva.cliente.persona.nombre,
-                    "surname": reserva.cliente.persona.apellido,
-                    "email": reserva.cliente.persona.email,
-                },
-                "back_urls": {
-                    "success": (
-                        f"{settings.FRONTEND_URL}/reservas/pago-exitoso"
-                        f"?tipo=sena&reserva_id={reserva.id_reserva}"
-                    ),
-                    "failure": f"{settings.FRONTEND_URL}/mis-reservas",
-                    "pending": f"{settings.FRONTEND_URL}/mis-reservas",
-                },
-                "external_reference": f"SENA-{reserva.id_reserva}",
-                "statement_descriptor": "El Eden",
-                "payment_methods": {"excluded_payment_types": [], "installments": 12},
-            }
+            preference_data = MercadoPagoService.datos_preferencia_sena(reserva, pago)
 
             logger.info(f"🔵 Creando preferencia de MercadoPago para reserva {reserva.id_reserva}")
             logger.info(f"💰 Monto: ${pago.monto_sena}")
             logger.info(f"👤 Cliente: {reserva.cliente.persona.email}")
 
-            preference_response = sdk.preference().create(preference_data)
-
-            logger.info(f"📦 Respuesta completa de MP: {preference_response}")
-
-            # La respuesta puede venir en diferentes formatos según la versión del SDK
-            if "response" in preference_response:
-                preference = preference_response["response"]
-            else:
-                preference = preference_response
+            preferencia, reutilizada = MercadoPagoService.preferencia(
+                reserva, PagoMercadoPago.TIPO_SENA, pago.monto_sena, preference_data
+            )
 
-            logger.info(f"✅ Preferencia creada: {preference.get('id')}")
-            logger.info(f"🔗 Init point: {preference.get('init_point')}")
-            logger.info(f"🔗 Sandbox: {preference.get('sandbox_init_point')}")
+            logger.info(f"✅ Preferencia {'reutilizada' if reutilizada else 'creada'}: {preferencia.preference_id}")
+            logger.info(f"🔗 Init point: {preferencia.init_point}")
+            logger.info(f"🔗 Sandbox: {preferencia.sandbox_init_point}")
 
             return Response(
                 {
-                    "preference_id": preference.get("id"),
-                    "init_point": preference.get("init_point"),
-                    "sandbox_init_point": preference.get("sandbox_init_point"),
+                    "preference_id": preferencia.preference_id,
+                    "init_point": preferencia.init_point,
+                    "sandbox_init_point": preferencia.sandbox_init_point,
                     "monto": str(pago.monto_sena),
                 },
                 status=status.HTTP_200_OK,
@@ -1076,15 +1031,21 @@ class ReservaViewSet(viewsets.ModelViewSet):
 
         except Exception as e:
             logger.error(f"Error al crear preferencia de MercadoPago: {str(e)}")
+            return Response(
+                {"error": "No se pudo crear la preferencia de pago", "detalle": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
     @action(detail=True, methods=["post"], url_path="crear-preferencia-final")
     def crear_preferencia_final(self, request, pk=None):
         """
         Crea una preferencia de MercadoPago para el pago final.
         """
-        import mercadopago
         from django.conf import settings
 
+        from apps.mercadopago.models import PagoMercadoPago
+        from apps.mercadopago.services import MercadoPagoService
+
         reserva = self.get_object()
         pago = reserva.obtener_pago()
 
@@ -1110,8 +1071,6 @@ class ReservaViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
-
             preference_data = {
                 "items": [
                     {
@@ -1131,19 +1090,23 @@ class ReservaViewSet(viewsets.ModelViewSet):
                 },
                 "external_reference": f"FINAL-{reserva.id_reserva}",
                 "statement_descriptor": "El Eden - Paisajismo",
-                "notification_url": f"{settings.BACKEND_URL}/api/v1/servicios/mercadopago/notificacion/",
             }
+            if MercadoPagoService.notification_url():
+                preference_data["notification_url"] = MercadoPagoService.notification_url()
 
-            preference_response = sdk.preference().create(preference_data)
-            preference = preference_response["response"]
+            preferencia, _ = MercadoPagoService.preferencia(
+                reserva, PagoMercadoPago.TIPO_FINAL, pago.monto_final, preference_data
+            )
 
-            logger.info(f"Preferencia de pago final creada para reserva {reserva.id_reserva}: {preference['id']}")
+            logger.info(
+                f"Preferencia de pago final para reserva {reserva.id_reserva}: {preferencia.preference_id}"
+            )
 
             return Response(
                 {
-                    "preference_id": preference["id"],
-                    "init_point": preference["init_point"],
-                    "sandbox_init_point": preference.get("sandbox_init_point"),
+                    "preference_id": preferencia.preference_id,
+                    "init_point": preferencia.init_point,
+                    "sandbox_init_point": preferencia.sandbox_init_point,
                     "monto": str(pago.monto_final),
                 },
                 status=status.HTTP_200_OK,
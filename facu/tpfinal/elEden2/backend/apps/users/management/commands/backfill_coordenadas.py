@@ -0,0 +1,84 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from apps.users.models import Localidad
+from apps.users.services.gazetteer import get_nomenclator
+from apps.users.services.spatial_index import invalidate_localidad_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Completa latitud/longitud de las localidades que no las tienen usando el nomenclátor offline "
+        "y, opcionalmente, Nominatim para las que no figuran en él."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--nominatim",
+            action="store_true",
+            help="Consulta Nominatim (1 request por segundo) para las localidades no encontradas.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Muestra qué se completaría sin persistir cambios.",
+        )
+
+    def handle(self, *args, **options):
+        usar_nominatim = bool(options.get("nominatim"))
+        dry_run = bool(options.get("dry_run"))
+
+        inicio = time.perf_counter()
+        nomenclator = get_nomenclator()
+        pendientes = list(Localidad.objects.filter(Q(latitud__isnull=True) | Q(longitud__isnull=True)))
+        self.stdout.write(
+            f"Localidades sin coordenadas: {len(pendientes)} | Entradas en nomenclátor: {len(nomenclator)}"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Modo simulación activo (--dry-run)."))
+
+        actualizadas = []
+        sin_resolver = []
+        for localidad in pendientes:
+            coords = nomenclator.coordenadas(localidad.nombre_localidad, localidad.nombre_provincia)
+            if coords:
+                localidad.latitud = Decimal(f"{coords[0]:.6f}")
+                localidad.longitud = Decimal(f"{coords[1]:.6f}")
+                actualizadas.append(localidad)
+            else:
+                sin_resolver.append(localidad)
+
+        desde_nominatim = 0
+        if usar_nominatim and sin_resolver:
+            from apps.weather.services import GeocodingService
+
+            geocoder = GeocodingService()
+            restantes = []
+            for localidad in sin_resolver:
+                coords = geocoder.geocode_localidad(localidad)
+                if coords:
+                    localidad.latitud = Decimal(f"{coords[0]:.6f}")
+                    localidad.longitud = Decimal(f"{coords[1]:.6f}")
+                    actualizadas.append(localidad)
+                    desde_nominatim += 1
+                else:
+                    restantes.append(localidad)
+                time.sleep(geocoder.min_interval)
+            sin_resolver = restantes
+
+        if actualizadas and not dry_run:
+            with transaction.atomic():
+                Localidad.objects.bulk_update(actualizadas, ["latitud", "longitud"], batch_size=500)
+            # bulk_update no dispara post_save
+            invalidate_localidad_index()
+
+        self.stdout.write(self.style.SUCCESS("Backfill de coordenadas finalizado."))
+        self.stdout.write(f"Completadas: {len(actualizadas)} (Nominatim: {desde_nominatim})")
+        self.stdout.write(f"Sin resolver: {len(sin_resolver)}")
+        for localidad in sin_resolver:
+            self.stdout.write(f"   - {localidad}")
+        self.stdout.write(f"Tiempo: {(time.perf_counter() - inicio) * 1000:.1f} ms")
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_proveedor_fecha_baja"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SugerenciaDireccionCache",
+            fields=[
+                ("id_sugerencia", models.AutoField(primary_key=True, serialize=False)),
+                ("consulta", models.CharField(help_text="Consulta normalizada", max_length=255, unique=True)),
+                ("resultados", models.JSONField(default=list)),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Sugerencia de dirección (cache)",
+                "verbose_name_plural": "Sugerencias de dirección (cache)",
+                "db_table": "sugerencia_direccion_cache",
+            },
+        ),
+    ]
@@ -301,3 +301,21 @@ class Proveedor(SoftDeleteBehaviorMixin, models.Model):
 
     def __str__(self):
         return f"{self.razon_social} (CUIT: {self.cuit})"
+
+
+class SugerenciaDireccionCache(models.Model):
+    """Resultados de Nominatim ya consultados, reutilizados entre reinicios y workers."""
+
+    id_sugerencia = models.AutoField(primary_key=True)
+    consulta = models.CharField(max_length=255, unique=True, help_text="Consulta normalizada")
+    resultados = models.JSONField(default=list)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sugerencia de dirección (cache)"
+        verbose_name_plural = "Sugerencias de dirección (cache)"
+        db_table = "sugerencia_direccion_cache"
+
+    def __str__(self):
+        return f"{self.consulta} ({len(self.resultados)} resultados)"
@@ -0,0 +1,275 @@
+"""Índice de prefijos (trie) de direcciones conocidas en el área operativa.
+
+Indexa calles de personas registradas, localidades y resultados de Nominatim ya
+guardados en ``SugerenciaDireccionCache``. Cada palabra de la etiqueta es un
+punto de entrada, de modo que "mart" encuentra "San Martín, Posadas". Cada nodo
+guarda hasta ``MAX_PER_NODE`` entradas, así la búsqueda cuesta O(largo del
+prefijo) y responde las teclas sin salir a la red.
+
+Se reconstruye por proceso cuando cambia la versión en el cache compartido
+(alta/baja/cambio de localidades). Las direcciones nuevas (calles de personas y
+respuestas de Nominatim) no lo reconstruyen: se publican como entradas sueltas en el
+cache y cada proceso las agrega a su índice en la próxima búsqueda.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from .gazetteer import get_nomenclator, normalize_name
+
+MAX_PER_NODE = 20
+_VERSION_KEY = "address_index:version"
+_DELTA_SEQ_KEY = "address_index:delta"
+# Una entrada publicada que ya expiró obliga a los procesos atrasados a reconstruir
+_DELTA_TTL = 24 * 3600
+_NUMBER_RE = re.compile(r"\b\d+[a-z]?\b")
+
+
+def split_query(text: str) -> Tuple[str, Optional[str]]:
+    """Separa la consulta normalizada en texto y número de puerta (si lo hay)."""
+    normalized = normalize_name(text)
+    match = _NUMBER_RE.search(normalized)
+    numero = match.group(0).upper() if match else None
+    texto = re.sub(r"\s+", " ", _NUMBER_RE.sub(" ", normalized)).strip()
+    return texto, numero
+
+
+class _Nodo:
+    __slots__ = ("hijos", "entradas")
+
+    def __init__(self):
+        self.hijos: Dict[str, _Nodo] = {}
+        self.entradas: List[int] = []
+
+
+class IndiceDirecciones:
+    def __init__(self):
+        self._raiz = _Nodo()
+        self._entradas: List[dict] = []
+        self._por_etiqueta: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def contiene(self, entrada: dict) -> bool:
+        return normalize_name(entrada.get("direccion_formateada")) in self._por_etiqueta
+
+    def agregar(self, entrada: dict) -> None:
+        etiqueta = normalize_name(entrada.get("direccion_formateada"))
+        if not etiqueta or etiqueta in self._por_etiqueta:
+            return
+        posicion = len(self._entradas)
+        self._entradas.append(entrada)
+        self._por_etiqueta[etiqueta] = posicion
+
+        texto, _ = split_query(etiqueta)
+        palabras = texto.split()
+        for inicio in range(len(palabras)):
+            nodo = self._raiz
+            for caracter in " ".join(palabras[inicio:]):
+                nodo = nodo.hijos.setdefault(caracter, _Nodo())
+                if len(nodo.entradas) < MAX_PER_NODE and (not nodo.entradas or nodo.entradas[-1] != posicion):
+                    nodo.entradas.append(posicion)
+
+    def agregar_varias(self, entradas: Iterable[dict]) -> None:
+        for entrada in entradas:
+            self.agregar(entrada)
+
+    def buscar(self, consulta: str, limit: int = 5) -> List[dict]:
+        texto, numero = split_query(consulta)
+        if not texto:
+            return []
+        nodo = self._raiz
+        for caracter in texto:
+            nodo = nodo.hijos.get(caracter)
+            if nodo is None:
+                return []
+
+        resultados = []
+        for posicion in nodo.entradas[:limit]:
+            entrada = dict(self._entradas[posicion])
+            if numero and entrada.get("calle"):
+                entrada["numero"] = numero
+                entrada["direccion_formateada"] = _formatear(entrada)
+            resultados.append(entrada)
+        return resultados
+
+    def exacta(self, direccion: str) -> Optional[dict]:
+        """Entrada cuya dirección formateada coincide con el texto (con o sin número)."""
+        normalized = normalize_name(direccion)
+        posicion = self._por_etiqueta.get(normalized)
+        if posicion is not None:
+            return dict(self._entradas[posicion])
+        texto, numero = split_query(direccion)
+        posicion = self._por_etiqueta.get(texto)
+        if posicion is None:
+            return None
+        entrada = dict(self._entradas[posicion])
+        if numero and entrada.get("calle"):
+            entrada["numero"] = numero
+            entrada["direccion_formateada"] = _formatear(entrada)
+        return entrada
+
+
+def _formatear(entrada: dict) -> str:
+    calle = entrada.get("calle") or ""
+    numero = entrada.get("numero")
+    if calle and numero and numero != "S/N":
+        calle = f"{calle} {numero}"
+    partes = [calle, entrada.get("ciudad"), entrada.get("provincia"), entrada.get("pais")]
+    return ", ".join(parte for parte in partes if parte)
+
+
+def _entrada(calle: str, localidad: dict) -> dict:
+    entrada = {
+        "calle": calle,
+        "numero": "S/N",
+        "ciudad": localidad["ciudad"],
+        "provincia": localidad["provincia"],
+        "pais": localidad["pais"],
+        "codigo_postal": localidad.get("codigo_postal"),
+        "latitud": localidad.get("latitud"),
+        "longitud": localidad.get("longitud"),
+    }
+    entrada["direccion_formateada"] = _formatear(entrada)
+    return entrada
+
+
+def _localidad_info(localidad) -> dict:
+    return {
+        "ciudad": localidad.nombre_localidad,
+        "provincia": localidad.nombre_provincia,
+        "pais": localidad.nombre_pais,
+        "codigo_postal": localidad.cp if localidad.cp not in (None, "", "S/N") else None,
+        "latitud": float(localidad.latitud) if localidad.latitud is not None else None,
+        "longitud": float(localidad.longitud) if localidad.longitud is not None else None,
+    }
+
+
+def _build_index() -> IndiceDirecciones:
+    from apps.users.models import Localidad, Persona, SugerenciaDireccionCache
+
+    from .address_service import is_operational_area, suggestion_cache_vigente
+
+    index = IndiceDirecciones()
+
+    # Primero lo ya validado por Nominatim: son las sugerencias más completas
+    vigentes = suggestion_cache_vigente(SugerenciaDireccionCache.objects.all())
+    for resultados in vigentes.values_list("resultados", flat=True).iterator():
+        index.agregar_varias(resultados or [])
+
+    localidades = {}
+    for localidad in Localidad.objects.all():
+        if not is_operational_area(localidad.nombre_provincia, localidad.nombre_pais):
+            continue
+        localidades[localidad.id_localidad] = _localidad_info(localidad)
+
+    calles = Persona.objects.filter(localidad_id__in=localidades.keys()).values_list("calle", "localidad_id").distinct()
+    for calle, localidad_id in calles.iterator():
+        if calle and calle.strip():
+            index.agregar(_entrada(calle.strip(), localidades[localidad_id]))
+
+    for localidad in localidades.values():
+        index.agregar(_entrada("", localidad))
+
+    nomenclator = get_nomenclator()
+    for posicion, (nombre, provincia) in enumerate(zip(nomenclator.nombres, nomenclator.provincias)):
+        if is_operational_area(provincia, "Argentina"):
+            index.agregar(
+                _entrada(
+                    "",
+                    {
+                        "ciudad": nombre,
+                        "provincia": provincia,
+                        "pais": "Argentina",
+                        "latitud": float(nomenclator.latitudes[posicion]),
+                        "longitud": float(nomenclator.longitudes[posicion]),
+                    },
+                )
+            )
+    return index
+
+
+_lock = threading.Lock()
+_state = {"version": None, "index": None, "delta": 0}
+
+
+def _current_version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Semilla no reutilizable: si el cache se vacía no debe coincidir con un índice viejo
+        cache.add(_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def invalidate_address_index():
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def publish_address_entries(entradas: List[dict]) -> None:
+    """Agrega entradas al índice de todos los procesos sin reconstruirlo."""
+    entradas = [entrada for entrada in entradas if entrada.get("direccion_formateada")]
+    if not entradas:
+        return
+    index = _state["index"]
+    if index is not None and all(index.contiene(entrada) for entrada in entradas):
+        return
+    cache.add(_DELTA_SEQ_KEY, 0, timeout=None)
+    try:
+        seq = cache.incr(_DELTA_SEQ_KEY)
+    except ValueError:
+        # Se vació el cache: la versión nueva obliga a reconstruir desde la base
+        invalidate_address_index()
+        return
+    cache.set(f"{_DELTA_SEQ_KEY}:{seq}", entradas, timeout=_DELTA_TTL)
+
+
+def index_persona_address(persona) -> None:
+    """Publica la calle de una persona del área operativa."""
+    from .address_service import is_operational_area
+
+    localidad = persona.localidad
+    calle = (persona.calle or "").strip()
+    if not calle or localidad is None:
+        return
+    if not is_operational_area(localidad.nombre_provincia, localidad.nombre_pais):
+        return
+    publish_address_entries([_entrada(calle, _localidad_info(localidad))])
+
+
+def _apply_deltas(index: IndiceDirecciones, desde: int, hasta: int) -> bool:
+    claves = [f"{_DELTA_SEQ_KEY}:{seq}" for seq in range(desde + 1, hasta + 1)]
+    publicadas = cache.get_many(claves)
+    if len(publicadas) != len(claves):
+        return False
+    for clave in claves:
+        index.agregar_varias(publicadas[clave])
+    return True
+
+
+def get_address_index() -> IndiceDirecciones:
+    version = _current_version()
+    delta = cache.get(_DELTA_SEQ_KEY) or 0
+    index = _state["index"]
+    if index is not None and _state["version"] == version and _state["delta"] == delta:
+        return index
+    with _lock:
+        if _state["index"] is not None and _state["version"] == version:
+            if _state["delta"] >= delta or _apply_deltas(_state["index"], _state["delta"], delta):
+                _state["delta"] = max(_state["delta"], delta)
+                return _state["index"]
+        # La base ya incluye todo lo publicado hasta ``delta``
+        _state["index"] = _build_index()
+        _state["version"] = version
+        _state["delta"] = delta
+        return _state["index"]
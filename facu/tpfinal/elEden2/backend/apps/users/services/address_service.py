@@ -2,20 +2,35 @@ from __future__ import annotations
 
 import logging
 import re
+from datetime import timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional
+from urllib.parse import urlparse
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from geopy.extra.rate_limiter import RateLimiter
+from django.utils import timezone
 from geopy.geocoders import Nominatim
 
-from apps.users.models import Localidad
+from apps.users.models import Localidad, SugerenciaDireccionCache
+from apps.users.services.address_index import get_address_index, publish_address_entries
+from apps.users.services.gazetteer import get_nomenclator, normalize_name
+from apps.users.services.rate_limit import nominatim_bucket
 
 logger = logging.getLogger(__name__)
 
-_geolocator = Nominatim(user_agent="elEden_address_lookup")
-_rate_limited_geocode = RateLimiter(_geolocator.geocode, min_delay_seconds=1)
+# Mismo servidor que GEOCODER_API_URL (permite apuntar a un simulador local)
+_GEOCODER_URL = urlparse(getattr(settings, "GEOCODER_API_URL", "https://nominatim.openstreetmap.org/search"))
+_geolocator = Nominatim(
+    user_agent="elEden_address_lookup",
+    timeout=getattr(settings, "GEOCODER_TIMEOUT", 10),
+    domain=_GEOCODER_URL.netloc or "nominatim.openstreetmap.org",
+    scheme=_GEOCODER_URL.scheme or "https",
+)
+_SUGGESTION_CACHE_TTL = getattr(settings, "ADDRESS_SUGGESTION_CACHE_TTL", 3600)
+_SUGGESTION_DB_TTL = timedelta(days=getattr(settings, "ADDRESS_SUGGESTION_DB_TTL_DAYS", 30))
+_GEOCODE_MAX_WAIT = getattr(settings, "ADDRESS_GEOCODE_MAX_WAIT_SECONDS", 2)
 _ALLOWED_COUNTRY = getattr(settings, "SERVICE_ALLOWED_COUNTRY", "Argentina").strip().lower()
 _ALLOWED_PROVINCES = [
     provincia.strip().lower()
@@ -94,13 +109,64 @@ def _normalize_location_result(location, fallback_text: str) -> Dict[str, Option
     return result
 
 
+def _cache_key(address_text: str) -> str:
+    return normalize_name(address_text)[:255]
+
+
+def _memory_key(key: str) -> str:
+    return "address:sug:" + key.replace(" ", "_")
+
+
+def suggestion_cache_vigente(queryset):
+    """Filas de ``SugerenciaDireccionCache`` que todavía no vencieron."""
+    return queryset.filter(fecha_actualizacion__gte=timezone.now() - _SUGGESTION_DB_TTL)
+
+
+def _cached_results(key: str) -> Optional[List[Dict[str, Optional[str]]]]:
+    """Resultados previos: primero el cache, luego la tabla persistente (si no venció)."""
+    results = cache.get(_memory_key(key))
+    if results is not None:
+        return results
+    results = (
+        suggestion_cache_vigente(SugerenciaDireccionCache.objects.filter(consulta=key))
+        .values_list("resultados", flat=True)
+        .first()
+    )
+    if results:
+        cache.set(_memory_key(key), results, timeout=_SUGGESTION_CACHE_TTL)
+        return results
+    return None
+
+
+def _store_results(key: str, results: List[Dict[str, Optional[str]]]) -> None:
+    # Una consulta sin resultados (o que falló) se vuelve a intentar la próxima vez
+    if not results:
+        return
+    SugerenciaDireccionCache.objects.update_or_create(consulta=key, defaults={"resultados": results})
+    cache.set(_memory_key(key), results, timeout=_SUGGESTION_CACHE_TTL)
+    publish_address_entries(results)
+
+
 def geocode_address(address_text: str) -> Dict[str, Optional[str]]:
     if not address_text:
         raise ValueError("La dirección es requerida")
 
+    # Las sugerencias ya mostradas vuelven con su dirección formateada: se resuelven sin red
+    local = get_address_index().exacta(address_text)
+    if local and local.get("latitud") is not None:
+        return local
+
+    key = _cache_key(address_text)
+    cached = _cached_results(key)
+    if cached:
+        return dict(cached[0])
+
+    if not nominatim_bucket().acquire(timeout=_GEOCODE_MAX_WAIT):
+        raise ValueError("El servicio de direcciones está ocupado, intentá nuevamente en unos segundos")
+
     logger.info("🌎 Geocodificando dirección: %s", address_text)
     try:
-        location = _rate_limited_geocode(address_text, addressdetails=True, language="es")
+        location = _geolocator.geocode(address_text, addressdetails=True, language="es")
     except Exception as exc:  # pragma: no cover - red de terceros
         logger.error("Error al geocodificar dirección: %s", exc)
         raise ValueError("No se pudo geocodificar la dirección") from exc
@@ -108,17 +174,39 @@ def geocode_address(address_text: str) -> Dict[str, Optional[str]]:
     if not location:
         raise ValueError("No se encontraron resultados para la dirección ingresada")
 
-    return _normalize_location_result(location, address_text)
+    result = _normalize_location_result(location, address_text)
+    _store_results(key, [result])
+    return result
 
 
 def suggest_addresses(address_text: str, limit: int = 5) -> List[Dict[str, Optional[str]]]:
+    """Sugerencias para autocompletar.
+
+    Orden de resolución: cache de consultas previas, índice local de prefijos y,
+    sólo si ambos fallan, Nominatim. Si el cupo compartido de Nominatim está
+    agotado se devuelve una lista vacía en lugar de bloquear el worker.
+    """
     if not address_text:
         raise ValueError("La dirección es requerida")
 
     safe_limit = max(1, min(limit or 5, 5))
+    key = _cache_key(address_text)
+
+    cached = _cached_results(key)
+    if cached is not None:
+        return cached[:safe_limit]
+
+    local = get_address_index().buscar(address_text, limit=safe_limit)
+    if local:
+        return local
+
+    if not nominatim_bucket().try_acquire():
+        logger.info("Cupo de Nominatim agotado, sin sugerencias para: %s", address_text)
+        return []
+
     logger.info("🔎 Buscando sugerencias para: %s (limite=%s)", address_text, safe_limit)
     try:
-        locations = _rate_limited_geocode(
+        locations = _geolocator.geocode(
             address_text,
             addressdetails=True,
             language="es",
@@ -129,19 +217,17 @@ def suggest_addresses(address_text: str, limit: int = 5) -> List[Dict[str, Optio
         logger.error("Error al obtener sugerencias: %s", exc)
         raise ValueError("No se pudieron obtener sugerencias para la dirección") from exc
 
-    if not locations:
-        return []
-
-    if not isinstance(locations, list):
+    if locations and not isinstance(locations, list):
         locations = [locations]
 
     suggestions = []
-    for location in locations[:safe_limit]:
+    for location in (locations or [])[:safe_limit]:
         try:
             suggestions.append(_normalize_location_result(location, address_text))
         except ValueError:
             continue
 
+    _store_results(key, suggestions)
     return suggestions
 
 
@@ -177,6 +263,10 @@ def get_or_create_localidad(address_info: Dict[str, Optional[str]]) -> Localidad
     codigo_postal = address_info.get("codigo_postal") or "S/N"
     latitud_val = address_info.get("latitud")
     longitud_val = address_info.get("longitud")
+    if latitud_val is None or longitud_val is None:
+        coords = get_nomenclator().coordenadas(ciudad, provincia)
+        if coords:
+            latitud_val, longitud_val = coords
     latitud = Decimal(str(latitud_val)) if latitud_val is not None else None
     longitud = Decimal(str(longitud_val)) if longitud_val is not None else None
 
@@ -0,0 +1,111 @@
+"""Nomenclátor offline de localidades (nombre, provincia, lat, lon).
+
+Se carga una sola vez por proceso desde ``apps/users/data/gazetteer_ar.csv`` en
+arreglos NumPy, con un índice hash por nombre normalizado (sin tildes ni
+mayúsculas). Permite resolver coordenadas de ``Localidad`` sin salir a la red.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer_ar.csv"
+
+# Variantes de escritura frecuentes para la misma provincia
+_PROVINCE_ALIASES = {
+    "caba": "capital federal",
+    "ciudad autonoma de buenos aires": "capital federal",
+    "ciudad de buenos aires": "capital federal",
+}
+
+
+def normalize_name(value: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", value or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def _normalize_province(value: Optional[str]) -> str:
+    normalized = normalize_name(value)
+    normalized = re.sub(r"^provincia de ", "", normalized)
+    return _PROVINCE_ALIASES.get(normalized, normalized)
+
+
+@dataclass(frozen=True)
+class EntradaNomenclator:
+    nombre: str
+    provincia: str
+    latitud: float
+    longitud: float
+
+
+class Nomenclator:
+    def __init__(self, rows: List[Tuple[str, str, float, float]]):
+        self.nombres = [row[0] for row in rows]
+        self.provincias = [row[1] for row in rows]
+        self.latitudes = np.array([row[2] for row in rows], dtype=np.float64)
+        self.longitudes = np.array([row[3] for row in rows], dtype=np.float64)
+
+        self._por_clave: Dict[Tuple[str, str], int] = {}
+        self._por_nombre: Dict[str, List[int]] = {}
+        for index, (nombre, provincia, _, _) in enumerate(rows):
+            nombre_norm = normalize_name(nombre)
+            self._por_clave.setdefault((nombre_norm, _normalize_province(provincia)), index)
+            self._por_nombre.setdefault(nombre_norm, []).append(index)
+
+    @classmethod
+    def from_csv(cls, path: Path = GAZETTEER_PATH) -> "Nomenclator":
+        with open(path, encoding="utf-8", newline="") as handle:
+            rows = [
+                (row["nombre"], row["provincia"], float(row["latitud"]), float(row["longitud"]))
+                for row in csv.DictReader(handle)
+            ]
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def _entrada(self, index: int) -> EntradaNomenclator:
+        return EntradaNomenclator(
+            nombre=self.nombres[index],
+            provincia=self.provincias[index],
+            latitud=float(self.latitudes[index]),
+            longitud=float(self.longitudes[index]),
+        )
+
+    def buscar(self, nombre: Optional[str], provincia: Optional[str] = None) -> Optional[EntradaNomenclator]:
+        """Busca por nombre y provincia; sin provincia sólo resuelve nombres únicos."""
+        nombre_norm = normalize_name(nombre)
+        if not nombre_norm:
+            return None
+        if provincia:
+            index = self._por_clave.get((nombre_norm, _normalize_province(provincia)))
+            if index is not None:
+                return self._entrada(index)
+        candidatos = self._por_nombre.get(nombre_norm, [])
+        if len(candidatos) == 1:
+            return self._entrada(candidatos[0])
+        return None
+
+    def coordenadas(self, nombre: Optional[str], provincia: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        entrada = self.buscar(nombre, provincia)
+        return (entrada.latitud, entrada.longitud) if entrada else None
+
+
+@lru_cache(maxsize=1)
+def get_nomenclator() -> Nomenclator:
+    return Nomenclator.from_csv()
+
+
+def coordenadas_localidad(localidad) -> Optional[Tuple[float, float]]:
+    if not localidad:
+        return None
+    return get_nomenclator().coordenadas(localidad.nombre_localidad, localidad.nombre_provincia)
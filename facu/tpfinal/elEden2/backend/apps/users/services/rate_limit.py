@@ -0,0 +1,54 @@
+"""Límites de tasa compartidos entre workers usando el cache de Django."""
+
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class TokenBucket:
+    """Balde de ``capacity`` fichas que se recarga completo cada ``period`` segundos.
+
+    El contador vive en el cache compartido y se consume con ``incr`` (atómico
+    en Redis/Memcached), de modo que todos los workers respetan el mismo cupo.
+    """
+
+    def __init__(self, name: str, capacity: int, period: float):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self.period = max(0.001, float(period))
+
+    def _key(self, now: float) -> str:
+        return f"bucket:{self.name}:{int(now // self.period)}"
+
+    def try_acquire(self) -> bool:
+        key = self._key(time.time())
+        cache.add(key, 0, timeout=max(1, int(self.period * 2)))
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            # La clave expiró entre add e incr: se toma como ventana nueva
+            cache.set(key, 1, timeout=max(1, int(self.period * 2)))
+            used = 1
+        return used <= self.capacity
+
+    def acquire(self, timeout: float = 0, poll_interval: float = 0.1) -> bool:
+        """Espera como máximo ``timeout`` segundos una ficha libre."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            if self.try_acquire():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+
+def nominatim_bucket() -> TokenBucket:
+    """Cupo único de Nominatim para todo el proyecto (política de uso: 1 req/s)."""
+    return TokenBucket(
+        "nominatim",
+        capacity=1,
+        period=max(1, int(getattr(settings, "GEOCODER_MIN_INTERVAL_SECONDS", 1))),
+    )
@@ -0,0 +1,155 @@
+"""Índice espacial en memoria para resolver la localidad más cercana a un punto.
+
+Usa una grilla de celdas de ``CELL_DEGREES`` grados sobre arreglos NumPy: la
+búsqueda recorre anillos de celdas alrededor del punto hasta que ninguna celda
+restante puede contener algo más cercano. Reemplaza al reverse geocoding HTTP.
+
+El índice de ``Localidad`` se reconstruye por proceso cuando cambia la versión
+guardada en el cache compartido (las señales de ``Localidad`` la incrementan).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.5
+_VERSION_KEY = "localidad_index:version"
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class IndiceEspacial:
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], items: Sequence):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.items = list(items)
+
+        buckets = defaultdict(list)
+        for index, (lat, lon) in enumerate(zip(self.latitudes, self.longitudes)):
+            buckets[self._cell(lat, lon)].append(index)
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {cell: np.array(indices, dtype=np.int64) for cell, indices in buckets.items()}
+        rows = [cell[0] for cell in self._cells] or [0]
+        cols = [cell[1] for cell in self._cells] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / CELL_DEGREES)), int(math.floor(lon / CELL_DEGREES))
+
+    def _ring(self, center: Tuple[int, int], radius: int):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for offset in range(-radius, radius + 1):
+            yield row - radius, col + offset
+            yield row + radius, col + offset
+        for offset in range(-radius + 1, radius):
+            yield row + offset, col - radius
+            yield row + offset, col + radius
+
+    def mas_cercano(self, latitude: float, longitude: float, max_km: Optional[float] = None):
+        """Devuelve ``(item, distancia_km)`` del punto más cercano o ``None``."""
+        if not self.items:
+            return None
+
+        center = self._cell(latitude, longitude)
+        # Distancia mínima (conservadora) cubierta por cada anillo completo de celdas
+        km_per_ring = CELL_DEGREES * 111.0 * max(math.cos(math.radians(min(abs(latitude) + CELL_DEGREES, 89.0))), 0.01)
+
+        best_index = None
+        best_distance = math.inf
+        min_row, max_row, min_col, max_col = self._bounds
+        last_ring = max(
+            abs(center[0] - min_row), abs(center[0] - max_row), abs(center[1] - min_col), abs(center[1] - max_col)
+        )
+        for radius in range(last_ring + 1):
+            if best_index is not None and (radius - 1) * km_per_ring > best_distance:
+                break
+            if max_km is not None and (radius - 1) * km_per_ring > max_km:
+                break
+            candidates = [self._cells[cell] for cell in self._ring(center, radius) if cell in self._cells]
+            if not candidates:
+                continue
+            indices = np.concatenate(candidates)
+            distances = haversine_km(latitude, longitude, self.latitudes[indices], self.longitudes[indices])
+            position = int(np.argmin(distances))
+            if distances[position] < best_distance:
+                best_distance = float(distances[position])
+                best_index = int(indices[position])
+
+        if best_index is None or (max_km is not None and best_distance > max_km):
+            return None
+        return self.items[best_index], best_distance
+
+
+_lock = threading.Lock()
+_state = {"version": None, "index": None}
+
+
+def _current_version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Semilla no reutilizable: si el cache se vacía no debe coincidir con un índice viejo
+        cache.add(_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def invalidate_localidad_index():
+    """Marca el índice como obsoleto en todos los procesos."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _build_localidad_index() -> IndiceEspacial:
+    from apps.users.models import Localidad
+
+    localidades: List[Localidad] = list(
+        Localidad.objects.filter(latitud__isnull=False, longitud__isnull=False).only(
+            "id_localidad", "cp", "nombre_localidad", "nombre_provincia", "nombre_pais", "latitud", "longitud"
+        )
+    )
+    return IndiceEspacial(
+        [float(localidad.latitud) for localidad in localidades],
+        [float(localidad.longitud) for localidad in localidades],
+        localidades,
+    )
+
+
+def get_localidad_index() -> IndiceEspacial:
+    version = _current_version()
+    index = _state["index"]
+    if index is not None and _state["version"] == version:
+        return index
+    with _lock:
+        if _state["index"] is None or _state["version"] != version:
+            _state["index"] = _build_localidad_index()
+            _state["version"] = version
+        return _state["index"]
+
+
+def localidad_mas_cercana(latitude: float, longitude: float, max_km: Optional[float] = None):
+    """Localidad con coordenadas más cercana al punto, o ``None`` si supera ``max_km``."""
+    if max_km is None:
+        max_km = float(getattr(settings, "LOCALIDAD_NEAREST_MAX_KM", 50))
+    result = get_localidad_index().mas_cercano(float(latitude), float(longitude), max_km=max_km)
+    return result[0] if result else None
@@ -1,2 +1,23 @@
-﻿# Signals deshabilitadas - Los modelos fueron adaptados al diagrama ER
-# No hay señales necesarias para los modelos actuales
+﻿from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Localidad, Persona
+from .services.address_index import index_persona_address, invalidate_address_index
+from .services.spatial_index import invalidate_localidad_index
+
+
+# El resto de los modelos no necesita señales (fueron adaptados al diagrama ER).
+# Localidad sí: cualquier alta/baja/cambio invalida los índices en memoria.
+@receiver(post_save, sender=Localidad)
+@receiver(post_delete, sender=Localidad)
+def invalidar_indice_localidades(sender, **kwargs):
+    invalidate_localidad_index()
+    invalidate_address_index()
+
+
+# Una calle nueva se agrega al índice de direcciones sin reconstruirlo
+@receiver(post_save, sender=Persona)
+def indexar_calle_persona(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or {"calle", "localidad"} & set(update_fields):
+        transaction.on_commit(lambda: index_persona_address(instance))
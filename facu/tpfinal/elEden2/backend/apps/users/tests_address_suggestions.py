@@ -0,0 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Genero, Localidad, Persona, SugerenciaDireccionCache, TipoDocumento
+from .services.address_index import get_address_index
+from .services.address_service import geocode_address, suggest_addresses
+from .services.rate_limit import nominatim_bucket
+
+
+def _nominatim_location(road, house_number, city="Posadas", state="Misiones"):
+    location = MagicMock()
+    location.latitude = -27.37
+    location.longitude = -55.9
+    location.address = f"{road} {house_number}, {city}, {state}, Argentina"
+    location.raw = {
+        "address": {
+            "road": road,
+            "house_number": house_number,
+            "city": city,
+            "state": state,
+            "country": "Argentina",
+            "postcode": "3300",
+        }
+    }
+    return location
+
+
+class AddressSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        localidad = Localidad.objects.create(
+            cp="3300",
+            nombre_localidad="Posadas",
+            nombre_provincia="Misiones",
+            latitud=Decimal("-27.367100"),
+            longitud=Decimal("-55.896100"),
+        )
+        Persona.objects.create(
+            nombre="Ana",
+            apellido="Gómez",
+            email="ana@example.com",
+            telefono="+5493764000000",
+            calle="Avenida Mitre",
+            numero="100",
+            nro_documento="30111222",
+            genero=Genero.objects.create(genero="Femenino"),
+            tipo_documento=TipoDocumento.objects.create(tipo="DNI"),
+            localidad=localidad,
+        )
+
+    def test_known_prefixes_are_answered_locally(self):
+        with patch("apps.users.services.address_service._geolocator") as geolocator:
+            results = suggest_addresses("avenida mit 1530")
+            posadas = suggest_addresses("posad")
+
+        geolocator.geocode.assert_not_called()
+        self.assertEqual(results[0]["calle"], "Avenida Mitre")
+        self.assertEqual(results[0]["numero"], "1530")
+        self.assertEqual(results[0]["direccion_formateada"], "Avenida Mitre 1530, Posadas, Misiones, Argentina")
+        self.assertEqual(posadas[0]["ciudad"], "Posadas")
+
+    def test_misses_use_nominatim_once_and_are_persisted(self):
+        with patch("apps.users.services.address_service._geolocator") as geolocator:
+            geolocator.geocode.return_value = [_nominatim_location("Calle Tucumán", "1800")]
+            first = suggest_addresses("Tucumán 1800")
+            cache.clear()
+            second = suggest_addresses("Tucumán 1800")
+
+        self.assertEqual(geolocator.geocode.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertTrue(SugerenciaDireccionCache.objects.filter(consulta="tucuman 1800").exists())
+
+    def test_empty_and_expired_results_are_queried_again(self):
+        SugerenciaDireccionCache.objects.create(
+            consulta="junin 2000", resultados=[_nominatim_location("Junín", "2000").raw["address"]]
+        )
+        SugerenciaDireccionCache.objects.filter(consulta="junin 2000").update(
+            fecha_actualizacion=timezone.now() - timedelta(days=60)
+        )
+
+        with (
+            patch("apps.users.services.address_service._geolocator") as geolocator,
+            patch("apps.users.services.address_service.nominatim_bucket") as bucket,
+        ):
+            bucket.return_value.try_acquire.return_value = True
+            geolocator.geocode.return_value = []
+            self.assertEqual(suggest_addresses("Junín 2000"), [])
+            self.assertEqual(suggest_addresses("Junín 2000"), [])
+
+        self.assertEqual(geolocator.geocode.call_count, 2)
+        self.assertFalse(SugerenciaDireccionCache.objects.filter(consulta="junin 2000", resultados=[]).exists())
+
+    def test_new_street_is_indexed_without_rebuilding(self):
+        get_address_index()
+        persona = Persona.objects.get(email="ana@example.com")
+
+        with patch("apps.users.services.address_index._build_index") as build_index:
+            with self.captureOnCommitCallbacks(execute=True):
+                persona.calle = "Calle Bolívar"
+                persona.save(update_fields=["calle"])
+            results = suggest_addresses("boliv")
+
+        build_index.assert_not_called()
+        self.assertEqual(results[0]["calle"], "Calle Bolívar")
+
+    def test_exhausted_bucket_returns_without_blocking(self):
+        with (
+            patch("apps.users.services.rate_limit.time.time", return_value=1000.5),
+            patch("apps.users.services.address_service._geolocator") as geolocator,
+        ):
+            self.assertTrue(nominatim_bucket().try_acquire())
+            results = suggest_addresses("Junín 2000")
+
+        geolocator.geocode.assert_not_called()
+        self.assertEqual(results, [])
+
+    def test_confirming_a_suggestion_skips_geocoding(self):
+        suggestion = suggest_addresses("avenida mitre 250")[0]
+
+        with patch("apps.users.services.address_service._geolocator") as geolocator:
+            geocoded = geocode_address(suggestion["direccion_formateada"])
+
+        geolocator.geocode.assert_not_called()
+        self.assertEqual(geocoded["numero"], "250")
+        self.assertEqual(geocoded["latitud"], -27.3671)
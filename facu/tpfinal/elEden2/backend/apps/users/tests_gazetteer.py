@@ -0,0 +1,49 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.weather.services import GeocodingService
+
+from .models import Localidad
+from .services.gazetteer import get_nomenclator
+
+
+class NomenclatorLookupTests(SimpleTestCase):
+    def test_lookup_ignores_accents_case_and_province_prefix(self):
+        nomenclator = get_nomenclator()
+
+        self.assertEqual(nomenclator.coordenadas("OBERA", "Provincia de Misiones"), (-27.487, -55.12))
+        self.assertIsNotNone(nomenclator.coordenadas("paso de los libres", "corrientes"))
+
+    def test_ambiguous_name_requires_province(self):
+        nomenclator = get_nomenclator()
+
+        self.assertIsNone(nomenclator.coordenadas("Loreto"))
+        self.assertNotEqual(nomenclator.coordenadas("Loreto", "Misiones"), nomenclator.coordenadas("Loreto", "Corrientes"))
+
+
+class BackfillCoordenadasTests(TestCase):
+    def test_backfill_fills_known_localidades_without_network(self):
+        posadas = Localidad.objects.create(cp="3300", nombre_localidad="Posadas", nombre_provincia="Misiones")
+        desconocida = Localidad.objects.create(cp="0000", nombre_localidad="Ciudad", nombre_provincia="Provincia")
+
+        with patch("apps.weather.services.requests.get") as mock_get:
+            call_command("backfill_coordenadas", stdout=StringIO())
+
+        mock_get.assert_not_called()
+        posadas.refresh_from_db()
+        desconocida.refresh_from_db()
+        self.assertEqual(posadas.latitud, Decimal("-27.367100"))
+        self.assertIsNone(desconocida.latitud)
+
+    def test_geocoder_uses_gazetteer_before_nominatim(self):
+        localidad = Localidad.objects.create(cp="3360", nombre_localidad="Oberá", nombre_provincia="Misiones")
+
+        with patch("apps.weather.services.requests.get") as mock_get:
+            coords = GeocodingService().geocode_localidad(localidad)
+
+        mock_get.assert_not_called()
+        self.assertEqual(coords, (-27.487, -55.12))
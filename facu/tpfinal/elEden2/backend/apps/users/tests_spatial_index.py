@@ -0,0 +1,80 @@
+import random
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.weather.services import ServicioTemperaturaActual
+
+from .models import Localidad
+from .services.gazetteer import get_nomenclator
+from .services.spatial_index import IndiceEspacial, haversine_km, localidad_mas_cercana
+
+
+class IndiceEspacialTests(SimpleTestCase):
+    def test_matches_brute_force_nearest_neighbour(self):
+        nomenclator = get_nomenclator()
+        index = IndiceEspacial(nomenclator.latitudes, nomenclator.longitudes, nomenclator.nombres)
+        rng = random.Random(7)
+
+        for _ in range(300):
+            lat, lon = rng.uniform(-35, -25), rng.uniform(-60, -53)
+            distances = haversine_km(lat, lon, nomenclator.latitudes, nomenclator.longitudes)
+            expected = nomenclator.nombres[int(np.argmin(distances))]
+
+            nombre, distancia = index.mas_cercano(lat, lon)
+            self.assertEqual(nombre, expected)
+            self.assertAlmostEqual(distancia, float(distances.min()), places=6)
+
+    def test_respects_max_distance(self):
+        index = IndiceEspacial([-27.3671], [-55.8961], ["Posadas"])
+
+        self.assertEqual(index.mas_cercano(-27.40, -55.90, max_km=10)[0], "Posadas")
+        self.assertIsNone(index.mas_cercano(-31.41, -64.18, max_km=10))
+
+
+class LocalidadMasCercanaTests(TestCase):
+    def test_index_refreshes_when_localidades_change(self):
+        self.assertIsNone(localidad_mas_cercana(-27.48, -55.12))
+
+        obera = Localidad.objects.create(
+            cp="3360",
+            nombre_localidad="Oberá",
+            nombre_provincia="Misiones",
+            latitud=Decimal("-27.487000"),
+            longitud=Decimal("-55.120000"),
+        )
+        self.assertEqual(localidad_mas_cercana(-27.48, -55.12).pk, obera.pk)
+
+        obera.latitud, obera.longitud = Decimal("-31.413500"), Decimal("-64.181100")
+        obera.save(update_fields=["latitud", "longitud"])
+        self.assertIsNone(localidad_mas_cercana(-27.48, -55.12))
+
+    def test_current_temperature_labels_location_without_reverse_geocoding(self):
+        cache.clear()
+        Localidad.objects.create(
+            cp="3300",
+            nombre_localidad="Posadas",
+            nombre_provincia="Misiones",
+            nombre_pais="Argentina",
+            latitud=Decimal("-27.367100"),
+            longitud=Decimal("-55.896100"),
+        )
+        admin = get_user_model().objects.create_superuser(
+            username="temp", email="temp@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+        response_mock = MagicMock()
+        response_mock.json.return_value = {"current": {"temperature_2m": 24.5}}
+
+        with patch("apps.weather.services.requests.get", return_value=response_mock) as mock_get:
+            ServicioTemperaturaActual().refrescar()
+            response = self.client.get(reverse("weather-current-temperature"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["location"], "Posadas, Argentina")
+        self.assertEqual(mock_get.call_count, 1)
@@ -11,6 +11,7 @@ class PronosticoClimaAdmin(admin.ModelAdmin):
         "longitud",
         "precipitacion_mm",
         "probabilidad_precipitacion",
+        "codigo_clima",
         "fuente",
         "creado_en",
     )
@@ -0,0 +1,186 @@
+"""
+Benchmark reproducible de los caminos de clima contra el simulador local:
+    python manage.py benchmark_clima --reservas 300 --localidades 60 --latency-ms 120 --error-rate 0.02
+
+Crea reservas y localidades sintéticas dentro de una transacción que se
+revierte al final, apunta ``WEATHER_API_URL``/``GEOCODER_API_URL`` al simulador
+(embebido, o uno ya levantado con ``--url``) y usa un cache propio en memoria
+para no tocar el cache real. Mide ``build_locality_forecasts`` en frío y en
+caliente, y ``evaluate_reservas_bulk`` en frío.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+import requests
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.servicios.models import Reserva, Servicio
+from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
+from apps.users.services.address_service import is_operational_area
+from apps.users.services.gazetteer import get_nomenclator
+from apps.weather.servidor_simulado import ConfiguracionSimulador, SimuladorClima, iniciar_en_segundo_plano
+from apps.weather.services import ClimaNoDisponibleError, ServicioAlertasClimaticas
+
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark-clima",
+    }
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide build_locality_forecasts y la evaluación masiva contra un Open-Meteo/Nominatim simulado."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reservas", type=int, default=200)
+        parser.add_argument("--localidades", type=int, default=40, help="Localidades distintas a repartir.")
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--iterations", type=int, default=5, help="Repeticiones por escenario.")
+        parser.add_argument("--latency-ms", type=float, default=100)
+        parser.add_argument("--jitter-ms", type=float, default=0)
+        parser.add_argument("--error-rate", type=float, default=0)
+        parser.add_argument("--rate-limit", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--url", help="Base de un simulador ya levantado (p. ej. http://127.0.0.1:8089); si no, se embebe uno."
+        )
+
+    def _crear_datos(self, total: int, cantidad_localidades: int, days: int):
+        nomenclator = get_nomenclator()
+        posiciones = [
+            posicion
+            for posicion, provincia in enumerate(nomenclator.provincias)
+            if is_operational_area(provincia, "Argentina")
+        ][: max(1, cantidad_localidades)]
+        localidades = [
+            Localidad.objects.create(
+                cp="3300",
+                nombre_localidad=nomenclator.nombres[posicion],
+                nombre_provincia=nomenclator.provincias[posicion],
+                latitud=Decimal(f"{nomenclator.latitudes[posicion]:.6f}"),
+                longitud=Decimal(f"{nomenclator.longitudes[posicion]:.6f}"),
+            )
+            for posicion in posiciones
+        ]
+        persona = Persona.objects.create(
+            nombre="Benchmark",
+            apellido="Clima",
+            email="benchmark-clima@example.com",
+            telefono="+5493764000000",
+            calle="Benchmark",
+            numero="1",
+            nro_documento="BENCH-CLIMA",
+            genero=Genero.objects.get_or_create(genero="Otro")[0],
+            tipo_documento=TipoDocumento.objects.get_or_create(tipo="DNI")[0],
+            localidad=localidades[0],
+        )
+        cliente = Cliente.objects.create(persona=persona)
+        servicio = Servicio.objects.create(nombre="Benchmark clima", reprogramable_por_clima=True)
+        ahora = timezone.now()
+        for indice in range(total):
+            Reserva.objects.create(
+                fecha_cita=ahora + timedelta(days=1 + indice % max(1, days - 1), hours=indice % 8),
+                cliente=cliente,
+                servicio=servicio,
+                estado="confirmada",
+                direccion=f"Benchmark {indice}",
+                localidad_servicio=localidades[indice % len(localidades)],
+            )
+        return list(ServicioAlertasClimaticas().get_upcoming_reservas(days).filter(servicio=servicio))
+
+    def _medir(self, simulador, iteraciones: int, funcion, limpiar_cache: bool):
+        tiempos, errores, upstream = [], 0, []
+        for _ in range(iteraciones):
+            if limpiar_cache:
+                cache.clear()
+            if simulador:
+                simulador.reiniciar_estadisticas()
+            inicio = time.perf_counter()
+            try:
+                funcion()
+            except (requests.RequestException, ClimaNoDisponibleError, ValueError):
+                errores += 1
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            if simulador:
+                upstream.append(sum(simulador.estadisticas.values()))
+        return np.array(tiempos), errores, upstream
+
+    def _evaluar(self, service, reservas, days):
+        try:
+            with transaction.atomic():
+                service.evaluate_reservas_bulk(reservas, days=days, notify=False)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def handle(self, *args, **options):
+        days = max(1, min(int(options["days"]), 7))
+        iteraciones = max(1, int(options["iterations"]))
+
+        simulador = servidor = None
+        base_url = (options.get("url") or "").rstrip("/")
+        if not base_url:
+            simulador = SimuladorClima(
+                ConfiguracionSimulador(
+                    latencia_ms=max(0.0, options["latency_ms"]),
+                    jitter_ms=max(0.0, options["jitter_ms"]),
+                    tasa_error=min(1.0, max(0.0, options["error_rate"])),
+                    limite_por_segundo=max(0, options["rate_limit"]),
+                    semilla=options["seed"],
+                )
+            )
+            servidor = iniciar_en_segundo_plano(simulador)
+            host, port = servidor.server_address[:2]
+            base_url = f"http://{host}:{port}"
+
+        ajustes = override_settings(
+            WEATHER_API_URL=f"{base_url}/v1/forecast",
+            GEOCODER_API_URL=f"{base_url}/search",
+            CACHES=BENCHMARK_CACHES,
+        )
+        try:
+            with ajustes:
+                try:
+                    with transaction.atomic():
+                        self._correr(simulador, base_url, options, days, iteraciones)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+        finally:
+            if servidor:
+                servidor.shutdown()
+                servidor.server_close()
+
+    def _correr(self, simulador, base_url, options, days, iteraciones):
+        reservas = self._crear_datos(max(1, options["reservas"]), options["localidades"], days)
+        service = ServicioAlertasClimaticas()
+        ubicaciones = len({service._resolve_localidad_info(reserva)["key"] for reserva in reservas})
+
+        self.stdout.write(
+            f"{len(reservas)} reservas en {ubicaciones} localidades, {days} días, {iteraciones} iteraciones "
+            f"contra {base_url}"
+        )
+        escenarios = [
+            ("localidades frío", lambda: service.build_locality_forecasts(reservas, days), True),
+            ("localidades caliente", lambda: service.build_locality_forecasts(reservas, days), False),
+            ("evaluación masiva", lambda: self._evaluar(service, reservas, days), True),
+        ]
+        for nombre, funcion, limpiar_cache in escenarios:
+            tiempos, errores, upstream = self._medir(simulador, iteraciones, funcion, limpiar_cache)
+            p50, p95, p99 = np.percentile(tiempos, [50, 95, 99])
+            linea = f"{nombre:<21} p50={p50:9.1f} ms  p95={p95:9.1f} ms  p99={p99:9.1f} ms  errores={errores}"
+            if upstream:
+                linea += f"  upstream/iter={np.mean(upstream):.1f}"
+            self.stdout.write(linea)
@@ -0,0 +1,146 @@
+"""
+Prueba de carga del endpoint de temperatura actual: antes (Open-Meteo sincrónico en
+cada request) vs. ahora (lectura de cache).
+    python manage.py benchmark_temperatura_actual --requests 300 --concurrency 20 --latency-ms 250
+
+Los dos caminos hacen requests HTTP reales contra el simulador de Open-Meteo
+(embebido, o uno ya levantado con ``--url``), así la comparación no depende de la
+red. Usa un cache propio en memoria y no escribe en la base.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.users.services.spatial_index import localidad_mas_cercana
+from apps.weather.servidor_simulado import ConfiguracionSimulador, SimuladorClima, iniciar_en_segundo_plano
+from apps.weather.views import TemperaturaActualAPIView
+
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark-temperatura",
+    }
+}
+
+
+class _TemperaturaSincronicaAPIView(APIView):
+    """La vista anterior, tal cual salvo la URL (``WEATHER_API_URL`` en vez de Open-Meteo fijo)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            lat = getattr(settings, "WEATHER_DEFAULT_LAT", -27.3667)
+            lon = getattr(settings, "WEATHER_DEFAULT_LON", -55.9000)
+
+            url = f"{settings.WEATHER_API_URL}?latitude={lat}&longitude={lon}&current=temperature_2m"
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+
+            data = response.json()
+            temperature = data["current"]["temperature_2m"]
+
+            location = None
+            localidad = localidad_mas_cercana(lat, lon)
+            if localidad:
+                location = ", ".join(filter(None, [localidad.nombre_localidad, localidad.nombre_pais]))
+
+            response_data = {"temperature": temperature, "unit": "°C"}
+            if location:
+                response_data["location"] = location
+
+            return Response(response_data, status=status.HTTP_200_OK)
+
+        except requests.RequestException:
+            return Response(
+                {"error": "Error al obtener datos de temperatura"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+
+class Command(BaseCommand):
+    help = "Mide p50/p95/p99 del endpoint de temperatura actual antes y después del cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests por escenario.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Requests concurrentes.")
+        parser.add_argument("--latency-ms", type=float, default=250, help="Latencia del simulador embebido.")
+        parser.add_argument(
+            "--url", help="Base de un simulador ya levantado (p. ej. http://127.0.0.1:8089); si no, se embebe uno."
+        )
+
+    def _run(self, view, total: int, concurrency: int):
+        factory = APIRequestFactory()
+        admin = User(username="benchmark", is_staff=True, is_superuser=True)
+        handler = view.as_view()
+
+        def one(_):
+            request = factory.get("/api/v1/weather/current-temperature/")
+            force_authenticate(request, user=admin)
+            started = time.perf_counter()
+            response = handler(request)
+            return (time.perf_counter() - started) * 1000, response.status_code == 200
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            resultados = list(pool.map(one, range(total)))
+        return np.array([tiempo for tiempo, _ in resultados]), sum(1 for _, ok in resultados if not ok)
+
+    def _report(self, label: str, latencies: np.ndarray, errores: int, upstream: int):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        self.stdout.write(
+            f"{label:<8} p50={p50:8.2f} ms  p95={p95:8.2f} ms  p99={p99:8.2f} ms  "
+            f"errores={errores}  upstream={upstream}"
+        )
+        return p99
+
+    def handle(self, *args, **options):
+        total = max(1, options["requests"])
+        concurrency = max(1, options["concurrency"])
+
+        simulador = servidor = None
+        base_url = (options.get("url") or "").rstrip("/")
+        if not base_url:
+            simulador = SimuladorClima(ConfiguracionSimulador(latencia_ms=max(0.0, options["latency_ms"])))
+            servidor = iniciar_en_segundo_plano(simulador)
+            host, port = servidor.server_address[:2]
+            base_url = f"http://{host}:{port}"
+
+        def llamadas_upstream():
+            return sum(simulador.estadisticas.values()) if simulador else 0
+
+        try:
+            with override_settings(WEATHER_API_URL=f"{base_url}/v1/forecast", CACHES=BENCHMARK_CACHES):
+                cache.clear()
+                # Índice espacial cargado antes de medir, igual que en un worker ya en marcha
+                localidad_mas_cercana(0, 0)
+
+                before, errores_before = self._run(_TemperaturaSincronicaAPIView, total, concurrency)
+                upstream_before = llamadas_upstream()
+                # Con el cache vacío la primera request consulta Open-Meteo dentro del request
+                frio, _ = self._run(TemperaturaActualAPIView, 1, 1)
+                after, errores_after = self._run(TemperaturaActualAPIView, total, concurrency)
+                upstream_after = llamadas_upstream() - upstream_before
+        finally:
+            if servidor:
+                servidor.shutdown()
+                servidor.server_close()
+
+        self.stdout.write(f"{total} requests, concurrencia {concurrency}, contra {base_url}")
+        p99_before = self._report("antes", before, errores_before, upstream_before)
+        p99_after = self._report("ahora", after, errores_after, upstream_after)
+        self.stdout.write(f"primera request con el cache vacío: {frio[0]:.2f} ms")
+        if p99_after:
+            self.stdout.write(self.style.SUCCESS(f"p99 {p99_before / p99_after:.0f}x menor"))
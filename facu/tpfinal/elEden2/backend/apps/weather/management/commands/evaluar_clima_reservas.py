@@ -0,0 +1,63 @@
+"""
+Evalúa en lote el pronóstico de las reservas reprogramables de los próximos días.
+Pensado para ejecutarse de noche (cron / scheduler):
+    python manage.py evaluar_clima_reservas --days 7
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.weather.services import ServicioAlertasClimaticas
+
+
+class Command(BaseCommand):
+    help = (
+        "Evalúa el clima de todas las reservas reprogramables de los próximos N días, "
+        "crea las alertas faltantes en lote y encola las notificaciones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Cantidad de días hacia adelante a evaluar (por defecto 7).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Evalúa y reporta sin persistir alertas ni enviar notificaciones.",
+        )
+
+    def handle(self, *args, **options):
+        days = max(1, int(options.get("days") or 7))
+        dry_run = bool(options.get("dry_run"))
+
+        self.stdout.write(f"Evaluando clima de reservas para los próximos {days} días...")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Modo simulación activo (--dry-run)."))
+
+        service = ServicioAlertasClimaticas()
+        inicio = time.perf_counter()
+        reservas = list(service.get_upcoming_reservas(days))
+        tiempo_carga = time.perf_counter() - inicio
+
+        # Sin transacción alrededor: la del servicio sólo cubre las escrituras, no las consultas HTTP
+        stats = service.evaluate_reservas_bulk(reservas, days=days, notify=not dry_run, dry_run=dry_run)
+
+        tiempos = stats.pop("tiempos", {})
+        tiempos = {"carga": tiempo_carga, **tiempos}
+
+        self.stdout.write(self.style.SUCCESS("Evaluación finalizada."))
+        self.stdout.write(f"Reservas evaluadas: {stats['reservas']}")
+        self.stdout.write(f"Ubicaciones consultadas: {stats['ubicaciones']}")
+        self.stdout.write(f"Sin pronóstico disponible: {stats['sin_pronostico']}")
+        self.stdout.write(f"Requieren reprogramación: {stats['requieren_reprogramacion']}")
+        self.stdout.write(f"Alertas creadas: {stats['alertas_creadas']}")
+        self.stdout.write(f"Alertas pendientes ya existentes: {stats['alertas_duplicadas']}")
+        self.stdout.write(f"Alertas pendientes actualizadas: {stats['alertas_actualizadas']}")
+        self.stdout.write(f"Notificaciones encoladas: {stats['notificaciones_encoladas']}")
+        self.stdout.write(
+            "Tiempos: " + " | ".join(f"{fase}={segundos * 1000:.1f} ms" for fase, segundos in tiempos.items())
+        )
@@ -0,0 +1,66 @@
+"""
+Precalienta el cache de pronósticos de las ubicaciones con reservas próximas.
+Con --loop queda corriendo como proceso auxiliar; cada vuelta sólo recarga lo que
+está por vencer (WEATHER_PREWARM_LEAD_SECONDS antes de WEATHER_CACHE_TTL):
+    python manage.py precalentar_pronosticos --loop --interval 300
+
+Corre en otro proceso que el backend, así que necesita el cache compartido
+(REDIS_URL); con el cache en memoria de cada proceso no tendría efecto.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.weather.services import ServicioAlertasClimaticas
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga en lote los pronósticos de las ubicaciones con reservas en los próximos N días "
+        "para que el resumen del dashboard siempre lea un cache caliente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Días hacia adelante de reservas y de pronóstico (máximo 7).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Repite el precalentamiento indefinidamente cada --interval segundos.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Segundos entre vueltas (por defecto la mitad de WEATHER_PREWARM_LEAD_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES["default"]["BACKEND"]
+        if backend.endswith(("LocMemCache", "DummyCache")):
+            raise CommandError(
+                f"El cache ({backend}) no se comparte entre procesos: el backend no vería los pronósticos "
+                "precalentados. Configurá REDIS_URL."
+            )
+        days = max(1, min(int(options.get("days") or 7), 7))
+
+        while True:
+            service = ServicioAlertasClimaticas()
+            # El intervalo debe ser menor que el margen para no dejar vencer ninguna entrada
+            interval = max(1, options.get("interval") or service.client.prewarm_lead // 2)
+            inicio = time.perf_counter()
+            stats = service.prewarm_upcoming_forecasts(days)
+            self.stdout.write(
+                f"Ubicaciones: {stats['ubicaciones']} | refrescadas: {stats['refrescadas']} | "
+                f"vigentes: {stats['vigentes']} | fallidas: {stats['fallidas']} | "
+                f"llamadas: {stats['llamadas']} | {(time.perf_counter() - inicio) * 1000:.0f} ms"
+            )
+            if not options.get("loop"):
+                return
+            time.sleep(interval)
@@ -0,0 +1,42 @@
+"""
+Refresca la temperatura actual en el cache compartido.
+Con --loop queda corriendo como proceso auxiliar (p. ej. un servicio más en docker-compose):
+    python manage.py refrescar_temperatura_actual --loop
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.weather.services import ServicioTemperaturaActual
+
+
+class Command(BaseCommand):
+    help = "Consulta Open-Meteo y guarda la temperatura actual en el cache que lee el dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Repite el refresco indefinidamente cada --interval segundos.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Segundos entre refrescos (por defecto WEATHER_CURRENT_REFRESH_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        service = ServicioTemperaturaActual()
+        interval = max(1, options.get("interval") or service.refresh_seconds)
+
+        while True:
+            payload = service.refrescar()
+            if payload:
+                self.stdout.write(self.style.SUCCESS(f"{payload['temperature']} {payload['unit']} (as_of {payload['as_of']})"))
+            else:
+                self.stdout.write(self.style.WARNING("Open-Meteo no respondió; se mantiene el último valor conocido."))
+            if not options.get("loop"):
+                return
+            time.sleep(interval)
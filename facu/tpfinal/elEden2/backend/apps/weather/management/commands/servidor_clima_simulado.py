@@ -0,0 +1,67 @@
+"""
+Levanta el simulador local de Open-Meteo / Nominatim:
+    python manage.py servidor_clima_simulado --port 8089 --latency-ms 150 --error-rate 0.05
+
+Después apuntar la app a él:
+    WEATHER_API_URL=http://127.0.0.1:8089/v1/forecast
+    GEOCODER_API_URL=http://127.0.0.1:8089/search
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.weather.servidor_simulado import ConfiguracionSimulador, SimuladorClima, iniciar_servidor
+
+
+class Command(BaseCommand):
+    help = "Sirve respuestas sintéticas o grabadas de Open-Meteo y Nominatim para pruebas de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument("--latency-ms", type=float, default=0, help="Latencia agregada a cada respuesta.")
+        parser.add_argument("--jitter-ms", type=float, default=0, help="Variación aleatoria de la latencia (±).")
+        parser.add_argument("--error-rate", type=float, default=0, help="Fracción de respuestas 503 (0 a 1).")
+        parser.add_argument(
+            "--rate-limit", type=int, default=0, help="Requests por segundo antes de responder 429 (0 = sin límite)."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos sintéticos.")
+        parser.add_argument(
+            "--recordings",
+            help='JSON {"/v1/forecast": {...}, "/search": [...]} con respuestas grabadas a servir tal cual.',
+        )
+        parser.add_argument("--verbose-requests", action="store_true", help="Loguea cada request recibido.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["error_rate"] <= 1:
+            raise CommandError("--error-rate debe estar entre 0 y 1.")
+        grabaciones = {}
+        if options.get("recordings"):
+            with open(options["recordings"], encoding="utf-8") as handle:
+                grabaciones = json.load(handle)
+
+        simulador = SimuladorClima(
+            ConfiguracionSimulador(
+                latencia_ms=max(0.0, options["latency_ms"]),
+                jitter_ms=max(0.0, options["jitter_ms"]),
+                tasa_error=options["error_rate"],
+                limite_por_segundo=max(0, options["rate_limit"]),
+                semilla=options["seed"],
+                grabaciones=grabaciones,
+            )
+        )
+        servidor = iniciar_servidor(
+            simulador, options["host"], options["port"], silencioso=not options["verbose_requests"]
+        )
+        host, port = servidor.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"Simulador de clima escuchando en http://{host}:{port}"))
+        self.stdout.write(f"  WEATHER_API_URL=http://{host}:{port}/v1/forecast")
+        self.stdout.write(f"  GEOCODER_API_URL=http://{host}:{port}/search")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            self.stdout.write("Requests atendidos: " + json.dumps(simulador.estadisticas, ensure_ascii=False))
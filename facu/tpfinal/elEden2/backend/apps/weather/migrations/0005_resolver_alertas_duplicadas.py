@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def resolver_alertas_duplicadas(apps, schema_editor):
+    """Deja una sola alerta pendiente por (reserva, fecha, tipo): la más reciente.
+
+    Las demás se marcan resueltas (el borrado físico está bloqueado por trigger).
+    """
+    AlertaClimatica = apps.get_model("weather", "AlertaClimatica")
+    vistas = set()
+    duplicadas = []
+    pendientes = (
+        AlertaClimatica.objects.filter(estado="pending", reserva__isnull=False)
+        .order_by("reserva_id", "fecha_alerta", "tipo_alerta", "-creada_en", "-id")
+        .values_list("id", "reserva_id", "fecha_alerta", "tipo_alerta")
+    )
+    for alerta_id, reserva_id, fecha_alerta, tipo_alerta in pendientes.iterator():
+        clave = (reserva_id, fecha_alerta, tipo_alerta)
+        if clave in vistas:
+            duplicadas.append(alerta_id)
+        else:
+            vistas.add(clave)
+    if duplicadas:
+        AlertaClimatica.objects.filter(id__in=duplicadas).update(estado="resolved", resuelta_en=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0004_renombrar_campos_clima_es"),
+    ]
+
+    operations = [
+        migrations.RunPython(resolver_alertas_duplicadas, migrations.RunPython.noop),
+    ]
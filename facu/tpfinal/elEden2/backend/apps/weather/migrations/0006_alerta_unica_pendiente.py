@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0005_resolver_alertas_duplicadas"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="alertaclimatica",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("estado", "pending")),
+                fields=("reserva", "fecha_alerta", "tipo_alerta"),
+                name="weather_alert_unica_pendiente",
+            ),
+        ),
+    ]
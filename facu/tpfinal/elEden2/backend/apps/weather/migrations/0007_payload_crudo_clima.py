@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0006_alerta_unica_pendiente"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayloadCrudoClima",
+            fields=[
+                ("hash", models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ("contenido_comprimido", models.BinaryField(db_column="compressed_content")),
+                ("bytes_originales", models.PositiveIntegerField(db_column="original_bytes")),
+                ("creado_en", models.DateTimeField(auto_now_add=True, db_column="created_at")),
+            ],
+            options={
+                "verbose_name": "Payload crudo de clima",
+                "verbose_name_plural": "Payloads crudos de clima",
+                "db_table": "weather_raw_payload",
+            },
+        ),
+        migrations.AddField(
+            model_name="pronosticoclima",
+            name="codigo_clima",
+            field=models.PositiveSmallIntegerField(blank=True, db_column="weather_code", null=True),
+        ),
+        migrations.AddField(
+            model_name="pronosticoclima",
+            name="payload",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="raw_payload_hash",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="pronosticos",
+                to="weather.payloadcrudoclima",
+            ),
+        ),
+    ]
@@ -0,0 +1,181 @@
+"""Mueve los payloads crudos a ``weather_raw_payload`` e informa el espacio ahorrado.
+
+- ``weather_forecast.raw_payload`` → blob + ``weather_code`` extraído.
+- ``weather_alert.payload`` y ``reserva.alerta_clima_payload`` dejan de copiar la
+  respuesta cruda: se conservan las claves propias de la alerta y una referencia
+  ``raw_payload_hash``.
+"""
+
+import hashlib
+import json
+import zlib
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+VOLATILE_PAYLOAD_KEYS = ("generationtime_ms",)
+# Claves que agrega la alerta sobre la copia del payload crudo
+ALERT_KEYS = ("decision", "suggested_reprogramming", "manual_resolution", "simulated", "raw_payload_hash")
+
+
+def _serializar(payload):
+    limpio = {clave: valor for clave, valor in payload.items() if clave not in VOLATILE_PAYLOAD_KEYS}
+    return json.dumps(limpio, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _json_bytes(value):
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")) if value else 0
+
+
+def _weather_code(payload, fecha):
+    """Código del día de la fila (los documentos de rango traen varios días)."""
+    try:
+        daily = payload["daily"]
+        fechas = daily.get("time") or []
+        indice = fechas.index(fecha.isoformat()) if fecha.isoformat() in fechas else 0
+        value = daily["weathercode"][indice]
+        return int(value) if value is not None else None
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        return None
+
+
+class _Compactador:
+    def __init__(self, Blob):
+        self.Blob = Blob
+        self.conocidos = set()
+        self.pendientes = []
+        self.bytes_antes = 0
+        self.bytes_despues = 0
+
+    def blob(self, payload):
+        datos = _serializar(payload)
+        clave = hashlib.sha256(datos).hexdigest()
+        if clave not in self.conocidos:
+            comprimido = zlib.compress(datos, 9)
+            self.conocidos.add(clave)
+            self.pendientes.append(
+                self.Blob(hash=clave, contenido_comprimido=comprimido, bytes_originales=len(datos))
+            )
+            self.bytes_despues += len(comprimido)
+        return clave
+
+    def separar_alerta(self, payload):
+        """Payload de alerta sin la copia cruda (pasa a referenciarse por hash), o None si no cambia."""
+        crudo = {clave: valor for clave, valor in payload.items() if clave not in ALERT_KEYS}
+        if not crudo:
+            return None
+        propio = {clave: valor for clave, valor in payload.items() if clave in ALERT_KEYS}
+        propio.setdefault("raw_payload_hash", self.blob(crudo))
+        return propio
+
+    def flush(self):
+        if self.pendientes:
+            self.Blob.objects.bulk_create(self.pendientes, ignore_conflicts=True, batch_size=BATCH_SIZE)
+            self.pendientes = []
+
+    def procesar(self, queryset, campo, transformar, campos):
+        """Aplica ``transformar`` fila por fila y guarda en lotes las que cambiaron."""
+        lote = []
+        for fila in queryset.iterator(chunk_size=BATCH_SIZE):
+            antes = getattr(fila, campo)
+            if not transformar(fila, antes):
+                continue
+            self.bytes_antes += _json_bytes(antes)
+            self.bytes_despues += _json_bytes(getattr(fila, campo))
+            lote.append(fila)
+            if len(lote) >= BATCH_SIZE:
+                self.flush()
+                queryset.model.objects.bulk_update(lote, campos, batch_size=BATCH_SIZE)
+                lote = []
+        if lote:
+            self.flush()
+            queryset.model.objects.bulk_update(lote, campos, batch_size=BATCH_SIZE)
+
+
+def compactar(apps, schema_editor):
+    Blob = apps.get_model("weather", "PayloadCrudoClima")
+    PronosticoClima = apps.get_model("weather", "PronosticoClima")
+    AlertaClimatica = apps.get_model("weather", "AlertaClimatica")
+    Reserva = apps.get_model("servicios", "Reserva")
+    compactador = _Compactador(Blob)
+
+    def pronostico(fila, payload):
+        fila.payload_id = compactador.blob(payload)
+        fila.codigo_clima = _weather_code(payload, fila.fecha)
+        fila.payload_crudo = {}
+        return True
+
+    def alerta(fila, payload):
+        nuevo = compactador.separar_alerta(payload)
+        if nuevo is not None:
+            fila.payload_alerta = nuevo
+        return nuevo is not None
+
+    def reserva(fila, payload):
+        nuevo = compactador.separar_alerta(payload)
+        if nuevo is not None:
+            fila.alerta_clima_payload = nuevo
+        return nuevo is not None
+
+    compactador.procesar(
+        PronosticoClima.objects.exclude(payload_crudo={}),
+        "payload_crudo",
+        pronostico,
+        ["payload", "codigo_clima", "payload_crudo"],
+    )
+    compactador.procesar(
+        AlertaClimatica.objects.exclude(payload_alerta={}), "payload_alerta", alerta, ["payload_alerta"]
+    )
+    compactador.procesar(
+        Reserva.objects.exclude(alerta_clima_payload={}), "alerta_clima_payload", reserva, ["alerta_clima_payload"]
+    )
+
+    if compactador.bytes_antes:
+        ahorro = compactador.bytes_antes - compactador.bytes_despues
+        print(
+            f"\n  Payloads de clima compactados: {compactador.bytes_antes} → {compactador.bytes_despues} bytes "
+            f"({len(compactador.conocidos)} blobs, {ahorro} bytes ahorrados, "
+            f"{ahorro * 100 / compactador.bytes_antes:.1f}%)"
+        )
+
+
+def descompactar(apps, schema_editor):
+    """Reverso: vuelve a copiar el contenido de los blobs en las filas."""
+    Blob = apps.get_model("weather", "PayloadCrudoClima")
+    PronosticoClima = apps.get_model("weather", "PronosticoClima")
+    AlertaClimatica = apps.get_model("weather", "AlertaClimatica")
+    Reserva = apps.get_model("servicios", "Reserva")
+    contenidos = {}
+
+    def contenido(clave):
+        if clave not in contenidos:
+            blob = Blob.objects.filter(hash=clave).first()
+            contenidos[clave] = json.loads(zlib.decompress(bytes(blob.contenido_comprimido))) if blob else {}
+        return contenidos[clave]
+
+    for modelo, campo, filas in (
+        (PronosticoClima, "payload_crudo", PronosticoClima.objects.filter(payload__isnull=False)),
+        (AlertaClimatica, "payload_alerta", AlertaClimatica.objects.filter(payload_alerta__has_key="raw_payload_hash")),
+        (Reserva, "alerta_clima_payload", Reserva.objects.filter(alerta_clima_payload__has_key="raw_payload_hash")),
+    ):
+        lote = []
+        for fila in filas.iterator(chunk_size=BATCH_SIZE):
+            if campo == "payload_crudo":
+                fila.payload_crudo = contenido(fila.payload_id)
+            else:
+                valor = dict(getattr(fila, campo))
+                setattr(fila, campo, {**contenido(valor.pop("raw_payload_hash")), **valor})
+            lote.append(fila)
+        modelo.objects.bulk_update(lote, [campo], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0007_payload_crudo_clima"),
+        ("servicios", "0037_catalogos_soft_delete"),
+    ]
+
+    operations = [
+        migrations.RunPython(compactar, descompactar),
+    ]
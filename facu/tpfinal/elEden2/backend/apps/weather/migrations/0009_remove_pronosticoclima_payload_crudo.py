@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0008_compactar_payloads_crudos"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="pronosticoclima",
+            name="payload_crudo",
+        ),
+    ]
@@ -1,8 +1,72 @@
+import hashlib
+import json
+import zlib
 from decimal import Decimal
+from functools import cached_property
+from typing import Dict, Iterable, List
 
 from django.conf import settings
 from django.db import models
 
+# Claves de la respuesta de Open-Meteo que cambian en cada llamada sin aportar datos
+VOLATILE_PAYLOAD_KEYS = ("generationtime_ms",)
+
+
+def serializar_payload(payload: dict) -> bytes:
+    """JSON canónico (claves ordenadas, sin campos volátiles) para hashear y comprimir."""
+    limpio = {clave: valor for clave, valor in (payload or {}).items() if clave not in VOLATILE_PAYLOAD_KEYS}
+    return json.dumps(limpio, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def hash_payload(payload: dict) -> str:
+    return hashlib.sha256(serializar_payload(payload)).hexdigest()
+
+
+class PayloadCrudoClima(models.Model):
+    """Respuesta cruda de un proveedor, guardada una sola vez por contenido (sha256 → JSON zlib)."""
+
+    hash = models.CharField(max_length=64, primary_key=True)
+    contenido_comprimido = models.BinaryField(db_column="compressed_content")
+    bytes_originales = models.PositiveIntegerField(db_column="original_bytes")
+    creado_en = models.DateTimeField(auto_now_add=True, db_column="created_at")
+
+    class Meta:
+        verbose_name = "Payload crudo de clima"
+        verbose_name_plural = "Payloads crudos de clima"
+        db_table = "weather_raw_payload"
+
+    def __str__(self):
+        return f"{self.hash[:12]} ({self.bytes_originales} bytes)"
+
+    @cached_property
+    def contenido(self) -> dict:
+        return json.loads(zlib.decompress(bytes(self.contenido_comprimido)).decode("utf-8"))
+
+    @classmethod
+    def desde_payload(cls, payload: dict) -> "PayloadCrudoClima":
+        datos = serializar_payload(payload)
+        return cls(
+            hash=hashlib.sha256(datos).hexdigest(),
+            contenido_comprimido=zlib.compress(datos, 9),
+            bytes_originales=len(datos),
+        )
+
+    @classmethod
+    def guardar(cls, payload: dict) -> "PayloadCrudoClima":
+        return cls.guardar_varios([payload])[0]
+
+    @classmethod
+    def guardar_varios(cls, payloads: Iterable[dict]) -> List["PayloadCrudoClima"]:
+        """Inserta los blobs que falten (un INSERT ... ON CONFLICT DO NOTHING); uno por payload, en orden."""
+        unicos: Dict[str, PayloadCrudoClima] = {}
+        resultado = []
+        for payload in payloads:
+            blob = cls.desde_payload(payload)
+            resultado.append(unicos.setdefault(blob.hash, blob))
+        if unicos:
+            cls.objects.bulk_create(list(unicos.values()), ignore_conflicts=True)
+        return resultado
+
 
 class PronosticoClima(models.Model):
     """Entrada de caché de pronóstico para una fecha y coordenadas."""
@@ -25,7 +89,15 @@ class PronosticoClima(models.Model):
     )
     probabilidad_precipitacion = models.PositiveIntegerField(null=True, blank=True, db_column="precipitation_probability")
     resumen = models.CharField(max_length=255, blank=True, db_column="summary")
-    payload_crudo = models.JSONField(default=dict, blank=True, db_column="raw_payload")
+    codigo_clima = models.PositiveSmallIntegerField(null=True, blank=True, db_column="weather_code")
+    payload = models.ForeignKey(
+        PayloadCrudoClima,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="pronosticos",
+        db_column="raw_payload_hash",
+    )
     fuente = models.CharField(max_length=20, choices=SOURCE_CHOICES, default="open-meteo", db_column="source")
     creado_en = models.DateTimeField(auto_now_add=True, db_column="created_at")
 
@@ -39,6 +111,10 @@ class PronosticoClima(models.Model):
     def __str__(self):
         return f"Pronóstico {self.fecha} ({self.latitud}, {self.longitud})"
 
+    @property
+    def payload_crudo(self) -> dict:
+        return self.payload.contenido if self.payload_id else {}
+
 
 class AlertaClimatica(models.Model):
     """Alerta generada cuando el pronóstico supera el umbral configurado."""
@@ -113,6 +189,14 @@ class AlertaClimatica(models.Model):
         verbose_name_plural = "Alertas climáticas"
         db_table = "weather_alert"
         ordering = ["estado", "fecha_alerta"]
+        constraints = [
+            # Una sola alerta pendiente por reserva, día y tipo: los chequeos repetidos la actualizan
+            models.UniqueConstraint(
+                fields=["reserva", "fecha_alerta", "tipo_alerta"],
+                condition=models.Q(estado="pending"),
+                name="weather_alert_unica_pendiente",
+            ),
+        ]
 
     def __str__(self):
         destino = f"Reserva {self.reserva_id}" if self.reserva_id else "General"
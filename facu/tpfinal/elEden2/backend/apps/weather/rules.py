@@ -0,0 +1,108 @@
+"""Motor columnar de reglas climáticas.
+
+Aplica las mismas reglas que ``ServicioAlertasClimaticas._evaluate_weather_rules``
+sobre arreglos NumPy en una sola pasada, para re-evaluar temporadas completas
+de pronósticos (p. ej. al ajustar umbrales) sin iterar objeto por objeto.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+# El orden es la prioridad de las reglas: gana la primera que aplica
+TRIGGERS = ("kill_switch", "light_rain", "low_probability", "heavy_rain", "acceptable")
+REASSIGN_TRIGGERS = frozenset({"kill_switch", "heavy_rain"})
+
+KILL_SWITCH, LIGHT_RAIN, LOW_PROBABILITY, HEAVY_RAIN, ACCEPTABLE = range(len(TRIGGERS))
+_REASSIGN_MASK = np.array([trigger in REASSIGN_TRIGGERS for trigger in TRIGGERS])
+
+
+@dataclass(frozen=True)
+class UmbralesClima:
+    drizzle_mm: Decimal
+    alert_mm: Decimal
+    low_probability: int
+    reassign_probability: int
+    kill_switch_codes: frozenset
+
+    @classmethod
+    def desde_servicio(cls, service) -> "UmbralesClima":
+        return cls(
+            drizzle_mm=service.drizzle_threshold,
+            alert_mm=service.threshold,
+            low_probability=service.low_probability_threshold,
+            reassign_probability=service.reassign_probability_threshold,
+            kill_switch_codes=frozenset(service.kill_switch_codes),
+        )
+
+    def con_cambios(self, **cambios) -> "UmbralesClima":
+        cambios = {campo: valor for campo, valor in cambios.items() if valor is not None}
+        if "kill_switch_codes" in cambios:
+            cambios["kill_switch_codes"] = frozenset(cambios["kill_switch_codes"])
+        return replace(self, **cambios)
+
+    def as_dict(self) -> dict:
+        return {
+            "drizzle_mm": float(self.drizzle_mm),
+            "alert_mm": float(self.alert_mm),
+            "low_probability": self.low_probability,
+            "reassign_probability": self.reassign_probability,
+            "kill_switch_codes": sorted(self.kill_switch_codes),
+        }
+
+
+def _to_cents(values: Iterable[Optional[Decimal]]) -> np.ndarray:
+    # Centésimas enteras: comparaciones exactas como con Decimal (2 decimales en BD)
+    array = np.array([0 if value is None else value for value in values], dtype=np.float64)
+    return np.rint(array * 100).astype(np.int64)
+
+
+def _to_int(values: Iterable[Optional[int]], missing: int) -> np.ndarray:
+    return np.array([missing if value is None else int(value) for value in values], dtype=np.int64)
+
+
+def evaluar_triggers(
+    precipitation_mm: Sequence[Optional[Decimal]],
+    probability: Sequence[Optional[int]],
+    weather_codes: Sequence[Optional[int]],
+    umbrales: UmbralesClima,
+) -> np.ndarray:
+    """Devuelve el índice de ``TRIGGERS`` que dispara cada pronóstico.
+
+    Los ``None`` se tratan igual que en la versión escalar: precipitación y
+    probabilidad faltantes cuentan como 0 y un código faltante nunca activa el
+    kill switch.
+    """
+    precipitation = _to_cents(precipitation_mm)
+    prob = _to_int(probability, missing=0)
+    codes = _to_int(weather_codes, missing=-1)
+
+    drizzle = float(Decimal(umbrales.drizzle_mm) * 100)
+    alert = float(Decimal(umbrales.alert_mm) * 100)
+
+    result = np.full(precipitation.shape, ACCEPTABLE, dtype=np.int8)
+    pending = np.ones(precipitation.shape, dtype=bool)
+    rules = (
+        (KILL_SWITCH, np.isin(codes, list(umbrales.kill_switch_codes))),
+        (LIGHT_RAIN, precipitation < drizzle),
+        (LOW_PROBABILITY, prob < umbrales.low_probability),
+        (HEAVY_RAIN, (precipitation > alert) & (prob >= umbrales.reassign_probability)),
+    )
+    for trigger, mask in rules:
+        hit = pending & mask
+        result[hit] = trigger
+        pending &= ~mask
+    return result
+
+
+def requiere_reprogramacion(triggers: np.ndarray) -> np.ndarray:
+    return _REASSIGN_MASK[triggers]
+
+
+def contar_triggers(triggers: np.ndarray) -> dict:
+    counts = np.bincount(triggers, minlength=len(TRIGGERS))
+    return {trigger: int(count) for trigger, count in zip(TRIGGERS, counts)}
@@ -144,3 +144,19 @@ class ChequeoClimaSerializer(serializers.Serializer):
         if not attrs.get("reserva_id") and not (attrs.get("date") and attrs.get("latitude") and attrs.get("longitude")):
             raise serializers.ValidationError("Debe enviar una reserva o bien fecha + coordenadas")
         return attrs
+
+
+class SimulacionUmbralesSerializer(serializers.Serializer):
+    drizzle_threshold_mm = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    threshold_mm = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    low_probability_threshold = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    reassign_probability_threshold = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    kill_switch_codes = serializers.ListField(child=serializers.IntegerField(min_value=0), required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    source = serializers.CharField(required=False, default="open-meteo")
+
+    def validate(self, attrs):
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from debe ser anterior o igual a date_to")
+        return attrs
@@ -1,23 +1,29 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
 from datetime import timezone as datetime_timezone
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
 from django.conf import settings
 from django.core.cache import cache
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.utils import timezone
 
 from apps.servicios.models import Reserva, ReservaEmpleado
 from apps.users.models import Empleado
+from apps.users.services.gazetteer import coordenadas_localidad
+from apps.users.services.rate_limit import nominatim_bucket
+from apps.users.services.spatial_index import localidad_mas_cercana
 
-from .models import AlertaClimatica, PronosticoClima
+from .models import AlertaClimatica, PayloadCrudoClima, PronosticoClima
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +37,7 @@ class ResultadoPronostico:
     longitude: Decimal
     weather_code: Optional[int]
     raw: dict
+    stale: bool = False
 
     @property
     def summary(self) -> str:
@@ -46,12 +53,98 @@ class ResumenPronosticoDiario:
     precipitation_probability: Optional[int]
     precipitation_sum: Optional[Decimal]
     weather_code: Optional[int]
+    stale: bool = False
+
+
+class ClimaNoDisponibleError(requests.RequestException):
+    """El proveedor de clima no responde y no hay pronóstico en caché para servir."""
+
+
+class CircuitBreaker:
+    """Circuit breaker compartido a través del cache de Django.
+
+    Tras ``failure_threshold`` fallos consecutivos queda abierto durante
+    ``cooldown_seconds``: las llamadas fallan de inmediato en lugar de esperar
+    el timeout del proveedor. Pasado el enfriamiento se permite un intento; si
+    vuelve a fallar se reabre sin esperar otros N fallos.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        cooldown_seconds: Optional[int] = None,
+    ):
+        self.name = name
+        self.failure_threshold = max(
+            1, int(failure_threshold or getattr(settings, "WEATHER_CIRCUIT_FAILURE_THRESHOLD", 3))
+        )
+        self.cooldown_seconds = int(cooldown_seconds or getattr(settings, "WEATHER_CIRCUIT_COOLDOWN_SECONDS", 60))
+        self._failures_key = f"circuit:{name}:failures"
+        self._open_until_key = f"circuit:{name}:open_until"
+
+    def is_open(self) -> bool:
+        open_until = cache.get(self._open_until_key)
+        return bool(open_until and open_until > time.time())
+
+    def record_success(self):
+        cache.delete_many([self._failures_key, self._open_until_key])
+
+    def record_failure(self):
+        cache.add(self._failures_key, 0, timeout=self.cooldown_seconds * 10)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            # La clave expiró entre add() e incr()
+            cache.set(self._failures_key, 1, timeout=self.cooldown_seconds * 10)
+            failures = 1
+
+        if failures >= self.failure_threshold:
+            cache.set(self._open_until_key, time.time() + self.cooldown_seconds, timeout=self.cooldown_seconds)
+            # Half-open: un único fallo tras el enfriamiento vuelve a abrirlo
+            cache.set(self._failures_key, self.failure_threshold - 1, timeout=self.cooldown_seconds * 10)
+            logger.warning(
+                "Circuit breaker '%s' abierto por %s s tras %s fallos",
+                self.name,
+                self.cooldown_seconds,
+                failures,
+            )
+
+
+def _aplicar_cambios(instance, valores: dict) -> List[str]:
+    """Asigna sólo los valores distintos y devuelve los campos modificados."""
+    cambios = []
+    for campo, valor in valores.items():
+        field = instance._meta.get_field(campo)
+        nuevo = valor.pk if field.is_relation and valor is not None else valor
+        if getattr(instance, field.attname) != nuevo:
+            setattr(instance, campo, valor)
+            cambios.append(campo)
+    return cambios
+
+
+def _run_in_background(func, *args):
+    thread = threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+    return thread
 
 
 class ClienteClima:
-    """Lightweight client for Open-Meteo (or compatible) weather APIs."""
+    """Lightweight client for Open-Meteo (or compatible) weather APIs.
 
-    def __init__(self, base_url: Optional[str] = None):
+    Los pronósticos se cachean ``WEATHER_CACHE_TTL`` segundos. Vencido ese plazo
+    se siguen sirviendo (marcados ``stale``) durante ``WEATHER_STALE_TTL``
+    mientras se revalidan en segundo plano, o mientras el circuit breaker esté
+    abierto.
+    """
+
+    MULTI_DAY_FIELDS = (
+        "temperature_2m_max,temperature_2m_min,precipitation_probability_mean,precipitation_sum,weathercode"
+    )
+    # Los rangos se piden y cachean siempre completos; cada consulta toma los días que necesita
+    MAX_RANGE_DAYS = 7
+
+    def __init__(self, base_url: Optional[str] = None, breaker: Optional[CircuitBreaker] = None):
         default_url = "https://api.open-meteo.com/v1/forecast"
         configured_url = getattr(settings, "WEATHER_API_URL", None)
         # Usar la URL por defecto si lo configurado está vacío o sólo espacios
@@ -59,6 +152,11 @@ class ClienteClima:
         if not chosen_url:
             chosen_url = default_url
         self.base_url = chosen_url
+        self.timeout = float(getattr(settings, "WEATHER_API_TIMEOUT", 10))
+        self.cache_ttl = int(getattr(settings, "WEATHER_CACHE_TTL", 3600))
+        self.stale_ttl = int(getattr(settings, "WEATHER_STALE_TTL", 6 * 3600))
+        self.prewarm_lead = int(getattr(settings, "WEATHER_PREWARM_LEAD_SECONDS", 600))
+        self.breaker = breaker or CircuitBreaker("open-meteo")
 
     def _build_params(
         self,
@@ -79,16 +177,52 @@ class ClienteClima:
             "end_date": end_str,
         }
 
-    def get_daily_forecast(self, latitude: float, longitude: float, target_date: datetime) -> ResultadoPronostico:
-        cache_key = f"weather:{latitude}:{longitude}:{target_date:%Y-%m-%d}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
+    def _request(self, params: dict, timeout: Optional[float] = None) -> dict:
+        if self.breaker.is_open():
+            raise ClimaNoDisponibleError("Servicio de clima temporalmente deshabilitado (circuit breaker abierto)")
+        try:
+            response = requests.get(self.base_url, params=params, timeout=timeout or self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
+
+    def _store(self, cache_key: str, value):
+        cache.set(
+            cache_key,
+            {"value": value, "fetched_at": time.time()},
+            timeout=self.cache_ttl + self.stale_ttl,
+        )
 
+    def _refresh(self, cache_key: str, fetcher):
+        lock_key = f"{cache_key}:refreshing"
+        try:
+            self._store(cache_key, fetcher())
+        except (requests.RequestException, ValueError):
+            logger.warning("No se pudo revalidar el pronóstico %s", cache_key)
+        finally:
+            cache.delete(lock_key)
+
+    def _get_with_revalidation(self, cache_key: str, fetcher):
+        """Devuelve ``(valor, stale)`` aplicando stale-while-revalidate."""
+        entry = cache.get(cache_key)
+        if isinstance(entry, dict) and "fetched_at" in entry:
+            if time.time() - entry["fetched_at"] < self.cache_ttl:
+                return entry["value"], False
+            if not self.breaker.is_open() and cache.add(f"{cache_key}:refreshing", True, timeout=self.timeout * 3):
+                _run_in_background(self._refresh, cache_key, fetcher)
+            return entry["value"], True
+
+        value = fetcher()
+        self._store(cache_key, value)
+        return value, False
+
+    def _fetch_daily_forecast(self, latitude: float, longitude: float, target_date: datetime) -> ResultadoPronostico:
         params = self._build_params(latitude, longitude, target_date)
-        response = requests.get(self.base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = self._request(params)
 
         daily = data.get("daily", {})
         precipitation_list = daily.get("precipitation_sum", [0])
@@ -104,7 +238,7 @@ class ClienteClima:
             except (TypeError, ValueError):
                 weather_code = None
 
-        result = ResultadoPronostico(
+        return ResultadoPronostico(
             date=target_date,
             precipitation_mm=precipitation,
             precipitation_probability=probability,
@@ -113,34 +247,26 @@ class ClienteClima:
             weather_code=weather_code,
             raw=data,
         )
-        cache.set(cache_key, result, timeout=3600)
-        return result
 
-    def get_multi_day_forecast(
+    def get_daily_forecast(self, latitude: float, longitude: float, target_date: datetime) -> ResultadoPronostico:
+        cache_key = f"weather:{latitude}:{longitude}:{target_date:%Y-%m-%d}"
+        result, stale = self._get_with_revalidation(
+            cache_key, lambda: self._fetch_daily_forecast(latitude, longitude, target_date)
+        )
+        return replace(result, stale=True) if stale else result
+
+    def _fetch_multi_day_forecast(
         self,
         latitude: float,
         longitude: float,
         start_date: datetime,
-        days: int = 7,
+        days: int,
     ) -> List[ResumenPronosticoDiario]:
-        days = max(1, min(days, 7))
         end_date = start_date + timedelta(days=days - 1)
-        cache_key = f"weather:range:{latitude}:{longitude}:{start_date:%Y-%m-%d}:{days}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        params = self._build_params(
-            latitude,
-            longitude,
-            start_date,
-            end_date,
-            daily_fields="temperature_2m_max,temperature_2m_min,precipitation_probability_mean,precipitation_sum,weathercode",
-        )
-        response = requests.get(self.base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        params = self._build_params(latitude, longitude, start_date, end_date, daily_fields=self.MULTI_DAY_FIELDS)
+        return self._parse_multi_day_results(self._request(params))
 
+    def _parse_multi_day_results(self, data: dict) -> List[ResumenPronosticoDiario]:
         daily = data.get("daily", {})
         dates = daily.get("time", [])
         temps_max = daily.get("temperature_2m_max", [])
@@ -176,10 +302,267 @@ class ClienteClima:
                     weather_code=weather_code,
                 )
             )
+        return results
+
+    @staticmethod
+    def _range_cache_key(latitude: float, longitude: float, start_date: datetime) -> str:
+        return f"weather:range:{latitude}:{longitude}:{start_date:%Y-%m-%d}"
+
+    def get_multi_day_forecast(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        days: int = 7,
+    ) -> List[ResumenPronosticoDiario]:
+        days = max(1, min(days, self.MAX_RANGE_DAYS))
+        cache_key = self._range_cache_key(latitude, longitude, start_date)
+        results, stale = self._get_with_revalidation(
+            cache_key, lambda: self._fetch_multi_day_forecast(latitude, longitude, start_date, self.MAX_RANGE_DAYS)
+        )
+        results = results[:days]
+        if stale:
+            return [replace(entry, stale=True) for entry in results]
+        return results
+
+    def _parse_daily_results(self, data: dict, latitude: float, longitude: float) -> Dict[date, ResultadoPronostico]:
+        daily = data.get("daily", {})
+        dates = daily.get("time", [])
+        precipitation_sum = daily.get("precipitation_sum", [])
+        precipitation_prob = daily.get("precipitation_probability_mean", [])
+        weather_codes = daily.get("weathercode", [])
+
+        results: Dict[date, ResultadoPronostico] = {}
+        for index, date_str in enumerate(dates):
+            try:
+                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+            except ValueError:
+                continue
+            precip_val = precipitation_sum[index] if index < len(precipitation_sum) else None
+            prob = precipitation_prob[index] if index < len(precipitation_prob) else None
+            weather_code = None
+            if index < len(weather_codes):
+                try:
+                    weather_code = int(weather_codes[index]) if weather_codes[index] is not None else None
+                except (TypeError, ValueError):
+                    weather_code = None
+            results[date_obj.date()] = ResultadoPronostico(
+                date=date_obj,
+                precipitation_mm=Decimal(str(precip_val or 0)),
+                precipitation_probability=prob,
+                latitude=Decimal(str(latitude)),
+                longitude=Decimal(str(longitude)),
+                weather_code=weather_code,
+                raw={
+                    "latitude": data.get("latitude", latitude),
+                    "longitude": data.get("longitude", longitude),
+                    "daily": {
+                        "time": [date_str],
+                        "precipitation_sum": [precip_val],
+                        "precipitation_probability_mean": [prob],
+                        "weathercode": [weather_code],
+                    },
+                },
+            )
+        return results
+
+    def _cached_days(
+        self, latitude: float, longitude: float, dates: List[date], allow_stale: bool
+    ) -> Dict[date, ResultadoPronostico]:
+        """Días de ``get_daily_forecast`` ya cacheados; con ``allow_stale`` también los vencidos."""
+        keys = {f"weather:{latitude}:{longitude}:{target_date:%Y-%m-%d}": target_date for target_date in dates}
+        results = {}
+        for key, entry in cache.get_many(list(keys)).items():
+            if not (isinstance(entry, dict) and "fetched_at" in entry):
+                continue
+            if time.time() - entry["fetched_at"] < self.cache_ttl:
+                results[keys[key]] = entry["value"]
+            elif allow_stale:
+                results[keys[key]] = replace(entry["value"], stale=True)
+        return results
 
-        cache.set(cache_key, results, timeout=3600)
+    def get_bulk_daily_forecasts(
+        self,
+        locations: List[Tuple[float, float]],
+        start_date: date,
+        days: int = 7,
+    ) -> Dict[Tuple[float, float], Dict[date, ResultadoPronostico]]:
+        """Pronósticos diarios de varias ubicaciones con una llamada por lote.
+
+        Open-Meteo acepta listas de coordenadas separadas por coma y responde con
+        un documento por ubicación, en el mismo orden. Comparte el cache de
+        ``get_daily_forecast``: las ubicaciones con todos los días vigentes no se
+        piden, y si un lote falla (o el circuit breaker está abierto) sus
+        ubicaciones usan lo cacheado aunque esté vencido. Lo que falte no aparece
+        en el resultado.
+        """
+        days = max(1, min(days, 16))
+        start = datetime.combine(start_date, datetime.min.time())
+        end = start + timedelta(days=days - 1)
+        dates = [(start + timedelta(days=offset)).date() for offset in range(days)]
+        batch_size = max(1, int(getattr(settings, "WEATHER_BULK_BATCH_SIZE", 50)))
+
+        results: Dict[Tuple[float, float], Dict[date, ResultadoPronostico]] = {}
+        missing = []
+        for latitude, longitude in dict.fromkeys(locations):
+            cached = self._cached_days(latitude, longitude, dates, allow_stale=False)
+            if len(cached) == len(dates):
+                results[(latitude, longitude)] = cached
+            else:
+                missing.append((latitude, longitude))
+
+        for offset in range(0, len(missing), batch_size):
+            batch = missing[offset : offset + batch_size]
+            params = self._build_params(
+                ",".join(str(lat) for lat, _ in batch),
+                ",".join(str(lon) for _, lon in batch),
+                start,
+                end,
+            )
+            try:
+                data = self._request(params)
+            except (requests.RequestException, ValueError) as exc:
+                # Incluye ClimaNoDisponibleError: el resto de los lotes sigue
+                logger.warning("Lote de %s ubicaciones sin pronóstico nuevo (%s); se usa el cache", len(batch), exc)
+                for latitude, longitude in batch:
+                    cached = self._cached_days(latitude, longitude, dates, allow_stale=True)
+                    if cached:
+                        results[(latitude, longitude)] = cached
+                continue
+            documents = data if isinstance(data, list) else [data]
+            for (latitude, longitude), document in zip(batch, documents):
+                daily_results = self._parse_daily_results(document, latitude, longitude)
+                for target_date, forecast in daily_results.items():
+                    self._store(f"weather:{latitude}:{longitude}:{target_date:%Y-%m-%d}", forecast)
+                results[(latitude, longitude)] = daily_results
         return results
 
+    def _needs_prewarm(self, cache_key: str, lead_seconds: int) -> bool:
+        entry = cache.get(cache_key)
+        if not (isinstance(entry, dict) and "fetched_at" in entry):
+            return True
+        return time.time() - entry["fetched_at"] >= self.cache_ttl - lead_seconds
+
+    def prewarm_forecasts(
+        self,
+        locations: List[Tuple[float, float]],
+        start_date: date,
+        lead_seconds: Optional[int] = None,
+    ) -> dict:
+        """Recarga en lote los pronósticos de ``locations`` que vencen en menos de ``lead_seconds``.
+
+        Una sola llamada por lote llena tanto la clave de rango que usa
+        ``get_multi_day_forecast`` (resumen por localidad, cualquier ``days``) como
+        las diarias de ``get_daily_forecast``. Las ubicaciones con datos todavía
+        frescos se omiten, así que el job puede correr seguido sin multiplicar las
+        llamadas.
+        """
+        lead = self.prewarm_lead if lead_seconds is None else max(0, int(lead_seconds))
+        start = datetime.combine(start_date, datetime.min.time())
+        end = start + timedelta(days=self.MAX_RANGE_DAYS - 1)
+        batch_size = max(1, int(getattr(settings, "WEATHER_BULK_BATCH_SIZE", 50)))
+
+        unique_locations = list(dict.fromkeys(locations))
+        due = [
+            (latitude, longitude)
+            for latitude, longitude in unique_locations
+            if self._needs_prewarm(self._range_cache_key(latitude, longitude, start), lead)
+        ]
+        stats = {"ubicaciones": len(unique_locations), "vigentes": len(unique_locations) - len(due)}
+        stats.update(refrescadas=0, fallidas=0, llamadas=0)
+
+        for offset in range(0, len(due), batch_size):
+            batch = due[offset : offset + batch_size]
+            params = self._build_params(
+                ",".join(str(lat) for lat, _ in batch),
+                ",".join(str(lon) for _, lon in batch),
+                start,
+                end,
+                daily_fields=self.MULTI_DAY_FIELDS,
+            )
+            try:
+                stats["llamadas"] += 1
+                data = self._request(params)
+            except (requests.RequestException, ValueError, ClimaNoDisponibleError):
+                logger.warning("No se pudo precalentar un lote de %s ubicaciones", len(batch))
+                stats["fallidas"] += len(batch)
+                continue
+            documents = data if isinstance(data, list) else [data]
+            for (latitude, longitude), document in zip(batch, documents):
+                self._store(self._range_cache_key(latitude, longitude, start), self._parse_multi_day_results(document))
+                for target_date, forecast in self._parse_daily_results(document, latitude, longitude).items():
+                    self._store(f"weather:{latitude}:{longitude}:{target_date:%Y-%m-%d}", forecast)
+                stats["refrescadas"] += 1
+        return stats
+
+    def get_current_temperature(self, latitude: float, longitude: float, timeout: Optional[float] = None) -> float:
+        data = self._request({"latitude": latitude, "longitude": longitude, "current": "temperature_2m"}, timeout)
+        try:
+            return data["current"]["temperature_2m"]
+        except (KeyError, TypeError) as exc:
+            raise ValueError("Respuesta sin temperatura actual") from exc
+
+
+class ServicioTemperaturaActual:
+    """Temperatura actual en el cache compartido, refrescada fuera del request.
+
+    El endpoint lee el cache. Si el dato tiene más de
+    ``WEATHER_CURRENT_REFRESH_SECONDS`` se agenda un refresco en segundo plano
+    (uno por intervalo entre todos los workers); si Open-Meteo falla se sigue
+    sirviendo el último valor conocido con su ``as_of``. Sólo con el cache vacío
+    se consulta dentro del request, con ``WEATHER_CURRENT_SYNC_TIMEOUT``.
+    """
+
+    CACHE_KEY = "weather:current"
+
+    def __init__(self, client: Optional[ClienteClima] = None):
+        self.client = client or ClienteClima()
+        self.latitude = getattr(settings, "WEATHER_DEFAULT_LAT", -27.3667)
+        self.longitude = getattr(settings, "WEATHER_DEFAULT_LON", -55.9000)
+        self.refresh_seconds = int(getattr(settings, "WEATHER_CURRENT_REFRESH_SECONDS", 300))
+        self.sync_timeout = float(getattr(settings, "WEATHER_CURRENT_SYNC_TIMEOUT", 3))
+
+    def leer(self) -> Optional[dict]:
+        return cache.get(self.CACHE_KEY)
+
+    def obtener(self) -> Optional[dict]:
+        """Valor del cache (refrescándolo en segundo plano si venció) o, si no hay ninguno, uno nuevo."""
+        payload = self.leer()
+        if payload is None:
+            return self.refrescar(timeout=self.sync_timeout)
+        self.programar_refresco(payload)
+        return payload
+
+    def _edad_segundos(self, payload: dict) -> float:
+        as_of = datetime.fromisoformat(payload["as_of"])
+        return (timezone.now() - as_of).total_seconds()
+
+    def esta_vencido(self, payload: Optional[dict]) -> bool:
+        return not payload or self._edad_segundos(payload) >= self.refresh_seconds
+
+    def refrescar(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            temperature = self.client.get_current_temperature(self.latitude, self.longitude, timeout)
+        except (requests.RequestException, ValueError, ClimaNoDisponibleError):
+            logger.warning("No se pudo refrescar la temperatura actual; se conserva el último valor")
+            return None
+
+        payload = {"temperature": temperature, "unit": "°C", "as_of": timezone.now().isoformat()}
+        localidad = localidad_mas_cercana(self.latitude, self.longitude)
+        if localidad:
+            payload["location"] = ", ".join(filter(None, [localidad.nombre_localidad, localidad.nombre_pais]))
+        # Sin expiración: el último valor conocido es el respaldo ante caídas de upstream
+        cache.set(self.CACHE_KEY, payload, timeout=None)
+        return payload
+
+    def programar_refresco(self, payload: Optional[dict]) -> bool:
+        if not self.esta_vencido(payload):
+            return False
+        if not cache.add(f"{self.CACHE_KEY}:refreshing", True, timeout=self.refresh_seconds):
+            return False
+        _run_in_background(self.refrescar)
+        return True
+
 
 class ServicioAlertasClimaticas:
     def __init__(self, client: Optional[ClienteClima] = None):
@@ -191,6 +574,7 @@ class ServicioAlertasClimaticas:
         self.max_employee_search_days = int(getattr(settings, "WEATHER_MAX_REASSIGN_DAYS", 30))
         self.default_employees_required = int(getattr(settings, "WEATHER_EMPLOYEES_DEFAULT_REQUIRED", 2))
         self.kill_switch_codes = set(getattr(settings, "WEATHER_KILL_SWITCH_CODES", [95, 96, 99]))
+        self.snap_decimals = int(getattr(settings, "WEATHER_LOCATION_SNAP_DECIMALS", 2))
         self.geocoder = GeocodingService()
 
     def _default_coordinates(self):
@@ -199,6 +583,10 @@ class ServicioAlertasClimaticas:
             float(getattr(settings, "WEATHER_DEFAULT_LON", -55.9000)),
         )
 
+    def _snap_coordinates(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        """Redondea a una grilla (~1 km con 2 decimales) para compartir pronósticos y cache."""
+        return round(float(latitude), self.snap_decimals), round(float(longitude), self.snap_decimals)
+
     def _get_coordinates(
         self, reserva: Reserva, latitude: Optional[float], longitude: Optional[float]
     ) -> Tuple[float, float, Optional[dict]]:
@@ -231,6 +619,12 @@ class ServicioAlertasClimaticas:
                 latitude, longitude = coords
         if latitude is None or longitude is None:
             latitude, longitude = self._default_coordinates()
+            if not localidad_obj:
+                # Sin localidad: agrupar y rotular con la localidad conocida más cercana al punto por defecto
+                localidad_obj = localidad_mas_cercana(latitude, longitude)
+                if localidad_obj:
+                    latitude, longitude = float(localidad_obj.latitud), float(localidad_obj.longitud)
+        latitude, longitude = self._snap_coordinates(latitude, longitude)
 
         key = localidad_obj.id_localidad if localidad_obj else f"default:{latitude}:{longitude}"
 
@@ -269,41 +663,25 @@ class ServicioAlertasClimaticas:
         target_date: datetime,
         raw_forecast: ResultadoPronostico,
     ) -> PronosticoClima:
+        blob = PayloadCrudoClima.guardar(raw_forecast.raw or {})
+        valores = {
+            "precipitacion_mm": raw_forecast.precipitation_mm,
+            "probabilidad_precipitacion": raw_forecast.precipitation_probability,
+            "resumen": raw_forecast.summary,
+            "codigo_clima": raw_forecast.weather_code,
+            "payload": blob,
+        }
         forecast, created = PronosticoClima.objects.get_or_create(
             fecha=target_date.date(),
             latitud=Decimal(str(latitude)),
             longitud=Decimal(str(longitude)),
             fuente="open-meteo",
-            defaults={
-                "precipitacion_mm": raw_forecast.precipitation_mm,
-                "probabilidad_precipitacion": raw_forecast.precipitation_probability,
-                "resumen": raw_forecast.summary,
-                "payload_crudo": raw_forecast.raw,
-            },
+            defaults=valores,
         )
         if not created:
-            needs_update = False
-            if forecast.payload_crudo in (None, {}):
-                forecast.payload_crudo = raw_forecast.raw
-                needs_update = True
-            if forecast.resumen != raw_forecast.summary:
-                forecast.resumen = raw_forecast.summary
-                needs_update = True
-            if forecast.precipitacion_mm != raw_forecast.precipitation_mm:
-                forecast.precipitacion_mm = raw_forecast.precipitation_mm
-                needs_update = True
-            if forecast.probabilidad_precipitacion != raw_forecast.precipitation_probability:
-                forecast.probabilidad_precipitacion = raw_forecast.precipitation_probability
-                needs_update = True
-            if needs_update:
-                forecast.save(
-                    update_fields=[
-                        "payload_crudo",
-                        "resumen",
-                        "precipitacion_mm",
-                        "probabilidad_precipitacion",
-                    ]
-                )
+            cambios = _aplicar_cambios(forecast, valores)
+            if cambios:
+                forecast.save(update_fields=cambios)
         return forecast
 
     def _evaluate_weather_rules(self, forecast: ResultadoPronostico) -> dict:
@@ -360,27 +738,54 @@ class ServicioAlertasClimaticas:
             return asignados_totales
         return max(1, self.default_employees_required)
 
-    def _find_next_available_slot(self, fecha_inicial: datetime, empleados_necesarios: int) -> datetime:
-        fecha_candidata = fecha_inicial + timedelta(days=1)
-        dias_buscados = 0
+    def _count_available_employees(self, fecha: date) -> int:
+        reservas_en_fecha = Reserva.objects.filter(
+            Q(fecha_realizacion__date=fecha) | (Q(fecha_realizacion__isnull=True) & Q(fecha_cita__date=fecha)),
+            estado__in=["confirmada", "en_curso"],
+        ).values_list("id_reserva", flat=True)
 
-        while dias_buscados < self.max_employee_search_days:
-            reservas_en_fecha = (
-                Reserva.objects.filter(
-                    Q(fecha_realizacion__date=fecha_candidata.date())
-                    | (Q(fecha_realizacion__isnull=True) & Q(fecha_cita__date=fecha_candidata.date())),
-                    estado__in=["confirmada", "en_curso"],
-                )
-                .values_list("id_reserva", flat=True)
-            )
+        empleados_ocupados = ReservaEmpleado.objects.filter(reserva_id__in=reservas_en_fecha).values_list(
+            "empleado_id", flat=True
+        )
 
-            empleados_ocupados = ReservaEmpleado.objects.filter(reserva_id__in=reservas_en_fecha).values_list(
-                "empleado_id", flat=True
-            )
+        return Empleado.objects.filter(activo=True).exclude(id_empleado__in=empleados_ocupados).count()
+
+    def _build_availability_index(self, desde: date, hasta: date) -> Callable[[date], int]:
+        """Precarga la ocupación de empleados de un rango con dos consultas.
+
+        Devuelve una función equivalente a ``_count_available_employees`` que
+        responde desde memoria, para evaluar muchas reservas sin un loop de
+        consultas por día.
+        """
+        activos = set(Empleado.objects.filter(activo=True).values_list("id_empleado", flat=True))
+        asignaciones = ReservaEmpleado.objects.filter(
+            Q(reserva__fecha_realizacion__date__range=(desde, hasta))
+            | (Q(reserva__fecha_realizacion__isnull=True) & Q(reserva__fecha_cita__date__range=(desde, hasta))),
+            reserva__estado__in=["confirmada", "en_curso"],
+        ).values_list("empleado_id", "reserva__fecha_realizacion", "reserva__fecha_cita")
+
+        ocupados_por_fecha = defaultdict(set)
+        for empleado_id, fecha_realizacion, fecha_cita in asignaciones:
+            fecha = timezone.localtime(fecha_realizacion or fecha_cita).date()
+            ocupados_por_fecha[fecha].add(empleado_id)
+
+        def disponibles(fecha: date) -> int:
+            return len(activos - ocupados_por_fecha.get(fecha, set()))
+
+        return disponibles
 
-            disponibles = Empleado.objects.filter(activo=True).exclude(id_empleado__in=empleados_ocupados).count()
+    def _find_next_available_slot(
+        self,
+        fecha_inicial: datetime,
+        empleados_necesarios: int,
+        disponibilidad: Optional[Callable[[date], int]] = None,
+    ) -> datetime:
+        disponibilidad = disponibilidad or self._count_available_employees
+        fecha_candidata = fecha_inicial + timedelta(days=1)
+        dias_buscados = 0
 
-            if disponibles >= empleados_necesarios:
+        while dias_buscados < self.max_employee_search_days:
+            if disponibilidad(fecha_candidata.date()) >= empleados_necesarios:
                 return fecha_candidata
 
             fecha_candidata += timedelta(days=1)
@@ -430,6 +835,7 @@ class ServicioAlertasClimaticas:
             "suggested_reprogramming": (suggested_date.isoformat() if suggested_date else None),
             "latitude": latitude,
             "longitude": longitude,
+            "stale": forecast.stale,
         }
 
         if localidad_info:
@@ -457,6 +863,350 @@ class ServicioAlertasClimaticas:
             result["alert_id"] = alerta.id
         return result
 
+    def get_upcoming_reservas(self, days: int = 7, solo_reprogramables: bool = True):
+        """Reservas activas cuya fecha efectiva cae entre hoy y ``days`` días."""
+        desde = timezone.localdate()
+        hasta = desde + timedelta(days=max(0, days))
+        reservas = Reserva.objects.select_related(
+            "servicio", "cliente__persona__localidad", "localidad_servicio"
+        ).filter(
+            Q(fecha_realizacion__date__range=(desde, hasta))
+            | (Q(fecha_realizacion__isnull=True) & Q(fecha_cita__date__range=(desde, hasta))),
+            estado__in=["pendiente", "confirmada", "en_curso"],
+        )
+        if solo_reprogramables:
+            reservas = reservas.filter(servicio__reprogramable_por_clima=True)
+        return reservas.order_by("fecha_cita")
+
+    def _empleados_requeridos_por_reserva(self, reserva_ids: List[int]) -> Dict[int, int]:
+        operadores = defaultdict(int)
+        totales = defaultdict(int)
+        for reserva_id, rol in ReservaEmpleado.objects.filter(reserva_id__in=reserva_ids).values_list(
+            "reserva_id", "rol"
+        ):
+            totales[reserva_id] += 1
+            if rol == "operador":
+                operadores[reserva_id] += 1
+
+        default = max(1, self.default_employees_required)
+        return {
+            reserva_id: operadores.get(reserva_id) or totales.get(reserva_id) or default for reserva_id in reserva_ids
+        }
+
+    def evaluate_reservas_bulk(self, reservas, days: int = 7, notify: bool = True, dry_run: bool = False) -> dict:
+        """Evalúa el clima de muchas reservas con cargas y escrituras en lote.
+
+        Agrupa las reservas por ubicación (ya ajustada a la grilla), obtiene los
+        pronósticos de todas las ubicaciones en lotes, aplica las mismas reglas que
+        ``evaluate_reserva`` y crea las alertas con ``bulk_create`` omitiendo las
+        reservas que ya tienen una alerta pendiente para esa fecha. Las
+        notificaciones se encolan para después del commit.
+
+        Las consultas HTTP (geocodificación y pronósticos) van antes de abrir la
+        transacción de escritura; con ``dry_run`` esa transacción se revierte.
+        """
+        timings = {}
+        started = time.perf_counter()
+
+        reservas = [reserva for reserva in reservas if reserva.fecha_realizacion or reserva.fecha_cita]
+        entries = []
+        for reserva in reservas:
+            fecha_base = reserva.fecha_realizacion or reserva.fecha_cita
+            fecha_objetivo = (
+                fecha_base.astimezone(datetime_timezone.utc) if timezone.is_aware(fecha_base) else fecha_base
+            )
+            localidad_info = self._resolve_localidad_info(reserva)
+            entries.append(
+                {
+                    "reserva": reserva,
+                    "fecha_base": fecha_base,
+                    "fecha": fecha_objetivo.date(),
+                    "location": (localidad_info["latitude"], localidad_info["longitude"]),
+                }
+            )
+        locations = list(dict.fromkeys(entry["location"] for entry in entries))
+        timings["agrupacion"] = time.perf_counter() - started
+
+        stats = {
+            "reservas": len(entries),
+            "ubicaciones": len(locations),
+            "sin_pronostico": 0,
+            "requieren_reprogramacion": 0,
+            "alertas_creadas": 0,
+            "alertas_duplicadas": 0,
+            "alertas_actualizadas": 0,
+            "notificaciones_encoladas": 0,
+        }
+        if not entries:
+            stats["tiempos"] = timings
+            return stats
+
+        step = time.perf_counter()
+        start_date = min(timezone.localdate(), min(entry["fecha"] for entry in entries))
+        span = (max(entry["fecha"] for entry in entries) - start_date).days + 1
+        forecasts_by_location = self.client.get_bulk_daily_forecasts(locations, start_date, max(days, span))
+        timings["pronosticos"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        triggered = []
+        for entry in entries:
+            forecast = forecasts_by_location.get(entry["location"], {}).get(entry["fecha"])
+            if forecast is None:
+                stats["sin_pronostico"] += 1
+                continue
+            decision = self._evaluate_weather_rules(forecast)
+            if decision["should_reassign"] and entry["reserva"].servicio.reprogramable_por_clima:
+                entry["forecast"] = forecast
+                entry["decision"] = decision
+                triggered.append(entry)
+        stats["requieren_reprogramacion"] = len(triggered)
+        timings["evaluacion"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        with transaction.atomic():
+            existing = {
+                (alerta.reserva_id, alerta.fecha_alerta): alerta
+                for alerta in AlertaClimatica.objects.filter(
+                    reserva_id__in=[entry["reserva"].id_reserva for entry in triggered],
+                    tipo_alerta="rain",
+                    estado="pending",
+                )
+            }
+            pending = [entry for entry in triggered if (entry["reserva"].id_reserva, entry["fecha"]) not in existing]
+            stats["alertas_duplicadas"] = len(triggered) - len(pending)
+
+            # Las alertas pendientes ya existentes se refrescan sin re-notificar, sólo si cambió algo
+            actualizadas, campos_actualizados = [], set()
+            for entry in triggered:
+                alerta = existing.get((entry["reserva"].id_reserva, entry["fecha"]))
+                if alerta is None:
+                    continue
+                cambios = _aplicar_cambios(
+                    alerta,
+                    {
+                        "precipitacion_mm": entry["forecast"].precipitation_mm,
+                        "porcentaje_probabilidad": entry["forecast"].precipitation_probability,
+                        "mensaje": entry["decision"]["reason"],
+                        "disparada_por": entry["decision"]["trigger"],
+                    },
+                )
+                if cambios:
+                    alerta.actualizada_en = timezone.now()
+                    actualizadas.append(alerta)
+                    campos_actualizados.update(cambios)
+            if actualizadas:
+                AlertaClimatica.objects.bulk_update(actualizadas, sorted(campos_actualizados) + ["actualizada_en"])
+            stats["alertas_actualizadas"] = len(actualizadas)
+
+            blobs = PayloadCrudoClima.guardar_varios([entry["forecast"].raw or {} for entry in pending])
+            forecast_rows = {}
+            for entry, blob in zip(pending, blobs):
+                latitude, longitude = entry["location"]
+                key = (entry["fecha"], Decimal(str(latitude)), Decimal(str(longitude)))
+                forecast = entry["forecast"]
+                forecast_rows.setdefault(
+                    key,
+                    PronosticoClima(
+                        fecha=key[0],
+                        latitud=key[1],
+                        longitud=key[2],
+                        fuente="open-meteo",
+                        precipitacion_mm=forecast.precipitation_mm,
+                        probabilidad_precipitacion=forecast.precipitation_probability,
+                        resumen=forecast.summary,
+                        codigo_clima=forecast.weather_code,
+                        payload=blob,
+                    ),
+                )
+            PronosticoClima.objects.bulk_create(
+                list(forecast_rows.values()),
+                update_conflicts=True,
+                unique_fields=["fecha", "latitud", "longitud", "fuente"],
+                update_fields=["precipitacion_mm", "probabilidad_precipitacion", "resumen", "codigo_clima", "payload"],
+            )
+
+            disponibilidad = None
+            empleados_requeridos = {}
+            if pending:
+                fechas = [entry["fecha_base"] for entry in pending]
+                desde = (min(fechas) + timedelta(days=1)).date()
+                hasta = (max(fechas) + timedelta(days=self.max_employee_search_days)).date()
+                disponibilidad = self._build_availability_index(desde, hasta)
+                empleados_requeridos = self._empleados_requeridos_por_reserva(
+                    [entry["reserva"].id_reserva for entry in pending]
+                )
+
+            alertas = []
+            for entry in pending:
+                reserva = entry["reserva"]
+                decision = entry["decision"]
+                latitude, longitude = entry["location"]
+                forecast_obj = forecast_rows[(entry["fecha"], Decimal(str(latitude)), Decimal(str(longitude)))]
+                suggested_date = self._find_next_available_slot(
+                    entry["fecha_base"], empleados_requeridos[reserva.id_reserva], disponibilidad
+                )
+                payload = {"raw_payload_hash": forecast_obj.payload_id}
+                payload["decision"] = {
+                    "trigger": decision["trigger"],
+                    "reason": decision["reason"],
+                    "weather_code": decision["weather_code"],
+                }
+                payload["suggested_reprogramming"] = suggested_date.isoformat()
+                entry["suggested_date"] = suggested_date
+                alertas.append(
+                    AlertaClimatica(
+                        reserva=reserva,
+                        servicio=reserva.servicio,
+                        pronostico=forecast_obj,
+                        fecha_alerta=entry["fecha"],
+                        latitud=forecast_obj.latitud,
+                        longitud=forecast_obj.longitud,
+                        precipitacion_mm=forecast_obj.precipitacion_mm,
+                        umbral_precipitacion=self.threshold,
+                        porcentaje_probabilidad=forecast_obj.probabilidad_precipitacion,
+                        requiere_reprogramacion=True,
+                        mensaje=decision["reason"],
+                        payload_alerta=payload,
+                        fuente="open-meteo",
+                        disparada_por=decision["trigger"],
+                    )
+                )
+            AlertaClimatica.objects.bulk_create(alertas)
+
+            for entry, alerta in zip(pending, alertas):
+                reserva = entry["reserva"]
+                reserva.weather_alert = alerta
+                reserva.alerta_clima_payload = alerta.payload_alerta
+                reserva.requiere_reprogramacion = True
+                reserva.motivo_reprogramacion = alerta.mensaje or "Clima: lluvia pronosticada"
+                reserva.fecha_reprogramada_sugerida = entry["suggested_date"]
+                reserva.reprogramacion_fuente = alerta.disparada_por
+            Reserva.objects.bulk_update(
+                [entry["reserva"] for entry in pending],
+                [
+                    "weather_alert",
+                    "alerta_clima_payload",
+                    "requiere_reprogramacion",
+                    "motivo_reprogramacion",
+                    "fecha_reprogramada_sugerida",
+                    "reprogramacion_fuente",
+                ],
+            )
+
+            if dry_run:
+                transaction.set_rollback(True)
+            elif notify and alertas:
+                notificaciones = [(entry["reserva"], alerta) for entry, alerta in zip(pending, alertas)]
+                transaction.on_commit(lambda: self._send_alert_notifications(notificaciones))
+                stats["notificaciones_encoladas"] = len(notificaciones)
+
+        stats["alertas_creadas"] = len(alertas)
+        timings["persistencia"] = time.perf_counter() - step
+        timings["total"] = time.perf_counter() - started
+        stats["tiempos"] = timings
+        return stats
+
+    def reservas_con_sugerencia_pendiente(self):
+        """Reservas con alerta pendiente y fecha sugerida, candidatas a "aceptar todas"."""
+        return Reserva.objects.filter(
+            requiere_reprogramacion=True,
+            fecha_reprogramada_sugerida__isnull=False,
+            weather_alert__estado="pending",
+            servicio__reprogramable_por_clima=True,
+        )
+
+    def reprogramar_en_lote(self, cambios: Dict[int, Optional[datetime]], usuario=None) -> dict:
+        """Confirma la reprogramación por clima de muchas reservas en una transacción.
+
+        ``cambios`` mapea id de reserva → nueva fecha (``None`` toma la sugerida).
+        La capacidad se valida una sola vez con el índice de disponibilidad del
+        rango completo, descontando lo que ya ocupa el propio lote; las reservas
+        que no entran vuelven en ``rechazadas`` y el resto se guarda con
+        ``bulk_update``. Los emails salen en segundo plano después del commit.
+        """
+        rechazadas = []
+        with transaction.atomic():
+            reservas = {
+                reserva.id_reserva: reserva
+                for reserva in Reserva.objects.select_for_update(of=("self",))
+                .select_related("servicio", "cliente__persona")
+                .filter(id_reserva__in=list(cambios))
+            }
+
+            candidatas = []
+            for reserva_id, nueva_fecha in cambios.items():
+                reserva = reservas.get(reserva_id)
+                if reserva is None:
+                    rechazadas.append({"reserva_id": reserva_id, "error": "Reserva inexistente"})
+                elif not reserva.servicio.reprogramable_por_clima:
+                    rechazadas.append(
+                        {
+                            "reserva_id": reserva_id,
+                            "error": "Este servicio no admite reprogramación automática por clima",
+                        }
+                    )
+                elif not (nueva_fecha or reserva.fecha_reprogramada_sugerida):
+                    rechazadas.append({"reserva_id": reserva_id, "error": "La reserva no tiene fecha sugerida"})
+                else:
+                    candidatas.append((reserva, nueva_fecha or reserva.fecha_reprogramada_sugerida))
+
+            aceptadas = []
+            if candidatas:
+                dias = [timezone.localtime(fecha).date() for _, fecha in candidatas]
+                disponibilidad = self._build_availability_index(min(dias), max(dias))
+                requeridos = self._empleados_requeridos_por_reserva([reserva.id_reserva for reserva, _ in candidatas])
+                ocupados = defaultdict(int)
+                for (reserva, nueva_fecha), dia in sorted(zip(candidatas, dias), key=lambda item: item[0][1]):
+                    necesarios = requeridos[reserva.id_reserva]
+                    if disponibilidad(dia) - ocupados[dia] < necesarios:
+                        rechazadas.append(
+                            {
+                                "reserva_id": reserva.id_reserva,
+                                "error": f"No hay {necesarios} empleados disponibles el {dia:%d/%m/%Y}",
+                            }
+                        )
+                        continue
+                    ocupados[dia] += necesarios
+                    aceptadas.append((reserva, nueva_fecha))
+
+            if aceptadas:
+                campos = set()
+                for reserva, nueva_fecha in aceptadas:
+                    campos.update(reserva.preparar_reprogramacion(nueva_fecha, motivo="clima", confirmar=True))
+                Reserva.objects.bulk_update([reserva for reserva, _ in aceptadas], sorted(campos))
+
+                ahora = timezone.now()
+                AlertaClimatica.objects.filter(
+                    pk__in=[reserva.weather_alert_id for reserva, _ in aceptadas if reserva.weather_alert_id],
+                    estado="pending",
+                ).update(estado="resolved", resuelta_en=ahora, resuelta_por=usuario, actualizada_en=ahora)
+
+                # EmailService sólo encola en el outbox: el envío real lo hace el worker de emails
+                transaction.on_commit(lambda: self._send_reprogram_notifications(aceptadas))
+
+        return {
+            "reprogramadas": [
+                {"reserva_id": reserva.id_reserva, "nueva_fecha": nueva_fecha.isoformat()}
+                for reserva, nueva_fecha in aceptadas
+            ],
+            "rechazadas": sorted(rechazadas, key=lambda item: item["reserva_id"]),
+        }
+
+    def _send_reprogram_notifications(self, reprogramaciones):
+        from apps.emails.services import EmailService
+
+        for reserva, nueva_fecha in reprogramaciones:
+            try:
+                EmailService.send_weather_reprogram_notification(reserva=reserva, nueva_fecha=nueva_fecha)
+            except Exception:  # pragma: no cover - un email fallido no corta el resto del lote
+                logger.exception("No se pudo notificar la reprogramación de la reserva %s", reserva.id_reserva)
+
+    def _send_alert_notifications(self, notificaciones):
+        from apps.emails.services import EmailService
+
+        for reserva, alerta in notificaciones:
+            EmailService.send_weather_alert_notification(reserva=reserva, alerta=alerta)
+
     def _create_alert_from_forecast(
         self,
         reserva: Reserva,
@@ -466,8 +1216,8 @@ class ServicioAlertasClimaticas:
         is_simulated: bool = False,
         message: Optional[str] = None,
     ) -> AlertaClimatica:
-        raw_payload = getattr(forecast, "payload_crudo", None)
-        payload = dict(raw_payload) if isinstance(raw_payload, dict) else {}
+        # Referencia al payload crudo en lugar de una copia por alerta (y por reserva)
+        payload = {"raw_payload_hash": forecast.payload_id} if forecast.payload_id else {}
         if decision:
             payload["decision"] = {
                 "trigger": decision.get("trigger"),
@@ -478,11 +1228,11 @@ class ServicioAlertasClimaticas:
             payload["suggested_reprogramming"] = suggested_date.isoformat()
         reason = message or (decision["reason"] if decision else "Lluvia pronosticada: se sugiere reprogramar")
         trigger = decision["trigger"] if decision else "weather"
-        alerta = AlertaClimatica.objects.create(
-            reserva=reserva,
+        alerta, _ = self._upsert_alerta(
+            reserva,
+            forecast.fecha,
             servicio=reserva.servicio,
             pronostico=forecast,
-            fecha_alerta=forecast.fecha,
             latitud=forecast.latitud,
             longitud=forecast.longitud,
             precipitacion_mm=forecast.precipitacion_mm,
@@ -498,6 +1248,26 @@ class ServicioAlertasClimaticas:
         self._mark_reserva_requires_reprogramming(reserva, alerta, suggested_date, reason, trigger)
         return alerta
 
+    def _upsert_alerta(self, reserva: Reserva, fecha_alerta, tipo_alerta: str = "rain", **valores):
+        """Crea la alerta pendiente de (reserva, fecha, tipo) o actualiza sólo lo que cambió.
+
+        Devuelve ``(alerta, creada)``. La unicidad la garantiza el constraint
+        parcial ``weather_alert_unica_pendiente``; ante una carrera se relee la fila.
+        """
+        clave = {"reserva": reserva, "fecha_alerta": fecha_alerta, "tipo_alerta": tipo_alerta, "estado": "pending"}
+        with transaction.atomic():
+            alerta = AlertaClimatica.objects.select_for_update().filter(**clave).first()
+            if alerta is None:
+                try:
+                    with transaction.atomic():
+                        return AlertaClimatica.objects.create(**clave, **valores), True
+                except IntegrityError:
+                    alerta = AlertaClimatica.objects.select_for_update().get(**clave)
+            cambios = _aplicar_cambios(alerta, valores)
+            if cambios:
+                alerta.save(update_fields=cambios + ["actualizada_en"])
+        return alerta, False
+
     def simulate_alert(
         self,
         reserva: Reserva,
@@ -509,31 +1279,24 @@ class ServicioAlertasClimaticas:
             raise ValueError("El servicio asociado no permite reprogramaciones automáticas por clima")
         fecha = alert_date or reserva.fecha_cita
         precipitation = precipitation_mm or self.threshold
+        valores = {
+            "precipitacion_mm": precipitation,
+            "probabilidad_precipitacion": 100,
+            "resumen": "Simulación de lluvia",
+            "payload": PayloadCrudoClima.guardar({"simulated": True, "message": message or "Simulación manual"}),
+        }
         forecast, created = PronosticoClima.objects.get_or_create(
             fecha=fecha.date(),
             latitud=Decimal(str(getattr(settings, "WEATHER_DEFAULT_LAT", -27.3667))),
             longitud=Decimal(str(getattr(settings, "WEATHER_DEFAULT_LON", -55.9000))),
             fuente="simulated",
-            defaults={
-                "precipitacion_mm": precipitation,
-                "probabilidad_precipitacion": 100,
-                "resumen": "Simulación de lluvia",
-                "payload_crudo": {
-                    "simulated": True,
-                    "message": message or "Simulación manual",
-                },
-            },
+            defaults=valores,
         )
         if not created:
             # Actualizar si ya existe
-            forecast.precipitacion_mm = precipitation
-            forecast.probabilidad_precipitacion = 100
-            forecast.resumen = "Simulación de lluvia"
-            forecast.payload_crudo = {
-                "simulated": True,
-                "message": message or "Simulación manual",
-            }
-            forecast.save()
+            cambios = _aplicar_cambios(forecast, valores)
+            if cambios:
+                forecast.save(update_fields=cambios)
         simulated_forecast = ResultadoPronostico(
             date=fecha,
             precipitation_mm=Decimal(str(precipitation)),
@@ -551,6 +1314,7 @@ class ServicioAlertasClimaticas:
 
         payload = {
             "simulated": True,
+            "raw_payload_hash": forecast.payload_id,
             "decision": {
                 "trigger": decision["trigger"],
                 "reason": reason_message,
@@ -560,11 +1324,11 @@ class ServicioAlertasClimaticas:
         if suggested_date:
             payload["suggested_reprogramming"] = suggested_date.isoformat()
 
-        alerta = AlertaClimatica.objects.create(
-            reserva=reserva,
+        alerta, _ = self._upsert_alerta(
+            reserva,
+            fecha.date(),
             servicio=reserva.servicio,
             pronostico=forecast,
-            fecha_alerta=fecha.date(),
             latitud=forecast.latitud,
             longitud=forecast.longitud,
             precipitacion_mm=precipitation,
@@ -591,25 +1355,21 @@ class ServicioAlertasClimaticas:
         motivo: Optional[str] = None,
         fuente: str = "weather",
     ):
-        reserva.weather_alert = alerta
-        reserva.alerta_clima_payload = alerta.payload_alerta or {}
+        # Sólo se notifica al pasar a "requiere reprogramación" o al cambiar de alerta
+        transicion = reserva.weather_alert_id != alerta.pk or not reserva.requiere_reprogramacion
+        valores = {"weather_alert": alerta, "alerta_clima_payload": alerta.payload_alerta or {}}
         if reserva.servicio.reprogramable_por_clima:
-            reserva.requiere_reprogramacion = True
-            reserva.motivo_reprogramacion = motivo or "Clima: lluvia pronosticada"
-            reserva.fecha_reprogramada_sugerida = suggested_date
-            reserva.reprogramacion_fuente = fuente
-        reserva.save(
-            update_fields=[
-                "weather_alert",
-                "alerta_clima_payload",
-                "requiere_reprogramacion",
-                "motivo_reprogramacion",
-                "fecha_reprogramada_sugerida",
-                "reprogramacion_fuente",
-            ]
-        )
+            valores.update(
+                requiere_reprogramacion=True,
+                motivo_reprogramacion=motivo or "Clima: lluvia pronosticada",
+                fecha_reprogramada_sugerida=suggested_date,
+                reprogramacion_fuente=fuente,
+            )
+        cambios = _aplicar_cambios(reserva, valores)
+        if cambios:
+            reserva.save(update_fields=cambios)
 
-        if reserva.servicio.reprogramable_por_clima:
+        if transicion and reserva.servicio.reprogramable_por_clima:
             from apps.emails.services import EmailService
 
             EmailService.send_weather_alert_notification(reserva=reserva, alerta=alerta)
@@ -619,6 +1379,20 @@ class ServicioAlertasClimaticas:
         start_datetime = datetime.combine(start_date, datetime.min.time())
         return self.client.get_multi_day_forecast(latitude, longitude, start_datetime, days)
 
+    def prewarm_upcoming_forecasts(self, days: int = 7, lead_seconds: Optional[int] = None) -> dict:
+        """Deja en cache el pronóstico de cada ubicación con reservas en los próximos ``days`` días.
+
+        Las ubicaciones se resuelven igual que en ``build_locality_forecasts``
+        (localidad del servicio, si no la del cliente, ajustadas a la grilla),
+        así el resumen del dashboard encuentra las mismas claves ya cargadas.
+        """
+        reservas = self.get_upcoming_reservas(days, solo_reprogramables=False)
+        locations = [
+            (info["latitude"], info["longitude"])
+            for info in map(self._resolve_localidad_info, reservas.iterator(chunk_size=500))
+        ]
+        return self.client.prewarm_forecasts(locations, timezone.localdate(), lead_seconds)
+
     def build_locality_forecasts(self, reservas, days: int = 7):
         grouped = {}
         for reserva in reservas:
@@ -686,6 +1460,7 @@ class ServicioAlertasClimaticas:
                     "longitude": group["longitude"],
                     "reservas": group["reservas"],
                     "forecast": forecast_payload,
+                    "stale": any(entry.stale for entry in forecasts),
                 }
             )
 
@@ -693,19 +1468,40 @@ class ServicioAlertasClimaticas:
 
 
 class GeocodingService:
+    """Resuelve coordenadas de localidades.
+
+    Primero consulta el nomenclátor offline; Nominatim queda como respaldo
+    limitado a una consulta cada ``GEOCODER_MIN_INTERVAL_SECONDS`` entre todos
+    los workers (si no hay turno libre se devuelve ``None`` en lugar de esperar).
+    """
+
     def __init__(self):
         self.base_url = getattr(settings, "GEOCODER_API_URL", "https://nominatim.openstreetmap.org/search")
         self.user_agent = getattr(settings, "GEOCODER_USER_AGENT", "ElEden-Weather/1.0")
+        self.timeout = float(getattr(settings, "GEOCODER_TIMEOUT", 10))
+        self.min_interval = max(1, int(getattr(settings, "GEOCODER_MIN_INTERVAL_SECONDS", 1)))
+        self.breaker = CircuitBreaker("nominatim")
+
+    def _acquire_slot(self) -> bool:
+        # Mismo cupo que las sugerencias de direcciones: Nominatim se limita por IP, no por módulo
+        return nominatim_bucket().try_acquire()
 
-    def geocode_localidad(self, localidad) -> Optional[Tuple[float, float]]:
+    def geocode_localidad(self, localidad, use_fallback: bool = True) -> Optional[Tuple[float, float]]:
         if not localidad:
             return None
 
+        coords = coordenadas_localidad(localidad)
+        if coords:
+            return coords
+
         cache_key = f"geo:{localidad.id_localidad}"
         cached = cache.get(cache_key)
         if cached:
             return cached
 
+        if not use_fallback or self.breaker.is_open() or not self._acquire_slot():
+            return None
+
         query_parts = [localidad.nombre_localidad]
         if localidad.nombre_provincia:
             query_parts.append(localidad.nombre_provincia)
@@ -723,18 +1519,26 @@ class GeocodingService:
             response = requests.get(
                 self.base_url,
                 params=params,
-                timeout=10,
+                timeout=self.timeout,
                 headers={"User-Agent": self.user_agent},
             )
             response.raise_for_status()
             data = response.json()
+            self.breaker.record_success()
             if not data:
                 return None
             lat = float(data[0]["lat"])
             lon = float(data[0]["lon"])
             cache.set(cache_key, (lat, lon), timeout=86400)
             return lat, lon
-        except (requests.RequestException, KeyError, ValueError):
+        except requests.RequestException:
+            self.breaker.record_failure()
+            logging.getLogger(__name__).warning(
+                "No se pudo geocodificar la localidad %s",
+                getattr(localidad, "id_localidad", "desconocida"),
+            )
+            return None
+        except (KeyError, ValueError):
             logging.getLogger(__name__).warning(
                 "No se pudo geocodificar la localidad %s",
                 getattr(localidad, "id_localidad", "desconocida"),
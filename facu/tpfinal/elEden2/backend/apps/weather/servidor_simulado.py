@@ -0,0 +1,228 @@
+"""Servidor local que imita Open-Meteo y Nominatim para pruebas de carga.
+
+Responde ``/v1/forecast`` (diario, rangos, varias coordenadas separadas por
+coma y ``current``), ``/search`` y ``/reverse`` con datos sintéticos
+deterministas: la misma coordenada y fecha devuelven siempre el mismo
+pronóstico. Las respuestas pueden reemplazarse por grabaciones reales
+(``{"<path>": <json>}``). Se configuran la latencia, la tasa de errores y un
+límite de requests por segundo (responde 429 al superarlo).
+
+    python manage.py servidor_clima_simulado --port 8089 --latency-ms 120
+    WEATHER_API_URL=http://127.0.0.1:8089/v1/forecast
+    GEOCODER_API_URL=http://127.0.0.1:8089/search
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from socketserver import ThreadingMixIn
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+# Códigos WMO con el peso aproximado con que aparecen en la región
+WEATHER_CODES = (0, 0, 1, 1, 2, 3, 3, 45, 61, 63, 65, 80, 81, 95)
+MAX_FORECAST_DAYS = 16
+
+
+@dataclass
+class ConfiguracionSimulador:
+    latencia_ms: float = 0
+    jitter_ms: float = 0
+    tasa_error: float = 0
+    limite_por_segundo: int = 0
+    semilla: int = 0
+    grabaciones: Dict[str, object] = field(default_factory=dict)
+
+
+def _rng(*partes) -> random.Random:
+    clave = ":".join(str(parte) for parte in partes).encode("utf-8")
+    return random.Random(int.from_bytes(hashlib.sha256(clave).digest()[:8], "big"))
+
+
+def _lista(params: Dict[str, List[str]], nombre: str) -> List[str]:
+    valor = (params.get(nombre) or [""])[0]
+    return [parte for parte in valor.split(",") if parte != ""]
+
+
+class SimuladorClima:
+    """Aplicación WSGI; ``estadisticas`` cuenta requests por ruta y resultado."""
+
+    def __init__(self, configuracion: Optional[ConfiguracionSimulador] = None):
+        self.configuracion = configuracion or ConfiguracionSimulador()
+        self._lock = threading.Lock()
+        self._ventana = (0, 0)
+        self._azar = random.Random(self.configuracion.semilla)
+        self.estadisticas: Dict[str, int] = {}
+
+    def _contar(self, clave: str) -> None:
+        with self._lock:
+            self.estadisticas[clave] = self.estadisticas.get(clave, 0) + 1
+
+    def reiniciar_estadisticas(self) -> None:
+        with self._lock:
+            self.estadisticas = {}
+
+    def _excede_limite(self) -> bool:
+        limite = self.configuracion.limite_por_segundo
+        if not limite:
+            return False
+        segundo = int(time.time())
+        with self._lock:
+            inicio, usados = self._ventana
+            usados = usados + 1 if inicio == segundo else 1
+            self._ventana = (segundo, usados)
+        return usados > limite
+
+    def _falla(self) -> bool:
+        with self._lock:
+            return self._azar.random() < self.configuracion.tasa_error
+
+    def _esperar(self) -> None:
+        configuracion = self.configuracion
+        if configuracion.latencia_ms or configuracion.jitter_ms:
+            with self._lock:
+                jitter = self._azar.uniform(-configuracion.jitter_ms, configuracion.jitter_ms)
+            time.sleep(max(0.0, configuracion.latencia_ms + jitter) / 1000)
+
+    # --- Open-Meteo -----------------------------------------------------
+
+    def _dia(self, latitud: str, longitud: str, fecha: date) -> dict:
+        azar = _rng(self.configuracion.semilla, latitud, longitud, fecha.isoformat())
+        codigo = azar.choice(WEATHER_CODES)
+        lluvia = round(azar.uniform(0.5, 25), 1) if codigo >= 61 else round(azar.uniform(0, 0.4), 1)
+        maxima = round(azar.uniform(18, 36), 1)
+        return {
+            "time": fecha.isoformat(),
+            "precipitation_sum": lluvia,
+            "precipitation_probability_mean": azar.randint(60, 100) if codigo >= 61 else azar.randint(0, 40),
+            "weathercode": codigo,
+            "temperature_2m_max": maxima,
+            "temperature_2m_min": round(maxima - azar.uniform(6, 12), 1),
+        }
+
+    def _documento_pronostico(self, latitud: str, longitud: str, params: Dict[str, List[str]]) -> dict:
+        documento = {
+            "latitude": float(latitud),
+            "longitude": float(longitud),
+            "generationtime_ms": 0.1,
+            "timezone": (params.get("timezone") or ["GMT"])[0],
+        }
+        if "current" in params:
+            azar = _rng(self.configuracion.semilla, latitud, longitud, int(time.time() // 900))
+            documento["current"] = {"temperature_2m": round(azar.uniform(12, 34), 1)}
+        campos = _lista(params, "daily")
+        if campos:
+            inicio = date.fromisoformat((params.get("start_date") or [date.today().isoformat()])[0])
+            fin = date.fromisoformat((params.get("end_date") or [inicio.isoformat()])[0])
+            dias = [
+                self._dia(latitud, longitud, inicio + timedelta(days=offset))
+                for offset in range(min((fin - inicio).days + 1, MAX_FORECAST_DAYS))
+            ]
+            documento["daily"] = {
+                campo: [dia.get(campo) for dia in dias] for campo in ["time", *campos] if campo in dias[0]
+            }
+        return documento
+
+    def _pronostico(self, params: Dict[str, List[str]]):
+        latitudes, longitudes = _lista(params, "latitude"), _lista(params, "longitude")
+        if not latitudes or len(latitudes) != len(longitudes):
+            return "400 Bad Request", {"error": True, "reason": "latitude/longitude inválidas"}
+        documentos = [self._documento_pronostico(lat, lon, params) for lat, lon in zip(latitudes, longitudes)]
+        return "200 OK", documentos if len(documentos) > 1 else documentos[0]
+
+    # --- Nominatim ------------------------------------------------------
+
+    def _lugar(self, consulta: str) -> dict:
+        from apps.users.services.gazetteer import get_nomenclator
+
+        nombre, _, resto = consulta.partition(",")
+        provincia = resto.split(",")[0].strip() or None
+        entrada = get_nomenclator().buscar(nombre, provincia)
+        if entrada:
+            latitud, longitud, ciudad, provincia = entrada.latitud, entrada.longitud, entrada.nombre, entrada.provincia
+        else:
+            azar = _rng(self.configuracion.semilla, consulta.lower())
+            latitud, longitud = azar.uniform(-28.2, -26.0), azar.uniform(-56.1, -53.7)
+            ciudad, provincia = "Posadas", "Misiones"
+        calle = nombre.strip() if not entrada else ""
+        direccion = {"city": ciudad, "state": provincia, "country": "Argentina", "postcode": "3300"}
+        if calle:
+            direccion["road"] = calle
+        return {
+            "place_id": _rng(consulta).randint(1, 10**9),
+            "lat": f"{latitud:.7f}",
+            "lon": f"{longitud:.7f}",
+            "display_name": ", ".join(parte for parte in (calle, ciudad, provincia, "Argentina") if parte),
+            "address": direccion,
+        }
+
+    def _buscar(self, params: Dict[str, List[str]]):
+        consulta = (params.get("q") or [""])[0].strip()
+        if not consulta:
+            return "200 OK", []
+        limite = max(1, int((params.get("limit") or ["1"])[0]))
+        return "200 OK", [self._lugar(consulta)][:limite]
+
+    def _reverso(self, params: Dict[str, List[str]]):
+        latitud = float((params.get("lat") or ["0"])[0])
+        longitud = float((params.get("lon") or ["0"])[0])
+        lugar = self._lugar(f"{latitud:.2f} {longitud:.2f}")
+        lugar.update(lat=f"{latitud:.7f}", lon=f"{longitud:.7f}")
+        return "200 OK", lugar
+
+    # --- WSGI -----------------------------------------------------------
+
+    def __call__(self, environ, start_response):
+        ruta = environ.get("PATH_INFO", "/")
+        params = parse_qs(environ.get("QUERY_STRING", ""))
+        self._esperar()
+
+        if self._excede_limite():
+            estado, cuerpo = "429 Too Many Requests", {"error": True, "reason": "rate limit"}
+        elif self._falla():
+            estado, cuerpo = "503 Service Unavailable", {"error": True, "reason": "falla simulada"}
+        elif ruta in self.configuracion.grabaciones:
+            estado, cuerpo = "200 OK", self.configuracion.grabaciones[ruta]
+        elif ruta.endswith("/forecast"):
+            estado, cuerpo = self._pronostico(params)
+        elif ruta.rstrip("/").endswith("/search"):
+            estado, cuerpo = self._buscar(params)
+        elif ruta.rstrip("/").endswith("/reverse"):
+            estado, cuerpo = self._reverso(params)
+        else:
+            estado, cuerpo = "404 Not Found", {"error": True, "reason": "ruta desconocida"}
+
+        self._contar(f"{ruta} {estado.split()[0]}")
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        start_response(estado, [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(datos)))])
+        return [datos]
+
+
+class _ServidorConHilos(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor(
+    simulador: SimuladorClima, host: str = "127.0.0.1", port: int = 0, silencioso: bool = True
+) -> WSGIServer:
+    """Crea el servidor (``port=0`` elige uno libre); ``serve_forever`` queda a cargo del llamador."""
+    handler = _HandlerSilencioso if silencioso else WSGIRequestHandler
+    return make_server(host, port, simulador, server_class=_ServidorConHilos, handler_class=handler)
+
+
+def iniciar_en_segundo_plano(simulador: SimuladorClima, host: str = "127.0.0.1", port: int = 0) -> WSGIServer:
+    servidor = iniciar_servidor(simulador, host, port)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -1,16 +1,28 @@
 from datetime import timedelta
 from decimal import Decimal
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
+import requests
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
 from apps.servicios.models import Reserva, Servicio
 from apps.users.models import Cliente, Genero, Localidad, Persona, TipoDocumento
-from apps.weather.models import AlertaClimatica
-from apps.weather.services import ResultadoPronostico
+from apps.weather.models import AlertaClimatica, PayloadCrudoClima, PronosticoClima
+from apps.weather.rules import TRIGGERS, UmbralesClima, evaluar_triggers
+from apps.weather.servidor_simulado import ConfiguracionSimulador, SimuladorClima, iniciar_en_segundo_plano
+from apps.weather.services import (
+    ClienteClima,
+    ClimaNoDisponibleError,
+    ResultadoPronostico,
+    ServicioAlertasClimaticas,
+    ServicioTemperaturaActual,
+)
 
 
 class WeatherEndpointTests(TestCase):
@@ -87,6 +99,69 @@ class WeatherEndpointTests(TestCase):
         self.assertEqual(alert.reserva, reserva)
         mock_send_email.assert_called_once()
 
+    def test_repeated_checks_upsert_a_single_alert_and_notify_once(self):
+        reserva = self._create_reserva(servicio=self.reprogramable_service)
+        forecasts = [
+            ResultadoPronostico(
+                date=reserva.fecha_cita,
+                precipitation_mm=Decimal(mm),
+                precipitation_probability=80,
+                latitude=Decimal("10.12345"),
+                longitude=Decimal("-65.12345"),
+                weather_code=None,
+                raw={"source": "test"},
+            )
+            for mm in ("5.00", "5.00", "7.00")
+        ]
+        with (
+            patch("apps.weather.services.ClienteClima.get_daily_forecast", side_effect=forecasts),
+            patch("apps.emails.services.EmailService.send_weather_alert_notification") as mock_send_email,
+        ):
+            alert_ids = [
+                self.client.post(
+                    reverse("weather-check"), {"reserva_id": reserva.id_reserva}, content_type="application/json"
+                ).json()["alert_id"]
+                for _ in forecasts
+            ]
+
+        self.assertEqual(len(set(alert_ids)), 1)
+        alert = AlertaClimatica.objects.get(reserva=reserva)
+        self.assertEqual(alert.precipitacion_mm, Decimal("7.00"))
+        mock_send_email.assert_called_once()
+
+    def test_identical_raw_payloads_are_stored_once(self):
+        reserva = self._create_reserva(servicio=self.reprogramable_service)
+        raw = {"daily": {"time": ["2030-01-01"], "weathercode": [61]}, "source": "test"}
+        forecasts = [
+            ResultadoPronostico(
+                date=reserva.fecha_cita,
+                precipitation_mm=Decimal("5.00"),
+                precipitation_probability=80,
+                latitude=Decimal("10.12345"),
+                longitude=Decimal("-65.12345"),
+                weather_code=61,
+                raw={**raw, "generationtime_ms": ms},
+            )
+            for ms in (0.12, 0.34)
+        ]
+        with (
+            patch("apps.weather.services.ClienteClima.get_daily_forecast", side_effect=forecasts),
+            patch("apps.emails.services.EmailService.send_weather_alert_notification"),
+        ):
+            for _ in forecasts:
+                self.client.post(
+                    reverse("weather-check"), {"reserva_id": reserva.id_reserva}, content_type="application/json"
+                )
+
+        self.assertEqual(PayloadCrudoClima.objects.count(), 1)
+        blob = PayloadCrudoClima.objects.get()
+        self.assertEqual(blob.contenido, raw)
+        forecast = PronosticoClima.objects.get()
+        self.assertEqual(forecast.codigo_clima, 61)
+        self.assertEqual(forecast.payload_crudo, raw)
+        alert = AlertaClimatica.objects.get(reserva=reserva)
+        self.assertEqual(alert.payload_alerta["raw_payload_hash"], blob.hash)
+
     def test_weather_simulate_endpoint_creates_simulated_alert(self):
         """Simulate should allow manual alert creation for reprogrammable services."""
 
@@ -192,3 +267,425 @@ class WeatherEndpointTests(TestCase):
         self.assertEqual(reserva_payload["id_reserva"], reserva_valida.id_reserva)
         self.assertIn("cliente", reserva_payload)
         self.assertEqual(reserva_payload["servicio"], self.reprogramable_service.nombre)
+
+    def test_prewarm_fills_the_cache_read_by_the_forecast_summary(self):
+        cache.clear()
+        corrientes = Localidad.objects.create(
+            cp="3400",
+            nombre_localidad="Corrientes",
+            nombre_provincia="Corrientes",
+            latitud=Decimal("-27.469000"),
+            longitud=Decimal("-58.830000"),
+        )
+        con_localidad = self._create_reserva(servicio=self.non_reprogramable_service)
+        con_localidad.localidad_servicio = corrientes
+        con_localidad.save(update_fields=["localidad_servicio"])
+        self._create_reserva(servicio=self.reprogramable_service)
+        self._create_reserva(servicio=self.reprogramable_service, fecha=timezone.now() + timedelta(days=20))
+
+        simulador = SimuladorClima()
+        servidor = iniciar_en_segundo_plano(simulador)
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        host, port = servidor.server_address[:2]
+
+        with (
+            override_settings(WEATHER_API_URL=f"http://{host}:{port}/v1/forecast"),
+            patch("apps.weather.services.GeocodingService.geocode_localidad", return_value=None),
+        ):
+            first = ServicioAlertasClimaticas().prewarm_upcoming_forecasts(days=7)
+            second = ServicioAlertasClimaticas().prewarm_upcoming_forecasts(days=7)
+            self.assertEqual(simulador.estadisticas, {"/v1/forecast 200": 1})
+
+            with patch("apps.weather.services.requests.get", side_effect=AssertionError("sin cache")):
+                response = self.client.get(reverse("weather-forecast-summary"), {"days": 7})
+                tres_dias = self.client.get(reverse("weather-forecast-summary"), {"days": 3})
+
+        self.assertEqual((first["ubicaciones"], first["refrescadas"], first["llamadas"]), (2, 2, 1))
+        self.assertEqual((second["refrescadas"], second["vigentes"], second["llamadas"]), (0, 2, 0))
+        self.assertEqual(response.status_code, 200)
+        by_location = {(item["latitude"], item["longitude"]): item for item in response.json()["results"]}
+        self.assertEqual(set(by_location), {(-27.47, -58.83), (-27.37, -55.9)})
+        self.assertTrue(all(len(item["forecast"]) == 7 and not item["stale"] for item in by_location.values()))
+        self.assertEqual(tres_dias.status_code, 200)
+        self.assertTrue(all(len(item["forecast"]) == 3 for item in tres_dias.json()["results"]))
+
+
+@override_settings(WEATHER_CIRCUIT_FAILURE_THRESHOLD=2, WEATHER_CIRCUIT_COOLDOWN_SECONDS=60)
+class ClienteClimaResilienceTests(SimpleTestCase):
+    """Circuit breaker and stale-while-revalidate behaviour of the weather client."""
+
+    def setUp(self):
+        cache.clear()
+        self.target = timezone.now() + timedelta(days=1)
+
+    def _ok_response(self, precipitation=3.0):
+        response = MagicMock()
+        response.json.return_value = {
+            "daily": {
+                "precipitation_sum": [precipitation],
+                "precipitation_probability_mean": [70],
+                "weathercode": [61],
+            }
+        }
+        return response
+
+    def test_breaker_opens_after_failures_and_fails_fast(self):
+        client = ClienteClima()
+        with patch("apps.weather.services.requests.get", side_effect=requests.Timeout) as mock_get:
+            for _ in range(2):
+                with self.assertRaises(requests.Timeout):
+                    client.get_daily_forecast(-27.0, -55.0, self.target)
+            with self.assertRaises(ClimaNoDisponibleError):
+                client.get_daily_forecast(-27.0, -55.0, self.target)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(client.breaker.is_open())
+
+    @override_settings(WEATHER_CACHE_TTL=0)
+    def test_expired_entry_is_served_stale_and_revalidated_in_background(self):
+        client = ClienteClima()
+        with patch("apps.weather.services.requests.get", return_value=self._ok_response()):
+            fresh = client.get_daily_forecast(-27.0, -55.0, self.target)
+        self.assertFalse(fresh.stale)
+
+        with (
+            patch("apps.weather.services.requests.get", side_effect=requests.Timeout) as mock_get,
+            patch("apps.weather.services._run_in_background") as mock_background,
+        ):
+            stale = client.get_daily_forecast(-27.0, -55.0, self.target)
+
+        self.assertTrue(stale.stale)
+        self.assertEqual(stale.precipitation_mm, fresh.precipitation_mm)
+        mock_get.assert_not_called()
+        mock_background.assert_called_once()
+
+    @override_settings(WEATHER_CACHE_TTL=0)
+    def test_stale_entry_served_without_refresh_while_breaker_open(self):
+        client = ClienteClima()
+        with patch("apps.weather.services.requests.get", return_value=self._ok_response()):
+            client.get_daily_forecast(-27.0, -55.0, self.target)
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+
+        with patch("apps.weather.services._run_in_background") as mock_background:
+            stale = client.get_daily_forecast(-27.0, -55.0, self.target)
+
+        self.assertTrue(stale.stale)
+        mock_background.assert_not_called()
+
+    @override_settings(WEATHER_CACHE_TTL=0, WEATHER_BULK_BATCH_SIZE=1, WEATHER_CIRCUIT_FAILURE_THRESHOLD=2)
+    def test_bulk_failed_batch_falls_back_to_cache_and_keeps_other_batches(self):
+        client = ClienteClima()
+        start = timezone.localdate()
+        cached, fresh, unknown = (-27.0, -55.0), (-28.0, -56.0), (-29.0, -57.0)
+        response = MagicMock()
+        response.json.return_value = {
+            "daily": {
+                "time": [start.isoformat()],
+                "precipitation_sum": [4.0],
+                "precipitation_probability_mean": [80],
+                "weathercode": [61],
+            }
+        }
+        with patch("apps.weather.services.requests.get", return_value=response):
+            client.get_bulk_daily_forecasts([cached], start, days=1)
+
+        with patch(
+            "apps.weather.services.requests.get", side_effect=[response, requests.Timeout(), requests.Timeout()]
+        ):
+            results = client.get_bulk_daily_forecasts([fresh, cached, unknown], start, days=1)
+
+        self.assertTrue(results[cached][start].stale)
+        self.assertEqual(results[cached][start].precipitation_mm, Decimal("4.0"))
+        self.assertFalse(results[fresh][start].stale)
+        self.assertNotIn(unknown, results)
+
+        # Con el breaker abierto no sale a la red y sigue sirviendo lo cacheado
+        with patch("apps.weather.services.requests.get") as mock_get:
+            self.assertTrue(client.breaker.is_open())
+            results = client.get_bulk_daily_forecasts([cached, unknown], start, days=1)
+        mock_get.assert_not_called()
+        self.assertEqual(set(results), {cached})
+
+
+class SimuladorClimaTests(SimpleTestCase):
+    """The local Open-Meteo/Nominatim stand-in used for benchmarks."""
+
+    def _start(self, **config):
+        simulador = SimuladorClima(ConfiguracionSimulador(**config))
+        servidor = iniciar_en_segundo_plano(simulador)
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        host, port = servidor.server_address[:2]
+        return simulador, f"http://{host}:{port}"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_client_reads_deterministic_bulk_forecasts(self):
+        simulador, url = self._start()
+        start = timezone.localdate()
+        locations = [(-27.37, -55.9), (-27.48, -58.83)]
+
+        first = ClienteClima(base_url=f"{url}/v1/forecast").get_bulk_daily_forecasts(locations, start, days=3)
+        cache.clear()
+        second = ClienteClima(base_url=f"{url}/v1/forecast").get_bulk_daily_forecasts(locations, start, days=3)
+
+        self.assertEqual(set(first), set(locations))
+        self.assertEqual(len(first[locations[0]]), 3)
+        self.assertEqual(first, second)
+        self.assertEqual(simulador.estadisticas, {"/v1/forecast 200": 2})
+
+    def test_rate_limit_and_errors_are_simulated(self):
+        _, url = self._start(limite_por_segundo=1)
+        params = {"q": "Posadas, Misiones", "format": "json"}
+        # Tres requests seguidos: aunque crucen un cambio de segundo, alguna ventana recibe dos
+        responses = [requests.get(f"{url}/search", params=params, timeout=5) for _ in range(3)]
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertAlmostEqual(float(responses[0].json()[0]["lat"]), -27.37, places=0)
+        self.assertIn(429, [response.status_code for response in responses[1:]])
+
+        _, failing_url = self._start(tasa_error=1)
+        with self.assertRaises(requests.HTTPError):
+            ClienteClima(base_url=f"{failing_url}/v1/forecast").get_daily_forecast(
+                -27.37, -55.9, timezone.now() + timedelta(days=1)
+            )
+
+
+class EvaluarClimaReservasCommandTests(TestCase):
+    """The nightly bulk job creates alerts once per reserva/date and dedupes reruns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        genero = Genero.objects.create(genero="Otro")
+        tipo_documento = TipoDocumento.objects.create(tipo="DNI")
+        cls.localidad = Localidad.objects.create(
+            cp="3300",
+            nombre_localidad="Posadas",
+            nombre_provincia="Misiones",
+            latitud=Decimal("-27.367000"),
+            longitud=Decimal("-55.896000"),
+        )
+        persona = Persona.objects.create(
+            nombre="Bulk",
+            apellido="Cliente",
+            email="bulk@example.com",
+            telefono="+541122223335",
+            calle="Principal",
+            numero="1",
+            nro_documento="87654321",
+            genero=genero,
+            tipo_documento=tipo_documento,
+            localidad=cls.localidad,
+        )
+        cls.cliente = Cliente.objects.create(persona=persona)
+        cls.servicio = Servicio.objects.create(nombre="Mantenimiento", reprogramable_por_clima=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def _rain_response(self, start, days=8):
+        response = MagicMock()
+        response.json.return_value = {
+            "daily": {
+                "time": [(start + timedelta(days=offset)).isoformat() for offset in range(days)],
+                "precipitation_sum": [12.0] * days,
+                "precipitation_probability_mean": [90] * days,
+                "weathercode": [63] * days,
+            }
+        }
+        return response
+
+    def test_command_creates_alerts_in_bulk_and_skips_pending_duplicates(self):
+        for offset in (1, 2):
+            Reserva.objects.create(
+                fecha_cita=timezone.now() + timedelta(days=offset),
+                cliente=self.cliente,
+                servicio=self.servicio,
+                estado="confirmada",
+                localidad_servicio=self.localidad,
+            )
+        response = self._rain_response(timezone.localdate())
+
+        with (
+            patch("apps.weather.services.requests.get", return_value=response) as mock_get,
+            patch("apps.emails.services.EmailService.send_weather_alert_notification") as mock_send_email,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            call_command("evaluar_clima_reservas", "--days", "3", stdout=StringIO())
+
+        mock_get.assert_called_once()
+        self.assertEqual(AlertaClimatica.objects.filter(estado="pending").count(), 2)
+        self.assertEqual(Reserva.objects.filter(requiere_reprogramacion=True).count(), 2)
+        self.assertEqual(mock_send_email.call_count, 2)
+
+        out = StringIO()
+        with (
+            patch("apps.weather.services.requests.get", return_value=response),
+            patch("apps.emails.services.EmailService.send_weather_alert_notification") as mock_send_email,
+        ):
+            call_command("evaluar_clima_reservas", "--days", "3", stdout=out)
+
+        self.assertEqual(AlertaClimatica.objects.count(), 2)
+        self.assertIn("Alertas pendientes ya existentes: 2", out.getvalue())
+        mock_send_email.assert_not_called()
+
+    def test_command_survives_upstream_failure_and_counts_missing_forecasts(self):
+        Reserva.objects.create(
+            fecha_cita=timezone.now() + timedelta(days=1),
+            cliente=self.cliente,
+            servicio=self.servicio,
+            estado="confirmada",
+            localidad_servicio=self.localidad,
+        )
+        out = StringIO()
+
+        with patch("apps.weather.services.requests.get", side_effect=requests.ConnectionError):
+            call_command("evaluar_clima_reservas", "--days", "3", stdout=out)
+
+        self.assertIn("Sin pronóstico disponible: 1", out.getvalue())
+        self.assertFalse(AlertaClimatica.objects.exists())
+
+    def test_dry_run_reports_alerts_without_persisting_them(self):
+        Reserva.objects.create(
+            fecha_cita=timezone.now() + timedelta(days=1),
+            cliente=self.cliente,
+            servicio=self.servicio,
+            estado="confirmada",
+            localidad_servicio=self.localidad,
+        )
+        out = StringIO()
+
+        with patch("apps.weather.services.requests.get", return_value=self._rain_response(timezone.localdate())):
+            call_command("evaluar_clima_reservas", "--days", "3", "--dry-run", stdout=out)
+
+        self.assertIn("Alertas creadas: 1", out.getvalue())
+        self.assertFalse(AlertaClimatica.objects.exists())
+        self.assertFalse(Reserva.objects.filter(requiere_reprogramacion=True).exists())
+
+
+class VectorizedWeatherRulesTests(TestCase):
+    """The columnar engine must match the scalar rules, including boundaries."""
+
+    def test_vectorized_triggers_match_scalar_rules(self):
+        service = ServicioAlertasClimaticas()
+        umbrales = UmbralesClima.desde_servicio(service)
+        precipitaciones = [None, Decimal("0.00"), Decimal("0.49"), Decimal("0.50"), service.threshold]
+        precipitaciones += [service.threshold + Decimal("0.01"), Decimal("25.00")]
+        probabilidades = [None, 0, 39, 40, 49, 50, 100]
+        codigos = [None, 3, 61, 95, 99]
+
+        casos = [
+            (precip, prob, code) for precip in precipitaciones for prob in probabilidades for code in codigos
+        ]
+        triggers = evaluar_triggers(
+            [caso[0] for caso in casos], [caso[1] for caso in casos], [caso[2] for caso in casos], umbrales
+        )
+
+        for (precip, prob, code), trigger in zip(casos, triggers):
+            forecast = ResultadoPronostico(
+                date=timezone.now(),
+                precipitation_mm=precip,
+                precipitation_probability=prob,
+                latitude=Decimal("0"),
+                longitude=Decimal("0"),
+                weather_code=code,
+                raw={},
+            )
+            expected = service._evaluate_weather_rules(forecast)["trigger"]
+            self.assertEqual(TRIGGERS[trigger], expected, msg=f"precip={precip} prob={prob} code={code}")
+
+    def test_what_if_endpoint_compares_candidate_thresholds(self):
+        admin = get_user_model().objects.create_superuser(
+            username="whatif", email="whatif@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+        base = timezone.localdate()
+        for offset, (precip, prob) in enumerate([("3.00", 80), ("1.50", 80), ("0.20", 90)]):
+            PronosticoClima.objects.create(
+                fecha=base + timedelta(days=offset),
+                latitud=Decimal("-27.37000"),
+                longitud=Decimal("-55.90000"),
+                precipitacion_mm=Decimal(precip),
+                probabilidad_precipitacion=prob,
+                codigo_clima=61,
+            )
+
+        with override_settings(WEATHER_ALERT_THRESHOLD_MM=2.0):
+            response = self.client.post(
+                reverse("weather-thresholds-what-if"),
+                {"threshold_mm": "1.00"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["pronosticos"], 3)
+        self.assertEqual(body["actual"]["reprogramarian"], 1)
+        self.assertEqual(body["candidato"]["reprogramarian"], 2)
+        self.assertEqual(body["nuevas_reprogramaciones"], 1)
+        self.assertEqual(body["candidato"]["triggers"]["light_rain"], 1)
+
+
+class TemperaturaActualCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = get_user_model().objects.create_superuser(
+            username="dashboard", email="dashboard@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+
+    def test_endpoint_only_reads_cache_and_keeps_last_known_value(self):
+        ok = MagicMock()
+        ok.json.return_value = {"current": {"temperature_2m": 18.5}}
+        with patch("apps.weather.services.requests.get", return_value=ok):
+            first = ServicioTemperaturaActual().refrescar()
+
+        with patch("apps.weather.services.requests.get", side_effect=requests.Timeout("boom")) as mock_get:
+            self.assertIsNone(ServicioTemperaturaActual().refrescar())
+            with patch("apps.weather.services._run_in_background") as background:
+                response = self.client.get(reverse("weather-current-temperature"))
+
+        self.assertEqual(mock_get.call_count, 1)
+        background.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["temperature"], 18.5)
+        self.assertEqual(response.json()["as_of"], first["as_of"])
+        self.assertFalse(response.json()["stale"])
+
+    def test_expired_value_schedules_a_single_background_refresh(self):
+        cache.set(
+            ServicioTemperaturaActual.CACHE_KEY,
+            {"temperature": 30.0, "unit": "°C", "as_of": (timezone.now() - timedelta(hours=1)).isoformat()},
+            timeout=None,
+        )
+
+        with patch("apps.weather.services._run_in_background") as background:
+            first = self.client.get(reverse("weather-current-temperature"))
+            self.client.get(reverse("weather-current-temperature"))
+
+        self.assertEqual(background.call_count, 1)
+        self.assertTrue(first.json()["stale"])
+
+    def test_cold_cache_fetches_once_with_short_timeout(self):
+        ok = MagicMock()
+        ok.json.return_value = {"current": {"temperature_2m": 22.0}}
+        with (
+            patch("apps.weather.services.requests.get", return_value=ok) as mock_get,
+            patch("apps.weather.services._run_in_background") as background,
+        ):
+            first = self.client.get(reverse("weather-current-temperature"))
+            second = self.client.get(reverse("weather-current-temperature"))
+
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(first.json()["temperature"], 22.0)
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], 3)
+        background.assert_not_called()
+
+    def test_cold_cache_and_upstream_down_returns_503(self):
+        with patch("apps.weather.services.requests.get", side_effect=requests.Timeout("boom")):
+            response = self.client.get(reverse("weather-current-temperature"))
+
+        self.assertEqual(response.status_code, 503)
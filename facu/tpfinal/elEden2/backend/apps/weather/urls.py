@@ -7,6 +7,7 @@ from .views import (
     ReservasElegiblesAPIView,
     ResumenPronosticoReservasAPIView,
     SimulacionClimaAPIView,
+    SimulacionUmbralesAPIView,
     TemperaturaActualAPIView,
 )
 
@@ -38,4 +39,9 @@ urlpatterns = [
         ResumenPronosticoReservasAPIView.as_view(),
         name="weather-forecast-summary",
     ),
+    path(
+        "weather/thresholds/what-if/",
+        SimulacionUmbralesAPIView.as_view(),
+        name="weather-thresholds-what-if",
+    ),
 ]
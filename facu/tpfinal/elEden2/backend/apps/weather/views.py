@@ -1,8 +1,7 @@
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-import requests
-from django.conf import settings
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework import status
@@ -12,13 +11,15 @@ from rest_framework.views import APIView
 
 from apps.servicios.models import Reserva
 
-from .models import AlertaClimatica
+from .models import AlertaClimatica, PronosticoClima
+from .rules import UmbralesClima, contar_triggers, evaluar_triggers, requiere_reprogramacion
 from .serializers import (
     AlertaClimaticaSerializer,
     ChequeoClimaSerializer,
     SimulacionClimaSerializer,
+    SimulacionUmbralesSerializer,
 )
-from .services import ServicioAlertasClimaticas
+from .services import ClimaNoDisponibleError, ServicioAlertasClimaticas, ServicioTemperaturaActual
 
 
 class ChequeoClimaAPIView(APIView):
@@ -29,22 +30,30 @@ class ChequeoClimaAPIView(APIView):
         data = serializer.validated_data
         service = ServicioAlertasClimaticas()
 
-        if data.get("reserva_id"):
-            reserva = Reserva.objects.select_related("servicio", "cliente__persona").get(id_reserva=data["reserva_id"])
-            result = service.evaluate_reserva(reserva, auto_create_alert=True)
-        else:
-            fecha = data["date"]
-            latitude = float(data["latitude"])
-            longitude = float(data["longitude"])
-            dummy_reserva = Reserva(
-                fecha_cita=datetime.combine(fecha, datetime.min.time(), tzinfo=timezone.utc),
-                servicio=None,
-            )
-            result = service.evaluate_reserva(
-                dummy_reserva,
-                latitude=latitude,
-                longitude=longitude,
-                auto_create_alert=False,
+        try:
+            if data.get("reserva_id"):
+                reserva = Reserva.objects.select_related("servicio", "cliente__persona").get(
+                    id_reserva=data["reserva_id"]
+                )
+                result = service.evaluate_reserva(reserva, auto_create_alert=True)
+            else:
+                fecha = data["date"]
+                latitude = float(data["latitude"])
+                longitude = float(data["longitude"])
+                dummy_reserva = Reserva(
+                    fecha_cita=datetime.combine(fecha, datetime.min.time(), tzinfo=timezone.utc),
+                    servicio=None,
+                )
+                result = service.evaluate_reserva(
+                    dummy_reserva,
+                    latitude=latitude,
+                    longitude=longitude,
+                    auto_create_alert=False,
+                )
+        except ClimaNoDisponibleError:
+            return Response(
+                {"error": "El servicio de clima no está disponible en este momento"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
         return Response(result, status=status.HTTP_200_OK)
@@ -208,71 +217,27 @@ class ReservasElegiblesAPIView(APIView):
 
 class TemperaturaActualAPIView(APIView):
     """
-    Obtiene la temperatura actual desde Open-Meteo.
+    Temperatura actual desde el cache compartido (ver ``ServicioTemperaturaActual``).
+    Si el dato venció agenda un refresco en segundo plano; sólo con el cache vacío
+    consulta Open-Meteo dentro del request, con un timeout corto.
     """
 
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        try:
-            # Coordenadas por defecto (Posadas, Misiones)
-            lat = getattr(settings, "WEATHER_DEFAULT_LAT", -27.3667)
-            lon = getattr(settings, "WEATHER_DEFAULT_LON", -55.9000)
-
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
-            temperature = data["current"]["temperature_2m"]
-
-            # Obtener ubicación usando Nominatim
-            location = None
-            try:
-                nominatim_url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=10&addressdetails=1"
-                nominatim_response = requests.get(
-                    nominatim_url,
-                    timeout=10,
-                    headers={"User-Agent": "ElEden-Weather/1.0"},
-                )
-                nominatim_response.raise_for_status()
-                nominatim_data = nominatim_response.json()
+        service = ServicioTemperaturaActual()
+        payload = service.obtener()
 
-                # Extraer ubicación legible
-                address = nominatim_data.get("address", {})
-                city = (
-                    address.get("city") or address.get("town") or address.get("village") or address.get("municipality")
-                )
-                country = address.get("country")
-                if city and country:
-                    location = f"{city}, {country}"
-                elif city:
-                    location = city
-                elif country:
-                    location = country
-                else:
-                    location = nominatim_data.get("display_name", "Ubicación desconocida")
-            except Exception:
-                # Si falla la geocodificación, continuar sin ubicación
-                location = None
-
-            response_data = {"temperature": temperature, "unit": "°C"}
-            if location:
-                response_data["location"] = location
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except requests.RequestException:
-            return Response(
-                {"error": "No se pudo obtener la temperatura"},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
-        except KeyError:
+        if not payload:
             return Response(
                 {"error": "Datos de temperatura no disponibles"},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
+        response_data = dict(payload)
+        response_data["stale"] = service.esta_vencido(payload)
+        return Response(response_data, status=status.HTTP_200_OK)
+
 
 class ResumenPronosticoReservasAPIView(APIView):
     permission_classes = [IsAdminUser]
@@ -297,5 +262,71 @@ class ResumenPronosticoReservasAPIView(APIView):
         )
 
         service = ServicioAlertasClimaticas()
-        summaries = service.build_locality_forecasts(reservas, days)
+        try:
+            summaries = service.build_locality_forecasts(reservas, days)
+        except ClimaNoDisponibleError:
+            return Response(
+                {"error": "El servicio de clima no está disponible en este momento"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
         return Response({"results": summaries, "count": len(summaries)}, status=status.HTTP_200_OK)
+
+
+class SimulacionUmbralesAPIView(APIView):
+    """
+    Re-evalúa los pronósticos guardados con umbrales candidatos ("what-if")
+    y los compara contra la configuración vigente.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = SimulacionUmbralesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        inicio = time.perf_counter()
+
+        actuales = UmbralesClima.desde_servicio(ServicioAlertasClimaticas())
+        candidatos = actuales.con_cambios(
+            drizzle_mm=data.get("drizzle_threshold_mm"),
+            alert_mm=data.get("threshold_mm"),
+            low_probability=data.get("low_probability_threshold"),
+            reassign_probability=data.get("reassign_probability_threshold"),
+            kill_switch_codes=data.get("kill_switch_codes"),
+        )
+
+        pronosticos = PronosticoClima.objects.filter(fuente=data["source"])
+        if data.get("date_from"):
+            pronosticos = pronosticos.filter(fecha__gte=data["date_from"])
+        if data.get("date_to"):
+            pronosticos = pronosticos.filter(fecha__lte=data["date_to"])
+        filas = list(pronosticos.values_list("precipitacion_mm", "probabilidad_precipitacion", "codigo_clima"))
+
+        precipitaciones = [fila[0] for fila in filas]
+        probabilidades = [fila[1] for fila in filas]
+        codigos = [fila[2] for fila in filas]
+
+        triggers_actuales = evaluar_triggers(precipitaciones, probabilidades, codigos, actuales)
+        triggers_candidatos = evaluar_triggers(precipitaciones, probabilidades, codigos, candidatos)
+        reprogramar_actual = requiere_reprogramacion(triggers_actuales)
+        reprogramar_candidato = requiere_reprogramacion(triggers_candidatos)
+
+        return Response(
+            {
+                "pronosticos": len(filas),
+                "umbrales_actuales": actuales.as_dict(),
+                "umbrales_candidatos": candidatos.as_dict(),
+                "actual": {
+                    "triggers": contar_triggers(triggers_actuales),
+                    "reprogramarian": int(reprogramar_actual.sum()),
+                },
+                "candidato": {
+                    "triggers": contar_triggers(triggers_candidatos),
+                    "reprogramarian": int(reprogramar_candidato.sum()),
+                },
+                "nuevas_reprogramaciones": int((reprogramar_candidato & ~reprogramar_actual).sum()),
+                "reprogramaciones_evitadas": int((reprogramar_actual & ~reprogramar_candidato).sum()),
+                "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+            },
+            status=status.HTTP_200_OK,
+        )
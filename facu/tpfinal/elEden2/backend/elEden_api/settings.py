@@ -73,6 +73,7 @@ LOCAL_APPS = [
     "apps.mercadopago",  # Nueva app para gestión de pagos
     "apps.weather",
     "apps.audit",
+    "apps.idempotencia",
 ]
 
 # --------------------------------------------------
@@ -162,6 +163,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",  # Required by django-allauth
+    # Antes de la auditoría: un reintento con Idempotency-Key no se registra dos veces
+    "apps.idempotencia.middleware.IdempotencyKeyMiddleware",
     "apps.audit.middleware.AuditLogMiddleware",
 ]
 
@@ -233,6 +236,15 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {"anon": "100/hour", "user": "1000/hour"},
 }
 
+# Respuestas guardadas por Idempotency-Key (apps.idempotencia): un reintento con la misma
+# clave dentro de este plazo recibe la respuesta original sin volver a ejecutar la vista
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Mientras la primera petición está en curso los duplicados reciben 409; pasado este plazo
+# sin respuesta (proceso caído) la clave se puede volver a usar
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+# Cada cuánto el servicio idempotencia-purga borra las claves vencidas
+IDEMPOTENCY_PURGE_INTERVAL_MINUTES = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_MINUTES", "60"))
+
 # JWT Configuration
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
@@ -339,12 +351,25 @@ if not DEBUG:
     SECURE_HSTS_PRELOAD = True
 
 # Cache Configuration
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+# Con REDIS_URL el cache es compartido por el backend y los workers (cupo de Nominatim,
+# pronósticos precalentados, contadores de notificaciones). Sin REDIS_URL cada proceso
+# tiene su propio cache en memoria: sirve sólo para desarrollo con un único proceso.
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "eleden",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "unique-snowflake",
+        }
     }
-}
 
 # Email Configuration
 # Para desarrollo local, usa Mailpit en Docker (mailpit:1025)
@@ -369,6 +394,33 @@ else:
 
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@eleden.com")
 
+# Bandeja de salida: los emails se encolan y los envía `manage.py procesar_correos`
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+# Reintentos con backoff exponencial: base * 2^(intento-1), con tope
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# Un email tomado por un worker que murió vuelve a la cola después de este plazo
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+# Con --loop se envía cuando hay un lote completo o el email más viejo esperó este tiempo
+EMAIL_OUTBOX_FLUSH_INTERVAL_SECONDS = float(os.getenv("EMAIL_OUTBOX_FLUSH_INTERVAL_SECONDS", "5"))
+
+# Avisos administrativos: "immediate" (un email por evento) o "digest" (resumen periódico)
+# para los administradores sin preferencia guardada
+EMAIL_ADMIN_DEFAULT_DELIVERY = os.getenv("EMAIL_ADMIN_DEFAULT_DELIVERY", "immediate")
+EMAIL_DIGEST_INTERVAL_MINUTES = float(os.getenv("EMAIL_DIGEST_INTERVAL_MINUTES", "60"))
+EMAIL_DIGEST_MAX_EVENTS = int(os.getenv("EMAIL_DIGEST_MAX_EVENTS", "500"))
+
+# Notificaciones en tiempo real (SSE en /api/v1/emails/notificaciones/stream/)
+NOTIFICATIONS_UNREAD_CACHE_SECONDS = int(os.getenv("NOTIFICATIONS_UNREAD_CACHE_SECONDS", "300"))
+# Cada stream busca en la base lo creado por otros procesos con esta frecuencia
+NOTIFICATIONS_SSE_DB_FALLBACK = os.getenv("NOTIFICATIONS_SSE_DB_FALLBACK", "True").lower() == "true"
+NOTIFICATIONS_SSE_POLL_SECONDS = float(os.getenv("NOTIFICATIONS_SSE_POLL_SECONDS", "15"))
+# El stream se cierra y el navegador reconecta, para no retener un worker indefinidamente
+NOTIFICATIONS_SSE_MAX_SECONDS = float(os.getenv("NOTIFICATIONS_SSE_MAX_SECONDS", "300"))
+# Vigencia del ticket de un solo uso con el que el navegador abre el stream
+NOTIFICATIONS_SSE_TICKET_SECONDS = int(os.getenv("NOTIFICATIONS_SSE_TICKET_SECONDS", "30"))
+
 # Frontend URL for email links
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
@@ -377,6 +429,32 @@ WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/fo
 WEATHER_DEFAULT_LAT = float(os.getenv("WEATHER_DEFAULT_LAT", "-27.3667"))
 WEATHER_DEFAULT_LON = float(os.getenv("WEATHER_DEFAULT_LON", "-55.9000"))
 WEATHER_ALERT_THRESHOLD_MM = float(os.getenv("WEATHER_ALERT_THRESHOLD_MM", "1.0"))
+WEATHER_API_TIMEOUT = float(os.getenv("WEATHER_API_TIMEOUT", "10"))
+# Pronósticos frescos durante WEATHER_CACHE_TTL; luego se sirven "stale" mientras se revalidan
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "3600"))
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "21600"))
+# precalentar_pronosticos recarga las entradas a las que les quedan menos de N segundos de frescura
+WEATHER_PREWARM_LEAD_SECONDS = int(os.getenv("WEATHER_PREWARM_LEAD_SECONDS", "600"))
+# Temperatura actual del dashboard: se refresca en segundo plano cada N segundos
+WEATHER_CURRENT_REFRESH_SECONDS = int(os.getenv("WEATHER_CURRENT_REFRESH_SECONDS", "300"))
+# Con el cache vacío la temperatura se consulta dentro del request con este timeout
+WEATHER_CURRENT_SYNC_TIMEOUT = float(os.getenv("WEATHER_CURRENT_SYNC_TIMEOUT", "3"))
+# Circuit breaker: tras N fallos consecutivos se deja de llamar a la API durante el enfriamiento
+WEATHER_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("WEATHER_CIRCUIT_FAILURE_THRESHOLD", "3"))
+WEATHER_CIRCUIT_COOLDOWN_SECONDS = int(os.getenv("WEATHER_CIRCUIT_COOLDOWN_SECONDS", "60"))
+# Ubicaciones por request en consultas masivas y decimales de la grilla de coordenadas
+WEATHER_BULK_BATCH_SIZE = int(os.getenv("WEATHER_BULK_BATCH_SIZE", "50"))
+WEATHER_LOCATION_SNAP_DECIMALS = int(os.getenv("WEATHER_LOCATION_SNAP_DECIMALS", "2"))
+
+# Geocoding: nomenclátor offline primero, Nominatim como respaldo (máx. 1 consulta por intervalo)
+GEOCODER_API_URL = os.getenv("GEOCODER_API_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_MIN_INTERVAL_SECONDS = int(os.getenv("GEOCODER_MIN_INTERVAL_SECONDS", "1"))
+LOCALIDAD_NEAREST_MAX_KM = float(os.getenv("LOCALIDAD_NEAREST_MAX_KM", "50"))
+# Sugerencias de direcciones: cache de consultas y espera máxima por cupo de Nominatim al confirmar
+ADDRESS_SUGGESTION_CACHE_TTL = int(os.getenv("ADDRESS_SUGGESTION_CACHE_TTL", "3600"))
+# Las respuestas de Nominatim guardadas en la base se vuelven a consultar pasados N días
+ADDRESS_SUGGESTION_DB_TTL_DAYS = int(os.getenv("ADDRESS_SUGGESTION_DB_TTL_DAYS", "30"))
+ADDRESS_GEOCODE_MAX_WAIT_SECONDS = float(os.getenv("ADDRESS_GEOCODE_MAX_WAIT_SECONDS", "2"))
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
@@ -409,6 +487,7 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # =============================================
@@ -477,3 +556,30 @@ COMPANY_CUIT = os.getenv("COMPANY_CUIT", "00-00000000-0")
 MERCADOPAGO_ACCESS_TOKEN = os.getenv("MERCADOPAGO_ACCESS_TOKEN", "")
 MERCADOPAGO_PUBLIC_KEY = os.getenv("MERCADOPAGO_PUBLIC_KEY", "")
 MERCADOPAGO_WEBHOOK_SECRET = os.getenv("MERCADOPAGO_WEBHOOK_SECRET", "")  # Para validar webhooks
+# URL pública del webhook que se manda en cada preferencia (vacío: la configurada en el panel de MercadoPago)
+MERCADOPAGO_NOTIFICATION_URL = os.getenv("MERCADOPAGO_NOTIFICATION_URL", "")
+# Otra URL para la API (p. ej. http://localhost:8090 con `manage.py simular_mercadopago`); vacío: la real
+MERCADOPAGO_API_BASE_URL = os.getenv("MERCADOPAGO_API_BASE_URL", "")
+# Conexiones HTTP que el cliente compartido del SDK mantiene abiertas por proceso
+MERCADOPAGO_POOL_MAXSIZE = int(os.getenv("MERCADOPAGO_POOL_MAXSIZE", "10"))
+# Preferencias de checkout: se reutilizan por (reserva, tipo, monto) hasta que vencen
+MERCADOPAGO_PREFERENCIA_TTL_MINUTOS = int(os.getenv("MERCADOPAGO_PREFERENCIA_TTL_MINUTOS", "1440"))
+# No se reutiliza una preferencia a la que le quede menos que esto
+MERCADOPAGO_PREFERENCIA_MARGEN_MINUTOS = int(os.getenv("MERCADOPAGO_PREFERENCIA_MARGEN_MINUTOS", "10"))
+
+# Verificaciones de pagos que MercadoPago todavía no informó: las resuelve `manage.py verificar_pagos`
+MERCADOPAGO_VERIFICACION_BATCH_SIZE = int(os.getenv("MERCADOPAGO_VERIFICACION_BATCH_SIZE", "50"))
+MERCADOPAGO_VERIFICACION_MAX_ATTEMPTS = int(os.getenv("MERCADOPAGO_VERIFICACION_MAX_ATTEMPTS", "12"))
+# Reintentos con backoff exponencial: base * 2^(intento-1), con tope
+MERCADOPAGO_VERIFICACION_BACKOFF_SECONDS = int(os.getenv("MERCADOPAGO_VERIFICACION_BACKOFF_SECONDS", "5"))
+MERCADOPAGO_VERIFICACION_BACKOFF_MAX_SECONDS = int(os.getenv("MERCADOPAGO_VERIFICACION_BACKOFF_MAX_SECONDS", "300"))
+MERCADOPAGO_VERIFICACION_LEASE_SECONDS = int(os.getenv("MERCADOPAGO_VERIFICACION_LEASE_SECONDS", "120"))
+# Búsqueda por lote: pagos actualizados desde la verificación más vieja menos este margen
+MERCADOPAGO_VERIFICACION_WINDOW_MINUTES = int(os.getenv("MERCADOPAGO_VERIFICACION_WINDOW_MINUTES", "60"))
+MERCADOPAGO_VERIFICACION_PAGE_SIZE = int(os.getenv("MERCADOPAGO_VERIFICACION_PAGE_SIZE", "100"))
+MERCADOPAGO_VERIFICACION_MAX_PAGES = int(os.getenv("MERCADOPAGO_VERIFICACION_MAX_PAGES", "5"))
+
+# `manage.py reconciliar_pagos`: búsquedas por external_reference, en paralelo y con tope de llamadas por segundo
+MERCADOPAGO_RECONCILIACION_BATCH_SIZE = int(os.getenv("MERCADOPAGO_RECONCILIACION_BATCH_SIZE", "100"))
+MERCADOPAGO_RECONCILIACION_CONCURRENCIA = int(os.getenv("MERCADOPAGO_RECONCILIACION_CONCURRENCIA", "4"))
+MERCADOPAGO_RECONCILIACION_POR_SEGUNDO = float(os.getenv("MERCADOPAGO_RECONCILIACION_POR_SEGUNDO", "10"))
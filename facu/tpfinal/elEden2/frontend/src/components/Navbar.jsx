@@ -17,6 +17,7 @@ const Navbar = () => {
   const [notificationsLoading, setNotificationsLoading] = useState(false);
   const [notificationsError, setNotificationsError] = useState('');
   const [selectedNotification, setSelectedNotification] = useState(null);
+  const [serverUnreadCount, setServerUnreadCount] = useState(null);
 
   const profileMenuRef = useRef(null);
   const mobileMenuRef = useRef(null);
@@ -70,7 +71,7 @@ const Navbar = () => {
     }
   };
 
-  const unreadCount = notifications.filter((n) => !n.read_at && !n.is_read).length;
+  const unreadCount = serverUnreadCount ?? notifications.filter((n) => !n.read_at && !n.is_read).length;
 
   const handleOpenNotification = async (notification) => {
     if (!notification) return;
@@ -110,6 +111,23 @@ const Navbar = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [user]);
 
+  useEffect(() => {
+    if (!user) {
+      setServerUnreadCount(null);
+      return undefined;
+    }
+    return notificacionesService.suscribir((evento) => {
+      if (evento.tipo === 'notificacion' && evento.notificacion) {
+        setNotifications((prev) =>
+          prev.some((item) => item.id === evento.id) ? prev : [evento.notificacion, ...prev]
+        );
+      }
+      if (typeof evento.no_leidas === 'number') {
+        setServerUnreadCount(evento.no_leidas);
+      }
+    });
+  }, [user]);
+
 const getNavLinks = () => {
     // 1. Lógica para Invitado (usuario no logueado)
     if (!user) {
@@ -53,6 +53,8 @@ const isLocationWithinOperationalArea = (province, country) => {
 const SolicitarServicioPage = () => {
   const { user } = useAuth();
   const fpRef = useRef(null);
+  // Idempotency-Key del envío actual: un doble envío o reintento no crea dos reservas
+  const idempotencyKeyRef = useRef(crypto.randomUUID());
   const fpInstanceRef = useRef(null);
   const fpTimeRef = useRef(null);
   const fpTimeInstanceRef = useRef(null);
@@ -633,7 +635,7 @@ Notas adicionales: ${formData.notas_adicionales || 'Ninguna'}`;
       success('Creando reserva...');
 
       // PASO 1: Crear la reserva
-      const reservaResponse = await serviciosService.solicitarServicio(formDataToSend);
+      const reservaResponse = await serviciosService.solicitarServicio(formDataToSend, idempotencyKeyRef.current);
       const reservaId = reservaResponse.reserva?.id_reserva || reservaResponse.id_reserva;
 
       if (!reservaId) {
@@ -655,6 +657,10 @@ Notas adicionales: ${formData.notas_adicionales || 'Ninguna'}`;
 
     } catch (err) {
       console.error('❌ Error al crear reserva:', err);
+      // Si el backend respondió, el próximo envío es otra solicitud; sin respuesta se reintenta con la misma clave
+      if (err.response) {
+        idempotencyKeyRef.current = crypto.randomUUID();
+      }
       handleApiError(err, 'No se pudo crear la reserva');
       setSubmitting(false);
     }
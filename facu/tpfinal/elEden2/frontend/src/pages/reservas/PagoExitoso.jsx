@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useSearchParams, useNavigate } from 'react-router-dom';
 import { CheckCircle, Printer, FileText, Calendar, DollarSign, CreditCard, User, Mail, Phone, AlertCircle, Loader, Info, Ruler, Palette, Hammer, ArrowLeft } from 'lucide-react';
 import api from '../../services/api';
-import { serviciosService } from '../../services';
+import { conIdempotencia, esperarVerificacionPago, serviciosService } from '../../services';
 import { error as showError, success as showSuccess } from '../../utils/notifications';
 import { useAuth } from '../../context/AuthContext';
 
@@ -133,12 +133,16 @@ const PagoExitoso = () => {
         if (finalPaymentId && (status === 'approved' || collectionStatus === 'approved')) {
           try {
             console.log(`🔄 Confirmando pago de ${tipoPago} para reserva ${reservaId}`);
+            let resultado = null;
             if (tipoPago === 'sena') {
-              await serviciosService.confirmarPagoSena(reservaId, { payment_id: finalPaymentId });
-              showSuccess('¡Pago de seña confirmado exitosamente!');
+              resultado = await serviciosService.confirmarPagoSena(reservaId, { payment_id: finalPaymentId });
             } else if (tipoPago === 'final') {
-              await serviciosService.confirmarPagoFinal(reservaId, { payment_id: finalPaymentId });
-              showSuccess('¡Pago final confirmado exitosamente!');
+              resultado = await serviciosService.confirmarPagoFinal(reservaId, { payment_id: finalPaymentId });
+            }
+            if (resultado?.estado === 'procesando') {
+              showSuccess('Recibimos tu pago. Te avisaremos apenas MercadoPago lo acredite.');
+            } else if (resultado) {
+              showSuccess(tipoPago === 'sena' ? '¡Pago de seña confirmado exitosamente!' : '¡Pago final confirmado exitosamente!');
             }
             console.log('✅ Pago confirmado exitosamente');
           } catch (err) {
@@ -153,13 +157,22 @@ const PagoExitoso = () => {
           // Si no tenemos payment_id pero tenemos preference_id, intentar obtener el pago desde el backend
           console.log('⚠️ No hay payment_id, intentando buscar por preferencia:', preferenceId);
           try {
-            const response = await api.post(`/mercadopago/reservas/${reservaId}/buscar-pago-por-preferencia/`, {
-              preference_id: preferenceId,
-              tipo_pago: tipoPago
-            });
-
-            if (response.data.payment_id) {
-              console.log('✅ Pago encontrado:', response.data.payment_id);
+            const response = await api.post(
+              `/mercadopago/reservas/${reservaId}/buscar-pago-por-preferencia/`,
+              { preference_id: preferenceId, tipo_pago: tipoPago },
+              conIdempotencia(`buscar-pago-${reservaId}-${tipoPago}-${preferenceId || externalReference}`)
+            );
+
+            let paymentIdEncontrado = response.data.payment_id;
+            if (response.status === 202 && response.data.verificacion_id) {
+              const verificacion = await esperarVerificacionPago(response.data.verificacion_id);
+              paymentIdEncontrado = verificacion.estado === 'aprobado' ? verificacion.payment_id : null;
+              if (!paymentIdEncontrado && ['pendiente', 'verificando'].includes(verificacion.estado)) {
+                showSuccess('Recibimos tu pago. Te avisaremos apenas MercadoPago lo acredite.');
+              }
+            }
+            if (paymentIdEncontrado) {
+              console.log('✅ Pago encontrado:', paymentIdEncontrado);
               showSuccess('¡Pago confirmado exitosamente!');
             }
           } catch (err) {
@@ -1,4 +1,38 @@
-import api from './api';
+import api, { API_BASE_URL } from './api';
+
+// MercadoPago responde 202 mientras el pago no fue informado, con una verificación encolada
+// en el backend: se sigue su estado y, cuando se resuelve, se confirma una vez más
+const VERIFICACION_ACTIVA = ['pendiente', 'verificando'];
+
+export const esperarVerificacionPago = async (verificacionId, { intentos = 15, esperaMs = 2000 } = {}) => {
+  for (let intento = 1; ; intento++) {
+    const { data } = await api.get(`/mercadopago/verificaciones/${verificacionId}/`);
+    if (!VERIFICACION_ACTIVA.includes(data.estado) || intento >= intentos) {
+      return data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, esperaMs));
+  }
+};
+
+// Con la misma Idempotency-Key el backend devuelve la respuesta guardada en vez de repetir
+// la operación (reintentos, doble clic, efectos que corren dos veces)
+export const conIdempotencia = (clave, config = {}) => ({
+  ...config,
+  headers: { ...(config.headers || {}), 'Idempotency-Key': clave },
+});
+
+const confirmarPagoMercadoPago = async (url, paymentData, opciones) => {
+  const config = conIdempotencia(`${url}:${paymentData.payment_id}`);
+  const response = await api.post(url, paymentData, config);
+  if (response.status !== 202 || !response.data?.verificacion_id) {
+    return response.data;
+  }
+  const verificacion = await esperarVerificacionPago(response.data.verificacion_id, opciones);
+  if (VERIFICACION_ACTIVA.includes(verificacion.estado)) {
+    return response.data;
+  }
+  return (await api.post(url, paymentData, config)).data;
+};
 
 // Auth Services
 export const authService = {
@@ -133,12 +167,18 @@ export const serviciosService = {
   },
 
   // Solicitar servicio (crear reserva con FormData para imágenes)
-  solicitarServicio: async (formData) => {
-    const response = await api.post('/servicios/reservas/', formData, {
+  // idempotencyKey: la misma para los reintentos de un mismo envío del formulario
+  solicitarServicio: async (formData, idempotencyKey) => {
+    const config = {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
-    });
+    };
+    const response = await api.post(
+      '/servicios/reservas/',
+      formData,
+      idempotencyKey ? conIdempotencia(idempotencyKey, config) : config
+    );
     return response.data;
   },
 
@@ -253,15 +293,11 @@ export const serviciosService = {
   },
   
   // MercadoPago - Confirmar pagos
-  confirmarPagoSena: async (reservaId, paymentData) => {
-    const response = await api.post(`/mercadopago/reservas/${reservaId}/confirmar-pago-sena/`, paymentData);
-    return response.data;
-  },
+  confirmarPagoSena: async (reservaId, paymentData) =>
+    confirmarPagoMercadoPago(`/mercadopago/reservas/${reservaId}/confirmar-pago-sena/`, paymentData),
   
-  confirmarPagoFinal: async (reservaId, paymentData) => {
-    const response = await api.post(`/mercadopago/reservas/${reservaId}/confirmar-pago-final/`, paymentData);
-    return response.data;
-  },
+  confirmarPagoFinal: async (reservaId, paymentData) =>
+    confirmarPagoMercadoPago(`/mercadopago/reservas/${reservaId}/confirmar-pago-final/`, paymentData),
 
   updateServicio: async (id, data) => {
     const response = await api.put(`/servicios/servicios/${id}/`, data);
@@ -429,6 +465,59 @@ export const notificacionesService = {
     const response = await api.post('/emails/notificaciones/marcar-todas-leidas/');
     return response.data;
   },
+
+  // Server-sent events: notificaciones nuevas y contador de no leídas.
+  // EventSource no envía headers: cada conexión pide un ticket de un solo uso (el JWT no
+  // viaja en la URL). Devuelve la función para cerrar.
+  suscribir: (onEvent) => {
+    if (typeof EventSource === 'undefined') return () => {};
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+    let ultimoId = null;
+
+    const reconnect = () => {
+      if (!closed) retryTimer = setTimeout(connect, 5000);
+    };
+
+    const connect = async () => {
+      if (closed || !localStorage.getItem('accessToken')) return;
+      let ticket;
+      try {
+        const response = await api.post('/emails/notificaciones/stream-ticket/');
+        ticket = response.data.ticket;
+      } catch (err) {
+        reconnect();
+        return;
+      }
+      if (closed) return;
+      const params = new URLSearchParams({ ticket });
+      if (ultimoId) params.set('ultimo_id', ultimoId);
+      source = new EventSource(`${API_BASE_URL}/emails/notificaciones/stream/?${params}`);
+      ['notificacion', 'no_leidas'].forEach((tipo) => {
+        source.addEventListener(tipo, (event) => {
+          if (event.lastEventId) ultimoId = event.lastEventId;
+          try {
+            onEvent(JSON.parse(event.data));
+          } catch (err) {
+            // ignore
+          }
+        });
+      });
+      source.onerror = () => {
+        // El ticket ya se usó: la reconexión automática de EventSource no serviría
+        source.close();
+        reconnect();
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  },
 };
 
 // ⚠️ ADVERTENCIA: Los siguientes endpoints NO EXISTEN en el backend actual